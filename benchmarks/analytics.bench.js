@@ -0,0 +1,76 @@
+// Times the analytics page's movement window from day rollups against rescanning and
+// re-sorting the full history, as StatsPage used to on every render.
+// Run with `npm run bench -- analytics`.
+import { createMovementRollup, rankMovers, summariseMovementWindow } from '../src/utils/analytics.js'
+
+const SIZES = [10_000, 100_000, 500_000]
+const ITEMS = 5_000
+const HISTORY_DAYS = 730
+const WINDOWS = [7, 30, 365]
+const REPEATS = 9
+const DAY_MS = 24 * 60 * 60 * 1000
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+const inventory = Array.from({ length: ITEMS }, (_, index) => ({
+  id: `item-${index}`,
+  sku: `SKU-${String(index).padStart(6, '0')}`,
+  name: `Item ${index}`,
+  category: `Category ${index % 12}`,
+}))
+const indexById = new Map(inventory.map((item, index) => [item.id, index]))
+
+const buildHistory = (size, now) =>
+  Array.from({ length: size }, (_, index) => {
+    const item = inventory[(index * 7919) % ITEMS]
+    const sold = index % 6
+    return {
+      itemId: item.id,
+      sku: item.sku,
+      name: item.name,
+      sold,
+      received: index % 4,
+      soldValue: sold * 3.5,
+      receivedValue: (index % 4) * 3.5,
+      timestamp: new Date(now - (index / size) * HISTORY_DAYS * DAY_MS).toISOString(),
+    }
+  })
+
+const rescan = (history, windowDays, now) => {
+  const threshold = now - windowDays * DAY_MS
+  const recent = history.filter((entry) => new Date(entry.timestamp).getTime() >= threshold)
+  const totals = new Map(inventory.map((item) => [item.id, { id: item.id, sold: 0 }]))
+  recent.forEach((entry) => {
+    totals.get(entry.itemId).sold += entry.sold
+  })
+  const movers = Array.from(totals.values())
+  return {
+    top: movers.filter((item) => item.sold > 0).sort((a, b) => b.sold - a.sold).slice(0, 4),
+    least: [...movers].sort((a, b) => a.sold - b.sold).slice(0, 4),
+  }
+}
+
+const now = Date.now()
+SIZES.forEach((size) => {
+  const history = buildHistory(size, now)
+  const start = performance.now()
+  const rollup = createMovementRollup(history)
+  console.log(`${size.toLocaleString('en-AU')} movements (rollup built in ${(performance.now() - start).toFixed(1)} ms)`)
+  WINDOWS.forEach((days) => {
+    const rolled = median(() => {
+      const window = summariseMovementWindow(rollup, days, now)
+      rankMovers(window.items, inventory, indexById)
+    })
+    const scanned = median(() => rescan(history, days, now))
+    console.log(`  ${String(days).padStart(3)} days  rollup ${rolled.toFixed(2)} ms  rescan ${scanned.toFixed(2)} ms`)
+  })
+})
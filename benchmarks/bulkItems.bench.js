@@ -0,0 +1,72 @@
+// Onboarding new items into a 100k-item store: the old one-at-a-time path (rescan every
+// item for the next SKU number and for a clashing SKU, then prependStoreItem) against
+// prepareBulkItems + one prependStoreItems commit. The old path is timed on fewer rows
+// since each addition is O(store size); both are reported per item.
+// Run with `npm run bench -- bulkItems`.
+import { prepareBulkItems } from '../src/utils/bulkItems.js'
+import { createInitialCostLayers } from '../src/utils/costing.js'
+import { createInventoryStore, prependStoreItem, prependStoreItems } from '../src/utils/inventoryStore.js'
+import { computeNextSkuNumber, formatAutoSku, skuKey } from '../src/utils/skus.js'
+import { createSyntheticInventory } from './synthetic.js'
+
+const ITEMS = 100_000
+const BULK_ROWS = 20_000
+const LEGACY_ROWS = 100
+const REPEATS = 3
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+const rowsFor = (count) =>
+  Array.from({ length: count }, (_, index) => ({
+    sku: index % 4 === 0 ? `NEW-${index}` : '',
+    name: `New item ${index}`,
+    category: 'Onboarded',
+    currentCount: String(index % 30),
+    unitCost: '4.50',
+  }))
+
+const store = createInventoryStore(createSyntheticInventory({ skus: ITEMS }))
+const timestamp = new Date().toISOString()
+
+const legacy = median(() => {
+  let current = store
+  rowsFor(LEGACY_ROWS).forEach((row) => {
+    const sku = row.sku || formatAutoSku(computeNextSkuNumber(current.items))
+    if (current.items.some((item) => skuKey(item.sku) === skuKey(sku))) return
+    const currentCount = Number(row.currentCount)
+    current = prependStoreItem(current, {
+      id: sku,
+      sku,
+      name: row.name,
+      category: row.category,
+      unitCost: 4.5,
+      currentCount,
+      lastCount: currentCount,
+      draftSold: '',
+      draftReceived: '',
+      lastUpdated: timestamp,
+      costLayers: createInitialCostLayers(currentCount, 4.5, timestamp),
+      itemNote: '',
+    })
+  })
+})
+
+const bulkRows = rowsFor(BULK_ROWS)
+const bulk = median(() => {
+  const prepared = prepareBulkItems(store, bulkRows, { nextSkuNumber: ITEMS + 1, timestamp })
+  prependStoreItems(store, prepared.items)
+})
+
+const perItem = (ms, rows) => `${((ms / rows) * 1000).toFixed(1).padStart(8)} µs/item`
+console.log(`${ITEMS.toLocaleString('en-AU')} items in the store`)
+console.log(`  one at a time (${LEGACY_ROWS.toLocaleString('en-AU')} rows)    ${legacy.toFixed(0).padStart(6)} ms  ${perItem(legacy, LEGACY_ROWS)}`)
+console.log(`  bulk (${BULK_ROWS.toLocaleString('en-AU')} rows)          ${bulk.toFixed(0).padStart(6)} ms  ${perItem(bulk, BULK_ROWS)}`)
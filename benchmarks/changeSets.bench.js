@@ -0,0 +1,68 @@
+// Five operators each drafting 20k lines against a 100k-item store: time building and
+// posting each change set (as JSON, as the session channel and files carry it), merging
+// the five, and committing the merged drafts in one commitStoreDrafts pass.
+// Run with `npm run bench -- changeSets`.
+import { changeSetFromStore, mergeChangeSets } from '../src/utils/changeSets.js'
+import { commitStoreDrafts, createInventoryStore, replaceStoreDrafts } from '../src/utils/inventoryStore.js'
+import { createRandom, createSyntheticInventory } from './synthetic.js'
+
+const ITEMS = 100_000
+const OPERATORS = ['Alex', 'Sam', 'Jordan', 'Riley', 'Casey']
+const LINES_PER_OPERATOR = 20_000
+const REPEATS = 9
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+const inventory = createSyntheticInventory({ skus: ITEMS })
+const store = createInventoryStore(inventory)
+const random = createRandom(11)
+
+// Each operator's drafts as their own tab's store holds them.
+const operatorStores = OPERATORS.map(() => {
+  const drafts = new Map()
+  while (drafts.size < LINES_PER_OPERATOR) {
+    const item = inventory[Math.floor(random() * ITEMS)]
+    drafts.set(item.id, { sold: 1 + Math.floor(random() * 6), received: random() < 0.2 ? 12 : 0 })
+  }
+  return replaceStoreDrafts(store, drafts)
+})
+
+let payloads = []
+const build = median(() => {
+  payloads = operatorStores.map((operatorStore, index) =>
+    JSON.stringify(changeSetFromStore(operatorStore, { sessionId: `s${index}`, operator: OPERATORS[index] })),
+  )
+})
+let changeSets = []
+const parse = median(() => {
+  changeSets = payloads.map((payload) => JSON.parse(payload))
+})
+let merged = null
+const merge = median(() => {
+  merged = mergeChangeSets(changeSets, store)
+})
+const commit = median(() => {
+  commitStoreDrafts(replaceStoreDrafts(store, merged.drafts), '2026-01-01T00:00:00.000Z', {
+    performedBy: 'Benchmark',
+    notes: '',
+  })
+})
+
+const lines = OPERATORS.length * LINES_PER_OPERATOR
+const kilobytes = payloads.reduce((total, payload) => total + payload.length, 0) / 1024
+console.log(
+  `${OPERATORS.length} operators x ${LINES_PER_OPERATOR.toLocaleString('en-AU')} lines on ${ITEMS.toLocaleString('en-AU')} items (${merged.drafts.size.toLocaleString('en-AU')} items drafted)`,
+)
+console.log(`  build + stringify ${build.toFixed(1)} ms  (${Math.round(kilobytes).toLocaleString('en-AU')} KB)`)
+console.log(`  parse             ${parse.toFixed(1)} ms`)
+console.log(`  merge             ${merge.toFixed(1)} ms  (${Math.round(lines / merge / 1000).toLocaleString('en-AU')}M lines/s)`)
+console.log(`  apply + commit    ${commit.toFixed(1)} ms`)
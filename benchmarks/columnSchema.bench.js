@@ -0,0 +1,93 @@
+// Column roles for the generic workspace: time inferring the schema of a 200k-row import
+// (headers plus a fixed-size value sample, so it does not grow with the sheet), and compare
+// looking roles up from it with the per-consumer header regex scans it replaced.
+// Run with `npm run bench -- columnSchema`.
+import { createColumnarTable } from '../src/utils/columnarTable.js'
+import { attachColumnSchema, columnSchemaFor, inferColumnSchema } from '../src/utils/columnSchema.js'
+
+const ROWS = 200_000
+const LOOKUPS = 100_000
+const REPEATS = 9
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+const columns = [
+  'Week',
+  'SKU',
+  'Item Name',
+  'Category',
+  'Opening Stock',
+  'Units Received',
+  'Units Sold',
+  'Closing Stock',
+  'Supplier',
+  'Notes',
+]
+const readCell = (rowIndex, column) => {
+  switch (column) {
+    case 'Week':
+      return `Week ${(rowIndex % 52) + 1}`
+    case 'SKU':
+      return `SKU-${100000 + rowIndex}`
+    case 'Item Name':
+      return `Item ${rowIndex}`
+    case 'Category':
+      return `Category ${rowIndex % 24}`
+    case 'Supplier':
+      return `Supplier ${rowIndex % 90}`
+    case 'Notes':
+      return ''
+    default:
+      return rowIndex % 97
+  }
+}
+
+// The header patterns each consumer used to run, once per lookup.
+const PATTERNS = [
+  /week/i,
+  /(item|product|name|description)/i,
+  /(sku|item|product|code|id)/i,
+  /(opening|start|begin)/i,
+  /(received|added|incoming|brought|restock|purchased|bought)/i,
+  /(used|sold|outgoing|shipped|consumed|spent)/i,
+  /(closing|ending|final|remain|available|on\s?hand)/i,
+  /(qty|quantity|count|stock|units|closing)/i,
+]
+
+let schema = null
+const infer = median(() => {
+  schema = inferColumnSchema(columns, ROWS, readCell)
+})
+const table = attachColumnSchema(createColumnarTable(columns, ROWS, readCell), schema)
+
+let found = 0
+const scanned = median(() => {
+  for (let lookup = 0; lookup < LOOKUPS; lookup += 1) {
+    PATTERNS.forEach((pattern) => {
+      if (columns.find((column) => pattern.test(column))) found += 1
+    })
+  }
+})
+const cached = median(() => {
+  for (let lookup = 0; lookup < LOOKUPS; lookup += 1) {
+    const { roles, quantity } = columnSchemaFor(table)
+    if (roles.week && roles.item && roles.sku && roles.opening) found += 4
+    if (roles.received && roles.used && roles.closing && quantity) found += 4
+  }
+})
+
+console.log(`${ROWS.toLocaleString('en-AU')} rows x ${columns.length} columns`)
+console.log(`  infer schema   ${infer.toFixed(2)} ms`)
+console.log(`  ${LOOKUPS.toLocaleString('en-AU')} lookups of every role`)
+console.log(`    regex scans  ${scanned.toFixed(1)} ms`)
+console.log(`    schema       ${cached.toFixed(1)} ms`)
+console.log(`  roles ${JSON.stringify(schema.roles)}`)
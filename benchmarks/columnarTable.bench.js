@@ -0,0 +1,121 @@
+// Compares the workspace grid's previous row-object table with the columnar table on a
+// 50k x 20 sheet: retained heap, a single cell edit (including rebuilding the row objects
+// the grid renders), applying a week label and adding a column.
+// Run with `node --expose-gc benchmarks/run.js columnarTable` for heap figures.
+import {
+  addColumn,
+  createColumnarTable,
+  createRowId,
+  fillColumn,
+  setCells,
+  tableRows,
+} from '../src/utils/columnarTable.js'
+
+const ROWS = 50_000
+const REPEATS = 9
+const COLUMNS = [
+  'Week',
+  'SKU',
+  'Item Name',
+  'Category',
+  'Supplier',
+  'Location',
+  'Notes',
+  'Unit',
+  'Barcode',
+  'Status',
+  'Opening Stock',
+  'Units Received',
+  'Units Sold',
+  'Closing Stock',
+  'Unit Cost',
+  'Sale Price',
+  'Reorder Quantity',
+  'Par Count',
+  'Waste Units',
+  'Inventory Value',
+]
+const CATEGORIES = ['Beverage', 'Bakery', 'Grab & Go', 'Dairy', 'Frozen']
+
+// Cells are built as fresh values, as a workbook parser would produce them: repeated
+// text is not shared and costs carry decimals.
+const cellValue = (rowIndex, column, columnIndex) => {
+  if (columnIndex >= 10) return ((rowIndex * (columnIndex + 3)) % 500) + 0.25
+  if (column === 'Week') return ['Week', String(24)].join(' ')
+  if (column === 'Category') return String(CATEGORIES[rowIndex % CATEGORIES.length]).concat('')
+  if (column === 'Status') return (rowIndex % 3 ? 'Act' : 'Rev').concat('ive')
+  return `${column} ${rowIndex}`
+}
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+// Builds a table and reports how much heap it keeps alive, when gc is exposed.
+const measureBuild = (build) => {
+  const hasGc = typeof globalThis.gc === 'function'
+  if (hasGc) globalThis.gc()
+  const before = process.memoryUsage().heapUsed
+  const value = build()
+  if (hasGc) globalThis.gc()
+  return { value, bytes: hasGc ? process.memoryUsage().heapUsed - before : null }
+}
+
+// The previous model: one object per row, copied with spreads by every handler.
+const buildRowTable = () => ({
+  columns: COLUMNS,
+  rows: Array.from({ length: ROWS }, (_, rowIndex) => {
+    const row = { __rowId: createRowId() }
+    COLUMNS.forEach((column, columnIndex) => {
+      row[column] = cellValue(rowIndex, column, columnIndex)
+    })
+    return row
+  }),
+})
+
+// Includes the row views the grid renders from.
+const buildColumnarTable = () => {
+  const table = createColumnarTable(COLUMNS, ROWS, cellValue)
+  tableRows(table)
+  return table
+}
+
+const formatMb = (bytes) => (bytes === null ? 'n/a (run with --expose-gc)' : `${(bytes / 1024 / 1024).toFixed(1)} MB`)
+
+const { value: rowTable, bytes: rowBytes } = measureBuild(buildRowTable)
+const { value: columnar, bytes: columnarBytes } = measureBuild(buildColumnarTable)
+
+const targetId = rowTable.rows[ROWS / 2].__rowId
+const columnarTargetId = tableRows(columnar)[ROWS / 2].__rowId
+
+const rowEdit = median(() => {
+  rowTable.rows.map((row) => (row.__rowId === targetId ? { ...row, 'Units Sold': 4 } : row))
+})
+const columnarEdit = median(() => {
+  tableRows(setCells(columnar, columnarTargetId, { 'Units Sold': 4 }))
+})
+const rowWeek = median(() => {
+  rowTable.rows.map((row) => ({ ...row, Week: 'Week 25' }))
+})
+const columnarWeek = median(() => {
+  fillColumn(columnar, 'Week', 'Week 25')
+})
+const rowAddColumn = median(() => {
+  rowTable.rows.map((row) => ({ ...row, Extra: '' }))
+})
+const columnarAddColumn = median(() => {
+  addColumn(columnar, 'Extra', '')
+})
+
+console.log(`${ROWS.toLocaleString('en-AU')} rows x ${COLUMNS.length} columns`)
+console.log(`  retained heap     rows ${formatMb(rowBytes)}  columnar ${formatMb(columnarBytes)}`)
+console.log(`  cell edit         rows ${rowEdit.toFixed(2)} ms  columnar ${columnarEdit.toFixed(2)} ms`)
+console.log(`  apply week label  rows ${rowWeek.toFixed(2)} ms  columnar ${columnarWeek.toFixed(2)} ms`)
+console.log(`  add column        rows ${rowAddColumn.toFixed(2)} ms  columnar ${columnarAddColumn.toFixed(2)} ms`)
@@ -0,0 +1,68 @@
+// Layer growth and valuation cost for SKUs restocked daily, with the default lossless merge
+// and with opt-in compaction (a 1c step and 7-day buckets): layers per SKU after a year, and the time to value the whole inventory by
+// walking every layer against reading the cached per-array totals.
+// Run with `npm run bench -- costLayers`.
+import {
+  DEFAULT_LAYER_POLICY,
+  calculateLayersValue,
+  computeCostMovement,
+} from '../src/utils/costing.js'
+
+const SKUS = 20_000
+const DAYS = 365
+const REPEATS = 9
+const DAY_MS = 24 * 60 * 60 * 1000
+const COMPACTED = { costStep: 0.01, ageBucketDays: 7 }
+const START = Date.parse('2025-01-01T09:00:00.000Z')
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+// A year of daily deliveries that run slightly ahead of sales, at a cost that drifts by
+// fractions of a cent.
+const simulate = (policy) => {
+  let layers = []
+  for (let day = 0; day < DAYS; day += 1) {
+    layers = computeCostMovement({
+      layers,
+      sold: day % 3 ? 40 : 10,
+      received: 45,
+      unitCost: 2.3 + Math.round(Math.sin(day) * 3) / 1000,
+      timestamp: new Date(START + day * DAY_MS).toISOString(),
+      policy,
+    }).layers
+  }
+  return layers
+}
+
+const walkValue = (layers) => layers.reduce((acc, layer) => acc + layer.quantity * layer.unitCost, 0)
+
+const variants = [
+  ['lossless', DEFAULT_LAYER_POLICY],
+  ['compacted', COMPACTED],
+]
+variants.forEach(([label, policy]) => {
+  const start = performance.now()
+  const sample = simulate(policy)
+  const simulateMs = performance.now() - start
+  // Each SKU gets its own copy, as items loaded from a workbook or IndexedDB would.
+  const inventory = Array.from({ length: SKUS }, () => sample.map((layer) => ({ ...layer })))
+  const walked = median(() => inventory.reduce((acc, layers) => acc + walkValue(layers), 0))
+  inventory.forEach((layers) => calculateLayersValue(layers))
+  const cached = median(() => inventory.reduce((acc, layers) => acc + calculateLayersValue(layers), 0))
+  console.log(
+    `${label.padEnd(12)} ${String(sample.length).padStart(4)} layers/SKU after ${DAYS} days` +
+      ` (${simulateMs.toFixed(1)} ms per SKU-year)`,
+  )
+  console.log(
+    `  value ${SKUS.toLocaleString('en-AU')} SKUs  walk ${walked.toFixed(2)} ms  cached ${cached.toFixed(2)} ms`,
+  )
+})
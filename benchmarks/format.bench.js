@@ -0,0 +1,101 @@
+// Formats every cell of a 50k-entry History table (timestamp, relative time, counts and
+// signed deltas): in one pass, as the windowed table renders it while scrolling down and
+// back up, and for one window re-rendered 1,000 times (as a keystroke elsewhere does). Compares the previous uncached formatters, which re-parse
+// each ISO string, with the cached ones fed the history index's parsed epochs.
+// Run with `npm run bench -- format`.
+import {
+  formatColumn,
+  formatDateTime,
+  formatDelta,
+  formatNumber,
+  formatRelativeTime,
+} from '../src/utils/format.js'
+import { createHistoryIndex, queryHistory, selectionEntries, selectionEpochs } from '../src/utils/historyIndex.js'
+import { createSyntheticHistory, createSyntheticInventory } from './synthetic.js'
+
+const ENTRIES = 50_000
+const WINDOW_ROWS = 40
+const REPEATS = 9
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+// The formatters as they were: a fresh Date and Intl call for every cell.
+const numberFormatter = new Intl.NumberFormat('en-AU', { maximumFractionDigits: 0, minimumFractionDigits: 0 })
+const currencyFormatter = new Intl.NumberFormat('en-AU', { style: 'currency', currency: 'AUD', maximumFractionDigits: 2 })
+const dateTimeFormatter = new Intl.DateTimeFormat('en-AU', { dateStyle: 'medium', timeStyle: 'short' })
+const relativeFormatter = new Intl.RelativeTimeFormat('en-AU', { numeric: 'auto' })
+const legacy = {
+  number: (value) => numberFormatter.format(Number(value)),
+  delta: (value, currency) =>
+    `${value > 0 ? '+' : ''}${currency ? currencyFormatter.format(value) : numberFormatter.format(value)}`,
+  dateTime: (value) => dateTimeFormatter.format(new Date(value)),
+  relative: (value) => {
+    const deltaMs = new Date(value).getTime() - Date.now()
+    return relativeFormatter.format(Math.round(deltaMs / 86_400_000), 'day')
+  },
+}
+
+const inventory = createSyntheticInventory({ skus: 5_000 })
+const history = createSyntheticHistory(inventory, { movementsPerSku: ENTRIES / 5_000 })
+const selection = queryHistory(createHistoryIndex(history))
+
+const legacyRows = (entries) =>
+  entries.map((entry) => [
+    legacy.dateTime(entry.timestamp),
+    legacy.relative(entry.timestamp),
+    legacy.number(entry.previousCount),
+    legacy.number(entry.sold),
+    legacy.number(entry.received),
+    legacy.number(entry.newCount),
+    legacy.delta(entry.delta, false),
+    legacy.delta(entry.valueImpact, true),
+  ])
+
+const cachedRows = (from, to) => {
+  const entries = selectionEntries(selection, from, to)
+  const epochs = selectionEpochs(selection, from, to)
+  const dateTimes = formatColumn(epochs, formatDateTime)
+  const relativeTimes = formatColumn(epochs, formatRelativeTime)
+  return entries.map((entry, row) => [
+    dateTimes[row],
+    relativeTimes[row],
+    formatNumber(entry.previousCount),
+    formatNumber(entry.sold),
+    formatNumber(entry.received),
+    formatNumber(entry.newCount),
+    formatDelta(entry.delta, { showZero: true }),
+    formatDelta(entry.valueImpact, { currency: true, showZero: true }),
+  ])
+}
+
+// Down the table a window at a time, then back up.
+const scrollWindows = (render) => {
+  for (let start = 0; start < ENTRIES; start += WINDOW_ROWS) render(start, start + WINDOW_ROWS)
+  for (let start = ENTRIES - WINDOW_ROWS; start >= 0; start -= WINDOW_ROWS) render(start, start + WINDOW_ROWS)
+}
+
+const RERENDERS = 1_000
+const legacyRerender = median(() => {
+  for (let run = 0; run < RERENDERS; run += 1) legacyRows(selectionEntries(selection, 0, WINDOW_ROWS))
+})
+const cachedRerender = median(() => {
+  for (let run = 0; run < RERENDERS; run += 1) cachedRows(0, WINDOW_ROWS)
+})
+const legacyFull = median(() => legacyRows(selectionEntries(selection)))
+const cachedFull = median(() => cachedRows(0, ENTRIES))
+const legacyScroll = median(() => scrollWindows((from, to) => legacyRows(selectionEntries(selection, from, to))))
+const cachedScroll = median(() => scrollWindows(cachedRows))
+
+console.log(`${ENTRIES.toLocaleString('en-AU')} history entries, ${WINDOW_ROWS}-row window`)
+console.log(`  format every row   uncached ${legacyFull.toFixed(1)} ms  cached ${cachedFull.toFixed(1)} ms`)
+console.log(`  scroll down and up uncached ${legacyScroll.toFixed(1)} ms  cached ${cachedScroll.toFixed(1)} ms`)
+console.log(`  1,000 re-renders   uncached ${legacyRerender.toFixed(1)} ms  cached ${cachedRerender.toFixed(1)} ms`)
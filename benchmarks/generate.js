@@ -0,0 +1,48 @@
+// Writes a synthetic Stocktake + Movements workbook, e.g.
+//   node benchmarks/generate.js --rows 100000 --categories 40 --layer-churn 0.5 -o big.xlsx
+// Options: --rows, or --skus with --movements-per-sku; --categories, --layer-churn,
+// --max-layers, --history-days, --seed. The same options always give the same workbook.
+import { writeFileSync } from 'node:fs'
+import { createUpdatedWorkbook } from '../src/utils/excel.js'
+import { DEFAULT_SYNTHETIC_OPTIONS, createSyntheticWorkbookData, optionsForRows } from './synthetic.js'
+
+const NUMERIC_OPTIONS = {
+  '--skus': 'skus',
+  '--movements-per-sku': 'movementsPerSku',
+  '--categories': 'categories',
+  '--layer-churn': 'layerChurn',
+  '--max-layers': 'maxLayers',
+  '--history-days': 'historyDays',
+  '--seed': 'seed',
+}
+
+const parseArgs = (argv) => {
+  const options = {}
+  let rows = null
+  let output = 'synthetic-stocktake.xlsx'
+  for (let index = 0; index < argv.length; index += 2) {
+    const [flag, value] = [argv[index], argv[index + 1]]
+    if (flag === '-o' || flag === '--output') {
+      output = value
+    } else if (flag === '--rows') {
+      rows = Number(value)
+    } else if (NUMERIC_OPTIONS[flag]) {
+      options[NUMERIC_OPTIONS[flag]] = Number(value)
+    } else {
+      throw new Error(`Unknown option: ${flag}`)
+    }
+  }
+  return { options: rows ? optionsForRows(rows, options) : options, output }
+}
+
+const { options, output } = parseArgs(process.argv.slice(2))
+const started = performance.now()
+const { inventory, history, metadata } = createSyntheticWorkbookData(options)
+const bytes = await createUpdatedWorkbook(inventory, metadata, history)
+writeFileSync(output, new Uint8Array(bytes))
+const config = { ...DEFAULT_SYNTHETIC_OPTIONS, ...options }
+console.log(
+  `Wrote ${output}: ${inventory.length.toLocaleString('en-AU')} SKUs, ` +
+    `${history.length.toLocaleString('en-AU')} movements, ${config.categories} categories ` +
+    `(seed ${config.seed}) in ${((performance.now() - started) / 1000).toFixed(1)} s`,
+)
@@ -0,0 +1,100 @@
+// Compares the time-indexed history with the flat newest-first array it replaced:
+// appending a 20-movement commit, and the History page's 30-day and 30-day-by-category
+// summaries (filter, re-parse each timestamp, then total).
+// Run with `npm run bench -- historyIndex`.
+import {
+  appendHistory,
+  createHistoryIndex,
+  queryHistory,
+  summariseHistorySelection,
+} from '../src/utils/historyIndex.js'
+
+const SIZES = [10_000, 100_000, 1_000_000]
+const ITEMS = 5_000
+const CATEGORIES = ['Beverage', 'Bakery', 'Grab & Go', 'Dairy', 'Frozen', 'Retail']
+const HISTORY_DAYS = 730
+const WINDOW_DAYS = 30
+const COMMIT_SIZE = 20
+const REPEATS = 9
+const DAY_MS = 24 * 60 * 60 * 1000
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+const movement = (index, timestamp) => {
+  const item = (index * 7919) % ITEMS
+  const sold = index % 6
+  const received = index % 4
+  return {
+    id: `movement-${index}`,
+    itemId: `item-${item}`,
+    sku: `SKU-${String(item).padStart(6, '0')}`,
+    name: `Item ${item}`,
+    category: CATEGORIES[item % CATEGORIES.length],
+    sold,
+    received,
+    delta: received - sold,
+    valueImpact: (received - sold) * 3.5,
+    performedBy: `Operator ${index % 7}`,
+    timestamp,
+  }
+}
+
+const buildHistory = (size, now) =>
+  Array.from({ length: size }, (_, index) =>
+    movement(index, new Date(now - (index / size) * HISTORY_DAYS * DAY_MS).toISOString()),
+  )
+
+const scanSummary = (history, from, category) =>
+  history
+    .filter(
+      (entry) =>
+        new Date(entry.timestamp).getTime() >= from && (!category || entry.category === category),
+    )
+    .reduce(
+      (acc, entry) => {
+        acc.adjustments += 1
+        acc.sold += entry.sold
+        acc.value += entry.valueImpact
+        if (!acc.latest || new Date(entry.timestamp) > new Date(acc.latest)) {
+          acc.latest = entry.timestamp
+        }
+        return acc
+      },
+      { adjustments: 0, sold: 0, value: 0, latest: null },
+    )
+
+const now = Date.now()
+const from = now - WINDOW_DAYS * DAY_MS
+const commit = Array.from({ length: COMMIT_SIZE }, (_, index) =>
+  movement(index, new Date(now + 1000).toISOString()),
+)
+
+SIZES.forEach((size) => {
+  const history = buildHistory(size, now)
+  const start = performance.now()
+  let index = createHistoryIndex(history)
+  console.log(`${size.toLocaleString('en-AU')} movements (index built in ${(performance.now() - start).toFixed(1)} ms)`)
+
+  const arrayAppend = median(() => [...commit, ...history])
+  const indexAppend = median(() => {
+    index = appendHistory(index, commit)
+  })
+  const arrayWindow = median(() => scanSummary(history, from))
+  const indexWindow = median(() => summariseHistorySelection(queryHistory(index, { from })))
+  const arrayCategory = median(() => scanSummary(history, from, 'Dairy'))
+  const indexCategory = median(() =>
+    summariseHistorySelection(queryHistory(index, { from, category: 'Dairy' })),
+  )
+  console.log(`  append ${COMMIT_SIZE}       array ${arrayAppend.toFixed(3)} ms  index ${indexAppend.toFixed(3)} ms`)
+  console.log(`  ${WINDOW_DAYS}-day summary  array ${arrayWindow.toFixed(3)} ms  index ${indexWindow.toFixed(3)} ms`)
+  console.log(`  + category      array ${arrayCategory.toFixed(3)} ms  index ${indexCategory.toFixed(3)} ms`)
+})
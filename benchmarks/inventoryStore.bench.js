@@ -0,0 +1,133 @@
+// Compares the old whole-array draft handling with the id-indexed inventory store.
+// Run with `npm run bench -- inventoryStore`. Measures state updates and derived
+// summaries only; React render cost is not included.
+import {
+  calculateLayersValue,
+  parseAdjustment,
+  summariseCostImpact,
+} from '../src/utils/costing.js'
+import {
+  commitStoreDrafts,
+  createInventoryStore,
+  storeHasDrafts,
+  storeTotals,
+  summariseStoreDrafts,
+  updateStoreItem,
+} from '../src/utils/inventoryStore.js'
+
+const SIZES = [1_000, 10_000, 100_000]
+const KEYSTROKES = 200
+const DRAFTED_ITEMS = 50
+
+const buildInventory = (size) =>
+  Array.from({ length: size }, (_, index) => {
+    const count = (index % 40) + 1
+    const unitCost = 1 + (index % 17) * 0.25
+    return {
+      id: `SKU-${index}`,
+      sku: `SKU-${index}`,
+      name: `Item ${index}`,
+      category: `Category ${index % 12}`,
+      unitCost,
+      currentCount: count,
+      lastCount: count,
+      draftSold: '',
+      draftReceived: '',
+      lastUpdated: null,
+      itemNote: '',
+      costLayers: [{ quantity: count, unitCost, acquiredAt: null }],
+    }
+  })
+
+// The derived values useInventory recomputed from the full array on every edit.
+const legacyDerived = (inventory) => {
+  const hasDrafts = inventory.some(
+    (item) => parseAdjustment(item.draftSold) > 0 || parseAdjustment(item.draftReceived) > 0,
+  )
+  const summary = { items: 0, sold: 0, received: 0, value: 0 }
+  let totalValue = 0
+  inventory.forEach((item) => {
+    const sold = parseAdjustment(item.draftSold)
+    const received = parseAdjustment(item.draftReceived)
+    totalValue += calculateLayersValue(item.costLayers ?? [])
+    if (sold === 0 && received === 0) {
+      return
+    }
+    summary.items += 1
+    summary.sold += sold
+    summary.received += received
+    const preview = summariseCostImpact(item, sold, received)
+    summary.value += preview.receivedValue - preview.soldValue
+  })
+  return { hasDrafts, summary, totalValue }
+}
+
+const legacyCommit = (inventory, timestamp) =>
+  inventory.map((item) => {
+    const sold = parseAdjustment(item.draftSold)
+    const received = parseAdjustment(item.draftReceived)
+    const costSummary = summariseCostImpact(item, sold, received, timestamp)
+    return {
+      ...item,
+      lastCount: item.currentCount,
+      currentCount: costSummary.totalQuantity,
+      draftSold: '',
+      draftReceived: '',
+      costLayers: costSummary.layers,
+    }
+  })
+
+const time = (fn) => {
+  const start = performance.now()
+  const result = fn()
+  return { result, ms: performance.now() - start }
+}
+
+const draftTargets = (size) =>
+  Array.from({ length: DRAFTED_ITEMS }, (_, index) => `SKU-${Math.floor((index * size) / DRAFTED_ITEMS)}`)
+
+const runLegacy = (size) => {
+  let inventory = buildInventory(size)
+  const targets = draftTargets(size)
+  const keystrokes = time(() => {
+    for (let stroke = 0; stroke < KEYSTROKES; stroke += 1) {
+      const id = targets[stroke % targets.length]
+      inventory = inventory.map((item) =>
+        item.id === id ? { ...item, draftSold: String((stroke % 3) + 1) } : item,
+      )
+      legacyDerived(inventory)
+    }
+  })
+  const commit = time(() => legacyCommit(inventory, new Date().toISOString()))
+  return { keystrokeMs: keystrokes.ms / KEYSTROKES, commitMs: commit.ms }
+}
+
+const runStore = (size) => {
+  let store = createInventoryStore(buildInventory(size))
+  const targets = draftTargets(size)
+  const keystrokes = time(() => {
+    for (let stroke = 0; stroke < KEYSTROKES; stroke += 1) {
+      const id = targets[stroke % targets.length]
+      const draftSold = String((stroke % 3) + 1)
+      store = updateStoreItem(store, id, (item) => ({ ...item, draftSold }))
+      storeHasDrafts(store)
+      summariseStoreDrafts(store)
+      storeTotals(store)
+    }
+  })
+  const commit = time(() =>
+    commitStoreDrafts(store, new Date().toISOString(), { performedBy: 'Bench', notes: '' }),
+  )
+  return { keystrokeMs: keystrokes.ms / KEYSTROKES, commitMs: commit.ms }
+}
+
+const format = (ms) => `${ms.toFixed(3)} ms`
+
+console.log(`${KEYSTROKES} keystrokes across ${DRAFTED_ITEMS} drafted items, then one commit\n`)
+SIZES.forEach((size) => {
+  const legacy = runLegacy(size)
+  const store = runStore(size)
+  console.log(`${size.toLocaleString('en-AU')} items`)
+  console.log(`  keystroke  legacy ${format(legacy.keystrokeMs)}  store ${format(store.keystrokeMs)}`)
+  console.log(`  commit     legacy ${format(legacy.commitMs)}  store ${format(store.commitMs)}`)
+})
@@ -0,0 +1,89 @@
+// Parses 2 million workbook cells with the three parsers the app used to have (excel.js's
+// regex `parseNumber`, the identical `parseNumericInput`, and the workspace grid's
+// `parseFloat`-based `coerceNumeric`) and with the shared `parseNumber`, for cells that
+// are already numbers, plain numeric text and formatted text ("$1,234.50", "(12)").
+// Also counts how many formatted cells each parser reads differently from the shared one.
+// Run with `npm run bench -- numbers`.
+import { parseNumber } from '../src/utils/numbers.js'
+import { createRandom } from './synthetic.js'
+
+const CELLS = 2_000_000
+const REPEATS = 9
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+const regexParse = (value, fallback = 0) => {
+  if (value === null || value === undefined || value === '') {
+    return fallback
+  }
+  if (typeof value === 'number' && Number.isFinite(value)) {
+    return value
+  }
+  const numeric = Number(String(value).replace(/[^0-9.-]/g, ''))
+  return Number.isFinite(numeric) ? numeric : fallback
+}
+
+const coerceNumeric = (candidate) => {
+  if (candidate === null || candidate === undefined || candidate === '') return 0
+  const parsed = Number.parseFloat(candidate)
+  return Number.isFinite(parsed) ? parsed : 0
+}
+
+const random = createRandom(7)
+const amount = () => Math.round(random() * 500_000) / 100
+const columns = {
+  numbers: Array.from({ length: CELLS }, () => amount()),
+  'numeric text': Array.from({ length: CELLS }, () => String(amount())),
+  'formatted text': Array.from({ length: CELLS }, () => {
+    const value = amount().toLocaleString('en-AU', { minimumFractionDigits: 2 })
+    const pick = random()
+    return pick < 0.4 ? `$${value}` : pick < 0.6 ? `(${value})` : pick < 0.8 ? `-$${value}` : `${value} ea`
+  }),
+}
+
+// One loop per parser, so each call site only ever sees one function.
+const sumWith = {
+  regex: (cells) => {
+    let total = 0
+    for (let index = 0; index < cells.length; index += 1) total += regexParse(cells[index])
+    return total
+  },
+  parseFloat: (cells) => {
+    let total = 0
+    for (let index = 0; index < cells.length; index += 1) total += coerceNumeric(cells[index])
+    return total
+  },
+  shared: (cells) => {
+    let total = 0
+    for (let index = 0; index < cells.length; index += 1) total += parseNumber(cells[index])
+    return total
+  },
+}
+
+console.log(`${CELLS.toLocaleString('en-AU')} cells per column, median of ${REPEATS}`)
+Object.entries(columns).forEach(([label, cells]) => {
+  const timings = Object.entries(sumWith).map(([name, sum]) => {
+    const ms = median(() => sum(cells))
+    const rate = Math.round(cells.length / ms / 1000).toLocaleString('en-AU')
+    return `${name} ${ms.toFixed(0)} ms (${rate}M/s)`
+  })
+  console.log(`  ${label.padEnd(15)} ${timings.join('  ')}`)
+})
+
+const formatted = columns['formatted text']
+Object.entries({ regex: regexParse, parseFloat: coerceNumeric }).forEach(([name, parse]) => {
+  let differ = 0
+  formatted.forEach((cell) => {
+    if (parse(cell) !== parseNumber(cell)) differ += 1
+  })
+  console.log(`  ${name} reads ${differ.toLocaleString('en-AU')} formatted cells differently`)
+})
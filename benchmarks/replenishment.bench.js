@@ -0,0 +1,99 @@
+// Reorder points and days of cover for 100k SKUs over two years of movements: the full
+// pass into typed arrays (on import, or the first commit of a day) and a commit's append,
+// against grouping movements into per-item day maps. Run with `npm run bench -- replenishment`.
+import { appendHistory, createHistoryIndex, historyToArray } from '../src/utils/historyIndex.js'
+import { planReplenishment, updateDemand } from '../src/utils/replenishment.js'
+import { createSyntheticHistory, createSyntheticInventory } from './synthetic.js'
+
+const SKUS = 100_000
+const MOVEMENTS_PER_SKU = 20
+const HISTORY_DAYS = 730
+const LOOKBACKS = [90, 730]
+const APPEND_LINES = 800
+const REPEATS = 5
+const DAY_MS = 24 * 60 * 60 * 1000
+
+const median = (fn) => {
+  const samples = []
+  let result = null
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    result = fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return { ms: samples[Math.floor(samples.length / 2)], result }
+}
+
+const endAt = '2026-06-30T12:00:00.000Z'
+const now = Date.parse(endAt)
+const inventory = createSyntheticInventory({ skus: SKUS })
+const index = createHistoryIndex(
+  createSyntheticHistory(inventory, { movementsPerSku: MOVEMENTS_PER_SKU, historyDays: HISTORY_DAYS, endAt }),
+)
+const history = historyToArray(index)
+
+// Per-item Map of day -> units sold, then the same statistics from each item's days.
+const groupedPlan = (lookbackDays) => {
+  const startDay = Math.floor(now / DAY_MS) - lookbackDays + 1
+  const byItem = new Map()
+  history.forEach((entry) => {
+    const day = Math.floor(Date.parse(entry.timestamp) / DAY_MS)
+    if (day < startDay || !(entry.sold > 0)) return
+    let days = byItem.get(entry.itemId)
+    if (!days) {
+      days = new Map()
+      byItem.set(entry.itemId, days)
+    }
+    days.set(day, (days.get(day) ?? 0) + entry.sold)
+  })
+  return inventory.map((item) => {
+    const days = byItem.get(item.id)
+    if (!days) return { rate: 0, spread: 0 }
+    let sum = 0
+    let squares = 0
+    days.forEach((units) => {
+      sum += units
+      squares += units * units
+    })
+    const rate = sum / lookbackDays
+    return { rate, spread: Math.sqrt(Math.max(0, squares / lookbackDays - rate * rate)) }
+  })
+}
+
+const formatMs = (ms) => `${ms.toFixed(1)} ms`
+console.log(
+  `${SKUS.toLocaleString('en-AU')} SKUs, ${index.length.toLocaleString('en-AU')} movements over ` +
+    `${HISTORY_DAYS} days`,
+)
+for (const lookback of LOOKBACKS) {
+  const full = median(() => updateDemand(null, index, now, lookback))
+  const plan = median(() => planReplenishment(full.result, inventory))
+  const grouped = median(() => groupedPlan(lookback))
+  console.log(
+    `lookback ${String(lookback).padStart(3)} days: typed arrays ${formatMs(full.ms)} + plan ` +
+      `${formatMs(plan.ms)} | per-item day maps ${formatMs(grouped.ms)} | ` +
+      `${full.result.summed.toLocaleString('en-AU')} movements, ` +
+      `${plan.result.reorderCount.toLocaleString('en-AU')} to reorder`,
+  )
+}
+
+// A commit's movements, stamped after the latest one, added to the summed arrays.
+const commit = inventory.slice(0, APPEND_LINES).map((item, line) => ({
+  id: `append-${line}`,
+  itemId: item.id,
+  sku: item.sku,
+  name: item.name,
+  category: item.category,
+  sold: 1 + (line % 5),
+  received: 0,
+  timestamp: endAt,
+}))
+let demand = updateDemand(null, index, now)
+let appended = index
+const append = median(() => {
+  appended = appendHistory(appended, commit)
+  demand = updateDemand(demand, appended, now)
+  return demand
+})
+console.log(`append ${APPEND_LINES} movements: ${formatMs(append.ms)} (${append.result.summed} summed)`)
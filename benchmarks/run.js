@@ -0,0 +1,18 @@
+// Runs every `*.bench.js` in this folder, or only those whose name contains one of
+// the arguments: `npm run bench -- inventoryStore`.
+import { readdirSync } from 'node:fs'
+import { dirname, join } from 'node:path'
+import { fileURLToPath, pathToFileURL } from 'node:url'
+
+const folder = dirname(fileURLToPath(import.meta.url))
+const filters = process.argv.slice(2)
+
+const benches = readdirSync(folder)
+  .filter((file) => file.endsWith('.bench.js'))
+  .filter((file) => !filters.length || filters.some((filter) => file.includes(filter)))
+  .sort()
+
+for (const file of benches) {
+  console.log(`\n# ${file.replace('.bench.js', '')}\n`)
+  await import(pathToFileURL(join(folder, file)).href)
+}
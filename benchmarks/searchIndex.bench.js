@@ -0,0 +1,56 @@
+// Times search index build and lookups against a lower-cased substring scan.
+// Run with `npm run bench -- searchIndex`.
+import { createSearchIndex, querySearchIndex } from '../src/utils/searchIndex.js'
+
+const SIZES = [1_000, 10_000, 100_000]
+const QUERIES = ['sku-00123', 'sku-0012', 'muffin 12', 'berry', 'bl', 'sku-0l2345']
+const REPEATS = 15
+const WORDS = ['Organic', 'Cold', 'Brew', 'Blueberry', 'Muffin', 'Granola', 'Parfait', 'Oat', 'Milk', 'Chia']
+const CATEGORIES = ['Beverage', 'Bakery', 'Grab & Go', 'Dairy', 'Frozen']
+
+const buildItems = (size) =>
+  Array.from({ length: size }, (_, index) => ({
+    id: `item-${index}`,
+    sku: `SKU-${String(index).padStart(6, '0')}`,
+    name: `${WORDS[index % WORDS.length]} ${WORDS[(index * 7) % WORDS.length]} ${index}`,
+    category: CATEGORIES[index % CATEGORIES.length],
+  }))
+
+const median = (fn) => {
+  const samples = []
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+const scan = (items, query) => {
+  const needle = query.trim().toLowerCase()
+  return items.filter((item) =>
+    [item.sku, item.name, item.category].some((field) => field.toLowerCase().includes(needle)),
+  )
+}
+
+SIZES.forEach((size) => {
+  const items = buildItems(size)
+  const start = performance.now()
+  const index = createSearchIndex(items, {
+    getId: (item) => item.id,
+    getFields: (item) => [item.sku, item.name, item.category],
+  })
+  console.log(`${size.toLocaleString('en-AU')} items (index built in ${(performance.now() - start).toFixed(1)} ms)`)
+  QUERIES.forEach((query) => {
+    let matches = []
+    const indexed = median(() => {
+      index.cache = null
+      matches = querySearchIndex(index, query)
+    })
+    const scanned = median(() => scan(items, query))
+    console.log(
+      `  ${query.padEnd(12)} ${String(matches.length).padStart(6)} hits  index ${indexed.toFixed(3)} ms  scan ${scanned.toFixed(3)} ms`,
+    )
+  })
+})
@@ -0,0 +1,68 @@
+// Stock as at a past date for a 100k-item store with a year of commits: rebuilt from the
+// nearest snapshot (taken every SNAPSHOT_EVERY_COMMITS commits or SNAPSHOT_EVERY_DAYS days)
+// against replaying every movement since the import snapshot, the O(all history) approach.
+// Run with `npm run bench -- snapshots`.
+import { appendHistory, createHistoryIndex } from '../src/utils/historyIndex.js'
+import { commitStoreDrafts, createInventoryStore, replaceStoreDrafts } from '../src/utils/inventoryStore.js'
+import { addSnapshot, createSnapshot, reconstructInventoryAt, shouldTakeSnapshot } from '../src/utils/snapshots.js'
+import { createRandom, createSyntheticInventory } from './synthetic.js'
+
+const ITEMS = 100_000
+const COMMITS = 365
+const LINES_PER_COMMIT = 800
+const REPEATS = 5
+const DAY_MS = 24 * 60 * 60 * 1000
+
+const median = (fn) => {
+  const samples = []
+  let result = null
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    result = fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return { ms: samples[Math.floor(samples.length / 2)], result }
+}
+
+const random = createRandom(5)
+let store = createInventoryStore(createSyntheticInventory({ skus: ITEMS }))
+let history = createHistoryIndex()
+const start = Date.parse('2025-01-01T18:00:00.000Z')
+let snapshots = [createSnapshot(store, null)]
+let commitsSince = 0
+
+// One commit a day, each selling and receiving a spread of items.
+for (let day = 0; day < COMMITS; day += 1) {
+  const timestamp = new Date(start + day * DAY_MS).toISOString()
+  const drafts = new Map()
+  while (drafts.size < LINES_PER_COMMIT) {
+    const item = store.items[Math.floor(random() * ITEMS)]
+    drafts.set(item.id, { sold: 1 + Math.floor(random() * 6), received: random() < 0.2 ? 24 : 0 })
+  }
+  const committed = commitStoreDrafts(replaceStoreDrafts(store, drafts), timestamp, { performedBy: 'Bench' })
+  store = committed.store
+  history = appendHistory(history, committed.historyEntries)
+  commitsSince += 1
+  if (shouldTakeSnapshot(snapshots, commitsSince, Date.parse(timestamp))) {
+    snapshots = addSnapshot(snapshots, createSnapshot(store, timestamp)).snapshots
+    commitsSince = 0
+  }
+}
+
+const live = createSnapshot(store, new Date(start + (COMMITS - 1) * DAY_MS).toISOString())
+console.log(
+  `${ITEMS.toLocaleString('en-AU')} items, ${history.length.toLocaleString('en-AU')} movements, ` +
+    `${snapshots.length} snapshots kept`,
+)
+for (const daysAgo of [300, 180, 45, 3]) {
+  const epoch = start + (COMMITS - daysAgo) * DAY_MS - 1
+  const nearest = median(() => reconstructInventoryAt(snapshots, live, history, epoch))
+  const full = median(() => reconstructInventoryAt(snapshots.slice(0, 1), null, history, epoch))
+  const label = `${String(daysAgo).padStart(3)} days ago`
+  console.log(
+    `  ${label}  nearest snapshot ${nearest.ms.toFixed(1).padStart(7)} ms ` +
+      `(${nearest.result.movements.toLocaleString('en-AU')} movements)   ` +
+      `full replay ${full.ms.toFixed(1).padStart(7)} ms (${full.result.movements.toLocaleString('en-AU')})`,
+  )
+}
@@ -0,0 +1,77 @@
+// Reports what each route downloads before its first paint, from the production build's
+// manifest: the entry chunk, the page's own chunk and their static imports (raw and gzip
+// bytes), plus the chunks deferred until an import or export starts.
+// Run `npm run build` first, then `npm run bench -- startup`. Time-to-interactive per
+// route is recorded in the browser as `page-interactive:<page>` performance measures.
+import { existsSync, readFileSync } from 'node:fs'
+import { dirname, join } from 'node:path'
+import { fileURLToPath } from 'node:url'
+import { gzipSync } from 'node:zlib'
+
+const ROUTES = {
+  demo: 'src/pages/DemoPage.jsx',
+  stocktake: 'src/pages/StocktakePage.jsx',
+  history: 'src/pages/HistoryPage.jsx',
+  stats: 'src/pages/StatsPage.jsx',
+}
+const DEFERRED = ['src/utils/excel.js', 'node_modules/xlsx-js-style/dist/xlsx.min.js']
+
+const dist = join(dirname(fileURLToPath(import.meta.url)), '..', 'dist')
+const manifestPath = join(dist, '.vite', 'manifest.json')
+
+const formatKb = (bytes) => `${(bytes / 1024).toFixed(1)} kB`.padStart(10)
+
+const chunkSizes = new Map()
+const sizeOf = (file) => {
+  if (!chunkSizes.has(file)) {
+    const bytes = readFileSync(join(dist, file))
+    chunkSizes.set(file, { raw: bytes.length, gzip: gzipSync(bytes).length })
+  }
+  return chunkSizes.get(file)
+}
+
+// Files a chunk needs before it can run: itself, its css and its static imports.
+const collectFiles = (manifest, key, files = new Set()) => {
+  const chunk = manifest[key]
+  if (!chunk || files.has(chunk.file)) {
+    return files
+  }
+  files.add(chunk.file)
+  chunk.css?.forEach((file) => files.add(file))
+  chunk.imports?.forEach((imported) => collectFiles(manifest, imported, files))
+  return files
+}
+
+const total = (files) =>
+  [...files].reduce(
+    (sum, file) => {
+      const size = sizeOf(file)
+      return { raw: sum.raw + size.raw, gzip: sum.gzip + size.gzip }
+    },
+    { raw: 0, gzip: 0 },
+  )
+
+if (!existsSync(manifestPath)) {
+  console.log('No build manifest found: run `npm run build` first.')
+} else {
+  const manifest = JSON.parse(readFileSync(manifestPath, 'utf8'))
+  const entryKey = Object.keys(manifest).find((key) => manifest[key].isEntry)
+  const entryFiles = collectFiles(manifest, entryKey)
+  const entry = total(entryFiles)
+  console.log(`entry (${entryKey})  ${formatKb(entry.raw)} raw ${formatKb(entry.gzip)} gzip`)
+  Object.entries(ROUTES).forEach(([route, key]) => {
+    if (!manifest[key]) {
+      console.log(`  #${route.padEnd(10)} not split into its own chunk`)
+      return
+    }
+    const files = collectFiles(manifest, key, new Set(entryFiles))
+    const size = total(files)
+    console.log(`  #${route.padEnd(10)} ${formatKb(size.raw)} raw ${formatKb(size.gzip)} gzip`)
+  })
+  DEFERRED.forEach((key) => {
+    if (manifest[key]) {
+      const size = total(collectFiles(manifest, key))
+      console.log(`  deferred ${key}  ${formatKb(size.raw)} raw ${formatKb(size.gzip)} gzip`)
+    }
+  })
+}
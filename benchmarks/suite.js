@@ -0,0 +1,187 @@
+// Times import, commit, search, analytics and export on synthetic workbooks of 1k, 10k,
+// 100k and 1M rows (see synthetic.js), and compares the medians with a saved baseline.
+//
+//   npm run bench:suite                                   # every scale and stage
+//   npm run bench:suite -- --scales 1k,10k --stages commit,search
+//   npm run bench:suite -- --save-baseline                # record benchmarks/baseline.json
+//   npm run bench:suite -- --threshold 1.5                # flag stages 50% slower
+//
+// Exits with status 1 when a stage is slower than the baseline by more than the
+// threshold (and by at least MIN_REGRESSION_MS, so tiny stages do not flap). Baselines
+// are only comparable on the same machine and Node version.
+import { existsSync, readFileSync, writeFileSync } from 'node:fs'
+import { dirname, join } from 'node:path'
+import { fileURLToPath } from 'node:url'
+import { createMovementRollup, rankMovers, summariseMovementWindow } from '../src/utils/analytics.js'
+import { createHistoryIndex, queryHistory, summariseHistorySelection } from '../src/utils/historyIndex.js'
+import {
+  commitStoreDrafts,
+  createInventoryStore,
+  searchStoreItems,
+  storeCategoryBreakdown,
+  updateStoreItem,
+} from '../src/utils/inventoryStore.js'
+import { createSyntheticDrafts, createSyntheticWorkbookData, optionsForRows } from './synthetic.js'
+
+const SCALES = { '1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000 }
+const STAGES = ['import', 'commit', 'search', 'analytics', 'export']
+const SEARCH_QUERIES = ['SYN-0001', 'berry', 'oat dairy', 'mnago', 'pantry 2']
+const DEFAULT_THRESHOLD = 1.25
+const MIN_REGRESSION_MS = 2
+const DAY_MS = 24 * 60 * 60 * 1000
+
+const folder = dirname(fileURLToPath(import.meta.url))
+
+const parseArgs = (argv) => {
+  const args = {
+    scales: Object.keys(SCALES),
+    stages: STAGES,
+    baseline: join(folder, 'baseline.json'),
+    saveBaseline: false,
+    threshold: DEFAULT_THRESHOLD,
+  }
+  for (let index = 0; index < argv.length; index += 1) {
+    const flag = argv[index]
+    if (flag === '--save-baseline') {
+      args.saveBaseline = true
+    } else if (flag === '--scales') {
+      args.scales = argv[++index].toLowerCase().split(',')
+    } else if (flag === '--stages') {
+      args.stages = argv[++index].split(',')
+    } else if (flag === '--baseline') {
+      args.baseline = argv[++index]
+    } else if (flag === '--threshold') {
+      args.threshold = Number(argv[++index])
+    } else {
+      throw new Error(`Unknown option: ${flag}`)
+    }
+  }
+  args.scales.forEach((scale) => {
+    if (!SCALES[scale]) throw new Error(`Unknown scale: ${scale} (use ${Object.keys(SCALES).join(', ')})`)
+  })
+  args.stages.forEach((stage) => {
+    if (!STAGES.includes(stage)) throw new Error(`Unknown stage: ${stage} (use ${STAGES.join(', ')})`)
+  })
+  return args
+}
+
+// Fewer repeats at the larger scales keep a full run to minutes.
+const repeatsFor = (rows) => (rows <= 10_000 ? 7 : rows <= 100_000 ? 3 : 1)
+
+// `setup` runs before each sample and is not timed.
+const median = async (repeats, fn, setup = () => undefined) => {
+  const samples = []
+  for (let run = 0; run < repeats; run += 1) {
+    const input = setup()
+    const start = performance.now()
+    await fn(input)
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return samples[Math.floor(samples.length / 2)]
+}
+
+const draftedStore = (inventory, drafts) => {
+  let store = createInventoryStore(inventory)
+  drafts.forEach(({ id, draftSold, draftReceived }) => {
+    store = updateStoreItem(store, id, (item) => ({ ...item, draftSold, draftReceived }))
+  })
+  return store
+}
+
+const runScale = async (rows, stages) => {
+  const repeats = repeatsFor(rows)
+  const { inventory, history, metadata } = createSyntheticWorkbookData(optionsForRows(rows))
+  const end = Date.parse(metadata.lastImportedAt)
+  const results = {}
+  // excel.js (and xlsx-js-style) is only loaded when a workbook stage is selected.
+  const excel = stages.includes('import') || stages.includes('export') ? await import('../src/utils/excel.js') : null
+
+  if (stages.includes('import')) {
+    const { importWorkbook } = await import('../src/utils/normalise.js')
+    const bytes = await excel.createUpdatedWorkbook(inventory, metadata, history)
+    results.import = await median(repeats, (buffer) => importWorkbook(buffer), () => bytes.slice(0))
+  }
+  if (stages.includes('commit')) {
+    const drafts = createSyntheticDrafts(inventory)
+    results.commit = await median(
+      repeats,
+      (store) => commitStoreDrafts(store, new Date(end).toISOString(), { performedBy: 'Benchmark', notes: '' }),
+      () => draftedStore(inventory, drafts),
+    )
+  }
+  if (stages.includes('search')) {
+    const store = createInventoryStore(inventory)
+    results.search = await median(repeats, () => {
+      SEARCH_QUERIES.forEach((query) => searchStoreItems(store, query))
+    })
+  }
+  if (stages.includes('analytics')) {
+    const store = createInventoryStore(inventory)
+    results.analytics = await median(repeats, () => {
+      const rollup = createMovementRollup(history)
+      const window = summariseMovementWindow(rollup, 30, end)
+      rankMovers(window.items, store.items, store.indexById)
+      storeCategoryBreakdown(store)
+      const index = createHistoryIndex(history)
+      summariseHistorySelection(queryHistory(index, { from: end - 30 * DAY_MS }))
+    })
+  }
+  if (stages.includes('export')) {
+    results.export = await median(repeats, () => excel.createUpdatedWorkbook(inventory, metadata, history))
+  }
+  return results
+}
+
+const formatMs = (value) =>
+  value === undefined ? '-' : `${value.toLocaleString('en-AU', { maximumFractionDigits: value < 10 ? 2 : 0 })} ms`
+
+const compare = (results, baseline, threshold) => {
+  const regressions = []
+  Object.entries(results).forEach(([scale, stages]) => {
+    Object.entries(stages).forEach(([stage, ms]) => {
+      const before = baseline?.results?.[scale]?.[stage]
+      if (before !== undefined && ms > before * threshold && ms - before >= MIN_REGRESSION_MS) {
+        regressions.push({ scale, stage, before, after: ms })
+      }
+    })
+  })
+  return regressions
+}
+
+const args = parseArgs(process.argv.slice(2))
+const baseline = existsSync(args.baseline) ? JSON.parse(readFileSync(args.baseline, 'utf8')) : null
+const results = {}
+for (const scale of args.scales) {
+  const rows = SCALES[scale]
+  results[scale] = await runScale(rows, args.stages)
+  const cells = args.stages.map((stage) => {
+    const before = baseline?.results?.[scale]?.[stage]
+    const ratio = before ? ` (${(results[scale][stage] / before).toFixed(2)}x)` : ''
+    return `${stage} ${formatMs(results[scale][stage])}${ratio}`
+  })
+  console.log(`${rows.toLocaleString('en-AU').padStart(9)} rows  ${cells.join('  ')}`)
+}
+
+if (args.saveBaseline) {
+  const merged = { ...(baseline?.results ?? {}) }
+  Object.entries(results).forEach(([scale, stages]) => {
+    merged[scale] = { ...(merged[scale] ?? {}), ...stages }
+  })
+  writeFileSync(
+    args.baseline,
+    `${JSON.stringify({ savedAt: new Date().toISOString(), node: process.version, results: merged }, null, 2)}\n`,
+  )
+  console.log(`\nSaved baseline to ${args.baseline}`)
+} else if (baseline) {
+  const regressions = compare(results, baseline, args.threshold)
+  if (regressions.length) {
+    console.log(`\nRegressions against ${args.baseline} (threshold ${args.threshold}x):`)
+    regressions.forEach(({ scale, stage, before, after }) => {
+      console.log(`  ${scale} ${stage}: ${formatMs(before)} -> ${formatMs(after)}`)
+    })
+    process.exitCode = 1
+  } else {
+    console.log(`\nNo regressions against ${args.baseline} (threshold ${args.threshold}x).`)
+  }
+}
@@ -0,0 +1,164 @@
+// Seeded synthetic stocktake data for the benchmark suite and `generate.js`. The same
+// options and seed always give the same items and movements, so runs on different
+// machines (or before and after a change) time identical work.
+//
+// Items come out in the shape `parseInventoryWorkbook` returns, with cost layers
+// attached, and movements in the shape `applyStocktake` records, newest first.
+
+const DAY_MS = 24 * 60 * 60 * 1000
+const CATEGORY_WORDS = ['Beverage', 'Bakery', 'Dairy', 'Frozen', 'Produce', 'Pantry', 'Snacks', 'Cleaning']
+const ITEM_WORDS = ['Berry', 'Oat', 'Almond', 'Mango', 'Cocoa', 'Vanilla', 'Citrus', 'Maple', 'Ginger', 'Honey']
+const OPERATORS = ['Alex', 'Sam', 'Jordan', 'Riley', 'Casey', 'Night run']
+
+export const DEFAULT_SYNTHETIC_OPTIONS = {
+  skus: 1_000,
+  movementsPerSku: 9,
+  categories: 12,
+  // Share of items holding several cost layers bought at different prices.
+  layerChurn: 0.3,
+  maxLayers: 4,
+  historyDays: 365,
+  endAt: '2026-01-01T00:00:00.000Z',
+  seed: 1,
+}
+
+// mulberry32: small, fast and identical everywhere, unlike Math.random.
+export const createRandom = (seed) => {
+  let state = seed >>> 0
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0
+    let value = state
+    value = Math.imul(value ^ (value >>> 15), value | 1)
+    value ^= value + Math.imul(value ^ (value >>> 7), value | 61)
+    return ((value ^ (value >>> 14)) >>> 0) / 4294967296
+  }
+}
+
+const roundCents = (value) => Math.round(value * 100) / 100
+
+const categoryName = (index) =>
+  `${CATEGORY_WORDS[index % CATEGORY_WORDS.length]} ${Math.floor(index / CATEGORY_WORDS.length) + 1}`
+
+// Splits a workbook row count between items and movements (one item per
+// `movementsPerSku + 1` rows), for the suite's 1k-1M row scales.
+export const optionsForRows = (rows, overrides = {}) => {
+  const movementsPerSku = overrides.movementsPerSku ?? DEFAULT_SYNTHETIC_OPTIONS.movementsPerSku
+  return { ...overrides, skus: Math.max(1, Math.round(rows / (movementsPerSku + 1))), movementsPerSku }
+}
+
+export const createSyntheticInventory = (options = {}) => {
+  const config = { ...DEFAULT_SYNTHETIC_OPTIONS, ...options }
+  const random = createRandom(config.seed)
+  const end = Date.parse(config.endAt)
+  const start = end - config.historyDays * DAY_MS
+  const skuWidth = Math.max(6, String(config.skus).length)
+
+  const inventory = []
+  for (let index = 0; index < config.skus; index += 1) {
+    const sku = `SYN-${String(index + 1).padStart(skuWidth, '0')}`
+    const word = ITEM_WORDS[Math.floor(random() * ITEM_WORDS.length)]
+    const category = categoryName(Math.floor(random() * config.categories))
+    const baseCost = roundCents(0.5 + random() * 40)
+    const currentCount = Math.floor(random() * 400)
+    const layerCount =
+      currentCount > 1 && random() < config.layerChurn ? 2 + Math.floor(random() * (config.maxLayers - 1)) : 1
+    const costLayers = []
+    let remaining = currentCount
+    for (let layer = 0; layer < layerCount && remaining > 0; layer += 1) {
+      const quantity = layer === layerCount - 1 ? remaining : Math.max(1, Math.floor(remaining * random()))
+      remaining -= quantity
+      costLayers.push({
+        quantity,
+        unitCost: roundCents(baseCost * (0.85 + random() * 0.3)),
+        acquiredAt: new Date(start + ((layer + 1) / (layerCount + 1)) * (end - start)).toISOString(),
+      })
+    }
+    inventory.push({
+      id: sku,
+      sku,
+      name: `${word} ${category.split(' ')[0]} ${index + 1}`,
+      category,
+      unitCost: baseCost,
+      currentCount,
+      lastCount: currentCount,
+      draftSold: '',
+      draftReceived: '',
+      lastUpdated: new Date(end).toISOString(),
+      itemNote: random() < 0.05 ? 'Check supplier pack size' : '',
+      costLayers,
+    })
+  }
+  return inventory
+}
+
+// Movements spread evenly over `historyDays` before `endAt`, newest first.
+export const createSyntheticHistory = (inventory, options = {}) => {
+  const config = { ...DEFAULT_SYNTHETIC_OPTIONS, ...options }
+  const random = createRandom(config.seed + 1)
+  const end = Date.parse(config.endAt)
+  const total = inventory.length * config.movementsPerSku
+  const history = new Array(total)
+  for (let position = 0; position < total; position += 1) {
+    const item = inventory[Math.floor(random() * inventory.length)]
+    const sold = Math.floor(random() * 12)
+    const received = random() < 0.3 ? Math.floor(random() * 48) : 0
+    const unitCost = roundCents(item.unitCost * (0.9 + random() * 0.2))
+    const previousCount = Math.floor(random() * 400)
+    const newCount = Math.max(0, previousCount - sold + received)
+    const soldValue = sold * unitCost
+    const receivedValue = received * unitCost
+    const timestamp = new Date(end - ((position + 0.5) / total) * config.historyDays * DAY_MS).toISOString()
+    history[position] = {
+      id: `${item.id}-${position}`,
+      itemId: item.id,
+      sku: item.sku,
+      name: item.name,
+      category: item.category,
+      previousCount,
+      newCount,
+      sold,
+      received,
+      delta: newCount - previousCount,
+      unitCost,
+      soldValue,
+      receivedValue,
+      soldUnitCost: sold ? unitCost : 0,
+      receivedUnitCost: received ? unitCost : 0,
+      valueImpact: receivedValue - soldValue,
+      performedBy: OPERATORS[Math.floor(random() * OPERATORS.length)],
+      notes: '',
+      itemNote: '',
+      timestamp,
+    }
+  }
+  return history
+}
+
+// Sold/received drafts for a share of the items, as typed on the stocktake page.
+export const createSyntheticDrafts = (inventory, { share = 0.1, seed = 1 } = {}) => {
+  const random = createRandom(seed + 2)
+  const drafts = []
+  inventory.forEach((item) => {
+    if (random() >= share) {
+      return
+    }
+    drafts.push({
+      id: item.id,
+      draftSold: String(Math.min(item.currentCount, Math.floor(random() * 10))),
+      draftReceived: random() < 0.4 ? String(1 + Math.floor(random() * 24)) : '',
+    })
+  })
+  return drafts
+}
+
+export const createSyntheticWorkbookData = (options = {}) => {
+  const config = { ...DEFAULT_SYNTHETIC_OPTIONS, ...options }
+  const inventory = createSyntheticInventory(config)
+  const history = createSyntheticHistory(inventory, config)
+  const metadata = {
+    sourceFileName: `synthetic-${config.skus}.xlsx`,
+    lastImportedAt: config.endAt,
+    lastStocktakeAt: history[0]?.timestamp ?? null,
+  }
+  return { inventory, history, metadata }
+}
@@ -0,0 +1,96 @@
+// Full workbook export: time and size `createUpdatedWorkbook` (shared style table, rows written
+// from the arrays, zip streamed through CompressionStream) against the path it replaced, which
+// built each sheet with json_to_sheet, spread a style object into every styled cell and wrote
+// the workbook with XLSX.write. The old path is reproduced here against xlsx-js-style.
+// Run with `npm run bench -- workbookWriter`.
+import { createSyntheticWorkbookData, optionsForRows } from './synthetic.js'
+
+const ROWS = 100_000
+const REPEATS = 3
+
+const median = async (fn) => {
+  const samples = []
+  let result = null
+  for (let run = 0; run < REPEATS; run += 1) {
+    const start = performance.now()
+    result = await fn()
+    samples.push(performance.now() - start)
+  }
+  samples.sort((a, b) => a - b)
+  return { ms: samples[Math.floor(samples.length / 2)], bytes: result.length ?? result.byteLength }
+}
+
+const HEADER_STYLE = {
+  fill: { patternType: 'solid', fgColor: { rgb: '4F46E5' } },
+  font: { bold: true, color: { rgb: 'FFFFFF' } },
+  alignment: { horizontal: 'center', vertical: 'center', wrapText: true },
+}
+
+const legacyWorkbook = (XLSX, inventory, metadata, history) => {
+  const styleRow = (worksheet, columnCount) => {
+    for (let column = 0; column < columnCount; column += 1) {
+      const cell = worksheet[XLSX.utils.encode_cell({ r: 0, c: column })]
+      if (cell) cell.s = { ...(cell.s ?? {}), ...HEADER_STYLE }
+    }
+  }
+  const workbook = XLSX.utils.book_new()
+  const inventorySheet = XLSX.utils.json_to_sheet(
+    inventory.map((item) => ({
+      SKU: item.sku,
+      Item: item.name,
+      Category: item.category,
+      Count: item.currentCount,
+      'Unit Cost': item.unitCost,
+      'Last Updated': item.lastUpdated ? new Date(item.lastUpdated) : '',
+      Notes: item.itemNote || '',
+    })),
+  )
+  styleRow(inventorySheet, 7)
+  XLSX.utils.book_append_sheet(workbook, inventorySheet, metadata.sheetName || 'Stocktake')
+  const movementsSheet = XLSX.utils.json_to_sheet(
+    history.map((entry) => ({
+      SKU: entry.sku,
+      Item: entry.name,
+      Category: entry.category,
+      'Previous Count': entry.previousCount,
+      Sold: entry.sold ?? 0,
+      Received: entry.received ?? 0,
+      'New Count': entry.newCount,
+      Delta: entry.delta,
+      'Unit Cost': entry.unitCost ?? '',
+      'Value Change': entry.valueImpact ?? 0,
+      'Performed By': entry.performedBy || '',
+      Notes: entry.notes || '',
+      'Item Note': entry.itemNote || '',
+      Timestamp: entry.timestamp ? new Date(entry.timestamp) : '',
+    })),
+  )
+  styleRow(movementsSheet, 14)
+  XLSX.utils.book_append_sheet(workbook, movementsSheet, 'Movements')
+  return XLSX.write(workbook, { bookType: 'xlsx', type: 'array', cellDates: true })
+}
+
+const formatMb = (bytes) => `${(bytes / 1024 / 1024).toFixed(2)} MB`
+
+let modules = null
+try {
+  modules = await Promise.all([import('xlsx-js-style'), import('../src/utils/excel.js')])
+} catch (error) {
+  console.log(`xlsx-js-style could not be loaded (${error.code ?? error.message}): run \`npm install\` first.`)
+}
+
+if (modules) {
+  const [XLSX, excel] = modules
+  const { inventory, history, metadata } = createSyntheticWorkbookData(optionsForRows(ROWS))
+  const legacy = await median(() => legacyWorkbook(XLSX, inventory, metadata, history))
+  const current = await median(() => excel.createUpdatedWorkbook(inventory, metadata, history))
+  console.log(
+    `${inventory.length.toLocaleString('en-AU')} items, ${history.length.toLocaleString('en-AU')} movements`,
+  )
+  console.log(`  json_to_sheet + XLSX.write  ${legacy.ms.toFixed(0).padStart(6)} ms  ${formatMb(legacy.bytes)}`)
+  console.log(`  style table + stream       ${current.ms.toFixed(0).padStart(6)} ms  ${formatMb(current.bytes)}`)
+  console.log(
+    `  ${(legacy.ms / current.ms).toFixed(1)}x faster, ` +
+      `${((1 - current.bytes / legacy.bytes) * 100).toFixed(0)}% smaller`,
+  )
+}
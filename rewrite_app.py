@@ -1,14 +1,39 @@
 ﻿from pathlib import Path
 content = """import { useCallback, useMemo, useRef, useState } from 'react'
 import * as XLSX from 'xlsx'
+import {
+  addColumn,
+  appendRow,
+  createColumnarTable,
+  createEmptyTable,
+  fillBlankCells,
+  fillColumn,
+  forEachCell,
+  readRow,
+  removeRow,
+  setCells,
+  sumColumn,
+  tableRows,
+  tableToMatrix,
+} from './utils/columnarTable.js'
+import {
+  attachColumnSchema,
+  columnSchemaFor,
+  inferColumnSchema,
+  loadRoleOverrides,
+  saveRoleOverrides,
+  setColumnRole,
+} from './utils/columnSchema.js'
+import { parseNumber } from './utils/numbers.js'
 
-const initialTable = { columns: [], rows: [] }
 const initialStatus = {
   type: 'idle',
   message: 'Drop an .xlsx file or use the uploader to begin.',
 }
 
 const DEFAULT_USED_LABEL = 'Units Sold'
+const STOCKTAKE_CARD_HEIGHT = 176
+const STOCKTAKE_OVERSCAN = 6
 const DEFAULT_RECEIVED_LABEL = 'Units Received'
 
 const templateColumns = [
@@ -59,9 +84,6 @@ const templateSeedRows = [
   },
 ]
 
-const createRowId = () =>
-  globalThis.crypto?.randomUUID?.() ?? `row-${Date.now()}-${Math.random().toString(16).slice(2)}`
-
 const normalizeColumns = (candidates = []) => {
   const seen = new Set()
   return candidates.map((candidate, index) => {
@@ -103,53 +125,128 @@ const sanitizeFileFragment = (value) =>
     .replace(/-+/g, '-')
     .replace(/^-|-$/g, '') || 'updated'
 
-const coerceNumeric = (candidate) => {
-  if (candidate === null || candidate === undefined || candidate === '') return 0
-  const parsed = Number.parseFloat(candidate)
-  return Number.isFinite(parsed) ? parsed : 0
+const computeVisibleRange = (rowCount, scrollTop, viewportHeight, rowHeight, overscan) => {
+  const start = Math.max(0, Math.min(rowCount, Math.floor(scrollTop / rowHeight) - overscan))
+  const end = Math.max(start, Math.min(rowCount, Math.ceil((scrollTop + viewportHeight) / rowHeight) + overscan))
+  return { start, end, paddingTop: start * rowHeight, paddingBottom: (rowCount - end) * rowHeight }
 }
 
-const applyMovementDefaults = (columns, rows) => {
-  const find = (regex) => columns.find((column) => regex.test(column))
-  const usedColumn = find(/(used|sold|outgoing|shipped|consumed|spent)/i)
-  const receivedColumn = find(/(received|added|incoming|brought|restock|purchased|bought)/i)
+// Trigram index over the lower-cased text of selected columns, keyed by __rowId. Rows are
+// re-indexed only when their object changes and their indexed text actually differs.
+const SEARCH_GRAM_LENGTH = 3
 
-  rows.forEach((row) => {
-    if (usedColumn && (row[usedColumn] === '' || row[usedColumn] === undefined)) {
-      row[usedColumn] = 0
+const createRowSearchIndex = () => ({ columnsKey: '', rows: new Map(), texts: new Map(), grams: new Map() })
+
+const forEachGram = (texts, callback) => {
+  const seen = new Set()
+  texts.forEach((text) => {
+    for (let start = 0; start + SEARCH_GRAM_LENGTH <= text.length; start += 1) {
+      const gram = text.slice(start, start + SEARCH_GRAM_LENGTH)
+      if (!seen.has(gram)) {
+        seen.add(gram)
+        callback(gram)
+      }
     }
-    if (receivedColumn && (row[receivedColumn] === '' || row[receivedColumn] === undefined)) {
-      row[receivedColumn] = 0
+  })
+}
+
+const unindexRow = (index, rowId) => {
+  forEachGram(index.texts.get(rowId) ?? [], (gram) => {
+    const postings = index.grams.get(gram)
+    postings.delete(rowId)
+    if (!postings.size) index.grams.delete(gram)
+  })
+  index.rows.delete(rowId)
+  index.texts.delete(rowId)
+}
+
+const syncRowSearchIndex = (index, columns, rows) => {
+  const columnsKey = columns.join('\u0000')
+  if (columnsKey !== index.columnsKey) {
+    index.columnsKey = columnsKey
+    index.rows.clear()
+    index.texts.clear()
+    index.grams.clear()
+  }
+  const live = new Set()
+  rows.forEach((row) => {
+    const rowId = row.__rowId
+    live.add(rowId)
+    if (index.rows.get(rowId) === row) return
+    const texts = columns.map((column) => `${row[column] ?? ''}`.toLowerCase())
+    const previous = index.texts.get(rowId)
+    if (previous && previous.every((text, position) => text === texts[position])) {
+      index.rows.set(rowId, row)
+      return
     }
+    if (previous) unindexRow(index, rowId)
+    index.rows.set(rowId, row)
+    index.texts.set(rowId, texts)
+    forEachGram(texts, (gram) => {
+      const postings = index.grams.get(gram)
+      if (postings) postings.add(rowId)
+      else index.grams.set(gram, new Set([rowId]))
+    })
   })
+  if (live.size !== index.rows.size) {
+    Array.from(index.rows.keys()).forEach((rowId) => {
+      if (!live.has(rowId)) unindexRow(index, rowId)
+    })
+  }
+  return index
+}
+
+// Row ids whose indexed text contains `needle` (already trimmed and lower-cased).
+const searchRowIndex = (index, needle) => {
+  const matches = new Set()
+  const confirm = (rowId) => {
+    if (index.texts.get(rowId)?.some((text) => text.includes(needle))) matches.add(rowId)
+  }
+  if (needle.length < SEARCH_GRAM_LENGTH) {
+    index.texts.forEach((_, rowId) => confirm(rowId))
+    return matches
+  }
+  const postings = []
+  for (let start = 0; start + SEARCH_GRAM_LENGTH <= needle.length; start += 1) {
+    const list = index.grams.get(needle.slice(start, start + SEARCH_GRAM_LENGTH))
+    if (!list) return matches
+    postings.push(list)
+  }
+  postings.sort((a, b) => a.size - b.size)
+  const [smallest, ...rest] = postings
+  smallest.forEach((rowId) => {
+    if (rest.every((list) => list.has(rowId))) confirm(rowId)
+  })
+  return matches
+}
+
+const coerceNumeric = (candidate) => parseNumber(candidate, 0)
+
+const applyMovementDefaults = (table) => {
+  let next = table
+  columnSchemaFor(table).movementColumns.forEach((column) => {
+    next = fillBlankCells(next, column, 0)
+  })
+  return next
 }
 
 const buildTemplateTable = () => {
   const columns = [...templateColumns]
-  const rows = templateSeedRows.map((seed) => {
-    const row = { __rowId: createRowId() }
-    columns.forEach((column) => {
-      row[column] = seed[column] ?? (column === DEFAULT_RECEIVED_LABEL || column === DEFAULT_USED_LABEL ? 0 : '')
-    })
-    return row
-  })
-  const blankRow = { __rowId: createRowId() }
-  columns.forEach((column) => {
-    if (column === 'Week') {
-      blankRow[column] = 'Week 25'
-    } else if (column === DEFAULT_RECEIVED_LABEL || column === DEFAULT_USED_LABEL) {
-      blankRow[column] = 0
-    } else {
-      blankRow[column] = ''
-    }
+  const isMovement = (column) => column === DEFAULT_RECEIVED_LABEL || column === DEFAULT_USED_LABEL
+  return createColumnarTable(columns, templateSeedRows.length + 1, (rowIndex, column) => {
+    const seed = templateSeedRows[rowIndex]
+    if (seed) return seed[column] ?? (isMovement(column) ? 0 : '')
+    if (column === 'Week') return 'Week 25'
+    return isMovement(column) ? 0 : ''
   })
-  return { columns, rows: [...rows, blankRow] }
 }
 
 function App() {
   const fileInputRef = useRef(null)
+  const tableSearchIndexRef = useRef(null)
+  const stockSearchIndexRef = useRef(null)
   const [view, setView] = useState('workspace')
-  const [table, setTable] = useState(initialTable)
+  const [table, setTable] = useState(createEmptyTable)
   const [status, setStatus] = useState(initialStatus)
   const [fileMeta, setFileMeta] = useState({ fileName: '', sheetName: '' })
   const [query, setQuery] = useState('')
@@ -158,71 +255,84 @@ function App() {
   const [nextWeekLabel, setNextWeekLabel] = useState('')
   const [pendingEdits, setPendingEdits] = useState(false)
   const [newColumnName, setNewColumnName] = useState('')
+  const [stockViewport, setStockViewport] = useState({ scrollTop: 0, height: STOCKTAKE_CARD_HEIGHT * 6 })
 
-  const weekColumn = useMemo(
-    () => table.columns.find((column) => column.toLowerCase().includes('week')),
-    [table.columns],
-  )
+  // Inferred once per import and carried on the table; the same object comes back for
+  // every edit until a column is added, so memos keyed on it stay put.
+  const schema = columnSchemaFor(table)
+  const columnMap = schema.roles
+  const weekColumn = columnMap.week
+  const numericColumnSet = schema.numeric
 
-  const numericColumnSet = useMemo(() => {
-    const numericColumns = table.columns.filter((column) =>
-      /(qty|quantity|count|stock|units|cost|price|amount|inventory|opening|closing|sold|received)/i.test(column),
-    )
-    return new Set(numericColumns)
-  }, [table.columns])
-
-  const columnMap = useMemo(() => {
-    const find = (regex) => table.columns.find((column) => regex.test(column))
-    const itemColumn = find(/(item|product|name|description)/i) || find(/(sku|code|id)/i)
-    return {
-      week: find(/week/i),
-      item: itemColumn,
-      sku: find(/(sku|item|product|code|id)/i),
-      opening: find(/(opening|start|begin)/i),
-      received: find(/(received|added|incoming|brought|restock|purchased|bought)/i),
-      used: find(/(used|sold|outgoing|shipped|consumed|spent)/i),
-      closing: find(/(closing|ending|final|remain|available|on\s?hand)/i),
-    }
-  }, [table.columns])
+  // Row objects are rebuilt only for the chunks an edit touched; the rest are reused.
+  const rows = useMemo(() => tableRows(table), [table])
 
   const hasInventoryColumns = useMemo(
-    () => table.rows.length > 0 && Boolean(columnMap.item || columnMap.sku || table.columns[0]),
-    [columnMap.item, columnMap.sku, table.columns, table.rows],
+    () => table.rowCount > 0 && Boolean(columnMap.item || columnMap.sku || table.columns[0]),
+    [columnMap.item, columnMap.sku, table.columns, table.rowCount],
   )
 
   const filteredRows = useMemo(() => {
-    if (!query.trim()) return table.rows
+    if (!query.trim()) return rows
     const needle = query.trim().toLowerCase()
-    return table.rows.filter((row) =>
-      table.columns.some((column) => `${row[column] ?? ''}`.toLowerCase().includes(needle)),
-    )
-  }, [query, table.columns, table.rows])
+    tableSearchIndexRef.current ??= createRowSearchIndex()
+    const index = syncRowSearchIndex(tableSearchIndexRef.current, table.columns, rows)
+    const matches = searchRowIndex(index, needle)
+    return rows.filter((row) => matches.has(row.__rowId))
+  }, [query, rows, table.columns])
 
   const stocktakeRows = useMemo(() => {
-    if (!table.rows.length) return []
+    if (!rows.length) return []
     const descriptors = [columnMap.item, columnMap.sku].filter(Boolean)
     const columnsToSearch = descriptors.length ? descriptors : table.columns.slice(0, 1)
-    if (!stockQuery.trim()) return table.rows
+    if (!stockQuery.trim()) return rows
     const needle = stockQuery.trim().toLowerCase()
-    return table.rows.filter((row) =>
-      columnsToSearch.some((column) => `${row[column] ?? ''}`.toLowerCase().includes(needle)),
+    stockSearchIndexRef.current ??= createRowSearchIndex()
+    const index = syncRowSearchIndex(stockSearchIndexRef.current, columnsToSearch, rows)
+    const matches = searchRowIndex(index, needle)
+    return rows.filter((row) => matches.has(row.__rowId))
+  }, [columnMap.item, columnMap.sku, rows, stockQuery, table.columns])
+
+  const stocktakeWindow = useMemo(() => {
+    const range = computeVisibleRange(
+      stocktakeRows.length,
+      stockViewport.scrollTop,
+      stockViewport.height,
+      STOCKTAKE_CARD_HEIGHT,
+      STOCKTAKE_OVERSCAN,
     )
-  }, [columnMap.item, columnMap.sku, stockQuery, table.columns, table.rows])
+    return { ...range, rows: stocktakeRows.slice(range.start, range.end) }
+  }, [stocktakeRows, stockViewport])
+
+  const handleStocktakeScroll = useCallback((event) => {
+    const { scrollTop, clientHeight } = event.currentTarget
+    setStockViewport((current) =>
+      current.scrollTop === scrollTop && current.height === clientHeight
+        ? current
+        : { scrollTop, height: clientHeight },
+    )
+  }, [])
+
+  const handleStockQueryChange = useCallback((value) => {
+    setStockQuery(value)
+    setStockViewport((current) => ({ ...current, scrollTop: 0 }))
+  }, [])
 
   const stats = useMemo(() => {
-    const quantityColumn = table.columns.find((column) => /(qty|quantity|count|stock|units|closing)/i.test(column))
-    const skuColumn = table.columns.find((column) => /(sku|item|product|code|id)/i.test(column))
-
-    const rowCount = table.rows.length
-    const totalQuantity = quantityColumn
-      ? table.rows.reduce((sum, row) => {
-          const value = Number.parseFloat(row[quantityColumn])
-          return Number.isFinite(value) ? sum + value : sum
-        }, 0)
-      : null
-    const uniqueItems = skuColumn
-      ? new Set(table.rows.map((row) => `${row[skuColumn] ?? ''}`.trim()).filter(Boolean)).size
-      : null
+    const { quantity: quantityColumn, roles } = columnSchemaFor(table)
+    const skuColumn = roles.sku
+
+    const { rowCount } = table
+    const totalQuantity = quantityColumn ? sumColumn(table, quantityColumn) : null
+    let uniqueItems = null
+    if (skuColumn) {
+      const skus = new Set()
+      forEachCell(table, skuColumn, (value) => {
+        const sku = `${value ?? ''}`.trim()
+        if (sku) skus.add(sku)
+      })
+      uniqueItems = skus.size
+    }
 
     return {
       rowCount,
@@ -231,9 +341,9 @@ function App() {
       uniqueItems,
       skuColumn,
     }
-  }, [table.columns, table.rows])
+  }, [table])
 
-  const hasData = table.rows.length > 0
+  const hasData = table.rowCount > 0
 
   const downloadFileName = useMemo(() => {
     const base = fileMeta.fileName || 'inventory'
@@ -259,7 +369,8 @@ function App() {
 
       const rawObjects = XLSX.utils.sheet_to_json(sheet, { defval: '' })
       let columns = []
-      let rows = []
+      let nextTable = null
+      let inferred = null
 
       if (rawObjects.length) {
         const columnSet = new Set()
@@ -270,12 +381,10 @@ function App() {
           })
         })
         columns = normalizeColumns(Array.from(columnSet))
-        rows = rawObjects.map((row) => {
-          const shapedRow = { __rowId: createRowId() }
-          columns.forEach((column) => {
-            shapedRow[column] = row[column] ?? ''
-          })
-          return shapedRow
+        const readCell = (rowIndex, column) => rawObjects[rowIndex][column] ?? ''
+        inferred = inferColumnSchema(columns, rawObjects.length, readCell, loadRoleOverrides(columns))
+        nextTable = createColumnarTable(columns, rawObjects.length, readCell, {
+          isNumeric: (column) => inferred.numeric.has(column),
         })
       } else {
         const matrix = XLSX.utils.sheet_to_json(sheet, { header: 1, defval: '' })
@@ -285,12 +394,10 @@ function App() {
         }
         const headerRow = matrix[0]
         columns = normalizeColumns(headerRow)
-        rows = matrix.slice(1).map((excelRow) => {
-          const shapedRow = { __rowId: createRowId() }
-          columns.forEach((column, index) => {
-            shapedRow[column] = excelRow[index] ?? ''
-          })
-          return shapedRow
+        const readCell = (rowIndex, column, columnIndex) => matrix[rowIndex + 1][columnIndex] ?? ''
+        inferred = inferColumnSchema(columns, matrix.length - 1, readCell, loadRoleOverrides(columns))
+        nextTable = createColumnarTable(columns, matrix.length - 1, readCell, {
+          isNumeric: (column) => inferred.numeric.has(column),
         })
       }
 
@@ -299,17 +406,20 @@ function App() {
         return
       }
 
-      applyMovementDefaults(columns, rows)
+      nextTable = applyMovementDefaults(attachColumnSchema(nextTable, inferred))
 
-      setTable({ columns, rows })
+      setTable(nextTable)
       setFileMeta({ fileName: file.name.replace(/\.(xlsx|xls|csv)$/i, ''), sheetName })
       setQuery('')
       setStockQuery('')
       setPendingEdits(false)
 
-      const weekCol = columns.find((column) => column.toLowerCase().includes('week'))
+      const weekCol = inferred.roles.week
       if (weekCol) {
-        const lastWeek = [...rows].reverse().map((row) => row[weekCol]).find((value) => `${value}`.trim())
+        let lastWeek
+        forEachCell(nextTable, weekCol, (value) => {
+          if (`${value}`.trim()) lastWeek = value
+        })
         const suggestion = suggestNextWeekLabel(lastWeek)
         setNextWeekLabel(suggestion || `${lastWeek ?? ''}`)
       } else {
@@ -318,7 +428,7 @@ function App() {
 
       setStatus({
         type: 'success',
-        message: `Loaded ${rows.length.toLocaleString()} rows from \"${sheetName}\".`,
+        message: `Loaded ${nextTable.rowCount.toLocaleString()} rows from \"${sheetName}\".`,
       })
       setView('workspace')
     } catch (error) {
@@ -373,183 +483,147 @@ function App() {
   )
 
   const handleCellChange = useCallback((rowId, column, value) => {
-    setTable((current) => {
-      const rows = current.rows.map((row) =>
-        row.__rowId === rowId
-          ? {
-              ...row,
-              [column]: value,
-            }
-          : row,
-      )
-      return { ...current, rows }
-    })
+    setTable((current) => setCells(current, rowId, { [column]: value }))
     setPendingEdits(true)
   }, [])
 
   const handleAddRow = useCallback(() => {
     setTable((current) => {
-      const nextRow = { __rowId: createRowId() }
+      const { movementColumns } = columnSchemaFor(current)
+      const nextRow = {}
       current.columns.forEach((column) => {
         if (column === weekColumn && nextWeekLabel) {
           nextRow[column] = nextWeekLabel
-        } else if (/(used|sold|outgoing|shipped|consumed|spent)/i.test(column)) {
-          nextRow[column] = 0
-        } else if (/(received|added|incoming|brought|restock|purchased|bought)/i.test(column)) {
+        } else if (movementColumns.has(column)) {
           nextRow[column] = 0
         } else {
           nextRow[column] = ''
         }
       })
-      return { ...current, rows: [...current.rows, nextRow] }
+      return appendRow(current, nextRow)
     })
     setPendingEdits(true)
   }, [nextWeekLabel, weekColumn])
 
   const handleDuplicateRow = useCallback((rowId) => {
     setTable((current) => {
-      const target = current.rows.find((row) => row.__rowId === rowId)
-      if (!target) return current
-      const duplicate = { __rowId: createRowId() }
-      current.columns.forEach((column) => {
-        duplicate[column] = target[column]
-      })
-      return { ...current, rows: [...current.rows, duplicate] }
+      const target = readRow(current, rowId)
+      return target ? appendRow(current, target) : current
     })
     setPendingEdits(true)
   }, [])
 
   const handleDeleteRow = useCallback((rowId) => {
-    setTable((current) => ({
-      columns: current.columns,
-      rows: current.rows.filter((row) => row.__rowId !== rowId),
-    }))
+    setTable((current) => removeRow(current, rowId))
     setPendingEdits(true)
   }, [])
 
   const handleApplyWeekLabel = useCallback(() => {
     if (!weekColumn || !nextWeekLabel.trim()) return
-    setTable((current) => {
-      const rows = current.rows.map((row) => ({
-        ...row,
-        [weekColumn]: nextWeekLabel,
-      }))
-      return { ...current, rows }
-    })
+    setTable((current) => fillColumn(current, weekColumn, nextWeekLabel))
     setPendingEdits(true)
     setStatus({ type: 'success', message: `Applied \"${nextWeekLabel}\" to the ${weekColumn} column.` })
   }, [nextWeekLabel, weekColumn])
 
   const handleAddColumn = useCallback(
     (name) => {
-      setTable((current) => {
-        const uniqueName = ensureUniqueColumnName(name, current.columns)
-        const columns = [...current.columns, uniqueName]
-        const rows = current.rows.map((row) => ({
-          ...row,
-          [uniqueName]: '',
-        }))
-        return { columns, rows }
-      })
+      setTable((current) => addColumn(current, ensureUniqueColumnName(name, current.columns), ''))
       setPendingEdits(true)
       setStatus({ type: 'success', message: `Added \"${name}\" column.` })
     },
     [],
   )
 
+  // Pins (or, with null, clears) the column used for a role. Saved against this column
+  // layout, so the next import of a file with the same headers starts from it.
+  const handleColumnRoleChange = useCallback(
+    (role, column) => {
+      const next = setColumnRole(table, role, column)
+      const nextSchema = columnSchemaFor(next)
+      saveRoleOverrides(next.columns, nextSchema.overrides)
+      setTable((current) =>
+        current.columns === next.columns ? attachColumnSchema(current, nextSchema) : current,
+      )
+      setStatus({
+        type: 'success',
+        message: column ? `Using \"${column}\" as the ${role} column.` : `No column is used as the ${role} column.`,
+      })
+    },
+    [table],
+  )
+
   const handleAdjustmentChange = useCallback(
     (rowId, type, rawValue) => {
-      const numericValue = Number.parseFloat(rawValue)
-      const parsedValue =
-        rawValue === ''
-          ? ''
-          : Number.isFinite(numericValue)
-            ? Math.max(numericValue, 0)
-            : 0
+      const parsedValue = rawValue === '' ? '' : Math.max(parseNumber(rawValue, 0), 0)
 
       const itemHeader = columnMap.item || columnMap.sku || table.columns[0]
-      const sourceRow = table.rows.find((row) => row.__rowId === rowId)
+      const sourceRow = readRow(table, rowId)
       const itemName = itemHeader && sourceRow ? sourceRow[itemHeader] : ''
 
       setTable((current) => {
         const columns = [...current.columns]
         const newColumns = []
-        const usedRegex = /(used|sold|outgoing|shipped|consumed|spent)/i
-        const receivedRegex = /(received|added|incoming|brought|restock|purchased|bought)/i
-        const openingRegex = /(opening|start|begin)/i
-        const closingRegex = /(closing|ending|final|remain|available|on\s?hand)/i
-        const weekRegex = /week/i
-
-        const ensureColumn = (regex, fallbackLabel) => {
-          let name = columns.find((column) => regex.test(column))
+        const { roles } = columnSchemaFor(current)
+        const created = {}
+
+        const ensureColumn = (role, fallbackLabel) => {
+          let name = roles[role] ?? created[role]
           if (!name && fallbackLabel) {
             name = ensureUniqueColumnName(fallbackLabel, columns)
             columns.push(name)
             newColumns.push(name)
+            created[role] = name
           }
           return name
         }
 
         const targetColumn =
           type === 'used'
-            ? ensureColumn(usedRegex, DEFAULT_USED_LABEL)
-            : ensureColumn(receivedRegex, DEFAULT_RECEIVED_LABEL)
+            ? ensureColumn('used', DEFAULT_USED_LABEL)
+            : ensureColumn('received', DEFAULT_RECEIVED_LABEL)
 
         if (!targetColumn) {
           return current
         }
 
-        const openingColumn = ensureColumn(openingRegex, null)
-        const closingColumn = ensureColumn(closingRegex, 'Closing Stock')
-        const weekColumnName = ensureColumn(weekRegex, null)
-        const usedColumn =
-          ensureColumn(usedRegex, type === 'used' ? DEFAULT_USED_LABEL : null) ?? targetColumn
+        const openingColumn = ensureColumn('opening', null)
+        const closingColumn = ensureColumn('closing', 'Closing Stock')
+        const weekColumnName = ensureColumn('week', null)
+        const usedColumn = ensureColumn('used', type === 'used' ? DEFAULT_USED_LABEL : null) ?? targetColumn
         const receivedColumn =
-          ensureColumn(
-            receivedRegex,
-            type === 'received' ? DEFAULT_RECEIVED_LABEL : null,
-          ) ?? targetColumn
+          ensureColumn('received', type === 'received' ? DEFAULT_RECEIVED_LABEL : null) ?? targetColumn
 
         const fillDefaults = new Set([targetColumn, usedColumn, receivedColumn])
 
-        const parseAmount = (value) => {
-          const number = Number.parseFloat(value)
-          return Number.isFinite(number) ? number : 0
+        let nextTable = current
+        newColumns.forEach((column) => {
+          nextTable = addColumn(nextTable, column, fillDefaults.has(column) ? 0 : '')
+        })
+        const row = readRow(nextTable, rowId)
+        if (!row) {
+          return nextTable
         }
 
-        const rows = current.rows.map((row) => {
-          const next = { ...row }
-          newColumns.forEach((column) => {
-            if (!(column in next)) {
-              next[column] = fillDefaults.has(column) ? 0 : ''
-            }
-          })
-
-          if (row.__rowId !== rowId) {
-            return next
-          }
-
-          next[targetColumn] = parsedValue === '' ? '' : Number(parsedValue)
-
-          if (weekColumnName && nextWeekLabel) {
-            next[weekColumnName] = nextWeekLabel
-          }
-
-          const openingValue = openingColumn ? parseAmount(next[openingColumn]) : 0
-          const usedValue = usedColumn ? parseAmount(next[usedColumn]) : 0
-          const receivedValue = receivedColumn ? parseAmount(next[receivedColumn]) : 0
+        const updates = { [targetColumn]: parsedValue === '' ? '' : Number(parsedValue) }
 
-          if (closingColumn) {
-            const closingValue = Math.max(openingValue + receivedValue - usedValue, 0)
-            next[closingColumn] = Number.isFinite(closingValue)
-              ? Number(closingValue.toFixed(2))
-              : next[closingColumn]
-          }
+        if (weekColumnName && nextWeekLabel) {
+          updates[weekColumnName] = nextWeekLabel
+        }
 
-          return next
-        })
+        // Rows are read-only views over the table, so pending updates are overlaid here.
+        const cell = (column) => (column in updates ? updates[column] : row[column])
+        const openingValue = openingColumn ? coerceNumeric(cell(openingColumn)) : 0
+        const usedValue = usedColumn ? coerceNumeric(cell(usedColumn)) : 0
+        const receivedValue = receivedColumn ? coerceNumeric(cell(receivedColumn)) : 0
+
+        if (closingColumn) {
+          const closingValue = Math.max(openingValue + receivedValue - usedValue, 0)
+          updates[closingColumn] = Number.isFinite(closingValue)
+            ? Number(closingValue.toFixed(2))
+            : cell(closingColumn)
+        }
 
-        return { columns, rows }
+        return setCells(nextTable, rowId, updates)
       })
 
       setPendingEdits(true)
@@ -563,13 +637,12 @@ function App() {
 
       setStatus({ type: 'success', message: statusMessage })
     },
-    [columnMap.item, columnMap.sku, nextWeekLabel, table.columns, table.rows],
+    [columnMap.item, columnMap.sku, nextWeekLabel, table],
   )
 
   const handleDownload = useCallback(() => {
     if (!table.columns.length) return
-    const exportRows = table.rows.map(({ __rowId, ...row }) => row)
-    const worksheet = XLSX.utils.json_to_sheet(exportRows, { header: table.columns })
+    const worksheet = XLSX.utils.aoa_to_sheet(tableToMatrix(table))
     const workbook = XLSX.utils.book_new()
     XLSX.utils.book_append_sheet(workbook, worksheet, fileMeta.sheetName || 'Inventory')
     const blob = XLSX.write(workbook, { bookType: 'xlsx', type: 'array' })
@@ -579,12 +652,12 @@ function App() {
     anchor.download = downloadFileName
     anchor.click()
     URL.revokeObjectURL(url)
-    setStatus({ type: 'success', message: `Exported ${exportRows.length.toLocaleString()} rows.` })
+    setStatus({ type: 'success', message: `Exported ${table.rowCount.toLocaleString()} rows.` })
     setPendingEdits(false)
-  }, [downloadFileName, fileMeta.sheetName, table.columns, table.rows])
+  }, [downloadFileName, fileMeta.sheetName, table])
 
   const handleReset = useCallback(() => {
-    setTable(initialTable)
+    setTable(createEmptyTable())
     setStatus(initialStatus)
     setFileMeta({ fileName: '', sheetName: '' })
     setQuery('')
@@ -598,7 +671,7 @@ function App() {
     const template = buildTemplateTable()
     setTable(template)
     setFileMeta({ fileName: 'weekly-inventory', sheetName: 'Inventory Week' })
-    const nextLabel = suggestNextWeekLabel(template.rows[0]?.Week ?? 'Week 1')
+    const nextLabel = suggestNextWeekLabel(tableRows(template)[0]?.Week ?? 'Week 1')
     setNextWeekLabel(nextLabel || 'Week 1')
     setStatus({
       type: 'success',
@@ -623,7 +696,7 @@ function App() {
     const usedValue = row[usedHeader] ?? row[columnMap.used] ?? 0
     const receivedValue = row[receivedHeader] ?? row[columnMap.received] ?? 0
     const closingHeader = columnMap.closing
-    const closingRaw = closingHeader && row[closingHeader] !== undefined ? Number.parseFloat(row[closingHeader]) : null
+    const closingRaw = closingHeader && row[closingHeader] !== undefined ? parseNumber(row[closingHeader], Number.NaN) : null
 
     const formattedClosing =
       closingRaw === null || Number.isNaN(closingRaw)
@@ -1,5 +1,5 @@
 import { Dot } from 'lucide-react'
-import { useEffect, useMemo, useState } from 'react'
+import { Suspense, lazy, useEffect, useMemo, useState } from 'react'
 import {
   APP_PAGES,
   EXCEL_SHEET_NAME,
@@ -7,19 +7,58 @@ import {
   SUMMARY_SHEET_NAME,
 } from './constants.js'
 import { useInventory } from './hooks/useInventory.js'
-import { DemoPage } from './pages/DemoPage.jsx'
-import { HistoryPage } from './pages/HistoryPage.jsx'
-import { StatsPage } from './pages/StatsPage.jsx'
-import { StocktakePage } from './pages/StocktakePage.jsx'
 import { classNames } from './utils/classNames.js'
 
-const PAGE_COMPONENTS = {
-  demo: DemoPage,
-  stocktake: StocktakePage,
-  history: HistoryPage,
-  stats: StatsPage,
+// Each page is its own chunk, fetched the first time its route is opened (or the nav
+// button is hovered), so the first paint only waits for the active page.
+const PAGE_LOADERS = {
+  demo: () => import('./pages/DemoPage.jsx').then((module) => ({ default: module.DemoPage })),
+  stocktake: () =>
+    import('./pages/StocktakePage.jsx').then((module) => ({ default: module.StocktakePage })),
+  history: () => import('./pages/HistoryPage.jsx').then((module) => ({ default: module.HistoryPage })),
+  stats: () => import('./pages/StatsPage.jsx').then((module) => ({ default: module.StatsPage })),
+  // Hidden: reached through #diagnostics only.
+  diagnostics: () =>
+    import('./pages/DiagnosticsPage.jsx').then((module) => ({ default: module.DiagnosticsPage })),
 }
 
+const isKnownPage = (id) => Object.hasOwn(PAGE_LOADERS, id)
+
+const PAGE_COMPONENTS = Object.fromEntries(
+  Object.entries(PAGE_LOADERS).map(([id, load]) => [id, lazy(load)]),
+)
+
+const preloadPage = (id) => {
+  PAGE_LOADERS[id]?.()
+}
+
+// Marks when a route's page first renders, so `performance.getEntriesByType('measure')`
+// shows time-to-interactive per route (from navigation start for the first page, from
+// the click for later ones).
+const measuredPages = new Set()
+
+const markPageInteractive = (id, startMark) => {
+  if (measuredPages.has(id) || typeof performance === 'undefined' || !performance.measure) {
+    return
+  }
+  measuredPages.add(id)
+  const hasStart = startMark && performance.getEntriesByName(startMark).length > 0
+  performance.measure(`page-interactive:${id}`, hasStart ? startMark : undefined)
+}
+
+const PageReady = ({ id, startMark }) => {
+  useEffect(() => {
+    markPageInteractive(id, startMark)
+  }, [id, startMark])
+  return null
+}
+
+const PageFallback = () => (
+  <div className="rounded-3xl border border-white/60 bg-white/60 px-6 py-10 text-center text-sm text-slate-500 shadow-sm">
+    Loading page...
+  </div>
+)
+
 const BRAND_NAME = 'Stocktake Inventory Platform'
 
 export default function App() {
@@ -27,7 +66,7 @@ export default function App() {
   const [activePage, setActivePage] = useState(() => {
     if (typeof window !== 'undefined') {
       const hash = window.location.hash.replace('#', '')
-      if (APP_PAGES.some((page) => page.id === hash)) {
+      if (isKnownPage(hash)) {
         return hash
       }
     }
@@ -40,7 +79,7 @@ export default function App() {
     }
     const handleHashChange = () => {
       const hash = window.location.hash.replace('#', '')
-      if (APP_PAGES.some((page) => page.id === hash)) {
+      if (isKnownPage(hash)) {
         setActivePage(hash)
       }
     }
@@ -54,7 +93,20 @@ export default function App() {
     }
   }, [activePage])
 
-  const CurrentPage = useMemo(() => PAGE_COMPONENTS[activePage] ?? DemoPage, [activePage])
+  const [navigationMark, setNavigationMark] = useState(null)
+  const openPage = (id) => {
+    const mark = `page-open:${id}`
+    if (typeof performance !== 'undefined' && performance.mark && !measuredPages.has(id)) {
+      performance.mark(mark)
+    }
+    setNavigationMark(mark)
+    setActivePage(id)
+  }
+
+  const CurrentPage = useMemo(
+    () => PAGE_COMPONENTS[activePage] ?? PAGE_COMPONENTS.demo,
+    [activePage],
+  )
   const baseInventorySheet = inventoryApi.metadata?.sheetName || EXCEL_SHEET_NAME
   const sheetList = useMemo(() => {
     if (!inventoryApi.metadata?.sourceFileName) {
@@ -107,7 +159,9 @@ export default function App() {
               <button
                 key={page.id}
                 type="button"
-                onClick={() => setActivePage(page.id)}
+                onClick={() => openPage(page.id)}
+                onPointerEnter={() => preloadPage(page.id)}
+                onFocus={() => preloadPage(page.id)}
                 className={classNames(
                   'flex min-w-[140px] flex-col items-start gap-2 rounded-3xl border px-5 py-4 text-left transition hover:-translate-y-0.5 hover:shadow-md focus:outline-none focus-visible:ring-2 focus-visible:ring-indigo-300',
                   isActive ? 'border-indigo-200 bg-white shadow-sm'
@@ -122,7 +176,10 @@ export default function App() {
         </nav>
 
         <main className="mt-10 flex-1">
-          <CurrentPage {...inventoryApi} navigate={setActivePage} />
+          <Suspense fallback={<PageFallback />}>
+            <CurrentPage {...inventoryApi} navigate={openPage} />
+            <PageReady id={activePage} startMark={navigationMark} />
+          </Suspense>
         </main>
 
         <footer className="mt-16 border-t border-white/60 pt-6 text-xs text-slate-500">
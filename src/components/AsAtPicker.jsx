@@ -0,0 +1,75 @@
+import { useState } from 'react'
+import { triggerWorkbookDownload } from '../utils/download.js'
+import { formatDate, formatDateTime, formatNumber } from '../utils/format.js'
+import { Button } from './Button.jsx'
+
+const todayText = () => {
+  const now = new Date()
+  const pad = (value) => String(value).padStart(2, '0')
+  return `${now.getFullYear()}-${pad(now.getMonth() + 1)}-${pad(now.getDate())}`
+}
+
+// The "as at" date shared by the Stats and History pages, for their header actions. Once a
+// date is chosen the stock at the end of that day can be exported as a workbook.
+export const AsAtPicker = ({ asAt, setAsAt, exportAsAtBytes, sourceFileName }) => {
+  const [isExporting, setIsExporting] = useState(false)
+
+  const handleExport = async () => {
+    setIsExporting(true)
+    try {
+      const bytes = await exportAsAtBytes()
+      if (bytes) {
+        const baseName = sourceFileName ? sourceFileName.replace(/\.xlsx?$/i, '') : 'stocktake-control'
+        triggerWorkbookDownload(bytes, `${baseName}-as-at-${asAt}.xlsx`)
+      }
+    } catch (err) {
+      console.error(err)
+    } finally {
+      setIsExporting(false)
+    }
+  }
+
+  return (
+    <>
+      <label htmlFor="as-at-date" className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">
+        As at
+      </label>
+      <input
+        id="as-at-date"
+        type="date"
+        value={asAt}
+        max={todayText()}
+        onChange={(event) => setAsAt(event.target.value)}
+        className="rounded-full border border-slate-200 bg-white px-3 py-2 text-sm text-slate-700 focus:border-indigo-400 focus:outline-none focus:ring-2 focus:ring-indigo-200"
+      />
+      {asAt ? (
+        <>
+          <Button variant="ghost" onClick={() => setAsAt('')}>
+            Now
+          </Button>
+          <Button variant="secondary" onClick={handleExport} isLoading={isExporting}>
+            Export as at
+          </Button>
+        </>
+      ) : null}
+    </>
+  )
+}
+
+// How the figures for an "as at" date were worked out.
+export const AsAtNote = ({ position }) => {
+  if (!position) {
+    return null
+  }
+  const source = position.basedOn
+    ? `the snapshot of ${formatDateTime(position.basedOn)}`
+    : 'the current inventory'
+  const method = position.exact
+    ? `replaying ${formatNumber(position.movements)} movements from ${source}`
+    : `rolling back ${formatNumber(position.movements)} movements from ${source}; values are at average cost`
+  return (
+    <p className="rounded-2xl border border-indigo-100 bg-indigo-50/60 px-4 py-3 text-sm text-slate-600">
+      Stock as at the end of {formatDate(position.asAt)}, worked out by {method}.
+    </p>
+  )
+}
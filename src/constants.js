@@ -53,10 +53,56 @@ export const DEFAULT_TEMPLATE_ROWS = [
 export const EXCEL_SHEET_NAME = 'Stocktake'
 export const HISTORY_SHEET_NAME = 'Movements'
 export const SUMMARY_SHEET_NAME = 'Summary'
+export const DELTA_ITEMS_SHEET_NAME = 'Changed Items'
+export const DELTA_SUMMARY_SHEET_NAME = 'Delta'
 
 export const EXCEL_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
 export const MOVEMENT_WINDOW_DAYS = 30
+export const MOVEMENT_WINDOW_OPTIONS = [7, 30, 90, 365]
+
+// Cost-layer compaction (see mergeCostLayers). At 0, the default, only neighbouring layers
+// with the same cost and receipt time merge, which never changes a valuation or a FIFO
+// cost. Setting a step merges layers whose costs round to the same step, and a bucket
+// merges layers received within the same bucket of days, at a quantity-weighted cost: a
+// SKU restocked daily keeps one layer per bucket, but later sales are costed at that
+// average rather than at each delivery's own cost.
+export const COST_LAYER_COST_STEP = 0
+export const COST_LAYER_AGE_BUCKET_DAYS = 0
+
+// Workbooks at or above this size are converted in row chunks with progress updates. The
+// browser still parses the whole file first; only the Python reader streams it.
+export const CHUNKED_IMPORT_THRESHOLD_BYTES = 2 * 1024 * 1024
+export const IMPORT_CHUNK_ROWS = 2000
+
+// Stocktake and History tables only mount the rows in view plus this many either side
+export const TABLE_ROW_HEIGHT_PX = 60
+export const TABLE_OVERSCAN_ROWS = 8
+
+// Inventory, history and metadata are kept in IndexedDB and restored on startup
+export const PERSIST_DATABASE_NAME = 'stocktake-inventory'
+export const PERSIST_DATABASE_VERSION = 2
+export const PERSIST_DEBOUNCE_MS = 400
+
+// Commits keep a snapshot of counts and cost layers every so many commits or days, so stock
+// as at a past date replays only the movements since the snapshot before it. Past the limit
+// they are thinned out evenly, keeping the first (taken at import); earlier dates are
+// rolled back from it.
+export const SNAPSHOT_EVERY_COMMITS = 25
+export const SNAPSHOT_EVERY_DAYS = 7
+export const SNAPSHOT_LIMIT = 24
+
+// Reorder suggestions: daily use and its variability over the lookback, a reorder point
+// covering the supplier lead time plus safety stock at the service level's z-score (1.65 is
+// about 95%), and orders up to the use expected over the lead time and review period
+export const REPLENISHMENT_LOOKBACK_DAYS = 90
+export const REPLENISHMENT_LEAD_TIME_DAYS = 7
+export const REPLENISHMENT_REVIEW_DAYS = 7
+export const REPLENISHMENT_SERVICE_Z = 1.65
+
+// Tabs counting together share drafts on this channel, at most once per debounce
+export const SESSION_CHANNEL_NAME = 'stocktake-session'
+export const SESSION_BROADCAST_DEBOUNCE_MS = 300
 
 export const AUTO_SKU_PREFIX = 'SKU-'
 export const AUTO_SKU_PAD_LENGTH = 4
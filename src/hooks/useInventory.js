@@ -1,17 +1,75 @@
-import { useCallback, useMemo, useState } from 'react'
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react'
+import { MOVEMENT_WINDOW_DAYS, SESSION_BROADCAST_DEBOUNCE_MS } from '../constants.js'
 import {
-  AUTO_SKU_PAD_LENGTH,
-  AUTO_SKU_PREFIX,
-  MOVEMENT_WINDOW_DAYS,
-  OPTIONAL_COLUMNS,
-} from '../constants.js'
+  addMovementsToRollup,
+  createMovementRollup,
+  rankMovers,
+  summariseMovementWindow,
+} from '../utils/analytics.js'
+import { bulkRowsFromInventory, parseBulkItemText, prepareBulkItems } from '../utils/bulkItems.js'
 import {
-  createBlankTemplateWorkbook,
-  createTemplateWorkbook,
-  createUpdatedWorkbook,
-  parseInventoryWorkbook,
-} from '../utils/excel.js'
+  attributeMergedEntries,
+  changeSetFromStore,
+  createSessionId,
+  isChangeSet,
+  mergeChangeSets,
+  parseChangeSet,
+  remainingDrafts,
+  summariseChangeSet,
+  upsertChangeSet,
+} from '../utils/changeSets.js'
+import {
+  calculateLayersQuantity,
+  createInitialCostLayers,
+  ensureFiniteNumber,
+  parseAdjustment,
+  summariseCostImpact,
+} from '../utils/costing.js'
+import {
+  appendHistory,
+  createHistoryIndex,
+  historyAddedSince,
+  historyToArray,
+  latestHistoryTimestamp,
+  queryHistory,
+  selectionEntries,
+} from '../utils/historyIndex.js'
+import {
+  clearStoreDrafts,
+  commitStoreDrafts,
+  createInventoryStore,
+  getStoreItem,
+  prependStoreItem,
+  prependStoreItems,
+  replaceStoreDrafts,
+  searchStoreItems,
+  storeCategoryBreakdown,
+  storeHasDrafts,
+  storeTotals,
+  summariseStoreDrafts,
+  updateStoreItem,
+} from '../utils/inventoryStore.js'
+import { normaliseManualString } from '../utils/normalise.js'
 import { parseNumericInput } from '../utils/numbers.js'
+import { createPersistenceQueue, loadPersistedInventory, openInventoryDatabase } from '../utils/persistence.js'
+import { profileStage, profileStageAsync } from '../utils/profiler.js'
+import { planReplenishment, topReorderSuggestions, updateDemand } from '../utils/replenishment.js'
+import { openSessionChannel } from '../utils/sessionChannel.js'
+import { computeNextSkuNumber, formatAutoSku } from '../utils/skus.js'
+import {
+  addSnapshot,
+  createSnapshot,
+  endOfDayEpoch,
+  reconstructInventoryAt,
+  shouldTakeSnapshot,
+  snapshotFromRecord,
+} from '../utils/snapshots.js'
+import {
+  exportDeltaInBackground,
+  exportWorkbookInBackground,
+  importWorkbookInBackground,
+  mergeDeltasInBackground,
+} from '../utils/workbookWorker.js'
 
 const INITIAL_METADATA = {
   sourceFileName: '',
@@ -19,362 +77,360 @@ const INITIAL_METADATA = {
   lastStocktakeAt: null,
   sheetName: null,
   nextSkuNumber: 1,
+  lastExportedAt: null,
+  unexportedItemIds: [],
+  commitsSinceSnapshot: 0,
 }
 
-const EPSILON = 1e-9
-
-const ensureFiniteNumber = (value, fallback = 0) => {
-  const numeric = Number(value)
-  return Number.isFinite(numeric) ? numeric : fallback
-}
-
-const normaliseUnitCost = (value) => ensureFiniteNumber(value, 0)
-
-const createInitialCostLayers = (quantity, unitCost, acquiredAt = null) => {
-  const normalisedQuantity = ensureFiniteNumber(quantity, 0)
-  if (normalisedQuantity <= EPSILON) {
-    return []
+export const useInventory = () => {
+  const [store, setStore] = useState(() => createInventoryStore())
+  const storeRef = useRef(store)
+  const [historyIndex, setHistoryIndex] = useState(() => createHistoryIndex())
+  const historyRef = useRef(historyIndex)
+  const [metadata, setMetadata] = useState(INITIAL_METADATA)
+  const [error, setError] = useState(null)
+  const [isLoading, setIsLoading] = useState(false)
+  const [importProgress, setImportProgress] = useState(null)
+
+  const [isRestored, setIsRestored] = useState(false)
+  const [movementWindowDays, setMovementWindowDays] = useState(MOVEMENT_WINDOW_DAYS)
+  // Point-in-time snapshots (oldest first) and the "as at" date the Stats and History
+  // pages are showing, as yyyy-mm-dd; empty for now.
+  const [snapshots, setSnapshots] = useState([])
+  const snapshotsRef = useRef(snapshots)
+  const commitsSinceSnapshotRef = useRef(0)
+  const [asAt, setAsAt] = useState('')
+
+  const importControllerRef = useRef(null)
+  const rollupRef = useRef(null)
+  const demandRef = useRef(null)
+  // Items changed since the last export, read synchronously by a delta export that
+  // follows a commit. Mirrored into metadata so it survives a reload.
+  const exportStateRef = useRef({ lastExportedAt: null, itemIds: new Set() })
+  const databaseRef = useRef(null)
+  const persistenceRef = useRef(null)
+  const inventory = store.items
+
+  // This tab's counting session. Its drafts are its change set; other operators' sets
+  // arrive over the session channel or as files and are merged in at commit.
+  const sessionRef = useRef(null)
+  const channelRef = useRef(null)
+  const [sessionOperator, setSessionOperatorState] = useState('')
+  const [peerChangeSets, setPeerChangeSets] = useState(() => new Map())
+  const peersRef = useRef(peerChangeSets)
+  const [isSessionShared, setIsSessionShared] = useState(false)
+
+  if (!persistenceRef.current) {
+    databaseRef.current = openInventoryDatabase()
+    persistenceRef.current = createPersistenceQueue(databaseRef.current)
+    sessionRef.current = { id: createSessionId(), operator: '', revision: 0, sentLines: 0 }
   }
-  return [
-    {
-      quantity: normalisedQuantity,
-      unitCost: normaliseUnitCost(unitCost),
-      acquiredAt,
-    },
-  ]
-}
 
-const mergeCostLayers = (layers = []) => {
-  return layers.reduce((acc, layer) => {
-    const quantity = ensureFiniteNumber(layer.quantity, 0)
-    if (quantity <= EPSILON) {
-      return acc
-    }
-    const unitCost = normaliseUnitCost(layer.unitCost)
-    const acquiredAt = layer.acquiredAt || null
-    const previous = acc[acc.length - 1]
-    if (
-      previous &&
-      Math.abs(previous.unitCost - unitCost) <= EPSILON &&
-      ((previous.acquiredAt && acquiredAt && previous.acquiredAt === acquiredAt) ||
-        !previous.acquiredAt ||
-        !acquiredAt)
-    ) {
-      previous.quantity += quantity
-      return acc
+  // Every store change goes through here so callbacks can read the latest store
+  // synchronously without re-creating themselves on each keystroke.
+  const commitStore = useCallback((nextStore) => {
+    if (nextStore === storeRef.current) {
+      return
     }
-    acc.push({
-      quantity,
-      unitCost,
-      acquiredAt,
-    })
-    return acc
+    storeRef.current = nextStore
+    setStore(nextStore)
   }, [])
-}
-
-const calculateLayersQuantity = (layers = []) =>
-  layers.reduce((acc, layer) => acc + ensureFiniteNumber(layer.quantity, 0), 0)
 
-const calculateLayersValue = (layers = []) =>
-  layers.reduce(
-    (acc, layer) =>
-      acc + ensureFiniteNumber(layer.quantity, 0) * normaliseUnitCost(layer.unitCost),
-    0,
-  )
-
-const computeCostMovement = ({
-  layers = [],
-  sold = 0,
-  received = 0,
-  unitCost = 0,
-  timestamp = null,
-}) => {
-  const workingLayers = layers
-    .map((layer) => ({
-      quantity: ensureFiniteNumber(layer.quantity, 0),
-      unitCost: normaliseUnitCost(layer.unitCost),
-      acquiredAt: layer.acquiredAt || null,
-    }))
-    .filter((layer) => layer.quantity > EPSILON)
+  // Same for history, so an export straight after a commit includes its movements.
+  const commitHistory = useCallback((nextIndex) => {
+    historyRef.current = nextIndex
+    setHistoryIndex(nextIndex)
+  }, [])
 
-  let remainingSold = Math.max(0, ensureFiniteNumber(sold, 0))
-  let soldValue = 0
-  const remainderLayers = []
+  const commitSnapshots = useCallback((nextSnapshots) => {
+    snapshotsRef.current = nextSnapshots
+    setSnapshots(nextSnapshots)
+  }, [])
 
-  workingLayers.forEach((layer) => {
-    if (remainingSold <= EPSILON) {
-      remainderLayers.push({ ...layer })
-      return
+  // Persisted snapshots, or a first one of the loaded inventory as at its latest movement
+  // when there are none (a workbook import, or a database from before snapshots).
+  const restoreSnapshots = useCallback((records, nextStore, nextHistory, nextMetadata) => {
+    if (records?.length) {
+      commitSnapshots(records.map(snapshotFromRecord))
+      commitsSinceSnapshotRef.current = nextMetadata.commitsSinceSnapshot ?? 0
+      return null
     }
-    const consume = Math.min(layer.quantity, remainingSold)
-    if (consume > EPSILON) {
-      soldValue += consume * layer.unitCost
-      remainingSold -= consume
+    const baseline = createSnapshot(
+      nextStore,
+      latestHistoryTimestamp(nextHistory) ?? nextMetadata.lastImportedAt ?? null,
+    )
+    commitSnapshots([baseline])
+    commitsSinceSnapshotRef.current = 0
+    return baseline
+  }, [commitSnapshots])
+
+  // Counts a commit that recorded movements, snapshotting `nextStore` when one is due.
+  // Returns the commits since the latest snapshot, for metadata.
+  const recordCommit = useCallback((nextStore, timestamp) => {
+    const commitsSince = commitsSinceSnapshotRef.current + 1
+    if (!shouldTakeSnapshot(snapshotsRef.current, commitsSince, Date.parse(timestamp))) {
+      commitsSinceSnapshotRef.current = commitsSince
+      return commitsSince
     }
-    const leftover = layer.quantity - consume
-    if (leftover > EPSILON) {
-      remainderLayers.push({
-        quantity: leftover,
-        unitCost: layer.unitCost,
-        acquiredAt: layer.acquiredAt,
-      })
+    const snapshot = createSnapshot(nextStore, timestamp)
+    const { snapshots: nextSnapshots, dropped } = addSnapshot(snapshotsRef.current, snapshot)
+    commitSnapshots(nextSnapshots)
+    persistenceRef.current.putSnapshot(snapshot, dropped)
+    commitsSinceSnapshotRef.current = 0
+    return 0
+  }, [commitSnapshots])
+
+  const commitPeers = useCallback((nextPeers) => {
+    if (nextPeers === peersRef.current) {
+      return
     }
-  })
-
-  if (remainingSold > EPSILON) {
-    const fallbackCost = remainderLayers.length
-      ? remainderLayers[remainderLayers.length - 1].unitCost
-      : normaliseUnitCost(unitCost)
-    soldValue += remainingSold * fallbackCost
-    remainingSold = 0
-  }
+    peersRef.current = nextPeers
+    setPeerChangeSets(nextPeers)
+  }, [])
 
-  const receivedQuantity = Math.max(0, ensureFiniteNumber(received, 0))
-  const receivedUnitCost = normaliseUnitCost(unitCost)
-  let receivedValue = 0
-  if (receivedQuantity > EPSILON) {
-    receivedValue = receivedQuantity * receivedUnitCost
-    remainderLayers.push({
-      quantity: receivedQuantity,
-      unitCost: receivedUnitCost,
-      acquiredAt: timestamp,
+  const localChangeSet = useCallback(() => {
+    const session = sessionRef.current
+    return changeSetFromStore(storeRef.current, {
+      sessionId: session.id,
+      operator: session.operator,
+      revision: session.revision,
     })
-  }
-
-  const mergedLayers = mergeCostLayers(remainderLayers)
-  const totalQuantity = calculateLayersQuantity(mergedLayers)
-  const soldUnitCost = sold > EPSILON ? soldValue / sold : 0
+  }, [])
 
-  return {
-    layers: mergedLayers,
-    totalQuantity,
-    soldValue,
-    soldUnitCost,
-    receivedValue,
-    receivedUnitCost: receivedQuantity > EPSILON ? receivedUnitCost : 0,
-  }
-}
+  const broadcastChangeSet = useCallback(() => {
+    const session = sessionRef.current
+    session.revision += 1
+    const changeSet = localChangeSet()
+    session.sentLines = changeSet.lines.length
+    channelRef.current?.post({ type: 'change-set', changeSet })
+  }, [localChangeSet])
+
+  const updateItem = useCallback((id, updater) => {
+    const nextStore = updateStoreItem(storeRef.current, id, updater)
+    if (nextStore === storeRef.current) {
+      return false
+    }
+    commitStore(nextStore)
+    persistenceRef.current.putItems([getStoreItem(nextStore, id)])
+    return true
+  }, [commitStore])
 
-const summariseCostImpact = (item, sold, received, timestamp = null) =>
-  computeCostMovement({
-    layers: item?.costLayers ?? [],
-    sold,
-    received,
-    unitCost: item?.unitCost ?? 0,
-    timestamp,
-  })
-
-const normaliseManualString = (value) => {
-  if (value === null || value === undefined) {
-    return ''
-  }
-  return String(value).trim()
-}
+  const resetExportState = useCallback((lastExportedAt, itemIds = []) => {
+    exportStateRef.current = { lastExportedAt, itemIds: new Set(itemIds) }
+  }, [])
 
-const formatAutoSku = (counter) => {
-  const number = String(counter).padStart(AUTO_SKU_PAD_LENGTH, '0')
-  return `${AUTO_SKU_PREFIX}${number}`
-}
+  const markUnexported = useCallback((ids) => {
+    const { itemIds } = exportStateRef.current
+    const sizeBefore = itemIds.size
+    ids.forEach((id) => itemIds.add(id))
+    if (itemIds.size !== sizeBefore) {
+      const unexportedItemIds = Array.from(itemIds)
+      setMetadata((prev) => ({ ...prev, unexportedItemIds }))
+    }
+  }, [])
 
-const extractSkuNumber = (sku) => {
-  if (!sku) {
-    return null
-  }
-  const match = String(sku).match(/(\d+)(?!.*\d)/)
-  return match ? Number.parseInt(match[1], 10) : null
-}
+  // Clears the items an export included, keeping any changed while it was written.
+  const markExported = useCallback((startedAt, exportedIds) => {
+    const { itemIds } = exportStateRef.current
+    exportedIds.forEach((id) => itemIds.delete(id))
+    exportStateRef.current.lastExportedAt = startedAt
+    const unexportedItemIds = Array.from(itemIds)
+    setMetadata((prev) => ({ ...prev, lastExportedAt: startedAt, unexportedItemIds }))
+  }, [])
 
-const computeNextSkuNumber = (items, fallback = 1) => {
-  let max = fallback - 1
-  items.forEach((item) => {
-    const candidate = extractSkuNumber(item.sku)
-    if (candidate && candidate > max) {
-      max = candidate
+  // Restore the last session from IndexedDB unless an import has already started.
+  useEffect(() => {
+    let cancelled = false
+    databaseRef.current
+      .then(loadPersistedInventory)
+      .then((persisted) => {
+        if (cancelled || !persisted || importControllerRef.current || storeRef.current.items.length) {
+          return
+        }
+        persistenceRef.current.restore(persisted)
+        const restoredStore = createInventoryStore(persisted.inventory)
+        const restoredHistory = createHistoryIndex(persisted.history)
+        commitStore(restoredStore)
+        commitHistory(restoredHistory)
+        const restoredMetadata = { ...INITIAL_METADATA, ...persisted.metadata }
+        const baseline = restoreSnapshots(
+          persisted.snapshots,
+          restoredStore,
+          restoredHistory,
+          restoredMetadata,
+        )
+        if (baseline) {
+          persistenceRef.current.putSnapshot(baseline)
+        }
+        resetExportState(restoredMetadata.lastExportedAt, restoredMetadata.unexportedItemIds)
+        setMetadata(restoredMetadata)
+      })
+      .catch((err) => console.error(err))
+      .finally(() => {
+        if (!cancelled) {
+          setIsRestored(true)
+        }
+      })
+    return () => {
+      cancelled = true
     }
-  })
-  return max + 1
-}
-
-const buildHistoryEntry = (
-  item,
-  sold,
-  received,
-  nextCount,
-  timestamp,
-  meta,
-  costSummary = {},
-) => {
-  const delta = nextCount - item.currentCount
-  if (delta === 0 && sold === 0 && received === 0) {
-    return null
-  }
-  const soldValue = ensureFiniteNumber(
-    costSummary.soldValue,
-    sold * normaliseUnitCost(item.unitCost),
-  )
-  const receivedValue = ensureFiniteNumber(
-    costSummary.receivedValue,
-    received * normaliseUnitCost(item.unitCost),
-  )
-  const soldUnitCost = sold > EPSILON ? soldValue / sold : 0
-  const receivedUnitCost =
-    received > EPSILON ? receivedValue / received : costSummary.receivedUnitCost ?? 0
-  const valueImpact = receivedValue - soldValue
-  const unitCost =
-    delta !== 0
-      ? valueImpact / delta
-      : costSummary.receivedUnitCost || costSummary.soldUnitCost || item.unitCost
-  return {
-    id: `${item.id}-${timestamp}`,
-    itemId: item.id,
-    sku: item.sku,
-    name: item.name,
-    category: item.category,
-    previousCount: item.currentCount,
-    newCount: nextCount,
-    sold,
-    received,
-    delta,
-    unitCost,
-    soldValue,
-    receivedValue,
-    soldUnitCost,
-    receivedUnitCost,
-    valueImpact,
-    performedBy: meta?.performedBy || '',
-    notes: meta?.notes || '',
-    itemNote: item?.itemNote || '',
-    timestamp,
-  }
-}
+  }, [commitStore, commitHistory, restoreSnapshots, resetExportState])
 
-const parseAdjustment = (value) => {
-  const parsed = parseNumericInput(value, 0)
-  if (!Number.isFinite(parsed)) {
-    return 0
-  }
-  return Math.max(0, parsed)
-}
+  useEffect(() => {
+    if (isRestored) {
+      persistenceRef.current.putMetadata(metadata)
+    }
+  }, [isRestored, metadata])
+
+  // Another tab committed: reload the committed inventory it persisted and keep only the
+  // drafts this tab entered after the set it consumed was sent.
+  const reloadAfterPeerCommit = useCallback(async ({ consumed = [] }) => {
+    const session = sessionRef.current
+    const consumedIds = new Set(consumed.map((changeSet) => changeSet.sessionId))
+    const peers = new Map(peersRef.current)
+    consumedIds.forEach((sessionId) => peers.delete(sessionId))
+    commitPeers(peers)
+    const persisted = await databaseRef.current.then(loadPersistedInventory)
+    if (!persisted) {
+      return
+    }
+    const own = consumed.find((changeSet) => changeSet.sessionId === session.id)
+    const drafts = remainingDrafts(storeRef.current, own ?? { lines: [] })
+    persistenceRef.current.restore(persisted)
+    const nextStore = replaceStoreDrafts(createInventoryStore(persisted.inventory), drafts)
+    const nextHistory = createHistoryIndex(persisted.history)
+    commitStore(nextStore)
+    commitHistory(nextHistory)
+    const restoredMetadata = { ...INITIAL_METADATA, ...persisted.metadata }
+    const baseline = restoreSnapshots(persisted.snapshots, nextStore, nextHistory, restoredMetadata)
+    if (baseline) {
+      persistenceRef.current.putSnapshot(baseline)
+    }
+    resetExportState(restoredMetadata.lastExportedAt, restoredMetadata.unexportedItemIds)
+    setMetadata(restoredMetadata)
+    persistenceRef.current.putItems(Array.from(nextStore.draftIds, (id) => getStoreItem(nextStore, id)))
+    session.sentLines = -1
+  }, [commitPeers, commitStore, commitHistory, restoreSnapshots, resetExportState])
+
+  useEffect(() => {
+    const channel = openSessionChannel(sessionRef.current.id, (message) => {
+      if (message.type === 'hello') {
+        broadcastChangeSet()
+      } else if (message.type === 'change-set' && isChangeSet(message.changeSet)) {
+        commitPeers(upsertChangeSet(peersRef.current, message.changeSet))
+      } else if (message.type === 'leave' && peersRef.current.has(message.sessionId)) {
+        const peers = new Map(peersRef.current)
+        peers.delete(message.sessionId)
+        commitPeers(peers)
+      } else if (message.type === 'committed') {
+        reloadAfterPeerCommit(message).catch((err) => console.error(err))
+      }
+    })
+    if (!channel) {
+      return undefined
+    }
+    channelRef.current = channel
+    setIsSessionShared(true)
+    channel.post({ type: 'hello' })
+    const leave = () => channel.post({ type: 'leave' })
+    window.addEventListener('pagehide', leave)
+    return () => {
+      window.removeEventListener('pagehide', leave)
+      leave()
+      channel.close()
+      channelRef.current = null
+    }
+  }, [broadcastChangeSet, commitPeers, reloadAfterPeerCommit])
 
-export const useInventory = () => {
-  const [inventory, setInventory] = useState([])
-  const [history, setHistory] = useState([])
-  const [metadata, setMetadata] = useState(INITIAL_METADATA)
-  const [error, setError] = useState(null)
-  const [isLoading, setIsLoading] = useState(false)
+  // Share this tab's drafts once typing pauses; nothing is sent while there are none.
+  useEffect(() => {
+    if (!channelRef.current || (!store.draftIds.size && !sessionRef.current.sentLines)) {
+      return undefined
+    }
+    const timer = setTimeout(broadcastChangeSet, SESSION_BROADCAST_DEBOUNCE_MS)
+    return () => clearTimeout(timer)
+  }, [store, sessionOperator, broadcastChangeSet])
+
+  useEffect(() => {
+    const flushPending = () => persistenceRef.current.flush()
+    window.addEventListener('pagehide', flushPending)
+    return () => window.removeEventListener('pagehide', flushPending)
+  }, [])
 
   const loadFromFile = useCallback(async (file) => {
+    importControllerRef.current?.abort()
+    const controller = new AbortController()
+    importControllerRef.current = controller
     setIsLoading(true)
     setError(null)
+    setImportProgress(null)
     try {
       const buffer = await file.arrayBuffer()
       const {
-        inventory: parsedInventory,
-        history: parsedHistory = [],
         workbookMeta,
-      } = parseInventoryWorkbook(buffer)
-
-      const normalisedInventory = parsedInventory.map((item) => {
-        const currentCount = Number.isFinite(item.currentCount) ? item.currentCount : 0
-        const unitCost = normaliseUnitCost(item.unitCost)
-        const lastCount = Number.isFinite(item.lastCount) ? item.lastCount : currentCount
-        const itemNote = normaliseManualString(
-          item.itemNote || item.note || item[OPTIONAL_COLUMNS.itemNote] || '',
-        )
-        const layerSourceTimestamp =
-          item.lastUpdated || workbookMeta.lastStocktakeAt || workbookMeta.importedAt || null
-        const initialLayers =
-          Array.isArray(item.costLayers) && item.costLayers.length
-            ? mergeCostLayers(item.costLayers)
-            : createInitialCostLayers(currentCount, unitCost, layerSourceTimestamp)
-        const layerQuantity = calculateLayersQuantity(initialLayers)
-        const costLayers =
-          Math.abs(layerQuantity - currentCount) > EPSILON
-            ? createInitialCostLayers(currentCount, unitCost, layerSourceTimestamp)
-            : initialLayers
-        return {
-          ...item,
-          currentCount,
-          lastCount,
-          unitCost,
-          costLayers,
-          draftSold: '',
-          draftReceived: '',
-          itemNote,
-        }
+        inventory: normalisedInventory,
+        history: normalisedHistory,
+      } = await profileStageAsync(
+        'import',
+        () =>
+          importWorkbookInBackground(buffer, {
+            onProgress: setImportProgress,
+            signal: controller.signal,
+          }),
+        { rows: (result) => result.inventory.length + result.history.length },
+      )
+
+      const nextHistory = profileStage('index-history', () => createHistoryIndex(normalisedHistory), {
+        rows: normalisedHistory.length,
       })
-      const normalisedHistory = parsedHistory.map((entry) => {
-        const sold = ensureFiniteNumber(entry.sold, 0)
-        const received = ensureFiniteNumber(entry.received, 0)
-        const unitCost = normaliseUnitCost(entry.unitCost)
-        const soldValue =
-          entry.soldValue !== undefined
-            ? ensureFiniteNumber(entry.soldValue, sold * unitCost)
-            : sold * unitCost
-        const receivedValue =
-          entry.receivedValue !== undefined
-            ? ensureFiniteNumber(entry.receivedValue, received * unitCost)
-            : received * unitCost
-        const soldUnitCost =
-          entry.soldUnitCost !== undefined
-            ? ensureFiniteNumber(entry.soldUnitCost, sold > EPSILON ? soldValue / sold : 0)
-            : sold > EPSILON
-              ? soldValue / sold
-              : 0
-        const receivedUnitCost =
-          entry.receivedUnitCost !== undefined
-            ? ensureFiniteNumber(entry.receivedUnitCost, received > EPSILON ? receivedValue / received : 0)
-            : received > EPSILON
-              ? receivedValue / received
-              : 0
-        const valueImpact =
-          entry.valueImpact !== undefined
-            ? ensureFiniteNumber(entry.valueImpact, receivedValue - soldValue)
-            : receivedValue - soldValue
-        return {
-          ...entry,
-          soldValue,
-          receivedValue,
-          soldUnitCost,
-          receivedUnitCost,
-          valueImpact,
-        }
-      })
-
-      setInventory(normalisedInventory)
-      setHistory(normalisedHistory)
-      setMetadata({
+      const nextMetadata = {
         ...INITIAL_METADATA,
         sourceFileName: file.name,
         sheetName: workbookMeta.sheetName,
         lastImportedAt: workbookMeta.importedAt,
-        lastStocktakeAt: workbookMeta.lastStocktakeAt ?? (normalisedHistory[0]?.timestamp ?? null),
+        lastStocktakeAt: workbookMeta.lastStocktakeAt ?? latestHistoryTimestamp(nextHistory),
         nextSkuNumber: computeNextSkuNumber(normalisedInventory),
+        lastExportedAt: workbookMeta.importedAt,
+      }
+      resetExportState(nextMetadata.lastExportedAt)
+      const nextStore = profileStage('build-store', () => createInventoryStore(normalisedInventory), {
+        rows: normalisedInventory.length,
+      })
+      commitStore(nextStore)
+      commitHistory(nextHistory)
+      const baseline = restoreSnapshots([], nextStore, nextHistory, nextMetadata)
+      setMetadata(nextMetadata)
+      persistenceRef.current.replaceAll({
+        inventory: normalisedInventory,
+        history: normalisedHistory,
+        metadata: nextMetadata,
+        snapshots: [baseline],
       })
       return normalisedInventory.length
     } catch (err) {
-      setError(err)
+      if (err?.name !== 'AbortError') {
+        setError(err)
+      }
       throw err
     } finally {
-      setIsLoading(false)
+      if (importControllerRef.current === controller) {
+        importControllerRef.current = null
+        setIsLoading(false)
+        setImportProgress(null)
+      }
     }
+  }, [commitStore, commitHistory, restoreSnapshots, resetExportState])
+
+  const cancelImport = useCallback(() => {
+    importControllerRef.current?.abort()
   }, [])
 
   const updateDraftAdjustment = useCallback((id, field, rawValue) => {
     if (!['draftSold', 'draftReceived'].includes(field)) {
       return
     }
-    setInventory((prev) =>
-      prev.map((item) =>
-        item.id === id
-          ? {
-              ...item,
-              [field]: rawValue,
-            }
-          : item,
-      ),
-    )
-  }, [])
+    updateItem(id, (item) => (item[field] === rawValue ? item : { ...item, [field]: rawValue }))
+  }, [updateItem])
 
   const previewDraftImpact = useCallback((item) => {
     if (!item) {
@@ -393,14 +449,11 @@ export const useInventory = () => {
   }, [])
 
   const resetDrafts = useCallback(() => {
-    setInventory((prev) =>
-      prev.map((item) => ({
-        ...item,
-        draftSold: '',
-        draftReceived: '',
-      })),
-    )
-  }, [])
+    const draftIds = Array.from(storeRef.current.draftIds)
+    const nextStore = clearStoreDrafts(storeRef.current)
+    commitStore(nextStore)
+    persistenceRef.current.putItems(draftIds.map((id) => getStoreItem(nextStore, id)))
+  }, [commitStore])
 
   const applyStocktake = useCallback((meta = {}) => {
     const operator = normaliseManualString(meta?.performedBy)
@@ -409,109 +462,99 @@ export const useInventory = () => {
     }
     const notes = normaliseManualString(meta?.notes)
     const timestamp = new Date().toISOString()
-    let computedHistory = []
-      setInventory((prev) => {
-        const historyEntries = []
-        const nextInventory = prev.map((item) => {
-          const sold = parseAdjustment(item.draftSold)
-          const received = parseAdjustment(item.draftReceived)
-          const costSummary = summariseCostImpact(item, sold, received, timestamp)
-          const nextCount = costSummary.totalQuantity
-          const historyEntry = buildHistoryEntry(
-            item,
-            sold,
-            received,
-            nextCount,
-            timestamp,
-            {
-              performedBy: operator,
-              notes,
-            },
-            costSummary,
-          )
-          if (historyEntry) {
-            historyEntries.push(historyEntry)
-          }
-          return {
-            ...item,
-            lastCount: item.currentCount,
-            currentCount: nextCount,
-            draftSold: '',
-            draftReceived: '',
-            lastUpdated: historyEntry ? timestamp : item.lastUpdated,
-            costLayers: costSummary.layers,
-          }
+    // Other operators' change sets are summed with this tab's drafts and committed in
+    // the same pass.
+    const ownSet = localChangeSet()
+    const peerSets = Array.from(peersRef.current.values())
+    const merged = peerSets.some((changeSet) => changeSet.lines.length)
+      ? profileStage('merge-change-sets', () => mergeChangeSets([ownSet, ...peerSets], storeRef.current), {
+          rows: (result) => result.lines,
         })
-        computedHistory = historyEntries
-          return nextInventory
-      })
-    let historyToAdd = computedHistory
-    if (!computedHistory.length) {
-      historyToAdd = inventory
-        .filter((item) => (item.lastCount ?? 0) === 0 && item.currentCount > 0)
-        .map((item) => ({
-          id: `${item.id}-${timestamp}-new`,
-          itemId: item.id,
-          sku: item.sku,
-          name: item.name,
-          category: item.category,
-          previousCount: 0,
-          newCount: item.currentCount,
-          sold: 0,
-          received: item.currentCount,
-          delta: item.currentCount,
-          unitCost: item.unitCost,
-          soldValue: 0,
-          receivedValue: item.currentCount * item.unitCost,
-          soldUnitCost: 0,
-          receivedUnitCost: item.unitCost,
-          valueImpact: item.currentCount * item.unitCost,
-          performedBy: operator,
-          notes: notes || 'New item',
-          itemNote: item.itemNote || '',
-          timestamp,
-        }))
+      : null
+    if (merged?.unmatched.length) {
+      console.warn(`${merged.unmatched.length} change-set lines were malformed or matched no item; skipped.`)
+    }
+    const draftedStore = merged ? replaceStoreDrafts(storeRef.current, merged.drafts) : storeRef.current
+    const {
+      store: nextStore,
+      historyEntries,
+      changedIds,
+    } = profileStage(
+      'apply-stocktake',
+      () => commitStoreDrafts(draftedStore, timestamp, { performedBy: operator, notes }),
+      { rows: (result) => result.changedIds.size },
+    )
+    const historyToAdd = merged ? attributeMergedEntries(historyEntries, merged.drafts) : historyEntries
+    commitStore(nextStore)
+    persistenceRef.current.putItems(Array.from(changedIds, (id) => getStoreItem(nextStore, id)))
+    persistenceRef.current.appendMovements(historyToAdd)
+    commitHistory(appendHistory(historyRef.current, historyToAdd))
+    const commitsSinceSnapshot = historyToAdd.length
+      ? recordCommit(nextStore, timestamp)
+      : commitsSinceSnapshotRef.current
+    setMetadata((prev) => ({ ...prev, lastStocktakeAt: timestamp, commitsSinceSnapshot }))
+    markUnexported(changedIds)
+    commitPeers(new Map())
+    const channel = channelRef.current
+    if (channel) {
+      // Other tabs reload from IndexedDB, so the commit has to be written first.
+      persistenceRef.current
+        .flush()
+        .then(() => channel.post({ type: 'committed', timestamp, consumed: [ownSet, ...peerSets] }))
     }
-    setHistory((prev) => [...historyToAdd, ...prev])
-    setMetadata((prev) => ({ ...prev, lastStocktakeAt: timestamp }))
     return historyToAdd
+  }, [commitStore, commitHistory, commitPeers, localChangeSet, markUnexported, recordCommit])
+
+  const setSessionOperator = useCallback((name) => {
+    sessionRef.current.operator = normaliseManualString(name)
+    setSessionOperatorState(name)
   }, [])
 
+  // Change sets saved on other devices (exportChangeSetJson) join the next commit.
+  const importChangeSetFiles = useCallback(async (files) => {
+    const changeSets = await Promise.all(Array.from(files, (file) => file.text().then(parseChangeSet)))
+    let peers = peersRef.current
+    changeSets.forEach((changeSet) => {
+      if (changeSet.sessionId !== sessionRef.current.id) {
+        peers = upsertChangeSet(peers, changeSet)
+      }
+    })
+    commitPeers(peers)
+    return changeSets.length
+  }, [commitPeers])
+
+  const exportChangeSetJson = useCallback(() => JSON.stringify(localChangeSet()), [localChangeSet])
+
   const updateUnitCost = useCallback((id, rawValue) => {
-    setInventory((prev) =>
-      prev.map((item) => {
-        if (item.id !== id) {
-          return item
-        }
-        const parsed = parseNumericInput(rawValue, item.unitCost ?? 0)
-        const nextUnitCost = Math.max(0, ensureFiniteNumber(parsed, item.unitCost ?? 0))
-        return {
-          ...item,
-          unitCost: nextUnitCost,
-        }
-      }),
-    )
-  }, [])
+    const changed = updateItem(id, (item) => {
+      const parsed = parseNumericInput(rawValue, item.unitCost ?? 0)
+      const nextUnitCost = Math.max(0, ensureFiniteNumber(parsed, item.unitCost ?? 0))
+      return nextUnitCost === item.unitCost ? item : { ...item, unitCost: nextUnitCost }
+    })
+    if (changed) {
+      markUnexported([id])
+    }
+  }, [updateItem, markUnexported])
 
   const updateItemNote = useCallback((id, rawValue) => {
-    setInventory((prev) =>
-      prev.map((item) =>
-        item.id === id
-          ? {
-              ...item,
-              itemNote: normaliseManualString(rawValue),
-            }
-          : item,
-      ),
-    )
-  }, [])
+    const itemNote = normaliseManualString(rawValue)
+    const changed = updateItem(id, (item) => (item.itemNote === itemNote ? item : { ...item, itemNote }))
+    if (changed) {
+      markUnexported([id])
+    }
+  }, [updateItem, markUnexported])
 
   const clearInventory = useCallback(() => {
-    setInventory([])
-    setHistory([])
+    commitStore(createInventoryStore())
+    commitHistory(createHistoryIndex())
+    commitSnapshots([])
+    commitsSinceSnapshotRef.current = 0
+    setAsAt('')
+    resetExportState(null)
     setMetadata(INITIAL_METADATA)
     setError(null)
-  }, [])
+    persistenceRef.current.clear()
+  }, [commitStore, commitHistory, commitSnapshots, resetExportState])
 
   const addManualItem = useCallback((partial = {}) => {
     const timestamp = new Date().toISOString()
@@ -538,132 +581,296 @@ export const useInventory = () => {
       costLayers: initialLayers,
       itemNote: notes,
     }
-    setInventory((prev) => [newItem, ...prev])
-    setHistory((prev) => [
-      {
-        id: `${newItem.id}-${timestamp}`,
-        itemId: newItem.id,
-        sku: newItem.sku,
-        name: newItem.name,
-        category: newItem.category,
-        previousCount: 0,
-        newCount: newItem.currentCount,
-        sold: 0,
-        received: newItem.currentCount,
-        delta: newItem.currentCount,
-        unitCost: newItem.unitCost,
-        soldValue: 0,
-        receivedValue: newItem.currentCount * newItem.unitCost,
-        soldUnitCost: 0,
-        receivedUnitCost: newItem.unitCost,
-        valueImpact: newItem.currentCount * newItem.unitCost,
-        performedBy,
-        notes,
-        timestamp,
-      },
-      ...prev,
-    ])
+    const nextStore = prependStoreItem(storeRef.current, newItem)
+    commitStore(nextStore)
+    persistenceRef.current.prependItem(newItem)
+    const openingEntry = {
+      id: `${newItem.id}-${timestamp}`,
+      itemId: newItem.id,
+      sku: newItem.sku,
+      name: newItem.name,
+      category: newItem.category,
+      previousCount: 0,
+      newCount: newItem.currentCount,
+      sold: 0,
+      received: newItem.currentCount,
+      delta: newItem.currentCount,
+      unitCost: newItem.unitCost,
+      soldValue: 0,
+      receivedValue: newItem.currentCount * newItem.unitCost,
+      soldUnitCost: 0,
+      receivedUnitCost: newItem.unitCost,
+      valueImpact: newItem.currentCount * newItem.unitCost,
+      performedBy,
+      notes,
+      timestamp,
+    }
+    commitHistory(appendHistory(historyRef.current, [openingEntry]))
+    persistenceRef.current.appendMovements([openingEntry])
+    const commitsSinceSnapshot = recordCommit(nextStore, timestamp)
     setMetadata((prev) => ({
       ...prev,
       lastStocktakeAt: timestamp,
       nextSkuNumber: nextSkuNumber + 1,
+      commitsSinceSnapshot,
     }))
+    markUnexported([newItem.id])
     return newItem
-  }, [metadata.nextSkuNumber])
+  }, [commitStore, commitHistory, markUnexported, metadata.nextSkuNumber, recordCommit])
+
+  // Many new items in one commit: `rows` from readBulkItemRows. Returns the items added and
+  // the rows skipped, with why.
+  const addItemsInBulk = useCallback((rows, meta = {}) => {
+    const timestamp = new Date().toISOString()
+    const { items, historyEntries, skipped, nextSkuNumber } = profileStage(
+      'bulk-add:prepare',
+      () =>
+        prepareBulkItems(storeRef.current, rows, {
+          nextSkuNumber: metadata.nextSkuNumber ?? 1,
+          timestamp,
+          performedBy: meta.performedBy,
+          notes: meta.notes,
+        }),
+      { rows: rows.length },
+    )
+    if (!items.length) {
+      return { items, skipped }
+    }
+    const nextStore = profileStage('bulk-add:store', () => prependStoreItems(storeRef.current, items), {
+      rows: items.length,
+    })
+    commitStore(nextStore)
+    persistenceRef.current.prependItems(items)
+    commitHistory(appendHistory(historyRef.current, historyEntries))
+    persistenceRef.current.appendMovements(historyEntries)
+    const commitsSinceSnapshot = recordCommit(nextStore, timestamp)
+    setMetadata((prev) => ({ ...prev, lastStocktakeAt: timestamp, nextSkuNumber, commitsSinceSnapshot }))
+    markUnexported(items.map((item) => item.id))
+    return { items, skipped }
+  }, [commitStore, commitHistory, markUnexported, metadata.nextSkuNumber, recordCommit])
+
+  // Rows for addItemsInBulk from pasted text, a CSV/TSV file, or another workbook's
+  // Stocktake sheet.
+  const readBulkItemRows = useCallback(async (source) => {
+    if (typeof source === 'string') {
+      return parseBulkItemText(source)
+    }
+    if (/\.xlsx?$/i.test(source.name ?? '')) {
+      const { inventory: items } = await importWorkbookInBackground(await source.arrayBuffer())
+      return bulkRowsFromInventory(items)
+    }
+    return parseBulkItemText(await source.text())
+  }, [])
 
   const hasInventory = inventory.length > 0
   const hasImported = Boolean(metadata.sourceFileName)
-  const hasDrafts = useMemo(
-    () => inventory.some((item) => parseAdjustment(item.draftSold) > 0 || parseAdjustment(item.draftReceived) > 0),
-    [inventory],
+  const hasDrafts = useMemo(() => storeHasDrafts(store), [store])
+  const sessionPeers = useMemo(
+    () =>
+      Array.from(peerChangeSets.values(), (changeSet) => ({
+        sessionId: changeSet.sessionId,
+        operator: changeSet.operator,
+        updatedAt: changeSet.updatedAt,
+        ...summariseChangeSet(changeSet),
+      })),
+    [peerChangeSets],
+  )
+  const draftSummary = useMemo(() => summariseStoreDrafts(store), [store])
+  const totals = useMemo(() => storeTotals(store), [store])
+  const searchInventory = useCallback(
+    (query, category) => searchStoreItems(store, query, category),
+    [store],
   )
 
-  const draftSummary = useMemo(() => {
-    return inventory.reduce(
-      (acc, item) => {
-        const sold = parseAdjustment(item.draftSold)
-        const received = parseAdjustment(item.draftReceived)
-        if (sold === 0 && received === 0) {
-          return acc
-        }
-        acc.items += 1
-        acc.sold += sold
-        acc.received += received
-        const costPreview = summariseCostImpact(item, sold, received)
-        acc.value += costPreview.receivedValue - costPreview.soldValue
-        return acc
-      },
-      { items: 0, sold: 0, received: 0, value: 0 },
-    )
-  }, [inventory])
-
-  const totals = useMemo(() => {
-    const totalSkus = inventory.length
-    const totalCurrent = inventory.reduce((acc, item) => acc + item.currentCount, 0)
-    const totalLast = inventory.reduce((acc, item) => acc + item.lastCount, 0)
-    const totalValue = inventory.reduce(
-      (acc, item) => acc + calculateLayersValue(item.costLayers ?? []),
-      0,
-    )
-    return {
-      totalSkus,
-      totalCurrent,
-      totalLast,
-      totalDelta: totalCurrent - totalLast,
-      totalValue,
+  // History only grows between imports, so new entries are added to the existing day
+  // buckets; any other change rebuilds them.
+  const movementRollup = useMemo(() => {
+    const cached = rollupRef.current
+    if (cached?.historyIndex === historyIndex) {
+      return cached.rollup
     }
-  }, [inventory])
+    const added = historyAddedSince(historyIndex, cached?.historyIndex)
+    const rollup = added
+      ? profileStage('stats:rollup-append', () => addMovementsToRollup(cached.rollup, added), {
+          rows: added.length,
+        })
+      : profileStage('stats:rollup', () => createMovementRollup(historyToArray(historyIndex)), {
+          rows: historyIndex.length,
+        })
+    rollupRef.current = { historyIndex, rollup }
+    return rollup
+  }, [historyIndex])
+
+  const asAtEpoch = useMemo(() => endOfDayEpoch(asAt), [asAt])
+  const hasAsAt = !Number.isNaN(asAtEpoch)
+
+  // With an "as at" date the window ends on that day.
+  const movementWindow = useMemo(
+    () =>
+      profileStage('stats:window', () =>
+        summariseMovementWindow(movementRollup, movementWindowDays, hasAsAt ? asAtEpoch : undefined),
+      ),
+    [movementRollup, movementWindowDays, hasAsAt, asAtEpoch],
+  )
+  const movementSummary = movementWindow.totals
+  const movers = useMemo(
+    () => profileStage('stats:movers', () => rankMovers(movementWindow.items, store.items, store.indexById)),
+    [movementWindow, store.items, store.indexById],
+  )
+  const categoryBreakdown = useMemo(
+    () => profileStage('stats:categories', () => storeCategoryBreakdown(store), { rows: store.items.length }),
+    [store],
+  )
 
-  const recentMovements = useMemo(() => {
-    if (!history.length) {
-      return []
-    }
-    const windowMs = MOVEMENT_WINDOW_DAYS * 24 * 60 * 60 * 1000
-    const threshold = Date.now() - windowMs
-    return history.filter((entry) => {
-      const timestamp = new Date(entry.timestamp).getTime()
-      return Number.isFinite(timestamp) && timestamp >= threshold
+  // Demand is summed once per history version, and a commit's movements are added to the
+  // arrays already summed. Reorder points follow the counts, so they are planned again
+  // whenever the items change.
+  const replenishment = useMemo(() => {
+    const demand = profileStage('stats:demand', () => updateDemand(demandRef.current, historyIndex), {
+      rows: (result) => result.summed,
+    })
+    demandRef.current = demand
+    const plan = profileStage('stats:replenishment', () => planReplenishment(demand, store.items), {
+      rows: store.items.length,
     })
-  }, [history])
+    return { ...plan, suggestions: topReorderSuggestions(plan) }
+  }, [historyIndex, store.items])
+
+  // Stock as at the chosen date, from the nearest snapshot. The live store stands in as the
+  // latest one.
+  const asAtPosition = useMemo(() => {
+    if (!hasAsAt) {
+      return null
+    }
+    const current = createSnapshot(store, latestHistoryTimestamp(historyIndex))
+    const position = profileStage(
+      'as-at:reconstruct',
+      () => reconstructInventoryAt(snapshots, current, historyIndex, asAtEpoch),
+      { rows: (result) => result?.movements ?? 0 },
+    )
+    return position && { ...position, asAt: new Date(asAtEpoch).toISOString() }
+  }, [hasAsAt, asAtEpoch, snapshots, historyIndex, store])
 
-  const generateBlankTemplateBytes = useCallback(() => createBlankTemplateWorkbook(), [])
-  const generateTemplateBytes = useCallback(() => createTemplateWorkbook(), [])
+  // xlsx-js-style is only fetched when a template is first requested.
+  const generateBlankTemplateBytes = useCallback(
+    () => import('../utils/excel.js').then((excel) => excel.createBlankTemplateWorkbook()),
+    [],
+  )
+  const generateTemplateBytes = useCallback(
+    () => import('../utils/excel.js').then((excel) => excel.createTemplateWorkbook()),
+    [],
+  )
 
   const exportWorkbookBytes = useCallback(
-    (overrides = {}) => {
-      const nextInventory = overrides.inventory ?? inventory
+    async (overrides = {}) => {
+      const startedAt = new Date().toISOString()
+      const exportedIds = Array.from(exportStateRef.current.itemIds)
+      const nextInventory = overrides.inventory ?? storeRef.current.items
       const nextMetadata = overrides.metadata ?? metadata
-      const nextHistory = overrides.history ?? history
-      return createUpdatedWorkbook(nextInventory, nextMetadata, nextHistory)
+      const nextHistory = overrides.history ?? historyToArray(historyRef.current)
+      const bytes = await profileStageAsync(
+        'export',
+        () => exportWorkbookInBackground(nextInventory, nextMetadata, nextHistory),
+        { rows: nextInventory.length + nextHistory.length },
+      )
+      if (!overrides.inventory) {
+        markExported(startedAt, exportedIds)
+      }
+      return bytes
     },
-    [inventory, metadata, history],
+    [metadata, markExported],
+  )
+
+  // Only the items changed and the movements recorded since the last export (or the
+  // import), for merging back into that workbook with mergeDeltaFiles.
+  const exportDeltaBytes = useCallback(async () => {
+    const { lastExportedAt, itemIds } = exportStateRef.current
+    const since = lastExportedAt ? Date.parse(lastExportedAt) : Number.NaN
+    if (Number.isNaN(since)) {
+      return exportWorkbookBytes()
+    }
+    const startedAt = new Date().toISOString()
+    const exportedIds = Array.from(itemIds)
+    const items = exportedIds.map((id) => getStoreItem(storeRef.current, id)).filter(Boolean)
+    const movements = selectionEntries(queryHistory(historyRef.current, { from: since + 1 }))
+    const bytes = await exportDeltaInBackground(items, movements, {
+      sourceFileName: metadata.sourceFileName,
+      since: lastExportedAt,
+    })
+    markExported(startedAt, exportedIds)
+    return bytes
+  }, [exportWorkbookBytes, markExported, metadata.sourceFileName])
+
+  // A full workbook of the stock as at the chosen date, with the movements up to it.
+  const exportAsAtBytes = useCallback(async () => {
+    if (!asAtPosition) {
+      return null
+    }
+    const history = selectionEntries(queryHistory(historyRef.current, { to: asAtEpoch }))
+    return exportWorkbookBytes({
+      inventory: asAtPosition.items,
+      history,
+      metadata: {
+        ...metadata,
+        asAt: asAtPosition.asAt,
+        lastStocktakeAt: history[0]?.timestamp ?? null,
+      },
+    })
+  }, [asAtPosition, asAtEpoch, exportWorkbookBytes, metadata])
+
+  const mergeDeltaFiles = useCallback(
+    async (files) => mergeDeltasInBackground(await Promise.all(Array.from(files, (file) => file.arrayBuffer()))),
+    [],
   )
 
   return {
     inventory,
-    history,
+    historyIndex,
     metadata,
     totals,
     draftSummary,
-    recentMovements,
+    movementSummary,
+    movementWindowDays,
+    setMovementWindowDays,
+    topOutflow: movers.topOutflow,
+    leastMoved: movers.leastMoved,
+    categoryBreakdown,
+    replenishment,
+    asAt,
+    setAsAt,
+    asAtPosition,
+    snapshotCount: snapshots.length,
     hasInventory,
     hasImported,
     hasDrafts,
     isLoading,
+    importProgress,
     error,
     loadFromFile,
+    cancelImport,
     updateDraftAdjustment,
     updateUnitCost,
     updateItemNote,
     previewDraftImpact,
+    searchInventory,
     resetDrafts,
     applyStocktake,
     clearInventory,
     addManualItem,
+    addItemsInBulk,
+    readBulkItemRows,
     generateBlankTemplateBytes,
     generateTemplateBytes,
     exportWorkbookBytes,
+    exportDeltaBytes,
+    exportAsAtBytes,
+    canExportDelta: Boolean(metadata.lastExportedAt),
+    mergeDeltaFiles,
+    sessionOperator,
+    setSessionOperator,
+    sessionPeers,
+    isSessionShared,
+    importChangeSetFiles,
+    exportChangeSetJson,
   }
 }
-
-
@@ -0,0 +1,87 @@
+import { useCallback, useEffect, useRef, useState } from 'react'
+import { TABLE_OVERSCAN_ROWS, TABLE_ROW_HEIGHT_PX } from '../constants.js'
+
+// Used until the scroll container has been measured, e.g. on the first render.
+const FALLBACK_VIEWPORT_ROWS = 20
+
+export const computeRowWindow = ({ rowCount, scrollTop, viewportHeight, rowHeight, overscan }) => {
+  const firstVisible = Math.floor(scrollTop / rowHeight)
+  const lastVisible = Math.ceil((scrollTop + viewportHeight) / rowHeight)
+  const start = Math.max(0, Math.min(rowCount, firstVisible - overscan))
+  const end = Math.max(start, Math.min(rowCount, lastVisible + overscan))
+  return {
+    start,
+    end,
+    paddingTop: start * rowHeight,
+    paddingBottom: (rowCount - end) * rowHeight,
+  }
+}
+
+// Tracks the scroll position of a fixed-height container and reports which slice of
+// `rowCount` equal-height rows should be mounted. Changing `resetKey` (e.g. the active
+// search and filter) scrolls back to the top.
+export const useWindowedRows = (
+  rowCount,
+  { rowHeight = TABLE_ROW_HEIGHT_PX, overscan = TABLE_OVERSCAN_ROWS, resetKey } = {},
+) => {
+  // A callback ref kept in state, so observers attach whenever the table mounts.
+  const [container, containerRef] = useState(null)
+  const frameRef = useRef(null)
+  const [viewport, setViewport] = useState({
+    scrollTop: 0,
+    height: rowHeight * FALLBACK_VIEWPORT_ROWS,
+  })
+
+  const measure = useCallback(() => {
+    frameRef.current = null
+    if (!container) {
+      return
+    }
+    setViewport((prev) =>
+      prev.scrollTop === container.scrollTop && prev.height === container.clientHeight
+        ? prev
+        : { scrollTop: container.scrollTop, height: container.clientHeight },
+    )
+  }, [container])
+
+  const onScroll = useCallback(() => {
+    if (frameRef.current === null) {
+      frameRef.current = requestAnimationFrame(measure)
+    }
+  }, [measure])
+
+  useEffect(() => {
+    if (!container) {
+      return undefined
+    }
+    measure()
+    const observer = typeof ResizeObserver === 'function' ? new ResizeObserver(measure) : null
+    observer?.observe(container)
+    return () => {
+      observer?.disconnect()
+      if (frameRef.current !== null) {
+        cancelAnimationFrame(frameRef.current)
+        frameRef.current = null
+      }
+    }
+  }, [container, measure])
+
+  useEffect(() => {
+    if (container) {
+      container.scrollTop = 0
+    }
+    setViewport((prev) => (prev.scrollTop === 0 ? prev : { ...prev, scrollTop: 0 }))
+  }, [container, resetKey])
+
+  return {
+    containerRef,
+    onScroll,
+    ...computeRowWindow({
+      rowCount,
+      scrollTop: viewport.scrollTop,
+      viewportHeight: viewport.height,
+      rowHeight,
+      overscan,
+    }),
+  }
+}
@@ -4,8 +4,8 @@ import { useMemo, useRef, useState } from 'react'
 import { Button } from '../components/Button.jsx'
 import { PageHeader } from '../components/PageHeader.jsx'
 import { APP_PAGES, EXCEL_SHEET_NAME, HISTORY_SHEET_NAME, SUMMARY_SHEET_NAME } from '../constants.js'
-import { triggerWorkbookDownload } from '../utils/excel.js'
-import { formatDateTime } from '../utils/format.js'
+import { triggerWorkbookDownload } from '../utils/download.js'
+import { formatDateTime, formatNumber } from '../utils/format.js'
 
 const DEMO_STEPS = [
   'Download the template to see the required columns.',
@@ -33,17 +33,22 @@ const UploadGuide = ({ isDragging }) => (
 
 export const DemoPage = ({
   loadFromFile,
+  cancelImport,
+  isLoading,
+  importProgress,
   error,
   metadata,
   hasInventory,
   hasImported,
   generateTemplateBytes,
   generateBlankTemplateBytes,
+  mergeDeltaFiles,
   navigate,
 }) => {
   const [statusMessage, setStatusMessage] = useState('')
   const [isDragging, setIsDragging] = useState(false)
   const fileInputRef = useRef(null)
+  const mergeInputRef = useRef(null)
   const baseSheetName = metadata?.sheetName || EXCEL_SHEET_NAME
 
   const sheetSummary = useMemo(() => {
@@ -76,13 +81,13 @@ export const DemoPage = ({
     [metadata, sheetSummary],
   )
 
-  const handleTemplateDownload = () => {
-    const bytes = generateTemplateBytes()
+  const handleTemplateDownload = async () => {
+    const bytes = await generateTemplateBytes()
     triggerWorkbookDownload(bytes, 'stocktake-template.xlsx')
   }
 
-  const handleBlankTemplateDownload = () => {
-    const bytes = generateBlankTemplateBytes()
+  const handleBlankTemplateDownload = async () => {
+    const bytes = await generateBlankTemplateBytes()
     triggerWorkbookDownload(bytes, 'stocktake-template-blank.xlsx')
   }
 
@@ -96,6 +101,10 @@ export const DemoPage = ({
       await loadFromFile(file)
       setStatusMessage(`Imported ${file.name}. Stocktake pages are ready.`)
     } catch (err) {
+      if (err?.name === 'AbortError') {
+        setStatusMessage(`Stopped importing ${file.name}.`)
+        return
+      }
       console.error(err)
       setStatusMessage('We could not read that workbook. Please check the columns and try again.')
     } finally {
@@ -105,6 +114,27 @@ export const DemoPage = ({
     }
   }
 
+  const handleMergeChange = async (event) => {
+    const files = Array.from(event.target.files || [])
+    if (!files.length) {
+      return
+    }
+    try {
+      setStatusMessage(`Merging ${files.length} workbooks...`)
+      const bytes = await mergeDeltaFiles(files)
+      const baseName = files[0].name.replace(/\.xlsx?$/i, '')
+      triggerWorkbookDownload(bytes, `${baseName}-merged.xlsx`)
+      setStatusMessage(`Merged ${files.length - 1} delta exports into the full workbook.`)
+    } catch (err) {
+      console.error(err)
+      setStatusMessage(err?.message || 'We could not merge those workbooks.')
+    } finally {
+      if (mergeInputRef.current) {
+        mergeInputRef.current.value = ''
+      }
+    }
+  }
+
   const handleFileChange = (event) => {
     handleFiles(event.target.files)
   }
@@ -199,6 +229,24 @@ export const DemoPage = ({
 
           <div className="space-y-3 text-sm">
             {statusMessage ? <p className="rounded-2xl bg-indigo-50 px-4 py-2 text-indigo-700">{statusMessage}</p> : null}
+            {isLoading ? (
+              <Button variant="ghost" onClick={cancelImport}>
+                Cancel import
+              </Button>
+            ) : null}
+            {importProgress?.total ? (
+              <div className="space-y-1">
+                <div className="h-2 rounded-full bg-slate-100">
+                  <div
+                    className="h-full rounded-full bg-indigo-400 transition-all"
+                    style={{ width: `${Math.min(100, (importProgress.processed / importProgress.total) * 100)}%` }}
+                  />
+                </div>
+                <p className="text-xs text-slate-500">
+                  Reading {importProgress.stage}: {formatNumber(importProgress.processed)} of {formatNumber(importProgress.total)} rows
+                </p>
+              </div>
+            ) : null}
             {error ? (
               <p className="rounded-2xl bg-rose-50 px-4 py-2 text-rose-600">
                 {error?.message || 'We could not parse that workbook. Please double-check the headers.'}
@@ -232,6 +280,22 @@ export const DemoPage = ({
               Go to Stocktake
             </Button>
           </div>
+          <div className="space-y-2 border-t border-slate-200 pt-4 text-sm text-slate-600">
+            <p>
+              Select a full workbook together with the delta exports taken from it to download one merged workbook.
+            </p>
+            <Button variant="ghost" onClick={() => mergeInputRef.current?.click()}>
+              Merge delta exports
+            </Button>
+            <input
+              ref={mergeInputRef}
+              type="file"
+              accept=".xlsx"
+              multiple
+              className="hidden"
+              onChange={handleMergeChange}
+            />
+          </div>
         </aside>
       </section>
 
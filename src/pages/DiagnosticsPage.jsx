@@ -0,0 +1,116 @@
+import { useMemo, useSyncExternalStore } from 'react'
+import { Button } from '../components/Button.jsx'
+import { EmptyState } from '../components/EmptyState.jsx'
+import { PageHeader } from '../components/PageHeader.jsx'
+import { triggerFileDownload } from '../utils/download.js'
+import { formatDateTime, formatNumber } from '../utils/format.js'
+import {
+  clearProfile,
+  exportProfileJson,
+  getProfileSnapshot,
+  subscribeProfile,
+  summariseProfile,
+} from '../utils/profiler.js'
+
+const formatMs = (value) => `${formatNumber(value, { maximumFractionDigits: 1 })} ms`
+
+const formatHeap = (bytes) =>
+  bytes === null || bytes === undefined ? '—' : `${formatNumber(bytes / 1024 / 1024, { maximumFractionDigits: 1 })} MB`
+
+const formatRate = (rows, durationMs) =>
+  rows && durationMs > 0 ? `${formatNumber((rows / durationMs) * 1000)}/s` : '—'
+
+// Not listed in the navigation; open it with #diagnostics.
+export const DiagnosticsPage = () => {
+  const stages = useSyncExternalStore(subscribeProfile, getProfileSnapshot)
+  const summary = useMemo(() => summariseProfile(stages), [stages])
+  const recent = useMemo(() => stages.slice().reverse(), [stages])
+
+  const handleExport = () => {
+    const stamp = new Date().toISOString().replace(/[:.]/g, '-')
+    triggerFileDownload(exportProfileJson(), `stocktake-profile-${stamp}.json`, 'application/json')
+  }
+
+  return (
+    <div className="space-y-10">
+      <PageHeader
+        eyebrow="Diagnostics"
+        title="Import and export timings"
+        description="Per-stage durations, row counts and heap estimates for workbook imports, stocktake commits, exports and analytics, recorded in this session."
+        actions={
+          <>
+            <Button variant="ghost" onClick={clearProfile} disabled={!stages.length}>
+              Clear
+            </Button>
+            <Button variant="primary" onClick={handleExport} disabled={!stages.length}>
+              Export JSON
+            </Button>
+          </>
+        }
+      />
+
+      {!stages.length ? (
+        <EmptyState
+          title="No stages recorded yet"
+          message="Import a workbook, apply a stocktake or open the analytics page, then come back here."
+        />
+      ) : (
+        <>
+          <section className="overflow-auto rounded-2xl border border-slate-200 bg-white">
+            <table className="min-w-[720px] divide-y divide-slate-200 text-sm">
+              <thead className="bg-slate-50 text-xs uppercase tracking-[0.2em] text-slate-500">
+                <tr>
+                  <th className="px-3 py-2 text-left">Stage</th>
+                  <th className="px-3 py-2 text-right">Runs</th>
+                  <th className="px-3 py-2 text-right">Total</th>
+                  <th className="px-3 py-2 text-right">Slowest</th>
+                  <th className="px-3 py-2 text-right">Rows</th>
+                </tr>
+              </thead>
+              <tbody className="divide-y divide-slate-100">
+                {summary.map((row) => (
+                  <tr key={row.stage}>
+                    <td className="px-3 py-2 font-medium text-slate-800">{row.stage}</td>
+                    <td className="px-3 py-2 text-right">{formatNumber(row.runs)}</td>
+                    <td className="px-3 py-2 text-right">{formatMs(row.totalMs)}</td>
+                    <td className="px-3 py-2 text-right">{formatMs(row.maxMs)}</td>
+                    <td className="px-3 py-2 text-right">{formatNumber(row.rows)}</td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </section>
+
+          <section className="max-h-[60vh] overflow-auto rounded-2xl border border-slate-200 bg-white">
+            <table className="min-w-[900px] divide-y divide-slate-200 text-sm">
+              <thead className="sticky top-0 bg-slate-50 text-xs uppercase tracking-[0.2em] text-slate-500">
+                <tr>
+                  <th className="px-3 py-2 text-left">Started</th>
+                  <th className="px-3 py-2 text-left">Stage</th>
+                  <th className="px-3 py-2 text-left">Thread</th>
+                  <th className="px-3 py-2 text-right">Duration</th>
+                  <th className="px-3 py-2 text-right">Rows</th>
+                  <th className="px-3 py-2 text-right">Rate</th>
+                  <th className="px-3 py-2 text-right">Heap Δ</th>
+                </tr>
+              </thead>
+              <tbody className="divide-y divide-slate-100">
+                {recent.map((record, index) => (
+                  <tr key={`${record.startedAt}-${record.stage}-${index}`}>
+                    <td className="px-3 py-2 text-slate-500">{formatDateTime(record.startedAt)}</td>
+                    <td className="px-3 py-2 font-medium text-slate-800">{record.stage}</td>
+                    <td className="px-3 py-2 text-slate-500">{record.source}</td>
+                    <td className="px-3 py-2 text-right">{formatMs(record.durationMs)}</td>
+                    <td className="px-3 py-2 text-right">{formatNumber(record.rows)}</td>
+                    <td className="px-3 py-2 text-right">{formatRate(record.rows, record.durationMs)}</td>
+                    <td className="px-3 py-2 text-right">{formatHeap(record.heapDeltaBytes)}</td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </section>
+        </>
+      )}
+    </div>
+  )
+}
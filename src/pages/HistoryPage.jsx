@@ -1,63 +1,76 @@
 ﻿import { Search } from 'lucide-react'
 import { useMemo, useState } from 'react'
+import { AsAtNote, AsAtPicker } from '../components/AsAtPicker.jsx'
 import { EmptyState } from '../components/EmptyState.jsx'
 import { MetricCard } from '../components/MetricCard.jsx'
 import { PageHeader } from '../components/PageHeader.jsx'
+import { MOVEMENT_WINDOW_OPTIONS, TABLE_ROW_HEIGHT_PX } from '../constants.js'
+import { useWindowedRows } from '../hooks/useWindowedRows.js'
 import {
+  formatColumn,
+  formatCurrency,
   formatDateTime,
   formatDelta,
   formatNumber,
   formatRelativeTime,
 } from '../utils/format.js'
+import {
+  historyCategories,
+  movementValueImpact,
+  queryHistory,
+  selectionEntries,
+  selectionEpochs,
+  summariseHistorySelection,
+} from '../utils/historyIndex.js'
 
-const computeValueImpact = (entry) =>
-  entry.valueImpact ??
-  (entry.receivedValue ?? 0) -
-    (entry.soldValue ?? (entry.sold ?? 0) * (entry.soldUnitCost ?? entry.unitCost ?? 0))
+const DAY_MS = 24 * 60 * 60 * 1000
 
-export const HistoryPage = ({ history }) => {
+export const HistoryPage = ({
+  historyIndex,
+  metadata,
+  asAt,
+  setAsAt,
+  asAtPosition,
+  exportAsAtBytes,
+}) => {
   const [search, setSearch] = useState('')
   const [categoryFilter, setCategoryFilter] = useState('all')
+  const [periodDays, setPeriodDays] = useState(0)
   const [noteModal, setNoteModal] = useState({ title: '', content: '' })
 
-  const categories = useMemo(() => {
-    const unique = new Set(history.map((entry) => entry.category).filter(Boolean))
-    return ['all', ...unique]
-  }, [history])
+  const categories = useMemo(() => ['all', ...historyCategories(historyIndex)], [historyIndex])
 
-  const filteredHistory = useMemo(() => {
-    const query = search.trim().toLowerCase()
-    return history.filter((entry) => {
-      const matchesQuery =
-        !query ||
-        entry.name.toLowerCase().includes(query) ||
-        (entry.sku && entry.sku.toLowerCase().includes(query)) ||
-        (entry.performedBy && entry.performedBy.toLowerCase().includes(query))
-      const matchesCategory = categoryFilter === 'all' || entry.category === categoryFilter
-      return matchesQuery && matchesCategory
-    })
-  }, [history, search, categoryFilter])
+  // With an "as at" date, movements after it are hidden and the period ends on it.
+  const asAtEpoch = asAtPosition ? Date.parse(asAtPosition.asAt) : undefined
+  const selection = useMemo(
+    () =>
+      queryHistory(historyIndex, {
+        category: categoryFilter === 'all' ? undefined : categoryFilter,
+        from: periodDays ? (asAtEpoch ?? Date.now()) - periodDays * DAY_MS : undefined,
+        to: asAtEpoch,
+        search,
+      }),
+    [historyIndex, search, categoryFilter, periodDays, asAtEpoch],
+  )
 
-  const summary = useMemo(() => {
-    return filteredHistory.reduce(
-      (acc, entry) => {
-        const sold = entry.sold ?? 0
-        const received = entry.received ?? 0
-        acc.adjustments += 1
-        acc.sold += sold
-        acc.received += received
-        acc.units += entry.delta
-        acc.value += computeValueImpact(entry)
-        if (!acc.latest || new Date(entry.timestamp) > new Date(acc.latest)) {
-          acc.latest = entry.timestamp
-        }
-        return acc
-      },
-      { adjustments: 0, sold: 0, received: 0, units: 0, value: 0, latest: null },
-    )
-  }, [filteredHistory])
+  const rowWindow = useWindowedRows(selection.length, {
+    resetKey: `${search}\u0000${categoryFilter}\u0000${periodDays}\u0000${asAt}`,
+  })
+
+  const summary = useMemo(() => summariseHistorySelection(selection), [selection])
 
-  if (!history.length) {
+  // Timestamps for the visible rows come from the index's parsed epochs, formatted per
+  // column; opening a note re-renders the rows without formatting them again.
+  const visibleRows = useMemo(() => {
+    const epochs = selectionEpochs(selection, rowWindow.start, rowWindow.end)
+    return {
+      entries: selectionEntries(selection, rowWindow.start, rowWindow.end),
+      dateTimes: formatColumn(epochs, formatDateTime),
+      relativeTimes: formatColumn(epochs, formatRelativeTime),
+    }
+  }, [selection, rowWindow.start, rowWindow.end])
+
+  if (!historyIndex.length) {
     return (
       <EmptyState
         title="No adjustments recorded"
@@ -72,8 +85,27 @@ export const HistoryPage = ({ history }) => {
         eyebrow="History"
         title="Stock movement history"
         description="Comprehensive audit trail of stock movements, responsible users, variance totals, and supporting notes."
+        actions={
+          <AsAtPicker
+            asAt={asAt}
+            setAsAt={setAsAt}
+            exportAsAtBytes={exportAsAtBytes}
+            sourceFileName={metadata?.sourceFileName}
+          />
+        }
       />
 
+      {asAtPosition ? (
+        <section className="space-y-4">
+          <AsAtNote position={asAtPosition} />
+          <div className="grid gap-6 sm:grid-cols-3">
+            <MetricCard label="SKUs" value={formatNumber(asAtPosition.totals.totalSkus)} />
+            <MetricCard label="Units on hand" value={formatNumber(asAtPosition.totals.totalCurrent)} />
+            <MetricCard label="Inventory value" value={formatCurrency(asAtPosition.totals.totalValue)} />
+          </div>
+        </section>
+      ) : null}
+
       <section className="grid gap-6 sm:grid-cols-2 lg:grid-cols-4">
         <MetricCard
           label="Adjustments"
@@ -110,7 +142,20 @@ export const HistoryPage = ({ history }) => {
               </button>
             ) : null}
           </div>
-          <div className="flex items-center gap-3">
+          <div className="flex flex-wrap items-center gap-3">
+            <label className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">Period</label>
+            <select
+              value={periodDays}
+              onChange={(event) => setPeriodDays(Number(event.target.value))}
+              className="rounded-full border border-slate-200 bg-white px-3 py-2 text-sm text-slate-700 focus:border-indigo-400 focus:outline-none focus:ring-2 focus:ring-indigo-200"
+            >
+              <option value={0}>All time</option>
+              {MOVEMENT_WINDOW_OPTIONS.map((days) => (
+                <option key={days} value={days}>
+                  Last {days} days
+                </option>
+              ))}
+            </select>
             <label className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">Category</label>
             <select
               value={categoryFilter}
@@ -126,9 +171,13 @@ export const HistoryPage = ({ history }) => {
           </div>
         </div>
 
-        <div className="overflow-x-auto rounded-2xl border border-slate-200">
+        <div
+          ref={rowWindow.containerRef}
+          onScroll={rowWindow.onScroll}
+          className="max-h-[70vh] overflow-auto rounded-2xl border border-slate-200"
+        >
           <table className="min-w-[1000px] divide-y divide-slate-200 text-sm">
-            <thead className="bg-slate-50 text-xs uppercase tracking-[0.2em] text-slate-500">
+            <thead className="sticky top-0 z-10 bg-slate-50 text-xs uppercase tracking-[0.2em] text-slate-500">
               <tr>
                 <th className="px-3 py-2 text-left">Timestamp</th>
                 <th className="px-3 py-2 text-left">Item</th>
@@ -144,22 +193,29 @@ export const HistoryPage = ({ history }) => {
               </tr>
             </thead>
             <tbody className="divide-y divide-slate-100 bg-white">
-              {filteredHistory.map((entry) => {
-                const valueImpact = computeValueImpact(entry)
+              {rowWindow.paddingTop > 0 ? (
+                <tr aria-hidden style={{ height: rowWindow.paddingTop }} />
+              ) : null}
+              {visibleRows.entries.map((entry, row) => {
+                const valueImpact = movementValueImpact(entry)
                 return (
-                  <tr key={entry.id} className="transition hover:bg-indigo-50/40">
+                  <tr
+                    key={entry.id}
+                    style={{ height: TABLE_ROW_HEIGHT_PX }}
+                    className="transition hover:bg-indigo-50/40"
+                  >
                     <td className="px-3 py-2 text-xs text-slate-500">
                       <div className="space-y-1">
-                        <p>{formatDateTime(entry.timestamp)}</p>
+                        <p>{visibleRows.dateTimes[row]}</p>
                         <p className="text-[11px] uppercase tracking-[0.2em] text-slate-400">
-                          {formatRelativeTime(entry.timestamp)}
+                          {visibleRows.relativeTimes[row]}
                         </p>
                       </div>
                     </td>
                     <td className="px-3 py-2">
-                      <div className="space-y-1">
-                        <p className="font-medium text-slate-800">{entry.name}</p>
-                        <p className="text-xs uppercase tracking-[0.2em] text-slate-400">
+                      <div className="max-w-[16rem] space-y-1">
+                        <p className="truncate font-medium text-slate-800" title={entry.name}>{entry.name}</p>
+                        <p className="truncate text-xs uppercase tracking-[0.2em] text-slate-400">
                           {entry.sku || 'No SKU'} / {entry.category || 'Uncategorised'}
                         </p>
                       </div>
@@ -182,7 +238,13 @@ export const HistoryPage = ({ history }) => {
                     >
                       {formatDelta(valueImpact, { currency: true, showZero: true })}
                     </td>
-                    <td className="px-3 py-2 text-sm text-slate-600">{entry.performedBy || '-'}</td>
+                    <td
+                      className="px-3 py-2 text-sm text-slate-600"
+                      title={entry.countedBy ? `Counted by ${entry.countedBy}` : undefined}
+                    >
+                      {entry.performedBy || '-'}
+                      {entry.countedBy && <span className="text-slate-400"> · {entry.countedBy}</span>}
+                    </td>
                     <td className="px-3 py-2 text-sm text-slate-500">
                       <button
                         type="button"
@@ -206,6 +268,9 @@ export const HistoryPage = ({ history }) => {
                   </tr>
                 )
               })}
+              {rowWindow.paddingBottom > 0 ? (
+                <tr aria-hidden style={{ height: rowWindow.paddingBottom }} />
+              ) : null}
             </tbody>
           </table>
         </div>
@@ -1,10 +1,11 @@
-import { useMemo } from 'react'
+import { AsAtNote, AsAtPicker } from '../components/AsAtPicker.jsx'
 import { MetricCard } from '../components/MetricCard.jsx'
 import { EmptyState } from '../components/EmptyState.jsx'
 import { PageHeader } from '../components/PageHeader.jsx'
-import { MOVEMENT_WINDOW_DAYS } from '../constants.js'
+import { MOVEMENT_WINDOW_OPTIONS } from '../constants.js'
 import {
   formatCurrency,
+  formatDate,
   formatDelta,
   formatNumber,
   formatPercent,
@@ -48,120 +49,84 @@ const MovementsList = ({ title, items, emptyLabel, highlight = 'neutral' }) => (
   </div>
 )
 
-export const StatsPage = ({ inventory, totals, recentMovements }) => {
-  const movementsSummary = useMemo(() => {
-    return recentMovements.reduce(
-      (acc, entry) => {
-        const sold = entry.sold ?? 0
-        const received = entry.received ?? 0
-        const soldValue =
-          entry.soldValue !== undefined
-            ? entry.soldValue
-            : sold * (entry.soldUnitCost ?? entry.unitCost ?? 0)
-        const receivedValue =
-          entry.receivedValue !== undefined
-            ? entry.receivedValue
-            : received * (entry.receivedUnitCost ?? entry.unitCost ?? 0)
-        if (sold > 0 || received > 0) {
-          acc.entries += 1
-        }
-        acc.sold += sold
-        acc.received += received
-        acc.valueOut += soldValue
-        acc.valueIn += receivedValue
-        return acc
-      },
-      { entries: 0, sold: 0, received: 0, valueOut: 0, valueIn: 0 },
-    )
-  }, [recentMovements])
-
-  const moverTotals = useMemo(() => {
-    const map = new Map()
-    inventory.forEach((item) => {
-      map.set(item.id, {
-        id: item.id,
-        sku: item.sku,
-        name: item.name,
-        category: item.category,
-        sold: 0,
-        soldValue: 0,
-        received: 0,
-        receivedValue: 0,
-      })
-    })
-    recentMovements.forEach((entry) => {
-      const key = entry.itemId || entry.sku || entry.name
-      if (!map.has(key)) {
-        map.set(key, {
-          id: key,
-          sku: entry.sku,
-          name: entry.name,
-          category: entry.category,
-          sold: 0,
-          soldValue: 0,
-          received: 0,
-          receivedValue: 0,
-        })
-      }
-      const bucket = map.get(key)
-      const sold = entry.sold ?? 0
-      const received = entry.received ?? 0
-      const soldValue =
-        entry.soldValue !== undefined
-          ? entry.soldValue
-          : sold * (entry.soldUnitCost ?? entry.unitCost ?? 0)
-      const receivedValue =
-        entry.receivedValue !== undefined
-          ? entry.receivedValue
-          : received * (entry.receivedUnitCost ?? entry.unitCost ?? 0)
-      bucket.sold += sold
-      bucket.received += received
-      bucket.soldValue += soldValue
-      bucket.receivedValue += receivedValue
-    })
-    return Array.from(map.values())
-  }, [inventory, recentMovements])
-
-  const topOutflow = useMemo(
-    () => moverTotals.filter((item) => item.sold > 0).sort((a, b) => b.sold - a.sold).slice(0, 4),
-    [moverTotals],
-  )
-
-  const leastMoved = useMemo(() => {
-    const sorted = [...moverTotals].sort((a, b) => a.sold - b.sold)
-    return sorted.slice(0, 4)
-  }, [moverTotals])
-
-  const categoryBreakdown = useMemo(() => {
-    const map = new Map()
-    inventory.forEach((item) => {
-      const key = item.category || 'Uncategorised'
-      if (!map.has(key)) {
-        map.set(key, { units: 0, value: 0 })
-      }
-      const bucket = map.get(key)
-      bucket.units += item.currentCount
-      const layerValue = (item.costLayers ?? []).reduce((acc, layer) => {
-        const quantity = Number(layer?.quantity ?? 0)
-        const cost = Number(layer?.unitCost ?? 0)
-        if (!Number.isFinite(quantity) || !Number.isFinite(cost)) {
-          return acc
-        }
-        return acc + quantity * cost
-      }, 0)
-      bucket.value += layerValue
-    })
-    const totalValue = Array.from(map.values()).reduce((acc, bucket) => acc + bucket.value, 0)
-    return Array.from(map.entries())
-      .map(([category, bucket]) => ({
-        category,
-        units: bucket.units,
-        value: bucket.value,
-        valueShare: totalValue ? bucket.value / totalValue : 0,
-      }))
-      .sort((a, b) => b.value - a.value)
-  }, [inventory])
+// Suggested orders for the items at or below their reorder point, most urgent first. These
+// are for today's stock, whatever the "as at" date.
+const ReorderSuggestions = ({ replenishment }) => (
+  <section className="rounded-3xl border border-slate-200 bg-white/70 p-6 shadow-sm backdrop-blur">
+    <div className="flex flex-wrap items-end justify-between gap-4">
+      <div>
+        <h2 className="text-lg font-semibold text-slate-900">Reorder suggestions</h2>
+        <p className="mt-2 text-sm text-slate-600">
+          Daily use over the last {formatNumber(replenishment.days)} days of sales, with safety stock for a{' '}
+          {replenishment.leadTimeDays}-day lead time and orders covering the next{' '}
+          {replenishment.leadTimeDays + replenishment.reviewDays} days.
+        </p>
+      </div>
+      <p className="text-sm text-slate-600">
+        {formatNumber(replenishment.reorderCount)} SKUs | {formatNumber(replenishment.unitsToOrder)} units |{' '}
+        {formatCurrency(replenishment.valueToOrder)}
+      </p>
+    </div>
+    {replenishment.suggestions.length ? (
+      <table className="mt-6 w-full text-left text-sm">
+        <thead className="text-xs uppercase tracking-[0.2em] text-slate-400">
+          <tr>
+            <th className="py-2 font-semibold">Item</th>
+            <th className="py-2 text-right font-semibold">On hand</th>
+            <th className="py-2 text-right font-semibold">Daily use</th>
+            <th className="py-2 text-right font-semibold">Days of cover</th>
+            <th className="py-2 text-right font-semibold">Reorder point</th>
+            <th className="py-2 text-right font-semibold">Order</th>
+          </tr>
+        </thead>
+        <tbody className="divide-y divide-slate-100">
+          {replenishment.suggestions.map((row) => (
+            <tr key={row.id}>
+              <td className="py-3">
+                <p className="font-medium text-slate-800">{row.name}</p>
+                <p className="text-xs uppercase tracking-[0.2em] text-slate-400">
+                  {row.sku || 'No SKU'} | {row.category || 'Uncategorised'}
+                </p>
+              </td>
+              <td className="py-3 text-right text-slate-600">{formatNumber(row.onHand)}</td>
+              <td className="py-3 text-right text-slate-600">
+                {formatNumber(row.dailyUse, { maximumFractionDigits: 1 })}
+              </td>
+              <td className="py-3 text-right font-semibold text-rose-500">
+                {formatNumber(row.daysOfCover, { maximumFractionDigits: 1 })}
+              </td>
+              <td className="py-3 text-right text-slate-600">{formatNumber(Math.ceil(row.reorderPoint))}</td>
+              <td className="py-3 text-right font-semibold text-emerald-600">
+                {formatNumber(row.suggestedOrder)}
+              </td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+    ) : (
+      <p className="mt-6 rounded-xl border border-dashed border-slate-200 bg-slate-50 px-4 py-3 text-sm text-slate-500">
+        Every selling item has stock above its reorder point.
+      </p>
+    )}
+  </section>
+)
 
+export const StatsPage = ({
+  inventory,
+  totals,
+  movementSummary,
+  movementWindowDays,
+  setMovementWindowDays,
+  topOutflow,
+  leastMoved,
+  categoryBreakdown,
+  replenishment,
+  metadata,
+  asAt,
+  setAsAt,
+  asAtPosition,
+  exportAsAtBytes,
+}) => {
   if (!inventory.length) {
     return (
       <EmptyState
@@ -171,30 +136,59 @@ export const StatsPage = ({ inventory, totals, recentMovements }) => {
     )
   }
 
-  const netUnits = movementsSummary.received - movementsSummary.sold
-  const netValue = movementsSummary.valueIn - movementsSummary.valueOut
+  const netUnits = movementSummary.received - movementSummary.sold
+  const netValue = movementSummary.valueIn - movementSummary.valueOut
+  // Stock on hand and category figures as at the chosen date; the window ends on it too.
+  const position = asAtPosition ?? { totals, categoryBreakdown }
+  const windowLabel = asAtPosition
+    ? `the ${movementWindowDays} days to ${formatDate(asAtPosition.asAt)}`
+    : `the last ${movementWindowDays}-day movement window`
 
   return (
     <div className="space-y-10">
       <PageHeader
         eyebrow="Insights"
         title="Inventory performance analytics"
-        description={`We analyse the last ${MOVEMENT_WINDOW_DAYS}-day movement window to surface trends, Highest consumptions, and Category contributions.`}
+        description={`We analyse ${windowLabel} to surface trends, Highest consumptions, and Category contributions.`}
+        actions={
+          <>
+            <AsAtPicker
+              asAt={asAt}
+              setAsAt={setAsAt}
+              exportAsAtBytes={exportAsAtBytes}
+              sourceFileName={metadata?.sourceFileName}
+            />
+            <label className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">Window</label>
+            <select
+              value={movementWindowDays}
+              onChange={(event) => setMovementWindowDays(Number(event.target.value))}
+              className="rounded-full border border-slate-200 bg-white px-3 py-2 text-sm text-slate-700 focus:border-indigo-400 focus:outline-none focus:ring-2 focus:ring-indigo-200"
+            >
+              {MOVEMENT_WINDOW_OPTIONS.map((days) => (
+                <option key={days} value={days}>
+                  Last {days} days
+                </option>
+              ))}
+            </select>
+          </>
+        }
       />
 
+      <AsAtNote position={asAtPosition} />
+
       <section className="grid gap-6 md:grid-cols-2 lg:grid-cols-4">
-        <MetricCard label="Units on hand" value={formatNumber(totals.totalCurrent)} />
-        <MetricCard label="Inventory value" value={formatCurrency(totals.totalValue)} />
+        <MetricCard label="Units on hand" value={formatNumber(position.totals.totalCurrent)} />
+        <MetricCard label="Inventory value" value={formatCurrency(position.totals.totalValue)} />
         <MetricCard
           label="Units sold"
-          value={formatNumber(movementsSummary.sold)}
+          value={formatNumber(movementSummary.sold)}
           delta={formatDelta(netUnits, { showZero: true })}
           deltaLabel="Net units"
           positive={netUnits >= 0}
         />
         <MetricCard
           label="Value out"
-          value={formatCurrency(movementsSummary.valueOut)}
+          value={formatCurrency(movementSummary.valueOut)}
           delta={formatDelta(netValue, { currency: true, showZero: true })}
           deltaLabel="Net value"
           positive={netValue >= 0}
@@ -216,13 +210,15 @@ export const StatsPage = ({ inventory, totals, recentMovements }) => {
         />
       </section>
 
+      <ReorderSuggestions replenishment={replenishment} />
+
       <section className="rounded-3xl border border-slate-200 bg-white/70 p-6 shadow-sm backdrop-blur">
         <h2 className="text-lg font-semibold text-slate-900">Category contribution</h2>
         <p className="mt-2 text-sm text-slate-600">
           Contribution of categories to unit volumes and inventory value.
         </p>
         <div className="mt-6 space-y-4">
-          {categoryBreakdown.map((bucket) => (
+          {position.categoryBreakdown.map((bucket) => (
             <div key={bucket.category} className="space-y-2">
               <div className="flex items-center justify-between text-sm text-slate-600">
                 <span className="font-medium text-slate-700">{bucket.category}</span>
@@ -4,13 +4,16 @@ import { Button } from '../components/Button.jsx'
 import { EmptyState } from '../components/EmptyState.jsx'
 import { MetricCard } from '../components/MetricCard.jsx'
 import { PageHeader } from '../components/PageHeader.jsx'
-import { AUTO_SKU_PAD_LENGTH, AUTO_SKU_PREFIX } from '../constants.js'
-import { triggerWorkbookDownload } from '../utils/excel.js'
+import { AUTO_SKU_PAD_LENGTH, AUTO_SKU_PREFIX, TABLE_ROW_HEIGHT_PX } from '../constants.js'
+import { useWindowedRows } from '../hooks/useWindowedRows.js'
+import { BULK_ITEM_COLUMNS } from '../utils/bulkItems.js'
+import { triggerFileDownload, triggerWorkbookDownload } from '../utils/download.js'
 import {
   formatCurrency,
   formatDate,
   formatDelta,
   formatNumber,
+  formatRelativeTime,
 } from '../utils/format.js'
 
 const buildTimestampSuffix = () => {
@@ -131,49 +134,135 @@ const ManualItemForm = ({ onSubmit, nextSku }) => {
   )
 }
 
+const BulkItemForm = ({ onSubmit }) => {
+  const [text, setText] = useState('')
+  const [file, setFile] = useState(null)
+  const [performedBy, setPerformedBy] = useState('')
+  const [notes, setNotes] = useState('')
+  const [isWorking, setIsWorking] = useState(false)
+  const fileInputRef = useRef(null)
+
+  const handleSubmit = async (event) => {
+    event.preventDefault()
+    setIsWorking(true)
+    const done = await onSubmit({ source: file ?? text, performedBy, notes })
+    setIsWorking(false)
+    if (done) {
+      setText('')
+      setFile(null)
+      if (fileInputRef.current) {
+        fileInputRef.current.value = ''
+      }
+    }
+  }
+
+  return (
+    <form onSubmit={handleSubmit} className="grid gap-4 rounded-2xl border border-slate-200 bg-white/70 p-6">
+      <label className="space-y-2 text-sm">
+        <span className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">Paste rows</span>
+        <textarea
+          value={text}
+          onChange={(event) => setText(event.target.value)}
+          disabled={Boolean(file)}
+          rows={5}
+          placeholder={`Paste from a spreadsheet or CSV: ${BULK_ITEM_COLUMNS.join(', ')}. Blank SKUs are numbered automatically.`}
+          className="w-full rounded-xl border border-slate-200 bg-white px-3 py-2 font-mono text-xs text-slate-800 focus:border-indigo-400 focus:outline-none focus:ring-2 focus:ring-indigo-200"
+        />
+      </label>
+      <div className="grid gap-4 md:grid-cols-3">
+        <label className="space-y-2 text-sm">
+          <span className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">Or a file</span>
+          <input
+            ref={fileInputRef}
+            type="file"
+            accept=".csv,.tsv,.txt,.xlsx,.xls"
+            onChange={(event) => setFile(event.target.files?.[0] ?? null)}
+            className="w-full text-sm text-slate-600"
+          />
+        </label>
+        <label className="space-y-2 text-sm">
+          <span className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">Identifier (ID)</span>
+          <input
+            required
+            value={performedBy}
+            onChange={(event) => setPerformedBy(event.target.value)}
+            placeholder="e.g. Supplier onboarding"
+            className="w-full rounded-xl border border-slate-200 bg-white px-3 py-2 text-sm text-slate-800 focus:border-indigo-400 focus:outline-none focus:ring-2 focus:ring-indigo-200"
+          />
+        </label>
+        <label className="space-y-2 text-sm">
+          <span className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">Notes</span>
+          <input
+            value={notes}
+            onChange={(event) => setNotes(event.target.value)}
+            placeholder="Recorded on each new item's entry"
+            className="w-full rounded-xl border border-slate-200 bg-white px-3 py-2 text-sm text-slate-800 focus:border-indigo-400 focus:outline-none focus:ring-2 focus:ring-indigo-200"
+          />
+        </label>
+      </div>
+      <div className="flex flex-wrap justify-end gap-3">
+        <Button type="submit" variant="primary" disabled={isWorking || (!file && !text.trim())}>
+          {isWorking ? 'Adding items...' : 'Add items'}
+        </Button>
+      </div>
+    </form>
+  )
+}
+
 export const StocktakePage = ({
   inventory,
   hasInventory,
   hasImported,
   hasDrafts,
-  history,
   updateDraftAdjustment,
   updateUnitCost,
   updateItemNote,
   previewDraftImpact,
+  searchInventory,
   resetDrafts,
   applyStocktake,
   exportWorkbookBytes,
+  exportDeltaBytes,
+  canExportDelta,
   draftSummary,
   totals,
   metadata,
   addManualItem,
+  addItemsInBulk,
+  readBulkItemRows,
+  sessionOperator,
+  setSessionOperator,
+  sessionPeers,
+  isSessionShared,
+  importChangeSetFiles,
+  exportChangeSetJson,
 }) => {
   const [search, setSearch] = useState('')
   const [categoryFilter, setCategoryFilter] = useState('all')
   const [performedBy, setPerformedBy] = useState('')
   const [notes, setNotes] = useState('')
+  const [changesOnly, setChangesOnly] = useState(false)
   const [status, setStatus] = useState('')
   const [manualStatus, setManualStatus] = useState('')
+  const [bulkStatus, setBulkStatus] = useState('')
   const [noteModal, setNoteModal] = useState({ item: null, value: '' })
+  const [sessionStatus, setSessionStatus] = useState('')
   const applySectionRef = useRef(null)
+  const changeSetInputRef = useRef(null)
 
   const categories = useMemo(() => {
     const unique = new Set(inventory.map((item) => item.category).filter(Boolean))
     return ['all', ...unique]
   }, [inventory])
 
-  const filteredInventory = useMemo(() => {
-    const query = search.trim().toLowerCase()
-    return inventory.filter((item) => {
-      const matchesQuery =
-        !query ||
-        item.name.toLowerCase().includes(query) ||
-        (item.sku && item.sku.toLowerCase().includes(query))
-      const matchesCategory = categoryFilter === 'all' || item.category === categoryFilter
-      return matchesQuery && matchesCategory
-    })
-  }, [inventory, search, categoryFilter])
+  const filteredInventory = useMemo(
+    () => searchInventory(search, categoryFilter),
+    [searchInventory, search, categoryFilter],
+  )
+
+  const rowWindow = useWindowedRows(filteredInventory.length, {
+    resetKey: `${search}\u0000${categoryFilter}`,
+  })
 
   const scrollToApply = () => {
     if (applySectionRef.current) {
@@ -181,34 +270,94 @@ export const StocktakePage = ({
     }
   }
 
-  const handleApply = () => {
+  const handleApply = async () => {
     if (!performedBy.trim()) {
       setStatus('Enter the name of the person responsible before updating the stocktake.')
       scrollToApply()
       return
     }
     const historyEntries = applyStocktake({ performedBy: performedBy.trim(), notes })
-    const updatedHistory = historyEntries.length ? [...historyEntries, ...history] : history
-    const bytes = exportWorkbookBytes({ history: updatedHistory })
+    setStatus('Preparing the updated workbook...')
+    const deltaExport = changesOnly && canExportDelta
+    let bytes
+    try {
+      bytes = deltaExport ? await exportDeltaBytes() : await exportWorkbookBytes()
+    } catch (err) {
+      console.error(err)
+      setStatus('Adjustments were recorded, but the workbook export failed. Please try exporting again.')
+      return
+    }
     const baseName = metadata?.sourceFileName
       ? metadata.sourceFileName.replace(/\.xlsx?$/i, '')
       : 'stocktake-control'
-    const stampedName = `${baseName}-updated-${buildTimestampSuffix()}.xlsx`
+    const stampedName = `${baseName}-${deltaExport ? 'delta' : 'updated'}-${buildTimestampSuffix()}.xlsx`
     triggerWorkbookDownload(bytes, stampedName)
     const recordedMessage = historyEntries.length
       ? `Recorded ${historyEntries.length} adjustments`
       : 'Applied without new adjustments'
-    setStatus(`${recordedMessage} and exported the latest workbook (inventory, history, summary).`)
+    setStatus(
+      deltaExport
+        ? `${recordedMessage} and exported the changes since the last export.`
+        : `${recordedMessage} and exported the latest workbook (inventory, history, summary).`,
+    )
     setPerformedBy('')
     setNotes('')
   }
 
+  const handleSaveCounts = () => {
+    const name = sessionOperator.trim() || 'operator'
+    triggerFileDownload(
+      exportChangeSetJson(),
+      `counts-${name.replace(/[^a-z0-9]+/gi, '-').toLowerCase()}-${buildTimestampSuffix()}.json`,
+      'application/json',
+    )
+    setSessionStatus('Saved your counts. Load the file on the device that will confirm the stocktake.')
+  }
+
+  const handleLoadCounts = async (event) => {
+    const files = Array.from(event.target.files || [])
+    if (!files.length) {
+      return
+    }
+    try {
+      const loaded = await importChangeSetFiles(files)
+      setSessionStatus(`Loaded counts from ${loaded} ${loaded === 1 ? 'file' : 'files'}; they will be merged when you confirm.`)
+    } catch (err) {
+      console.error(err)
+      setSessionStatus(err?.message || 'We could not read those counts.')
+    } finally {
+      if (changeSetInputRef.current) {
+        changeSetInputRef.current.value = ''
+      }
+    }
+  }
+
   const handleManualAdd = (form) => {
     const newItem = addManualItem(form)
     setManualStatus(`Registered ${newItem.name} (${newItem.sku}) in the inventory register.`)
     setStatus('')
   }
 
+  const handleBulkAdd = async ({ source, performedBy: bulkOperator, notes: bulkNotes }) => {
+    try {
+      const rows = await readBulkItemRows(source)
+      const { items, skipped } = addItemsInBulk(rows, { performedBy: bulkOperator, notes: bulkNotes })
+      const skippedNote = skipped.length
+        ? ` Skipped ${formatNumber(skipped.length)}: ${skipped
+            .slice(0, 3)
+            .map(({ row, reason }) => `row ${row} - ${reason}`)
+            .join('; ')}${skipped.length > 3 ? '; ...' : ''}.`
+        : ''
+      setBulkStatus(`Added ${formatNumber(items.length)} ${items.length === 1 ? 'item' : 'items'}.${skippedNote}`)
+      setStatus('')
+      return items.length > 0
+    } catch (err) {
+      console.error(err)
+      setBulkStatus(err?.message || 'We could not read those items.')
+      return false
+    }
+  }
+
   const openNoteModal = (item) => {
     setNoteModal({ item, value: item.itemNote ?? '' })
   }
@@ -226,6 +375,11 @@ export const StocktakePage = ({
   const draftBanner = draftSummary?.items > 0
     ? `Pending adjustments: ${draftSummary.items} lines - sold ${formatNumber(draftSummary.sold)} units, received ${formatNumber(draftSummary.received)} units (net ${formatDelta(netUnits, { showZero: true })}, ${formatDelta(draftSummary.value, { currency: true, showZero: true })}).`
     : null
+  const countingPeers = sessionPeers.filter((peer) => peer.lines > 0)
+  const peerLines = countingPeers.reduce((total, peer) => total + peer.lines, 0)
+  const peerBanner = peerLines
+    ? `${formatNumber(peerLines)} more lines from ${countingPeers.length} other ${countingPeers.length === 1 ? 'operator' : 'operators'} will be merged in when you confirm.`
+    : null
 
   if (!hasImported) {
     return (
@@ -287,8 +441,72 @@ export const StocktakePage = ({
         <ManualItemForm onSubmit={handleManualAdd} nextSku={nextSkuPreview(metadata?.nextSkuNumber)} />
       </section>
 
-      {draftBanner ? (
-        <p className="rounded-2xl border border-indigo-200 bg-indigo-50 px-6 py-3 text-sm text-indigo-700">{draftBanner}</p>
+      <section className="space-y-4">
+        <div className="flex flex-col gap-1 md:flex-row md:items-center md:justify-between">
+          <h2 className="text-lg font-semibold text-slate-900">Add many items</h2>
+          {bulkStatus ? <p className="text-xs text-emerald-600">{bulkStatus}</p> : null}
+        </div>
+        <BulkItemForm onSubmit={handleBulkAdd} />
+      </section>
+
+      <section className="space-y-4 rounded-3xl border border-slate-200 bg-white/70 p-6 shadow-sm backdrop-blur">
+        <div className="flex flex-col gap-1 md:flex-row md:items-center md:justify-between">
+          <h2 className="text-lg font-semibold text-slate-900">Counting together</h2>
+          <p className="text-xs text-slate-500">
+            {isSessionShared
+              ? 'Open the app in another tab or window to count alongside; entries are shared as you type.'
+              : 'Save your counts to a file and load it on the device that confirms the stocktake.'}
+          </p>
+        </div>
+        <div className="flex flex-col gap-3 md:flex-row md:items-end">
+          <label className="w-full max-w-sm space-y-2 text-sm">
+            <span className="text-xs font-semibold uppercase tracking-[0.2em] text-slate-500">Your name</span>
+            <input
+              value={sessionOperator}
+              onChange={(event) => setSessionOperator(event.target.value)}
+              placeholder="Shown to the others counting"
+              className="w-full rounded-xl border border-slate-200 bg-white px-3 py-2 text-sm text-slate-800 focus:border-indigo-400 focus:outline-none focus:ring-2 focus:ring-indigo-200"
+            />
+          </label>
+          <div className="flex flex-wrap gap-2">
+            <Button variant="ghost" onClick={handleSaveCounts}>
+              Save my counts
+            </Button>
+            <Button variant="ghost" onClick={() => changeSetInputRef.current?.click()}>
+              Load counts
+            </Button>
+            <input
+              ref={changeSetInputRef}
+              type="file"
+              accept=".json,application/json"
+              multiple
+              className="hidden"
+              onChange={handleLoadCounts}
+            />
+          </div>
+        </div>
+        {sessionPeers.length ? (
+          <ul className="divide-y divide-slate-100 rounded-2xl border border-slate-200 bg-white text-sm">
+            {sessionPeers.map((peer) => (
+              <li key={peer.sessionId} className="flex flex-wrap items-center justify-between gap-2 px-4 py-2">
+                <span className="font-medium text-slate-800">{peer.operator || 'Unnamed operator'}</span>
+                <span className="text-slate-500">
+                  {formatNumber(peer.lines)} lines - sold {formatNumber(peer.sold)}, received{' '}
+                  {formatNumber(peer.received)} - {formatRelativeTime(peer.updatedAt)}
+                </span>
+              </li>
+            ))}
+          </ul>
+        ) : (
+          <p className="text-sm text-slate-500">Nobody else is counting right now.</p>
+        )}
+        {sessionStatus ? <p className="text-xs text-emerald-600">{sessionStatus}</p> : null}
+      </section>
+
+      {draftBanner || peerBanner ? (
+        <p className="rounded-2xl border border-indigo-200 bg-indigo-50 px-6 py-3 text-sm text-indigo-700">
+          {[draftBanner, peerBanner].filter(Boolean).join(' ')}
+        </p>
       ) : null}
 
       <section className="space-y-4 rounded-3xl border border-slate-200 bg-white/70 p-6 shadow-sm backdrop-blur">
@@ -298,7 +516,7 @@ export const StocktakePage = ({
             <input
               value={search}
               onChange={(event) => setSearch(event.target.value)}
-              placeholder="Search by SKU or item"
+              placeholder="Search by SKU, item, or category"
               className="w-full bg-transparent text-sm text-slate-700 placeholder:text-slate-400 focus:outline-none"
             />
             {search ? (
@@ -327,9 +545,13 @@ export const StocktakePage = ({
           </div>
         </div>
 
-        <div className="overflow-x-auto rounded-2xl border border-slate-200">
+        <div
+          ref={rowWindow.containerRef}
+          onScroll={rowWindow.onScroll}
+          className="max-h-[70vh] overflow-auto rounded-2xl border border-slate-200"
+        >
           <table className="min-w-[1000px] divide-y divide-slate-200 text-sm">
-            <thead className="bg-slate-50 text-xs uppercase tracking-[0.2em] text-slate-500">
+            <thead className="sticky top-0 z-10 bg-slate-50 text-xs uppercase tracking-[0.2em] text-slate-500">
               <tr>
                 <th className="px-3 py-2 text-left">Item</th>
                 <th className="px-3 py-2 text-left">Current</th>
@@ -342,7 +564,10 @@ export const StocktakePage = ({
               </tr>
             </thead>
             <tbody className="divide-y divide-slate-100 bg-white">
-                {filteredInventory.map((item) => {
+                {rowWindow.paddingTop > 0 ? (
+                  <tr aria-hidden style={{ height: rowWindow.paddingTop }} />
+                ) : null}
+                {filteredInventory.slice(rowWindow.start, rowWindow.end).map((item) => {
                   const costPreview = previewDraftImpact(item)
                   const nextCount =
                     typeof costPreview.totalQuantity === 'number'
@@ -350,28 +575,18 @@ export const StocktakePage = ({
                       : item.currentCount
                   const delta = nextCount - item.currentCount
                   const valueImpact = costPreview.receivedValue - costPreview.soldValue
-                  const layerValue = (item.costLayers ?? []).reduce((acc, layer) => {
-                    const quantity = Number(layer?.quantity ?? 0)
-                    const cost = Number(layer?.unitCost ?? 0)
-                    if (!Number.isFinite(quantity) || !Number.isFinite(cost)) {
-                      return acc
-                    }
-                    return acc + quantity * cost
-                  }, 0)
-                  const layerQuantity = (item.costLayers ?? []).reduce((acc, layer) => {
-                    const quantity = Number(layer?.quantity ?? 0)
-                    return Number.isFinite(quantity) ? acc + quantity : acc
-                  }, 0)
-                  const averageCost =
-                    layerQuantity > 0 ? layerValue / layerQuantity : item.unitCost ?? 0
 
           return (
-            <tr key={item.id} className="transition hover:bg-indigo-50/40">
+            <tr
+              key={item.id}
+              style={{ height: TABLE_ROW_HEIGHT_PX }}
+              className="transition hover:bg-indigo-50/40"
+            >
               <td className="px-3 py-2">
-                <div className="space-y-1">
-                  <p className="font-medium text-slate-800">{item.name}</p>
-                          <p className="text-xs uppercase tracking-[0.2em] text-slate-400">
-                            {item.sku || 'No SKU'} <br/> {item.category || 'Uncategorised'}
+                <div className="max-w-[16rem] space-y-1">
+                  <p className="truncate font-medium text-slate-800" title={item.name}>{item.name}</p>
+                          <p className="truncate text-xs uppercase tracking-[0.2em] text-slate-400">
+                            {item.sku || 'No SKU'} / {item.category || 'Uncategorised'}
                           </p>
                         </div>
                       </td>
@@ -438,6 +653,9 @@ export const StocktakePage = ({
                     </tr>
                   )
                 })}
+                {rowWindow.paddingBottom > 0 ? (
+                  <tr aria-hidden style={{ height: rowWindow.paddingBottom }} />
+                ) : null}
                 {!filteredInventory.length ? (
                   <tr>
                     <td colSpan={8} className="px-4 py-6 text-center text-sm text-slate-500">
@@ -517,6 +735,17 @@ export const StocktakePage = ({
             />
           </label>
         </div>
+        {canExportDelta ? (
+          <label className="flex items-center gap-2 text-sm text-slate-600">
+            <input
+              type="checkbox"
+              checked={changesOnly}
+              onChange={(event) => setChangesOnly(event.target.checked)}
+              className="h-4 w-4 rounded border-slate-300 text-indigo-600 focus:ring-indigo-200"
+            />
+            Export changes only (merge into the full workbook from the Demo page)
+          </label>
+        ) : null}
         <div className="flex flex-wrap gap-2">
           <Button variant="primary" onClick={handleApply}>
             Confirm stocktake & export
@@ -0,0 +1,247 @@
+// Movement rollups for the analytics page. History entries are bucketed by UTC day, each
+// day keeping its own totals and per-item totals, so a movement window of any length is
+// summed from day buckets instead of rescanning history. Only the days the window starts
+// and ends in are filtered entry by entry, which keeps windows exact to the millisecond.
+
+const DAY_MS = 24 * 60 * 60 * 1000
+
+const emptyTotals = () => ({ entries: 0, sold: 0, received: 0, valueOut: 0, valueIn: 0 })
+
+const movementKey = (entry) => entry.itemId || entry.sku || entry.name
+
+const movementValues = (entry) => {
+  const sold = entry.sold ?? 0
+  const received = entry.received ?? 0
+  return {
+    sold,
+    received,
+    soldValue:
+      entry.soldValue !== undefined ? entry.soldValue : sold * (entry.soldUnitCost ?? entry.unitCost ?? 0),
+    receivedValue:
+      entry.receivedValue !== undefined
+        ? entry.receivedValue
+        : received * (entry.receivedUnitCost ?? entry.unitCost ?? 0),
+  }
+}
+
+const addToTotals = (totals, values) => {
+  if (values.sold > 0 || values.received > 0) {
+    totals.entries += 1
+  }
+  totals.sold += values.sold
+  totals.received += values.received
+  totals.valueOut += values.soldValue
+  totals.valueIn += values.receivedValue
+}
+
+const addToItemTotals = (items, entry, values) => {
+  const key = movementKey(entry)
+  let bucket = items.get(key)
+  if (!bucket) {
+    bucket = {
+      id: key,
+      sku: entry.sku,
+      name: entry.name,
+      category: entry.category,
+      sold: 0,
+      soldValue: 0,
+      received: 0,
+      receivedValue: 0,
+    }
+    items.set(key, bucket)
+  }
+  bucket.sold += values.sold
+  bucket.soldValue += values.soldValue
+  bucket.received += values.received
+  bucket.receivedValue += values.receivedValue
+}
+
+// Appends entries to the rollup in place and returns a new top-level object so React
+// memos keyed on the rollup see the change.
+export const addMovementsToRollup = (rollup, entries) => {
+  entries.forEach((entry) => {
+    const epoch = new Date(entry.timestamp).getTime()
+    if (!Number.isFinite(epoch)) {
+      return
+    }
+    const day = Math.floor(epoch / DAY_MS)
+    let bucket = rollup.days.get(day)
+    if (!bucket) {
+      bucket = { day, entries: [], totals: emptyTotals(), items: new Map() }
+      rollup.days.set(day, bucket)
+      rollup.sortedDays = null
+    }
+    const values = movementValues(entry)
+    bucket.entries.push({ entry, epoch, values })
+    addToTotals(bucket.totals, values)
+    addToItemTotals(bucket.items, entry, values)
+  })
+  return { ...rollup }
+}
+
+export const createMovementRollup = (history = []) =>
+  addMovementsToRollup({ days: new Map(), sortedDays: null }, history)
+
+const sortedDays = (rollup) => {
+  if (!rollup.sortedDays) {
+    rollup.sortedDays = Array.from(rollup.days.keys()).sort((a, b) => b - a)
+  }
+  return rollup.sortedDays
+}
+
+// Totals and per-item buckets for movements from `now - windowDays` up to `now`; a past
+// `now` gives the window ending on an "as at" date.
+export const summariseMovementWindow = (rollup, windowDays, now = Date.now()) => {
+  const threshold = now - windowDays * DAY_MS
+  const firstDay = Math.floor(threshold / DAY_MS)
+  const lastDay = Math.floor(now / DAY_MS)
+  const totals = emptyTotals()
+  const items = new Map()
+  const mergeItems = (source) => {
+    source.forEach((bucket, key) => {
+      const target = items.get(key)
+      if (!target) {
+        items.set(key, { ...bucket })
+        return
+      }
+      target.sold += bucket.sold
+      target.soldValue += bucket.soldValue
+      target.received += bucket.received
+      target.receivedValue += bucket.receivedValue
+    })
+  }
+  for (const day of sortedDays(rollup)) {
+    if (day > lastDay) {
+      continue
+    }
+    if (day < firstDay) {
+      break
+    }
+    const bucket = rollup.days.get(day)
+    if (day > firstDay && day < lastDay) {
+      totals.entries += bucket.totals.entries
+      totals.sold += bucket.totals.sold
+      totals.received += bucket.totals.received
+      totals.valueOut += bucket.totals.valueOut
+      totals.valueIn += bucket.totals.valueIn
+      mergeItems(bucket.items)
+      continue
+    }
+    const partial = new Map()
+    bucket.entries.forEach(({ entry, epoch, values }) => {
+      if (epoch >= threshold && epoch <= now) {
+        addToTotals(totals, values)
+        addToItemTotals(partial, entry, values)
+      }
+    })
+    mergeItems(partial)
+  }
+  return { totals, items }
+}
+
+// Keeps the best `limit` values seen, where `before(a, b)` means a ranks ahead of b.
+// A bounded binary heap with the weakest kept value at the root.
+export const selectTop = (values, limit, before) => {
+  const heap = []
+  const swap = (i, j) => {
+    const held = heap[i]
+    heap[i] = heap[j]
+    heap[j] = held
+  }
+  const siftUp = (index) => {
+    while (index > 0) {
+      const parent = (index - 1) >> 1
+      if (!before(heap[parent], heap[index])) {
+        return
+      }
+      swap(parent, index)
+      index = parent
+    }
+  }
+  const siftDown = (index) => {
+    for (;;) {
+      const left = index * 2 + 1
+      const right = left + 1
+      let weakest = index
+      if (left < heap.length && before(heap[weakest], heap[left])) {
+        weakest = left
+      }
+      if (right < heap.length && before(heap[weakest], heap[right])) {
+        weakest = right
+      }
+      if (weakest === index) {
+        return
+      }
+      swap(index, weakest)
+      index = weakest
+    }
+  }
+  for (const value of values) {
+    if (heap.length < limit) {
+      heap.push(value)
+      siftUp(heap.length - 1)
+    } else if (limit > 0 && before(value, heap[0])) {
+      heap[0] = value
+      siftDown(0)
+    }
+  }
+  return heap.sort((a, b) => (before(a, b) ? -1 : before(b, a) ? 1 : 0))
+}
+
+const inventoryLabel = (item) => ({
+  id: item.id,
+  sku: item.sku,
+  name: item.name,
+  category: item.category,
+})
+
+const inventoryBucket = (item) => ({
+  ...inventoryLabel(item),
+  sold: 0,
+  soldValue: 0,
+  received: 0,
+  receivedValue: 0,
+})
+
+// Highest and lowest sold over the window, across inventory items and any moved items
+// no longer in the inventory. Ties keep inventory order. Items still in the inventory
+// are labelled with their current SKU, name and category.
+export const rankMovers = (windowItems, inventory, indexById, limit = 4) => {
+  const order = (bucket) => indexById.get(bucket.id) ?? inventory.length
+  const label = (bucket) => {
+    const index = indexById.get(bucket.id)
+    return index === undefined ? bucket : { ...bucket, ...inventoryLabel(inventory[index]) }
+  }
+  const topOutflow = selectTop(
+    Array.from(windowItems.values()).filter((bucket) => bucket.sold > 0),
+    limit,
+    (a, b) => a.sold > b.sold || (a.sold === b.sold && order(a) < order(b)),
+  ).map(label)
+
+  // Most items do not move in a window, so unmoved items are usually found in the first
+  // few rows; the heap is only needed when nearly everything has sold something.
+  const leastMoved = []
+  for (const item of inventory) {
+    if (leastMoved.length === limit) {
+      return { topOutflow, leastMoved }
+    }
+    const bucket = windowItems.get(item.id)
+    if (!bucket || bucket.sold === 0) {
+      leastMoved.push(bucket ? { ...bucket, ...inventoryLabel(item) } : inventoryBucket(item))
+    }
+  }
+  const candidates = inventory.map((item) => windowItems.get(item.id) ?? inventoryBucket(item))
+  windowItems.forEach((bucket) => {
+    if (!indexById.has(bucket.id)) {
+      candidates.push(bucket)
+    }
+  })
+  return {
+    topOutflow,
+    leastMoved: selectTop(
+      candidates,
+      limit,
+      (a, b) => a.sold < b.sold || (a.sold === b.sold && order(a) < order(b)),
+    ).map(label),
+  }
+}
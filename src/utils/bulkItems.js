@@ -0,0 +1,215 @@
+import { OPTIONAL_COLUMNS, REQUIRED_COLUMNS } from '../constants.js'
+import { createInitialCostLayers } from './costing.js'
+import { buildNewItemEntry, storeHasSku } from './inventoryStore.js'
+import { normaliseManualString } from './normalise.js'
+import { parseNumber } from './numbers.js'
+import { createIdAllocator, extractSkuNumber, formatAutoSku, skuKey } from './skus.js'
+
+// Bulk onboarding: rows pasted from a spreadsheet, read from a CSV, or taken from another
+// workbook's inventory become new items in one pass. Rows are validated, SKUs are checked
+// against the store's SKU index and each other, blank SKUs are allocated from the
+// `nextSkuNumber` counter, and each new item gets its opening cost layer and "New item"
+// history entry, ready to be committed together.
+
+export const BULK_ITEM_FIELDS = ['sku', 'name', 'category', 'currentCount', 'unitCost', 'itemNote']
+
+// The template's column labels, in the order headerless rows are read; for help text.
+export const BULK_ITEM_COLUMNS = [
+  REQUIRED_COLUMNS.sku,
+  REQUIRED_COLUMNS.name,
+  REQUIRED_COLUMNS.category,
+  REQUIRED_COLUMNS.count,
+  REQUIRED_COLUMNS.unitCost,
+  OPTIONAL_COLUMNS.itemNote,
+]
+
+const FIELD_HEADERS = {
+  sku: /^(sku|code|item code|product code|barcode|plu)$/i,
+  name: /^(item|item name|name|product|description)$/i,
+  category: /^(category|department|group)$/i,
+  currentCount: /^(count|qty|quantity|on hand|stock|opening count)$/i,
+  unitCost: /^(unit cost|cost|price|unit price)$/i,
+  itemNote: /^(notes?|item note|comment)$/i,
+}
+
+const isBlank = (value) => value === null || value === undefined || `${value}`.trim() === ''
+
+// Splits delimited text into rows of cells; quoted cells may hold the delimiter, doubled
+// quotes and line breaks. Tab-separated when the first line has a tab (a spreadsheet paste).
+const splitDelimited = (text) => {
+  const firstLine = text.slice(0, text.search(/\r?\n|$/))
+  let delimiter = ','
+  if (firstLine.includes('\t')) {
+    delimiter = '\t'
+  } else if (firstLine.includes(';') && !firstLine.includes(',')) {
+    delimiter = ';'
+  }
+  const rows = []
+  let row = []
+  let cell = ''
+  let quoted = false
+  for (let index = 0; index < text.length; index += 1) {
+    const char = text[index]
+    if (quoted) {
+      if (char === '"' && text[index + 1] === '"') {
+        cell += '"'
+        index += 1
+      } else if (char === '"') {
+        quoted = false
+      } else {
+        cell += char
+      }
+    } else if (char === '"' && cell === '') {
+      quoted = true
+    } else if (char === delimiter) {
+      row.push(cell)
+      cell = ''
+    } else if (char === '\n' || char === '\r') {
+      if (char === '\r' && text[index + 1] === '\n') index += 1
+      row.push(cell)
+      rows.push(row)
+      row = []
+      cell = ''
+    } else {
+      cell += char
+    }
+  }
+  if (cell !== '' || row.length) {
+    row.push(cell)
+    rows.push(row)
+  }
+  return rows.filter((cells) => cells.some((value) => !isBlank(value)))
+}
+
+const headerFields = (cells) => {
+  const fields = cells.map((cell) => {
+    const header = normaliseManualString(cell)
+    return BULK_ITEM_FIELDS.find((field) => FIELD_HEADERS[field].test(header)) ?? null
+  })
+  return fields.some(Boolean) ? fields : null
+}
+
+// Pasted or CSV text as rows of { sku, name, category, currentCount, unitCost, itemNote }.
+// A first row naming any known column is read as the header; otherwise columns are taken
+// in the template's order (SKU, Item, Category, Count, Unit Cost, Notes).
+export const parseBulkItemText = (text) => {
+  const rows = splitDelimited(String(text ?? ''))
+  const headers = rows.length ? headerFields(rows[0]) : null
+  const fields = headers ?? BULK_ITEM_FIELDS
+  return (headers ? rows.slice(1) : rows).map((cells) => {
+    const row = {}
+    fields.forEach((field, column) => {
+      if (field && row[field] === undefined) {
+        row[field] = cells[column] ?? ''
+      }
+    })
+    return row
+  })
+}
+
+// Another workbook's parsed inventory (importWorkbook) as bulk rows.
+export const bulkRowsFromInventory = (items) =>
+  items.map((item) => ({
+    sku: item.sku,
+    name: item.name,
+    category: item.category,
+    currentCount: item.currentCount,
+    unitCost: item.unitCost,
+    itemNote: item.itemNote,
+  }))
+
+const readQuantity = (value) => {
+  if (isBlank(value)) return 0
+  const parsed = parseNumber(value, Number.NaN)
+  return Number.isFinite(parsed) && parsed >= 0 ? parsed : Number.NaN
+}
+
+// Returns { items, historyEntries, skipped, nextSkuNumber }. `skipped` lists
+// { row, reason } with 1-based row numbers; nothing in `store` is changed. Items keep
+// lastCount equal to their count, since their opening entries are written here rather
+// than by the next stocktake commit.
+export const prepareBulkItems = (
+  store,
+  rows,
+  { nextSkuNumber = 1, timestamp = new Date().toISOString(), performedBy = 'Bulk import', notes = '' } = {},
+) => {
+  const skipped = []
+  const accepted = []
+  const batchSkus = new Set()
+  let highestSupplied = 0
+
+  // Supplied SKUs are reserved first, so an allocated SKU never takes one a later row names.
+  rows.forEach((row, index) => {
+    const sku = normaliseManualString(row.sku)
+    const name = normaliseManualString(row.name)
+    const currentCount = readQuantity(row.currentCount)
+    const unitCost = readQuantity(row.unitCost)
+    let reason = null
+    if (!sku && !name) {
+      reason = 'No SKU or item name'
+    } else if (Number.isNaN(currentCount)) {
+      reason = `Count "${row.currentCount}" is not a number of zero or more`
+    } else if (Number.isNaN(unitCost)) {
+      reason = `Unit cost "${row.unitCost}" is not an amount of zero or more`
+    } else if (sku && storeHasSku(store, sku)) {
+      reason = `SKU ${sku} is already in the inventory`
+    } else if (sku && batchSkus.has(skuKey(sku))) {
+      reason = `SKU ${sku} appears more than once`
+    }
+    if (reason) {
+      skipped.push({ row: index + 1, reason })
+      return
+    }
+    if (sku) {
+      batchSkus.add(skuKey(sku))
+      highestSupplied = Math.max(highestSupplied, extractSkuNumber(sku) ?? 0)
+    }
+    accepted.push({ row, sku, name, currentCount, unitCost })
+  })
+
+  let counter = nextSkuNumber
+  const allocateSku = () => {
+    let sku = formatAutoSku(counter)
+    while (storeHasSku(store, sku) || batchSkus.has(skuKey(sku))) {
+      counter += 1
+      sku = formatAutoSku(counter)
+    }
+    counter += 1
+    batchSkus.add(skuKey(sku))
+    return sku
+  }
+  const allocateId = createIdAllocator((id) => store.indexById.has(id))
+  const meta = {
+    performedBy: normaliseManualString(performedBy) || 'Bulk import',
+    notes: normaliseManualString(notes),
+  }
+
+  const items = []
+  const historyEntries = []
+  accepted.forEach(({ row, sku: suppliedSku, name, currentCount, unitCost }) => {
+    const sku = suppliedSku || allocateSku()
+    const item = {
+      id: allocateId(sku),
+      sku,
+      name: name || sku,
+      category: normaliseManualString(row.category) || 'Uncategorised',
+      unitCost,
+      currentCount,
+      lastCount: currentCount,
+      draftSold: '',
+      draftReceived: '',
+      lastUpdated: timestamp,
+      costLayers: createInitialCostLayers(currentCount, unitCost, timestamp),
+      itemNote: normaliseManualString(row.itemNote),
+    }
+    items.push(item)
+    historyEntries.push(buildNewItemEntry(item, timestamp, meta))
+  })
+
+  return {
+    items,
+    historyEntries,
+    skipped,
+    nextSkuNumber: Math.max(counter, highestSupplied + 1),
+  }
+}
@@ -0,0 +1,177 @@
+import { parseAdjustment } from './costing.js'
+import { getStoreItem } from './inventoryStore.js'
+
+// Multi-operator sessions. Each operator's sold/received drafts form a change set that
+// other tabs receive over the session channel (sessionChannel.js) or as a saved file.
+// Lines are compact [itemId, sku, sold, received] arrays, so a set of tens of thousands of
+// lines posts and parses quickly. Sets come from other tabs and from files, so each line is
+// read through `readChangeSetLine` rather than trusted. Merging sums every set's lines per
+// item, so sets can arrive in any order; a newer revision of a session's set replaces the
+// older one rather than adding to it. The headless engine reads the same files
+// (stocktake_engine/sessions.py).
+
+export const CHANGE_SET_FORMAT = 'stocktake-change-set'
+export const CHANGE_SET_VERSION = 1
+
+export const createSessionId = () =>
+  globalThis.crypto?.randomUUID?.() ?? `session-${Date.now()}-${Math.random().toString(16).slice(2)}`
+
+export const changeSetFromStore = (store, { sessionId, operator = '', revision = 0 }) => {
+  const lines = []
+  store.draftIds.forEach((id) => {
+    const item = getStoreItem(store, id)
+    const sold = parseAdjustment(item.draftSold)
+    const received = parseAdjustment(item.draftReceived)
+    if (sold || received) {
+      lines.push([id, item.sku ?? '', sold, received])
+    }
+  })
+  return {
+    format: CHANGE_SET_FORMAT,
+    version: CHANGE_SET_VERSION,
+    sessionId,
+    operator,
+    revision,
+    updatedAt: new Date().toISOString(),
+    lines,
+  }
+}
+
+export const isChangeSet = (value) =>
+  value?.format === CHANGE_SET_FORMAT && typeof value.sessionId === 'string' && Array.isArray(value.lines)
+
+export const parseChangeSet = (text) => {
+  const value = JSON.parse(text)
+  if (!isChangeSet(value)) {
+    throw new Error('This file is not a stocktake change set.')
+  }
+  if (value.version > CHANGE_SET_VERSION) {
+    throw new Error('This change set was saved by a newer version of the app.')
+  }
+  return value
+}
+
+// Only numbers and text are read as quantities, so an object or a list in a file counts as 0.
+const readQuantity = (value) =>
+  typeof value === 'number' || typeof value === 'string' ? parseAdjustment(value) : 0
+
+// A line as { itemId, sku, sold, received }, with sold and received parsed like typed input
+// (never negative), or null when it is not an [itemId, sku, sold, received] array with a
+// text id or SKU.
+export const readChangeSetLine = (line) => {
+  if (!Array.isArray(line) || line.length < 4) {
+    return null
+  }
+  const [itemId, sku] = line
+  const hasId = typeof itemId === 'string' && itemId !== ''
+  const hasSku = typeof sku === 'string' && sku !== ''
+  if (!hasId && !hasSku) {
+    return null
+  }
+  return {
+    itemId: hasId ? itemId : null,
+    sku: hasSku ? sku : '',
+    sold: readQuantity(line[2]),
+    received: readQuantity(line[3]),
+  }
+}
+
+// Adds or replaces a session's set in a Map keyed by session id, keeping the newest
+// revision. Returns the same Map when `changeSet` is not newer.
+export const upsertChangeSet = (changeSets, changeSet) => {
+  const existing = changeSets.get(changeSet.sessionId)
+  if (existing && existing.revision >= changeSet.revision) {
+    return changeSets
+  }
+  return new Map(changeSets).set(changeSet.sessionId, changeSet)
+}
+
+export const summariseChangeSet = (changeSet) => {
+  let sold = 0
+  let received = 0
+  changeSet.lines.forEach((line) => {
+    const read = readChangeSetLine(line)
+    if (read) {
+      sold += read.sold
+      received += read.received
+    }
+  })
+  return { lines: changeSet.lines.length, sold, received }
+}
+
+// Sums the sets' lines per item: `drafts` maps item id to { sold, received, operators }.
+// Lines are matched by item id, then by SKU (a manual item registered in another tab has
+// a different id). Lines matching neither, and malformed lines, are returned in
+// `unmatched` with a `reason` of 'unknown-item' or 'invalid'.
+export const mergeChangeSets = (changeSets, store) => {
+  const drafts = new Map()
+  const unmatched = []
+  let idBySku = null
+  let lines = 0
+  changeSets.forEach((changeSet) => {
+    const operator = changeSet.operator || ''
+    changeSet.lines.forEach((line) => {
+      lines += 1
+      const read = readChangeSetLine(line)
+      if (!read) {
+        unmatched.push({ sessionId: changeSet.sessionId, operator, line, reason: 'invalid' })
+        return
+      }
+      const { itemId, sku, sold, received } = read
+      let id = itemId !== null && store.indexById.has(itemId) ? itemId : undefined
+      if (id === undefined && sku) {
+        idBySku ??= new Map(store.items.map((item) => [item.sku, item.id]))
+        id = idBySku.get(sku)
+      }
+      if (id === undefined) {
+        unmatched.push({ sessionId: changeSet.sessionId, operator, line, reason: 'unknown-item' })
+        return
+      }
+      if (!sold && !received) {
+        return
+      }
+      const draft = drafts.get(id)
+      if (!draft) {
+        drafts.set(id, { sold, received, operators: operator ? [operator] : [] })
+        return
+      }
+      draft.sold += sold
+      draft.received += received
+      if (operator && !draft.operators.includes(operator)) {
+        draft.operators.push(operator)
+      }
+    })
+  })
+  return { drafts, unmatched, lines, sessions: changeSets.length }
+}
+
+// The store's drafts less what `consumed` (an earlier revision of this session's set,
+// committed by another tab) already covered, for the edits made since it was sent.
+export const remainingDrafts = (store, consumed) => {
+  const consumedById = new Map()
+  consumed.lines.forEach((line) => {
+    const read = readChangeSetLine(line)
+    if (read?.itemId) {
+      consumedById.set(read.itemId, read)
+    }
+  })
+  const drafts = new Map()
+  store.draftIds.forEach((id) => {
+    const item = getStoreItem(store, id)
+    const line = consumedById.get(id)
+    const sold = Math.max(0, parseAdjustment(item.draftSold) - (line?.sold ?? 0))
+    const received = Math.max(0, parseAdjustment(item.draftReceived) - (line?.received ?? 0))
+    if (sold || received) {
+      drafts.set(id, { sold, received })
+    }
+  })
+  return drafts
+}
+
+// Records who counted each merged movement in `countedBy`; `performedBy` stays the
+// operator who committed it. Entries whose sets carried no names are left as they are.
+export const attributeMergedEntries = (historyEntries, drafts) =>
+  historyEntries.map((entry) => {
+    const operators = drafts.get(entry.itemId)?.operators
+    return operators?.length ? { ...entry, countedBy: operators.join(', ') } : entry
+  })
@@ -0,0 +1,264 @@
+// Column roles for the generic workspace grid (see rewrite_app.py). Which column holds the
+// week, SKU, item name and the opening/received/used/closing quantities is worked out once
+// per import, from the headers and a sample of each column's values, and kept on the table
+// as `table.schema`; the grid, stats, new rows and the stocktake cards all read it instead
+// of matching headers themselves. A role the user sets by hand is saved against the file's
+// column layout and applied again the next time a file with the same headers is imported.
+
+import { isNumericColumn, sampleCells } from './columnarTable.js'
+import { parseNumber } from './numbers.js'
+
+export const COLUMN_ROLES = ['week', 'sku', 'item', 'opening', 'received', 'used', 'closing']
+
+// Roles that hold quantities, and the two that new rows start at zero.
+const QUANTITY_ROLES = new Set(['opening', 'received', 'used', 'closing'])
+export const MOVEMENT_ROLES = ['received', 'used']
+
+const SAMPLE_ROWS = 256
+const ROLE_THRESHOLD = 0.5
+const NUMERIC_SHARE = 0.8
+const OVERRIDES_STORAGE_KEY = 'stocktake-column-roles'
+const MAX_SAVED_LAYOUTS = 20
+
+// [pattern, weight] per role; a header scores the weight of the best pattern it matches.
+const HEADER_PATTERNS = {
+  week: [[/week|\bwk\b/i, 1], [/period/i, 0.6]],
+  sku: [[/sku|barcode|\bplu\b|code|\bid\b/i, 1], [/item|product/i, 0.5]],
+  item: [[/item|product|name|description/i, 1], [/sku|code|\bid\b/i, 0.5]],
+  opening: [[/opening|start|begin/i, 1]],
+  received: [[/received|added|incoming|brought|restock|purchased|bought/i, 1]],
+  used: [[/used|sold|outgoing|shipped|consumed|spent/i, 1]],
+  closing: [[/closing|ending|final|remain|available|on\s?hand/i, 1]],
+}
+
+const QUANTITY_HEADER = /qty|quantity|count|stock|units|closing/i
+const WEEK_VALUE = /^\s*(week|wk)\.?\s*\d+\s*$/i
+const CODE_VALUE = /^[a-z]{1,6}[-_ ]?\d{2,}[a-z]?$/i
+// parseNumber reads past labels ("Week 3" -> 3); a sampled cell only counts as a number
+// when it has no letters besides an exponent.
+const LETTER = /[a-df-z]/i
+
+const headerScore = (role, column) => {
+  let best = 0
+  HEADER_PATTERNS[role].forEach(([pattern, weight]) => {
+    if (weight > best && pattern.test(column)) best = weight
+  })
+  return best
+}
+
+// Shares of the sampled non-blank cells that are numbers, week labels, product codes and
+// distinct values.
+const profileValues = (values) => {
+  let filled = 0
+  let numeric = 0
+  let weeks = 0
+  let codes = 0
+  const distinct = new Set()
+  values.forEach((value) => {
+    if (value === '' || value === null || value === undefined) return
+    filled += 1
+    const text = typeof value === 'number' ? '' : `${value}`.trim()
+    const number = LETTER.test(text) ? Number.NaN : parseNumber(value, Number.NaN)
+    if (Number.isFinite(number)) {
+      numeric += 1
+      if (Number.isInteger(number) && number >= 1 && number <= 53) weeks += 1
+    } else {
+      if (WEEK_VALUE.test(text)) weeks += 1
+      if (CODE_VALUE.test(text)) codes += 1
+    }
+    distinct.add(typeof value === 'string' ? value.trim().toLowerCase() : value)
+  })
+  if (!filled) {
+    return { filled, numeric: 0, weeks: 0, codes: 0, distinct: 0 }
+  }
+  return {
+    filled,
+    numeric: numeric / filled,
+    weeks: weeks / filled,
+    codes: codes / filled,
+    distinct: distinct.size / filled,
+  }
+}
+
+// 0..1 per role. Headers carry most of the weight; values confirm them, and on their own
+// can only pick out week labels and product codes, the two roles with a telling shape.
+const scoreColumn = (column, profile) => {
+  const empty = profile.filled === 0
+  const numericShare = empty ? 1 : profile.numeric
+  const textShare = empty ? 1 : 1 - profile.numeric
+  const scores = {}
+  COLUMN_ROLES.forEach((role) => {
+    const header = headerScore(role, column)
+    let score
+    if (QUANTITY_ROLES.has(role)) {
+      score = header * (0.4 + 0.6 * numericShare)
+    } else if (role === 'week') {
+      const labelled = profile.weeks >= 0.9 ? 0.8 * textShare : 0
+      score = Math.max(header * (0.45 + 0.55 * (empty ? 1 : profile.weeks)), labelled)
+    } else if (role === 'sku') {
+      const coded = 0.8 * profile.codes * profile.distinct
+      score = Math.max(header * (0.6 + 0.4 * (empty ? 1 : profile.distinct)), coded)
+    } else {
+      score = header * (0.4 + 0.6 * textShare)
+    }
+    scores[role] = Number(score.toFixed(3))
+  })
+  return scores
+}
+
+// Highest-scoring pairs first; each column takes one role, except that the item and SKU
+// may share a column (a sheet with only "Item" uses it for both).
+const assignRoles = (columns, scores, overrides) => {
+  const roles = {}
+  const confidence = {}
+  const taken = new Map()
+  const canTake = (role, column) => {
+    const holder = taken.get(column)
+    return !holder || (holder === 'sku' && role === 'item') || (holder === 'item' && role === 'sku')
+  }
+  Object.entries(overrides).forEach(([role, column]) => {
+    if (!COLUMN_ROLES.includes(role) || (column !== null && !columns.includes(column))) return
+    roles[role] = column ?? undefined
+    confidence[role] = 1
+    if (column !== null) taken.set(column, role)
+  })
+  const candidates = []
+  columns.forEach((column) => {
+    COLUMN_ROLES.forEach((role) => {
+      const score = scores.get(column)[role]
+      if (score >= ROLE_THRESHOLD && !(role in roles)) candidates.push({ role, column, score })
+    })
+  })
+  candidates.sort((a, b) => b.score - a.score || columns.indexOf(a.column) - columns.indexOf(b.column))
+  candidates.forEach(({ role, column, score }) => {
+    if (role in roles || !canTake(role, column)) return
+    roles[role] = column
+    confidence[role] = score
+    taken.set(column, role)
+  })
+  COLUMN_ROLES.forEach((role) => {
+    if (!(role in roles)) {
+      roles[role] = undefined
+      confidence[role] = 0
+    }
+  })
+  if (!roles.item && roles.sku && !('item' in overrides)) {
+    roles.item = roles.sku
+    confidence.item = confidence.sku
+  }
+  return { roles, confidence }
+}
+
+const buildSchema = (columns, profiles, scores, overrides) => {
+  const { roles, confidence } = assignRoles(columns, scores, overrides)
+  const numeric = new Set()
+  columns.forEach((column) => {
+    const profile = profiles.get(column)
+    const isNumeric = profile.filled ? profile.numeric >= NUMERIC_SHARE : isNumericColumn(column)
+    if (isNumeric) numeric.add(column)
+  })
+  QUANTITY_ROLES.forEach((role) => {
+    if (roles[role]) numeric.add(roles[role])
+  })
+  const quantity =
+    roles.closing ?? columns.find((column) => numeric.has(column) && QUANTITY_HEADER.test(column))
+  return {
+    columns,
+    roles,
+    confidence,
+    numeric,
+    quantity,
+    movementColumns: new Set(MOVEMENT_ROLES.map((role) => roles[role]).filter(Boolean)),
+    overrides,
+    profiles,
+    scores,
+  }
+}
+
+const inferFromSamples = (columns, sampleColumn, overrides) => {
+  const profiles = new Map()
+  const scores = new Map()
+  columns.forEach((column, columnIndex) => {
+    const profile = profileValues(sampleColumn(column, columnIndex))
+    profiles.set(column, profile)
+    scores.set(column, scoreColumn(column, profile))
+  })
+  return buildSchema(columns, profiles, scores, overrides)
+}
+
+// For an import: `readCell(rowIndex, column, columnIndex)` as createColumnarTable takes it.
+// The schema's `numeric` set is meant to be passed on as that table's `isNumeric`.
+export const inferColumnSchema = (columns, rowCount, readCell, overrides = {}) => {
+  const stride = Math.max(1, Math.floor(rowCount / SAMPLE_ROWS))
+  return inferFromSamples(
+    columns,
+    (column, columnIndex) => {
+      const values = []
+      for (let rowIndex = 0; rowIndex < rowCount && values.length < SAMPLE_ROWS; rowIndex += stride) {
+        values.push(readCell(rowIndex, column, columnIndex))
+      }
+      return values
+    },
+    overrides,
+  )
+}
+
+export const attachColumnSchema = (table, schema) => ({ ...table, schema })
+
+// Edits spread the table, so `table.schema` follows every version; it only goes stale
+// when a column is added, and the re-inferred schema is then cached per columns array.
+const staleSchemas = new WeakMap()
+
+export const columnSchemaFor = (table) => {
+  if (table.schema?.columns === table.columns) {
+    return table.schema
+  }
+  let schema = staleSchemas.get(table.columns)
+  if (!schema) {
+    const overrides = { ...loadRoleOverrides(table.columns), ...table.schema?.overrides }
+    schema = inferFromSamples(table.columns, (column) => sampleCells(table, column, SAMPLE_ROWS), overrides)
+    staleSchemas.set(table.columns, schema)
+  }
+  return schema
+}
+
+// `column` null clears the role; undefined drops the override and goes back to inference.
+export const setColumnRole = (table, role, column) => {
+  const schema = columnSchemaFor(table)
+  const overrides = { ...schema.overrides }
+  if (column === undefined) {
+    delete overrides[role]
+  } else {
+    overrides[role] = column
+  }
+  return attachColumnSchema(table, buildSchema(schema.columns, schema.profiles, schema.scores, overrides))
+}
+
+export const layoutSignature = (columns) =>
+  columns.map((column) => `${column}`.trim().toLowerCase()).join('\u001f')
+
+const readSavedLayouts = () => {
+  try {
+    return JSON.parse(globalThis.localStorage?.getItem(OVERRIDES_STORAGE_KEY) ?? '{}') ?? {}
+  } catch {
+    return {}
+  }
+}
+
+export const loadRoleOverrides = (columns) => readSavedLayouts()[layoutSignature(columns)] ?? {}
+
+// Newest layouts are kept; the oldest beyond MAX_SAVED_LAYOUTS are dropped.
+export const saveRoleOverrides = (columns, overrides) => {
+  const signature = layoutSignature(columns)
+  const layouts = readSavedLayouts()
+  delete layouts[signature]
+  if (Object.keys(overrides).length) {
+    layouts[signature] = overrides
+  }
+  const kept = Object.entries(layouts).slice(-MAX_SAVED_LAYOUTS)
+  try {
+    globalThis.localStorage?.setItem(OVERRIDES_STORAGE_KEY, JSON.stringify(Object.fromEntries(kept)))
+  } catch {
+    // Private browsing or a full quota: the override still applies until the next import.
+  }
+}
@@ -0,0 +1,381 @@
+// Columnar table model for the generic workspace grid (see rewrite_app.py). Rows are split
+// into chunks of at most TABLE_CHUNK_ROWS. Each chunk holds its row ids and one part per
+// column: numeric columns use a Float64Array, with any non-numeric cells ('' or text) kept
+// aside in a small map, and text columns use arrays with repeated imported strings
+// interned, so a category or week label is held once rather than once per row. Tables are
+// immutable; an edit copies only the chunk it touches, so unchanged chunks, and the row
+// objects built from them, are shared between versions.
+
+import { parseNumber } from './numbers.js'
+
+export const TABLE_CHUNK_ROWS = 1024
+
+const NUMERIC_COLUMN_PATTERN =
+  /(qty|quantity|count|stock|units|cost|price|amount|inventory|opening|closing|sold|received)/i
+
+export const isNumericColumn = (column) => NUMERIC_COLUMN_PATTERN.test(column)
+
+export const createRowId = () =>
+  globalThis.crypto?.randomUUID?.() ?? `row-${Date.now()}-${Math.random().toString(16).slice(2)}`
+
+const intern = (pool, value) => {
+  if (typeof value !== 'string') {
+    return value
+  }
+  const existing = pool.get(value)
+  if (existing !== undefined) {
+    return existing
+  }
+  pool.set(value, value)
+  return value
+}
+
+// NaN in `values` marks a cell whose value is held in `raw`.
+const writeNumber = (part, offset, value) => {
+  if (typeof value === 'number' && !Number.isNaN(value)) {
+    part.values[offset] = value
+    part.raw?.delete(offset)
+    return
+  }
+  part.values[offset] = Number.NaN
+  part.raw ??= new Map()
+  part.raw.set(offset, value)
+}
+
+const readPart = (part, offset) => {
+  if (Array.isArray(part)) {
+    return part[offset]
+  }
+  const value = part.values[offset]
+  return Number.isNaN(value) ? part.raw.get(offset) : value
+}
+
+const createPart = (numeric, length) =>
+  numeric ? { values: new Float64Array(length), raw: null } : new Array(length)
+
+const copyPart = (part, length = part.length ?? part.values.length) => {
+  if (Array.isArray(part)) {
+    const copy = part.slice(0, length)
+    copy.length = length
+    return copy
+  }
+  const values = new Float64Array(length)
+  values.set(part.values.subarray(0, Math.min(length, part.values.length)))
+  return { values, raw: part.raw ? new Map(part.raw) : null }
+}
+
+const writePart = (part, offset, value, pool = null) => {
+  if (Array.isArray(part)) {
+    part[offset] = pool ? intern(pool, value) : value
+  } else {
+    writeNumber(part, offset, value)
+  }
+}
+
+// Builds a part of `length` cells all holding `value`, in one pass.
+const filledPart = (numeric, length, value) => {
+  if (!numeric) {
+    return new Array(length).fill(value)
+  }
+  const part = createPart(true, length)
+  if (typeof value === 'number' && !Number.isNaN(value)) {
+    part.values.fill(value)
+  } else {
+    part.values.fill(Number.NaN)
+    part.raw = new Map()
+    for (let offset = 0; offset < length; offset += 1) {
+      part.raw.set(offset, value)
+    }
+  }
+  return part
+}
+
+const emptyTable = (columns, isNumeric) => ({
+  columns,
+  numeric: new Set(columns.filter(isNumeric)),
+  chunks: [],
+  rowCount: 0,
+  // Shared by every version of the table: row ids are never reused, and a row never
+  // moves to another chunk, so stale entries simply fail the lookup in `locate`.
+  locations: new Map(),
+})
+
+// `readCell(rowIndex, column, columnIndex)` supplies each imported cell.
+export const createColumnarTable = (columns, rowCount, readCell, { isNumeric = isNumericColumn } = {}) => {
+  const table = emptyTable(columns, isNumeric)
+  // Only needed while importing; keeping it would hold every distinct string twice over.
+  const pool = new Map()
+  for (let start = 0; start < rowCount; start += TABLE_CHUNK_ROWS) {
+    const length = Math.min(TABLE_CHUNK_ROWS, rowCount - start)
+    const rowIds = new Array(length)
+    const parts = {}
+    columns.forEach((column) => {
+      parts[column] = createPart(table.numeric.has(column), length)
+    })
+    for (let offset = 0; offset < length; offset += 1) {
+      const rowId = createRowId()
+      rowIds[offset] = rowId
+      table.locations.set(rowId, table.chunks.length)
+      columns.forEach((column, columnIndex) => {
+        writePart(parts[column], offset, readCell(start + offset, column, columnIndex), pool)
+      })
+    }
+    table.chunks.push({ rowIds, parts })
+  }
+  table.rowCount = rowCount
+  return table
+}
+
+export const createEmptyTable = () => emptyTable([], isNumericColumn)
+
+const locate = (table, rowId) => {
+  const chunkIndex = table.locations.get(rowId)
+  const chunk = table.chunks[chunkIndex]
+  const offset = chunk ? chunk.rowIds.indexOf(rowId) : -1
+  return offset === -1 ? null : { chunkIndex, chunk, offset }
+}
+
+const replaceChunk = (table, chunkIndex, chunk, rowDelta = 0) => {
+  const chunks = table.chunks.slice()
+  chunks[chunkIndex] = chunk
+  return { ...table, chunks, rowCount: table.rowCount + rowDelta }
+}
+
+// Row objects are views: `row[column]` reads through a getter on a prototype shared by
+// every row with the same columns, so a row costs three fields rather than a copy of
+// its cells. Views are built once per chunk version and reused until the chunk changes.
+const rowPrototypes = new WeakMap()
+const rowViews = new WeakMap()
+
+const rowPrototype = (columns) => {
+  let prototype = rowPrototypes.get(columns)
+  if (!prototype) {
+    prototype = {}
+    columns.forEach((column) => {
+      Object.defineProperty(prototype, column, {
+        enumerable: true,
+        get() {
+          return readPart(this.__parts[column], this.__offset)
+        },
+      })
+    })
+    rowPrototypes.set(columns, prototype)
+  }
+  return prototype
+}
+
+const chunkRows = (columns, chunk) => {
+  let rows = rowViews.get(chunk)
+  if (!rows) {
+    const prototype = rowPrototype(columns)
+    rows = chunk.rowIds.map((rowId, offset) => {
+      const row = Object.create(prototype)
+      row.__rowId = rowId
+      row.__parts = chunk.parts
+      row.__offset = offset
+      return row
+    })
+    rowViews.set(chunk, rows)
+  }
+  return rows
+}
+
+export const tableRows = (table) => {
+  const rows = new Array(table.rowCount)
+  let position = 0
+  table.chunks.forEach((chunk) => {
+    const views = chunkRows(table.columns, chunk)
+    for (let offset = 0; offset < views.length; offset += 1) {
+      rows[position] = views[offset]
+      position += 1
+    }
+  })
+  return rows
+}
+
+export const readRow = (table, rowId) => {
+  const location = locate(table, rowId)
+  return location ? chunkRows(table.columns, location.chunk)[location.offset] : undefined
+}
+
+// Writes `values` ({ column: value }) into one row, copying only that row's chunk.
+export const setCells = (table, rowId, values) => {
+  const location = locate(table, rowId)
+  if (!location) {
+    return table
+  }
+  const { chunk, chunkIndex, offset } = location
+  const parts = { ...chunk.parts }
+  Object.entries(values).forEach(([column, value]) => {
+    if (!(column in parts)) {
+      return
+    }
+    parts[column] = copyPart(parts[column])
+    writePart(parts[column], offset, value)
+  })
+  return replaceChunk(table, chunkIndex, { rowIds: chunk.rowIds, parts })
+}
+
+export const appendRow = (table, values, rowId = createRowId()) => {
+  const lastIndex = table.chunks.length - 1
+  const last = table.chunks[lastIndex]
+  if (!last || last.rowIds.length >= TABLE_CHUNK_ROWS) {
+    const parts = {}
+    table.columns.forEach((column) => {
+      parts[column] = createPart(table.numeric.has(column), 1)
+      writePart(parts[column], 0, values[column])
+    })
+    table.locations.set(rowId, table.chunks.length)
+    return { ...table, chunks: [...table.chunks, { rowIds: [rowId], parts }], rowCount: table.rowCount + 1 }
+  }
+  const offset = last.rowIds.length
+  const parts = {}
+  table.columns.forEach((column) => {
+    parts[column] = copyPart(last.parts[column], offset + 1)
+    writePart(parts[column], offset, values[column])
+  })
+  table.locations.set(rowId, lastIndex)
+  return replaceChunk(table, lastIndex, { rowIds: [...last.rowIds, rowId], parts }, 1)
+}
+
+export const removeRow = (table, rowId) => {
+  const location = locate(table, rowId)
+  if (!location) {
+    return table
+  }
+  const { chunk, chunkIndex, offset } = location
+  const parts = {}
+  table.columns.forEach((column) => {
+    const part = chunk.parts[column]
+    if (Array.isArray(part)) {
+      parts[column] = part.filter((_, position) => position !== offset)
+      return
+    }
+    const values = new Float64Array(part.values.length - 1)
+    values.set(part.values.subarray(0, offset))
+    values.set(part.values.subarray(offset + 1), offset)
+    let raw = null
+    part.raw?.forEach((value, position) => {
+      if (position !== offset) {
+        raw ??= new Map()
+        raw.set(position > offset ? position - 1 : position, value)
+      }
+    })
+    parts[column] = { values, raw }
+  })
+  const rowIds = chunk.rowIds.filter((_, position) => position !== offset)
+  return replaceChunk(table, chunkIndex, { rowIds, parts }, -1)
+}
+
+// Sets every cell of `column` to `value`: one fill per chunk instead of a copy per row.
+export const fillColumn = (table, column, value) => {
+  if (!table.columns.includes(column)) {
+    return table
+  }
+  const numeric = table.numeric.has(column)
+  const chunks = table.chunks.map((chunk) => ({
+    rowIds: chunk.rowIds,
+    parts: { ...chunk.parts, [column]: filledPart(numeric, chunk.rowIds.length, value) },
+  }))
+  return { ...table, chunks }
+}
+
+export const addColumn = (table, column, value = '', { isNumeric = isNumericColumn } = {}) => {
+  const columns = [...table.columns, column]
+  const numeric = new Set(table.numeric)
+  if (isNumeric(column)) {
+    numeric.add(column)
+  }
+  return fillColumn({ ...table, columns, numeric }, column, value)
+}
+
+// Replaces blank ('' or missing) cells of `column` with `value`. Chunks with no blanks
+// in that column are left as they are.
+export const fillBlankCells = (table, column, value) => {
+  if (!table.columns.includes(column)) {
+    return table
+  }
+  let changed = false
+  const chunks = table.chunks.map((chunk) => {
+    const part = chunk.parts[column]
+    let next = null
+    for (let offset = 0; offset < chunk.rowIds.length; offset += 1) {
+      const current = readPart(part, offset)
+      if (current === '' || current === undefined) {
+        next ??= copyPart(part)
+        writePart(next, offset, value)
+      }
+    }
+    if (!next) {
+      return chunk
+    }
+    changed = true
+    return { rowIds: chunk.rowIds, parts: { ...chunk.parts, [column]: next } }
+  })
+  return changed ? { ...table, chunks } : table
+}
+
+export const forEachCell = (table, column, callback) => {
+  table.chunks.forEach((chunk) => {
+    const part = chunk.parts[column]
+    for (let offset = 0; offset < chunk.rowIds.length; offset += 1) {
+      callback(readPart(part, offset))
+    }
+  })
+}
+
+// Up to `limit` cells of `column`, spread evenly over the table rather than taken from
+// the top, so a sorted or sectioned sheet is still represented.
+export const sampleCells = (table, column, limit) => {
+  const stride = Math.max(1, Math.floor(table.rowCount / limit))
+  const sample = []
+  let rowIndex = 0
+  for (const chunk of table.chunks) {
+    const part = chunk.parts[column]
+    const length = chunk.rowIds.length
+    let offset = (stride - (rowIndex % stride)) % stride
+    for (; offset < length && sample.length < limit; offset += stride) {
+      sample.push(readPart(part, offset))
+    }
+    rowIndex += length
+    if (sample.length >= limit) {
+      break
+    }
+  }
+  return sample
+}
+
+// Sum of the cells in `column` that parse as finite numbers.
+export const sumColumn = (table, column) => {
+  let total = 0
+  table.chunks.forEach((chunk) => {
+    const part = chunk.parts[column]
+    if (Array.isArray(part)) {
+      part.forEach((value) => {
+        total += parseNumber(value)
+      })
+      return
+    }
+    const { values, raw } = part
+    for (let offset = 0; offset < values.length; offset += 1) {
+      const value = values[offset]
+      if (Number.isFinite(value)) {
+        total += value
+      } else if (Number.isNaN(value)) {
+        total += parseNumber(raw.get(offset))
+      }
+    }
+  })
+  return total
+}
+
+// Header row followed by one array per row, for XLSX.utils.aoa_to_sheet.
+export const tableToMatrix = (table) => {
+  const matrix = [table.columns]
+  table.chunks.forEach((chunk) => {
+    for (let offset = 0; offset < chunk.rowIds.length; offset += 1) {
+      matrix.push(table.columns.map((column) => readPart(chunk.parts[column], offset)))
+    }
+  })
+  return matrix
+}
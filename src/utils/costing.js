@@ -0,0 +1,255 @@
+import { COST_LAYER_AGE_BUCKET_DAYS, COST_LAYER_COST_STEP } from '../constants.js'
+import { parseNumericInput } from './numbers.js'
+
+export const EPSILON = 1e-9
+
+const DAY_MS = 24 * 60 * 60 * 1000
+
+export const DEFAULT_LAYER_POLICY = {
+  costStep: COST_LAYER_COST_STEP,
+  ageBucketDays: COST_LAYER_AGE_BUCKET_DAYS,
+}
+
+export const ensureFiniteNumber = (value, fallback = 0) => {
+  const numeric = Number(value)
+  return Number.isFinite(numeric) ? numeric : fallback
+}
+
+export const normaliseUnitCost = (value) => ensureFiniteNumber(value, 0)
+
+export const createInitialCostLayers = (quantity, unitCost, acquiredAt = null) => {
+  const normalisedQuantity = ensureFiniteNumber(quantity, 0)
+  if (normalisedQuantity <= EPSILON) {
+    return []
+  }
+  return [
+    {
+      quantity: normalisedQuantity,
+      unitCost: normaliseUnitCost(unitCost),
+      acquiredAt,
+    },
+  ]
+}
+
+const sameCost = (a, b, costStep) =>
+  Math.abs(a - b) <= EPSILON || (costStep > 0 && Math.round(a / costStep) === Math.round(b / costStep))
+
+const sameAge = (a, b, ageBucketDays) => {
+  if (!a || !b || a === b) {
+    return true
+  }
+  if (!(ageBucketDays > 0)) {
+    return false
+  }
+  const bucketMs = ageBucketDays * DAY_MS
+  const bucketA = Math.floor(Date.parse(a) / bucketMs)
+  return Number.isFinite(bucketA) && bucketA === Math.floor(Date.parse(b) / bucketMs)
+}
+
+// Merges neighbouring layers (never reordering them, so consumption stays FIFO) and drops
+// exhausted ones. Neighbours merge when their costs round to the same `costStep` and they
+// were acquired in the same `ageBucketDays` bucket; a merged layer keeps the older date
+// and the quantity-weighted cost, so its value is unchanged. A step or bucket of 0 (the
+// default) only merges identical costs and timestamps.
+export const mergeCostLayers = (layers = [], policy = DEFAULT_LAYER_POLICY) => {
+  const { costStep = 0, ageBucketDays = 0 } = policy
+  return layers.reduce((acc, layer) => {
+    const quantity = ensureFiniteNumber(layer.quantity, 0)
+    if (quantity <= EPSILON) {
+      return acc
+    }
+    const unitCost = normaliseUnitCost(layer.unitCost)
+    const acquiredAt = layer.acquiredAt || null
+    const previous = acc[acc.length - 1]
+    if (
+      previous &&
+      sameCost(previous.unitCost, unitCost, costStep) &&
+      sameAge(previous.acquiredAt, acquiredAt, ageBucketDays)
+    ) {
+      if (Math.abs(previous.unitCost - unitCost) > EPSILON) {
+        previous.unitCost =
+          (previous.quantity * previous.unitCost + quantity * unitCost) / (previous.quantity + quantity)
+      }
+      previous.quantity += quantity
+      return acc
+    }
+    acc.push({
+      quantity,
+      unitCost,
+      acquiredAt,
+    })
+    return acc
+  }, [])
+}
+
+// Layer arrays are never modified once built, so each one's quantity and value are
+// worked out on first read and cached; store totals, the category breakdown and the
+// export then read them without walking the layers again.
+const layerTotalsCache = new WeakMap()
+
+export const calculateLayerTotals = (layers = []) => {
+  let totals = layerTotalsCache.get(layers)
+  if (!totals) {
+    totals = { quantity: 0, value: 0 }
+    layers.forEach((layer) => {
+      const quantity = ensureFiniteNumber(layer.quantity, 0)
+      totals.quantity += quantity
+      totals.value += quantity * normaliseUnitCost(layer.unitCost)
+    })
+    layerTotalsCache.set(layers, totals)
+  }
+  return totals
+}
+
+export const calculateLayersQuantity = (layers = []) => calculateLayerTotals(layers).quantity
+
+export const calculateLayersValue = (layers = []) => calculateLayerTotals(layers).value
+
+export const calculateAverageLayerCost = (layers = [], fallback = 0) => {
+  const { quantity, value } = calculateLayerTotals(layers)
+  return quantity === 0 ? ensureFiniteNumber(fallback, 0) : value / quantity
+}
+
+export const computeCostMovement = ({
+  layers = [],
+  sold = 0,
+  received = 0,
+  unitCost = 0,
+  timestamp = null,
+  policy = DEFAULT_LAYER_POLICY,
+}) => {
+  const workingLayers = layers
+    .map((layer) => ({
+      quantity: ensureFiniteNumber(layer.quantity, 0),
+      unitCost: normaliseUnitCost(layer.unitCost),
+      acquiredAt: layer.acquiredAt || null,
+    }))
+    .filter((layer) => layer.quantity > EPSILON)
+
+  let remainingSold = Math.max(0, ensureFiniteNumber(sold, 0))
+  let soldValue = 0
+  const remainderLayers = []
+
+  workingLayers.forEach((layer) => {
+    if (remainingSold <= EPSILON) {
+      remainderLayers.push({ ...layer })
+      return
+    }
+    const consume = Math.min(layer.quantity, remainingSold)
+    if (consume > EPSILON) {
+      soldValue += consume * layer.unitCost
+      remainingSold -= consume
+    }
+    const leftover = layer.quantity - consume
+    if (leftover > EPSILON) {
+      remainderLayers.push({
+        quantity: leftover,
+        unitCost: layer.unitCost,
+        acquiredAt: layer.acquiredAt,
+      })
+    }
+  })
+
+  if (remainingSold > EPSILON) {
+    const fallbackCost = remainderLayers.length
+      ? remainderLayers[remainderLayers.length - 1].unitCost
+      : normaliseUnitCost(unitCost)
+    soldValue += remainingSold * fallbackCost
+    remainingSold = 0
+  }
+
+  const receivedQuantity = Math.max(0, ensureFiniteNumber(received, 0))
+  const receivedUnitCost = normaliseUnitCost(unitCost)
+  let receivedValue = 0
+  if (receivedQuantity > EPSILON) {
+    receivedValue = receivedQuantity * receivedUnitCost
+    remainderLayers.push({
+      quantity: receivedQuantity,
+      unitCost: receivedUnitCost,
+      acquiredAt: timestamp,
+    })
+  }
+
+  const mergedLayers = mergeCostLayers(remainderLayers, policy)
+  const totalQuantity = calculateLayersQuantity(mergedLayers)
+  const soldUnitCost = sold > EPSILON ? soldValue / sold : 0
+
+  return {
+    layers: mergedLayers,
+    totalQuantity,
+    soldValue,
+    soldUnitCost,
+    receivedValue,
+    receivedUnitCost: receivedQuantity > EPSILON ? receivedUnitCost : 0,
+  }
+}
+
+export const summariseCostImpact = (item, sold, received, timestamp = null) =>
+  computeCostMovement({
+    layers: item?.costLayers ?? [],
+    sold,
+    received,
+    unitCost: item?.unitCost ?? 0,
+    timestamp,
+  })
+
+export const buildHistoryEntry = (
+  item,
+  sold,
+  received,
+  nextCount,
+  timestamp,
+  meta,
+  costSummary = {},
+) => {
+  const delta = nextCount - item.currentCount
+  if (delta === 0 && sold === 0 && received === 0) {
+    return null
+  }
+  const soldValue = ensureFiniteNumber(
+    costSummary.soldValue,
+    sold * normaliseUnitCost(item.unitCost),
+  )
+  const receivedValue = ensureFiniteNumber(
+    costSummary.receivedValue,
+    received * normaliseUnitCost(item.unitCost),
+  )
+  const soldUnitCost = sold > EPSILON ? soldValue / sold : 0
+  const receivedUnitCost =
+    received > EPSILON ? receivedValue / received : costSummary.receivedUnitCost ?? 0
+  const valueImpact = receivedValue - soldValue
+  const unitCost =
+    delta !== 0
+      ? valueImpact / delta
+      : costSummary.receivedUnitCost || costSummary.soldUnitCost || item.unitCost
+  return {
+    id: `${item.id}-${timestamp}`,
+    itemId: item.id,
+    sku: item.sku,
+    name: item.name,
+    category: item.category,
+    previousCount: item.currentCount,
+    newCount: nextCount,
+    sold,
+    received,
+    delta,
+    unitCost,
+    soldValue,
+    receivedValue,
+    soldUnitCost,
+    receivedUnitCost,
+    valueImpact,
+    performedBy: meta?.performedBy || '',
+    notes: meta?.notes || '',
+    itemNote: item?.itemNote || '',
+    timestamp,
+  }
+}
+
+export const parseAdjustment = (value) => {
+  const parsed = parseNumericInput(value, 0)
+  if (!Number.isFinite(parsed)) {
+    return 0
+  }
+  return Math.max(0, parsed)
+}
@@ -0,0 +1,17 @@
+import { EXCEL_MIME_TYPE } from '../constants.js'
+
+// Kept apart from excel.js so pages can offer downloads without loading xlsx-js-style.
+export const triggerFileDownload = (content, fileName, type) => {
+  const blob = new Blob([content], { type })
+  const url = URL.createObjectURL(blob)
+  const anchor = document.createElement('a')
+  anchor.href = url
+  anchor.download = fileName
+  document.body.appendChild(anchor)
+  anchor.click()
+  document.body.removeChild(anchor)
+  URL.revokeObjectURL(url)
+}
+
+export const triggerWorkbookDownload = (workbookBytes, fileName) =>
+  triggerFileDownload(workbookBytes, fileName, EXCEL_MIME_TYPE)
@@ -1,14 +1,21 @@
 import * as XLSX from 'xlsx-js-style'
 import {
   DEFAULT_TEMPLATE_ROWS,
-  EXCEL_MIME_TYPE,
   EXCEL_SHEET_NAME,
+  DELTA_ITEMS_SHEET_NAME,
+  DELTA_SUMMARY_SHEET_NAME,
   HISTORY_SHEET_NAME,
   TEMPLATE_HEADERS,
   REQUIRED_COLUMNS,
   SUMMARY_SHEET_NAME,
   OPTIONAL_COLUMNS,
+  IMPORT_CHUNK_ROWS,
 } from '../constants.js'
+import { calculateAverageLayerCost, calculateLayersValue } from './costing.js'
+import { parseNumber } from './numbers.js'
+import { createStageTimer, profileStage, profileStageAsync } from './profiler.js'
+import { createIdAllocator } from './skus.js'
+import { createXlsxWriter } from './xlsxWriter.js'
 
 const normaliseString = (value) => {
   if (value === null || value === undefined) {
@@ -17,14 +24,6 @@ const normaliseString = (value) => {
   return String(value).trim()
 }
 
-const parseNumber = (value) => {
-  if (value === null || value === undefined || value === '') {
-    return 0
-  }
-  const numeric = Number(String(value).replace(/[^0-9.-]/g, ''))
-  return Number.isFinite(numeric) ? numeric : 0
-}
-
 const parseCurrency = parseNumber
 
 const MOVEMENT_HEADERS = [
@@ -42,30 +41,10 @@ const MOVEMENT_HEADERS = [
   'Notes',
   'Item Note',
   'Timestamp',
+  // Added after Timestamp so workbooks written before it still read by position.
+  'Counted By',
 ]
 
-const ensureFiniteNumber = (value, fallback = 0) => {
-  const numeric = Number(value)
-  return Number.isFinite(numeric) ? numeric : fallback
-}
-
-const calculateLayersQuantity = (layers = []) =>
-  layers.reduce((acc, layer) => acc + ensureFiniteNumber(layer?.quantity, 0), 0)
-
-const calculateLayersValue = (layers = []) =>
-  layers.reduce(
-    (acc, layer) => acc + ensureFiniteNumber(layer?.quantity, 0) * ensureFiniteNumber(layer?.unitCost, 0),
-    0,
-  )
-
-const calculateAverageLayerCost = (layers = [], fallback = 0) => {
-  const quantity = calculateLayersQuantity(layers)
-  if (quantity === 0) {
-    return ensureFiniteNumber(fallback, 0)
-  }
-  return calculateLayersValue(layers) / quantity
-}
-
 const toIsoTimestamp = (value) => {
   if (!value && value !== 0) {
     return null
@@ -106,122 +85,277 @@ const ensureHeaders = (worksheet) => {
   }
 }
 
+const mapInventoryRow = (row, index, allocateId) => {
+  const sku = normaliseString(row[REQUIRED_COLUMNS.sku])
+  const name = normaliseString(row[REQUIRED_COLUMNS.name]) || `Item ${index + 1}`
+  const id = allocateId(sku || name || `row-${index + 1}`)
+  const currentCount = parseNumber(row[REQUIRED_COLUMNS.count])
+  return {
+    id,
+    sku,
+    name,
+    category: normaliseString(row[REQUIRED_COLUMNS.category]) || 'Uncategorised',
+    unitCost: parseCurrency(row[REQUIRED_COLUMNS.unitCost]),
+    currentCount,
+    lastCount: currentCount,
+    draftSold: '',
+    draftReceived: '',
+    lastUpdated: toIsoTimestamp(row[REQUIRED_COLUMNS.lastUpdated]),
+    itemNote: normaliseString(row[OPTIONAL_COLUMNS.itemNote]),
+  }
+}
+
+const hasMovementIdentity = (row) => normaliseString(row.SKU) || normaliseString(row.Item)
+
+const mapMovementRow = (row, index) => {
+  const sku = normaliseString(row.SKU)
+  const name = normaliseString(row.Item) || 'Unnamed item'
+  const category = normaliseString(row.Category) || 'Uncategorised'
+  const previousCount = parseNumber(row['Previous Count'])
+  const sold = parseNumber(row.Sold)
+  const received = parseNumber(row.Received)
+  const hasNewCount = row['New Count'] !== ''
+  const newCount = hasNewCount ? parseNumber(row['New Count']) : previousCount - sold + received
+  const hasDelta = row.Delta !== ''
+  const delta = hasDelta ? parseNumber(row.Delta) : newCount - previousCount
+  const unitCost = parseCurrency(row['Unit Cost'])
+  const rawValueChange = parseCurrency(row['Value Change'])
+  const performedBy = normaliseString(row['Performed By'])
+  const countedBy = normaliseString(row['Counted By'])
+  const notes = normaliseString(row.Notes)
+  const itemNote = normaliseString(row['Item Note'])
+  const timestamp = toIsoTimestamp(row.Timestamp)
+  const soldValue = sold * unitCost
+  const receivedValue = received * unitCost
+  const valueImpact =
+    rawValueChange !== 0 || row['Value Change'] === 0
+      ? rawValueChange
+      : receivedValue - soldValue
+  const soldUnitCost = sold > 0 ? soldValue / sold : 0
+  const receivedUnitCost = received > 0 ? receivedValue / received : 0
+  return {
+    id: `${sku || name || 'movement'}-${index}`,
+    itemId: sku || name || `movement-${index}`,
+    sku,
+    name,
+    category,
+    previousCount,
+    sold,
+    received,
+    newCount,
+    delta,
+    unitCost,
+    soldValue,
+    receivedValue,
+    soldUnitCost,
+    receivedUnitCost,
+    valueImpact,
+    performedBy,
+    countedBy,
+    notes,
+    itemNote,
+    timestamp,
+  }
+}
+
+// Movement timestamps all come from toIsoTimestamp, so they compare correctly as text
+// and the latest is found without parsing each one back into a Date.
+const latestTimestamp = (latest, entry) =>
+  entry.timestamp && (latest === null || entry.timestamp > latest) ? entry.timestamp : latest
+
 export const parseInventoryWorkbook = (arrayBuffer) => {
-  const workbook = XLSX.read(arrayBuffer, { type: 'array' })
+  const workbook = profileStage('xlsx-read', () => XLSX.read(arrayBuffer, { type: 'array' }))
   const [sheetName] = workbook.SheetNames
   if (!sheetName) {
     throw new Error('No sheets found in the workbook.')
   }
   const worksheet = workbook.Sheets[sheetName]
   ensureHeaders(worksheet)
-  const rows = XLSX.utils.sheet_to_json(worksheet, {
-    defval: '',
-    raw: false,
-  })
-  const seenIds = new Set()
-  const inventory = rows.map((row, index) => {
-    const sku = normaliseString(row[REQUIRED_COLUMNS.sku])
-    const name = normaliseString(row[REQUIRED_COLUMNS.name]) || `Item ${index + 1}`
-    const baseId = sku || name || `row-${index + 1}`
-    let id = baseId
-    let suffix = 1
-    while (seenIds.has(id)) {
-      id = `${baseId}-${suffix++}`
-    }
-    seenIds.add(id)
-    const currentCount = parseNumber(row[REQUIRED_COLUMNS.count])
-    return {
-      id,
-      sku,
-      name,
-      category: normaliseString(row[REQUIRED_COLUMNS.category]) || 'Uncategorised',
-      unitCost: parseCurrency(row[REQUIRED_COLUMNS.unitCost]),
-      currentCount,
-      lastCount: currentCount,
-      draftSold: '',
-      draftReceived: '',
-      lastUpdated: toIsoTimestamp(row[REQUIRED_COLUMNS.lastUpdated]),
-      itemNote: normaliseString(row[OPTIONAL_COLUMNS.itemNote]),
-    }
-  })
+  const rows = profileStage(
+    'sheet-to-json:inventory',
+    () => XLSX.utils.sheet_to_json(worksheet, { defval: '', raw: false }),
+    { rows: (result) => result.length },
+  )
+  const allocateId = createIdAllocator()
+  const inventory = profileStage(
+    'map-rows:inventory',
+    () => rows.map((row, index) => mapInventoryRow(row, index, allocateId)),
+    { rows: rows.length },
+  )
   let history = []
   const movementsSheet = workbook.Sheets[HISTORY_SHEET_NAME]
   if (movementsSheet) {
-    const movementRows = XLSX.utils.sheet_to_json(movementsSheet, {
-      header: MOVEMENT_HEADERS,
-      range: 1,
-      defval: '',
-      raw: false,
-    })
-    history = movementRows
-      .filter((row) => normaliseString(row.SKU) || normaliseString(row.Item))
-      .map((row, index) => {
-        const sku = normaliseString(row.SKU)
-        const name = normaliseString(row.Item) || 'Unnamed item'
-        const category = normaliseString(row.Category) || 'Uncategorised'
-        const previousCount = parseNumber(row['Previous Count'])
-        const sold = parseNumber(row.Sold)
-        const received = parseNumber(row.Received)
-        const hasNewCount = row['New Count'] !== ''
-        const newCount = hasNewCount ? parseNumber(row['New Count']) : previousCount - sold + received
-        const hasDelta = row.Delta !== ''
-        const delta = hasDelta ? parseNumber(row.Delta) : newCount - previousCount
-        const unitCost = parseCurrency(row['Unit Cost'])
-        const rawValueChange = parseCurrency(row['Value Change'])
-        const performedBy = normaliseString(row['Performed By'])
-        const notes = normaliseString(row.Notes)
-        const itemNote = normaliseString(row['Item Note'])
-        const timestamp = toIsoTimestamp(row.Timestamp)
-        const soldValue = sold * unitCost
-        const receivedValue = received * unitCost
-        const valueImpact =
-          rawValueChange !== 0 || row['Value Change'] === 0
-            ? rawValueChange
-            : receivedValue - soldValue
-        const soldUnitCost = sold > 0 ? soldValue / sold : 0
-        const receivedUnitCost = received > 0 ? receivedValue / received : 0
-        return {
-          id: `${sku || name || 'movement'}-${index}`,
-          itemId: sku || name || `movement-${index}`,
-          sku,
-          name,
-          category,
-          previousCount,
-          sold,
-          received,
-          newCount,
-          delta,
-          unitCost,
-          soldValue,
-          receivedValue,
-          soldUnitCost,
-          receivedUnitCost,
-          valueImpact,
-          performedBy,
-          notes,
-          itemNote,
-          timestamp,
-        }
-      })
+    const movementRows = profileStage(
+      'sheet-to-json:movements',
+      () =>
+        XLSX.utils.sheet_to_json(movementsSheet, {
+          header: MOVEMENT_HEADERS,
+          range: 1,
+          defval: '',
+          raw: false,
+        }),
+      { rows: (result) => result.length },
+    )
+    history = profileStage(
+      'map-rows:movements',
+      () => movementRows.filter(hasMovementIdentity).map(mapMovementRow),
+      { rows: movementRows.length },
+    )
   }
-  const lastStocktakeAt = history.reduce((latest, entry) => {
-    if (!entry.timestamp) {
-      return latest
-    }
-    const value = new Date(entry.timestamp).getTime()
-    return Number.isFinite(value) && value > latest ? value : latest
-  }, 0)
+  const lastStocktakeAt = history.reduce(latestTimestamp, null)
+  const deltaSheet = workbook.Sheets[DELTA_SUMMARY_SHEET_NAME]
   return {
     inventory,
     history,
     workbookMeta: {
       sheetName,
       importedAt: new Date().toISOString(),
-      lastStocktakeAt: lastStocktakeAt ? new Date(lastStocktakeAt).toISOString() : null,
+      lastStocktakeAt,
+      ...(deltaSheet ? readDeltaSummary(deltaSheet) : {}),
     },
   }
 }
 
+const yieldToEventLoop = () => new Promise((resolve) => setTimeout(resolve, 0))
+
+const throwIfAborted = (signal) => {
+  if (signal?.aborted) {
+    throw new DOMException('Workbook import was cancelled.', 'AbortError')
+  }
+}
+
+// Walks a worksheet in row chunks, formatting cells like sheet_to_json({ raw: false })
+// and deleting each cell once read so the parsed sheet is released as we go. With a
+// profiler `timer`, the time spent reading each chunk is added to it.
+async function* readSheetRows(worksheet, { headers, startRow, chunkSize, signal, timer }) {
+  if (!worksheet['!ref']) {
+    return
+  }
+  const range = XLSX.utils.decode_range(worksheet['!ref'])
+  const columnLetters = []
+  for (let column = range.s.c; column <= range.e.c; column += 1) {
+    columnLetters.push(XLSX.utils.encode_col(column))
+  }
+  let chunk = []
+  let chunkStarted = performance.now()
+  for (let rowIndex = Math.max(range.s.r, startRow); rowIndex <= range.e.r; rowIndex += 1) {
+    const rowNumber = XLSX.utils.encode_row(rowIndex)
+    const row = {}
+    let hasValue = false
+    for (let offset = 0; offset < columnLetters.length; offset += 1) {
+      const header = headers[offset]
+      const address = columnLetters[offset] + rowNumber
+      const cell = worksheet[address]
+      if (cell === undefined) {
+        if (header) {
+          row[header] = ''
+        }
+        continue
+      }
+      delete worksheet[address]
+      const value = cell.v === undefined || cell.v === null ? '' : XLSX.utils.format_cell(cell)
+      if (value !== '') {
+        hasValue = true
+      }
+      if (header) {
+        row[header] = value
+      }
+    }
+    if (!hasValue) {
+      continue
+    }
+    chunk.push(row)
+    if (chunk.length >= chunkSize) {
+      timer?.add(performance.now() - chunkStarted, chunk.length)
+      yield { rows: chunk, rowIndex, lastRow: range.e.r }
+      chunk = []
+      await yieldToEventLoop()
+      throwIfAborted(signal)
+      chunkStarted = performance.now()
+    }
+  }
+  if (chunk.length) {
+    timer?.add(performance.now() - chunkStarted, chunk.length)
+    yield { rows: chunk, rowIndex: range.e.r, lastRow: range.e.r }
+  }
+}
+
+// XLSX.read still parses the whole workbook into memory up front; this does not stream the
+// file. Rows are then converted and handed to the callbacks in chunks, deleting cells as
+// they are read, so large imports report progress, stay cancellable and release the parsed
+// sheets as they go.
+export const readInventoryWorkbookInChunks = async (
+  arrayBuffer,
+  { chunkSize = IMPORT_CHUNK_ROWS, onInventory, onHistory, onProgress, signal } = {},
+) => {
+  throwIfAborted(signal)
+  onProgress?.({ stage: 'read', processed: 0, total: 0 })
+  const workbook = profileStage('xlsx-read', () => XLSX.read(arrayBuffer, { type: 'array', cellStyles: false }))
+  const [sheetName] = workbook.SheetNames
+  if (!sheetName) {
+    throw new Error('No sheets found in the workbook.')
+  }
+  const worksheet = workbook.Sheets[sheetName]
+  ensureHeaders(worksheet)
+  await yieldToEventLoop()
+  throwIfAborted(signal)
+
+  let lastStocktakeAt = null
+  let historyCount = 0
+  const movementsSheet = workbook.Sheets[HISTORY_SHEET_NAME]
+  if (movementsSheet) {
+    let movementIndex = 0
+    const readTimer = createStageTimer('read-rows:movements')
+    for await (const { rows, rowIndex, lastRow } of readSheetRows(movementsSheet, {
+      headers: MOVEMENT_HEADERS,
+      startRow: 1,
+      chunkSize,
+      signal,
+      timer: readTimer,
+    })) {
+      const entries = readTimer.time(() =>
+        rows.filter(hasMovementIdentity).map((row) => mapMovementRow(row, movementIndex++)),
+      )
+      lastStocktakeAt = entries.reduce(latestTimestamp, lastStocktakeAt)
+      historyCount += entries.length
+      onHistory?.(entries)
+      onProgress?.({ stage: HISTORY_SHEET_NAME, processed: rowIndex, total: lastRow })
+    }
+    readTimer.end()
+    delete workbook.Sheets[HISTORY_SHEET_NAME]
+  }
+
+  const workbookMeta = {
+    sheetName,
+    importedAt: new Date().toISOString(),
+    lastStocktakeAt,
+  }
+
+  const headerRange = XLSX.utils.decode_range(worksheet['!ref'])
+  const headers = []
+  for (let column = headerRange.s.c; column <= headerRange.e.c; column += 1) {
+    const cell = worksheet[XLSX.utils.encode_cell({ r: headerRange.s.r, c: column })]
+    headers.push(cell ? XLSX.utils.format_cell(cell) : '')
+  }
+  const allocateId = createIdAllocator()
+  let inventoryCount = 0
+  const readTimer = createStageTimer('read-rows:inventory')
+  for await (const { rows, rowIndex, lastRow } of readSheetRows(worksheet, {
+    headers,
+    startRow: headerRange.s.r + 1,
+    chunkSize,
+    signal,
+    timer: readTimer,
+  })) {
+    const items = readTimer.time(() => rows.map((row) => mapInventoryRow(row, inventoryCount++, allocateId)))
+    onInventory?.(items, workbookMeta)
+    onProgress?.({ stage: sheetName, processed: rowIndex, total: lastRow })
+  }
+  readTimer.end()
+
+  return { workbookMeta, inventoryCount, historyCount }
+}
+
 const HEADER_CELL_STYLE = {
   fill: { patternType: 'solid', fgColor: { rgb: '4F46E5' } },
   font: { bold: true, color: { rgb: 'FFFFFF' } },
@@ -242,228 +376,187 @@ const VALUE_CELL_STYLE = {
   alignment: { horizontal: 'left', vertical: 'center' },
 }
 
-const applyRowStyles = (worksheet, rowIndex, columnCount, style) => {
-  for (let columnIndex = 0; columnIndex < columnCount; columnIndex += 1) {
-    const cellAddress = XLSX.utils.encode_cell({ r: rowIndex, c: columnIndex })
-    if (!worksheet[cellAddress]) {
-      continue
-    }
-    worksheet[cellAddress].s = {
-      ...(worksheet[cellAddress].s ?? {}),
-      ...style,
-    }
-  }
-}
+// Excel's built-in "m/d/yy h:mm", as the Python writer uses.
+const DATE_FORMAT = 22
 
-const applyColumnStyles = (worksheet, columnIndex, rowCount, style) => {
-  for (let rowIndex = 0; rowIndex < rowCount; rowIndex += 1) {
-    const cellAddress = XLSX.utils.encode_cell({ r: rowIndex, c: columnIndex })
-    if (!worksheet[cellAddress]) {
-      continue
-    }
-    worksheet[cellAddress].s = {
-      ...(worksheet[cellAddress].s ?? {}),
-      ...style,
-    }
-  }
-}
+const TEMPLATE_WIDTHS = [14, 26, 18, 12, 14, 16]
+const INVENTORY_WIDTHS = [14, 28, 18, 12, 14, 16, 28]
+const MOVEMENT_WIDTHS = [14, 26, 18, 14, 12, 12, 14, 12, 12, 16, 18, 28, 28, 22, 22]
+const SUMMARY_WIDTHS = [20, 28]
 
-export const createTemplateWorkbook = () => {
-  const workbook = XLSX.utils.book_new()
-  const worksheet = XLSX.utils.aoa_to_sheet(DEFAULT_TEMPLATE_ROWS)
-  worksheet['!cols'] = [
-    { wch: 14 },
-    { wch: 26 },
-    { wch: 18 },
-    { wch: 12 },
-    { wch: 14 },
-    { wch: 16 },
-  ]
-  applyRowStyles(worksheet, 0, TEMPLATE_HEADERS.length, HEADER_CELL_STYLE)
-  XLSX.utils.book_append_sheet(workbook, worksheet, EXCEL_SHEET_NAME)
-  const movementsSheet = createEmptyMovementsSheet()
-  XLSX.utils.book_append_sheet(workbook, movementsSheet, HISTORY_SHEET_NAME)
-  const summarySheet = createSummarySheet(
-    DEFAULT_TEMPLATE_ROWS.slice(1).map((row) => ({
-      currentCount: parseNumber(row[3]),
-      unitCost: parseCurrency(row[4]),
-      category: row[2],
-    })),
-    {
-      sourceFileName: 'Template workbook',
-    },
+const INVENTORY_HEADERS = [...Object.values(REQUIRED_COLUMNS), OPTIONAL_COLUMNS.itemNote]
+
+const toDate = (timestamp) => (timestamp ? new Date(timestamp) : '')
+
+// Each style is registered once per workbook; cells carry the index.
+const registerStyles = (book) => ({
+  header: book.registerStyle(HEADER_CELL_STYLE),
+  // The summary title sits in the header row and the label column, so takes both.
+  title: book.registerStyle({ ...HEADER_CELL_STYLE, ...LABEL_CELL_STYLE }),
+  label: book.registerStyle(LABEL_CELL_STYLE),
+  value: book.registerStyle(VALUE_CELL_STYLE),
+  valueDate: book.registerStyle({ ...VALUE_CELL_STYLE, numFmt: DATE_FORMAT }),
+  date: book.registerStyle({ numFmt: DATE_FORMAT }),
+})
+
+const writeWorkbook = (book) =>
+  book.write((sheet, write) =>
+    sheet.stage ? profileStageAsync(sheet.stage, write, { rows: sheet.records.length }) : write(),
   )
-  XLSX.utils.book_append_sheet(workbook, summarySheet, SUMMARY_SHEET_NAME)
-  return XLSX.write(workbook, { bookType: 'xlsx', type: 'array', cellDates: true })
-}
 
-export const createBlankTemplateWorkbook = () => {
-  const workbook = XLSX.utils.book_new()
-  const worksheet = XLSX.utils.aoa_to_sheet([TEMPLATE_HEADERS])
-  worksheet['!cols'] = [
-    { wch: 14 },
-    { wch: 26 },
-    { wch: 18 },
-    { wch: 12 },
-    { wch: 14 },
-    { wch: 16 },
-  ]
-  applyRowStyles(worksheet, 0, TEMPLATE_HEADERS.length, HEADER_CELL_STYLE)
-  XLSX.utils.book_append_sheet(workbook, worksheet, EXCEL_SHEET_NAME)
-  const movementsSheet = createEmptyMovementsSheet()
-  XLSX.utils.book_append_sheet(workbook, movementsSheet, HISTORY_SHEET_NAME)
-  const summarySheet = createSummarySheet([], { sourceFileName: 'Blank workbook' })
-  XLSX.utils.book_append_sheet(workbook, summarySheet, SUMMARY_SHEET_NAME)
-  return XLSX.write(workbook, { bookType: 'xlsx', type: 'array', cellDates: true })
-}
+const inventoryColumns = (styles) => [
+  { value: (item) => item.sku },
+  { value: (item) => item.name },
+  { value: (item) => item.category },
+  { value: (item) => item.currentCount },
+  { value: (item) => calculateAverageLayerCost(item.costLayers ?? [], item.unitCost) },
+  { value: (item) => toDate(item.lastUpdated), style: styles.date },
+  { value: (item) => item.itemNote || '' },
+]
 
-const createSummarySheet = (inventory, metadata = {}) => {
+const movementColumns = (styles) => [
+  { value: (entry) => entry.sku },
+  { value: (entry) => entry.name },
+  { value: (entry) => entry.category },
+  { value: (entry) => entry.previousCount },
+  { value: (entry) => entry.sold ?? 0 },
+  { value: (entry) => entry.received ?? 0 },
+  { value: (entry) => entry.newCount },
+  { value: (entry) => entry.delta },
+  { value: (entry) => entry.unitCost ?? '' },
+  {
+    value: (entry) =>
+      entry.valueImpact ??
+      (entry.receivedValue ?? 0) - (entry.soldValue ?? (entry.sold ?? 0) * (entry.soldUnitCost ?? entry.unitCost ?? 0)),
+  },
+  { value: (entry) => entry.performedBy || '' },
+  { value: (entry) => entry.notes || '' },
+  { value: (entry) => entry.itemNote || '' },
+  { value: (entry) => toDate(entry.timestamp), style: styles.date },
+  { value: (entry) => entry.countedBy || '' },
+]
+
+const addInventorySheet = (book, styles, name, inventory) =>
+  book.addSheet(name, {
+    widths: INVENTORY_WIDTHS,
+    rows: [[INVENTORY_HEADERS, styles.header]],
+    records: inventory,
+    columns: inventoryColumns(styles),
+    stage: 'build-sheet:inventory',
+  })
+
+const addMovementsSheet = (book, styles, history) =>
+  book.addSheet(HISTORY_SHEET_NAME, {
+    widths: MOVEMENT_WIDTHS,
+    rows: [[MOVEMENT_HEADERS, styles.header]],
+    records: history,
+    columns: movementColumns(styles),
+    stage: 'build-sheet:movements',
+  })
+
+// A title row, then label/value rows; `valueStyles` false leaves the values unstyled.
+const summaryRows = (styles, title, rows, valueStyles = true) => [
+  [[title], styles.title],
+  ...rows.map((row) => {
+    const isDate = row[1] instanceof Date
+    const valueStyle = valueStyles ? (isDate ? styles.valueDate : styles.value) : isDate ? styles.date : 0
+    return [row, [styles.label, valueStyle]]
+  }),
+]
+
+const addSummarySheet = (book, styles, inventory, metadata = {}) => {
   const totalUnits = inventory.reduce((acc, item) => acc + item.currentCount, 0)
   const totalValue = inventory.reduce(
     (acc, item) => acc + calculateLayersValue(item.costLayers ?? []),
     0,
   )
-  const summaryRows = [
-    ['Stocktake Inventory Tool'],
-    ['Generated At', new Date()],
-    ['Source File', metadata.sourceFileName || ''],
-    ['Imported At', metadata.lastImportedAt ? new Date(metadata.lastImportedAt) : ''],
-    ['Last Stocktake', metadata.lastStocktakeAt ? new Date(metadata.lastStocktakeAt) : ''],
-    ['Total SKUs', inventory.length],
-    ['Units On Hand', totalUnits],
-    ['Inventory Value', totalValue],
-  ]
-  const summarySheet = XLSX.utils.aoa_to_sheet(summaryRows)
-  summarySheet['!cols'] = [{ wch: 20 }, { wch: 28 }]
-  applyRowStyles(summarySheet, 0, 2, HEADER_CELL_STYLE)
-  applyColumnStyles(summarySheet, 0, summaryRows.length, LABEL_CELL_STYLE)
-  applyColumnStyles(summarySheet, 1, summaryRows.length, VALUE_CELL_STYLE)
-  return summarySheet
+  book.addSheet(SUMMARY_SHEET_NAME, {
+    widths: SUMMARY_WIDTHS,
+    rows: summaryRows(styles, 'Stocktake Inventory Tool', [
+      ['Generated At', new Date()],
+      ...(metadata.asAt ? [['As At', toDate(metadata.asAt)]] : []),
+      ['Source File', metadata.sourceFileName || ''],
+      ['Imported At', toDate(metadata.lastImportedAt)],
+      ['Last Stocktake', toDate(metadata.lastStocktakeAt)],
+      ['Total SKUs', inventory.length],
+      ['Units On Hand', totalUnits],
+      ['Inventory Value', totalValue],
+    ]),
+  })
 }
 
-const createMovementsSheet = (history) => {
-  if (!history.length) {
-    return null
-  }
-  const rows = history.map((entry) => ({
-    SKU: entry.sku,
-    Item: entry.name,
-    Category: entry.category,
-    'Previous Count': entry.previousCount,
-    Sold: entry.sold ?? 0,
-    Received: entry.received ?? 0,
-    'New Count': entry.newCount,
-    Delta: entry.delta,
-    'Unit Cost': entry.unitCost ?? '',
-    'Value Change':
-      entry.valueImpact ??
-      (entry.receivedValue ?? 0) - (entry.soldValue ?? (entry.sold ?? 0) * (entry.soldUnitCost ?? entry.unitCost ?? 0)),
-    'Performed By': entry.performedBy || '',
-    Notes: entry.notes || '',
-    'Item Note': entry.itemNote || '',
-    Timestamp: entry.timestamp ? new Date(entry.timestamp) : '',
-  }))
-  const worksheet = XLSX.utils.json_to_sheet(rows, {
-    header: MOVEMENT_HEADERS,
+const writeTemplateWorkbook = (rows, summaryInventory, sourceFileName) => {
+  const book = createXlsxWriter()
+  const styles = registerStyles(book)
+  const [headers, ...samples] = rows
+  book.addSheet(EXCEL_SHEET_NAME, {
+    widths: TEMPLATE_WIDTHS,
+    rows: [[headers, styles.header], ...samples.map((row) => [row])],
   })
-  applyRowStyles(worksheet, 0, MOVEMENT_HEADERS.length, HEADER_CELL_STYLE)
-  worksheet['!cols'] = [
-    { wch: 14 },
-    { wch: 26 },
-    { wch: 18 },
-    { wch: 14 },
-    { wch: 12 },
-    { wch: 12 },
-    { wch: 14 },
-    { wch: 12 },
-    { wch: 12 },
-    { wch: 16 },
-    { wch: 18 },
-    { wch: 28 },
-    { wch: 28 },
-    { wch: 22 },
-  ]
-  return worksheet
+  addMovementsSheet(book, styles, [])
+  addSummarySheet(book, styles, summaryInventory, { sourceFileName })
+  return writeWorkbook(book)
 }
 
-export const createUpdatedWorkbook = (inventory, metadata = {}, history = []) => {
-  const workbook = XLSX.utils.book_new()
-  const rows = inventory.map((item) => ({
-    [REQUIRED_COLUMNS.sku]: item.sku,
-    [REQUIRED_COLUMNS.name]: item.name,
-    [REQUIRED_COLUMNS.category]: item.category,
-    [REQUIRED_COLUMNS.count]: item.currentCount,
-    [REQUIRED_COLUMNS.unitCost]: calculateAverageLayerCost(item.costLayers ?? [], item.unitCost),
-    [REQUIRED_COLUMNS.lastUpdated]: item.lastUpdated ? new Date(item.lastUpdated) : '',
-    [OPTIONAL_COLUMNS.itemNote]: item.itemNote || '',
-  }))
-  const requiredHeaders = Object.values(REQUIRED_COLUMNS)
-  const optionalHeaders = [OPTIONAL_COLUMNS.itemNote]
-  const headers = [...requiredHeaders, ...optionalHeaders]
-  const worksheet = XLSX.utils.json_to_sheet(rows, {
-    header: headers,
-  })
-  applyRowStyles(worksheet, 0, headers.length, HEADER_CELL_STYLE)
-  worksheet['!cols'] = [
-    { wch: 14 },
-    { wch: 28 },
-    { wch: 18 },
-    { wch: 12 },
-    { wch: 14 },
-    { wch: 16 },
-    { wch: 28 },
-  ]
-  XLSX.utils.book_append_sheet(
-    workbook,
-    worksheet,
-    metadata.sheetName || EXCEL_SHEET_NAME,
-  )
-  const movementsSheet = createMovementsSheet(history) || createEmptyMovementsSheet()
-  XLSX.utils.book_append_sheet(workbook, movementsSheet, HISTORY_SHEET_NAME)
-  XLSX.utils.book_append_sheet(
-    workbook,
-    createSummarySheet(inventory, metadata),
-    SUMMARY_SHEET_NAME,
+export const createTemplateWorkbook = () =>
+  writeTemplateWorkbook(
+    DEFAULT_TEMPLATE_ROWS,
+    DEFAULT_TEMPLATE_ROWS.slice(1).map((row) => ({
+      currentCount: parseNumber(row[3]),
+      unitCost: parseCurrency(row[4]),
+      category: row[2],
+    })),
+    'Template workbook',
   )
-  return XLSX.write(workbook, {
-    bookType: 'xlsx',
-    type: 'array',
-    cellDates: true,
+
+export const createBlankTemplateWorkbook = () => writeTemplateWorkbook([TEMPLATE_HEADERS], [], 'Blank workbook')
+
+// Resolves to the .xlsx bytes. Rows are written from `inventory` and `history` as the zip
+// is deflated; nothing is copied into per-row objects first.
+export const createUpdatedWorkbook = (inventory, metadata = {}, history = []) => {
+  const book = createXlsxWriter()
+  const styles = registerStyles(book)
+  addInventorySheet(book, styles, metadata.sheetName || EXCEL_SHEET_NAME, inventory)
+  addMovementsSheet(book, styles, history)
+  addSummarySheet(book, styles, inventory, metadata)
+  return profileStageAsync('xlsx-write', () => writeWorkbook(book), {
+    rows: inventory.length + history.length,
   })
 }
 
-export const triggerWorkbookDownload = (workbookBytes, fileName) => {
-  const blob = new Blob([workbookBytes], { type: EXCEL_MIME_TYPE })
-  const url = URL.createObjectURL(blob)
-  const anchor = document.createElement('a')
-  anchor.href = url
-  anchor.download = fileName
-  document.body.appendChild(anchor)
-  anchor.click()
-  document.body.removeChild(anchor)
-  URL.revokeObjectURL(url)
+// A delta export holds only the items changed and the movements recorded since the last
+// export. Its first sheet uses the Stocktake columns and its movements sheet the usual
+// name, so it parses like any workbook; the Delta sheet marks it and records the base.
+export const createDeltaWorkbook = (changedItems, movements, { sourceFileName = '', since = null } = {}) => {
+  const book = createXlsxWriter()
+  const styles = registerStyles(book)
+  addInventorySheet(book, styles, DELTA_ITEMS_SHEET_NAME, changedItems)
+  addMovementsSheet(book, styles, movements)
+  book.addSheet(DELTA_SUMMARY_SHEET_NAME, {
+    widths: SUMMARY_WIDTHS,
+    rows: summaryRows(
+      styles,
+      'Stocktake Delta Export',
+      [
+        ['Generated At', new Date()],
+        ['Base File', sourceFileName],
+        ['Changes Since', toDate(since)],
+        ['Changed Items', changedItems.length],
+        ['New Movements', movements.length],
+      ],
+      false,
+    ),
+  })
+  return writeWorkbook(book)
 }
 
-const createEmptyMovementsSheet = () => {
-  const worksheet = XLSX.utils.aoa_to_sheet([MOVEMENT_HEADERS])
-  applyRowStyles(worksheet, 0, MOVEMENT_HEADERS.length, HEADER_CELL_STYLE)
-  worksheet['!cols'] = [
-    { wch: 14 },
-    { wch: 26 },
-    { wch: 18 },
-    { wch: 14 },
-    { wch: 12 },
-    { wch: 12 },
-    { wch: 14 },
-    { wch: 12 },
-    { wch: 12 },
-    { wch: 16 },
-    { wch: 18 },
-    { wch: 28 },
-    { wch: 22 },
-  ]
-  return worksheet
+function readDeltaSummary(worksheet) {
+  const rows = XLSX.utils.sheet_to_json(worksheet, { header: 1, raw: true, defval: '' })
+  const valueOf = (label) => rows.find((row) => row[0] === label)?.[1]
+  return {
+    isDelta: true,
+    deltaBaseFile: normaliseString(valueOf('Base File')),
+    deltaSince: toIsoTimestamp(valueOf('Changes Since')),
+    deltaGeneratedAt: toIsoTimestamp(valueOf('Generated At')),
+  }
 }
-
-
-
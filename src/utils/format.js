@@ -1,87 +1,153 @@
 ﻿const DEFAULT_LOCALE = 'en-AU'
+const EMPTY = '—'
+
+// Table cells format the same few thousand values on every render, so each formatter
+// keeps its recent results. The cache is a two-generation LRU: hits in the older map are
+// promoted, and when the newer one fills it replaces the older, dropping whatever was not
+// used since. Evicting one key at a time from the front of a Map is slow in V8 once many
+// keys have been deleted, which this avoids.
+const FORMAT_CACHE_SIZE = 5000
+
+export const createLruCache = (limit = FORMAT_CACHE_SIZE) => {
+  let recent = new Map()
+  let older = new Map()
+  const set = (key, value) => {
+    if (recent.size >= limit) {
+      older = recent
+      recent = new Map()
+    }
+    recent.set(key, value)
+    return value
+  }
+  return {
+    get(key) {
+      const value = recent.get(key)
+      if (value !== undefined) {
+        return value
+      }
+      const promoted = older.get(key)
+      if (promoted !== undefined) {
+        older.delete(key)
+        set(key, promoted)
+      }
+      return promoted
+    },
+    set,
+    clear() {
+      recent = new Map()
+      older = new Map()
+    },
+  }
+}
+
+const cachedFormat = (cache, key, format) => {
+  const cached = cache.get(key)
+  return cached === undefined ? cache.set(key, format(key)) : cached
+}
 
 const numberFormatters = new Map()
 const getNumberFormatter = (options) => {
   const key = JSON.stringify(options)
   if (!numberFormatters.has(key)) {
-    numberFormatters.set(key, new Intl.NumberFormat(DEFAULT_LOCALE, options))
+    const formatter = new Intl.NumberFormat(DEFAULT_LOCALE, options)
+    const cache = createLruCache()
+    numberFormatters.set(key, (value) => cachedFormat(cache, value, (number) => formatter.format(number)))
   }
   return numberFormatters.get(key)
 }
 
-const baseCurrencyFormatter = new Intl.NumberFormat(DEFAULT_LOCALE, {
-  style: 'currency',
-  currency: 'AUD',
-  maximumFractionDigits: 2,
-})
+// Keyed on the digits, so the common whole-number calls skip building an options key.
+const wholeNumberFormat = getNumberFormatter({ maximumFractionDigits: 0, minimumFractionDigits: 0 })
+const currencyFormat = (() => {
+  const formatter = new Intl.NumberFormat(DEFAULT_LOCALE, {
+    style: 'currency',
+    currency: 'AUD',
+    maximumFractionDigits: 2,
+  })
+  const cache = createLruCache()
+  return (value) => cachedFormat(cache, value, (number) => formatter.format(number))
+})()
 
-export const formatNumber = (value, options = {}) => {
+const toFiniteNumber = (value) => {
   if (value === null || value === undefined) {
-    return '—'
+    return null
   }
-  const numericValue = Number(value)
-  if (!Number.isFinite(numericValue)) {
-    return '—'
-  }
-  const formatter = getNumberFormatter({
-    maximumFractionDigits: options.maximumFractionDigits ?? 0,
-    minimumFractionDigits: options.minimumFractionDigits ?? 0,
-  })
-  return formatter.format(numericValue)
+  const numericValue = typeof value === 'number' ? value : Number(value)
+  return Number.isFinite(numericValue) ? numericValue : null
+}
+
+export const formatNumber = (value, options = {}) => {
+  const numericValue = toFiniteNumber(value)
+  if (numericValue === null) {
+    return EMPTY
+  }
+  const maximumFractionDigits = options.maximumFractionDigits ?? 0
+  const minimumFractionDigits = options.minimumFractionDigits ?? 0
+  const format =
+    maximumFractionDigits === 0 && minimumFractionDigits === 0
+      ? wholeNumberFormat
+      : getNumberFormatter({ maximumFractionDigits, minimumFractionDigits })
+  return format(numericValue)
 }
 
 export const formatCurrency = (value) => {
-  if (value === null || value === undefined) {
-    return '—'
-  }
-  const numericValue = Number(value)
-  if (!Number.isFinite(numericValue)) {
-    return '—'
-  }
-  return baseCurrencyFormatter.format(numericValue)
+  const numericValue = toFiniteNumber(value)
+  return numericValue === null ? EMPTY : currencyFormat(numericValue)
 }
 
+const signedCaches = { currency: createLruCache(), units: createLruCache() }
+
 export const formatDelta = (value, { currency = false, showZero = false } = {}) => {
   if (value === 0 && !showZero) {
-    return '—'
+    return EMPTY
   }
-  const formatter = currency ? formatCurrency : (val) => formatNumber(val, { maximumFractionDigits: 0 })
-  const numericValue = Number(value)
-  if (!Number.isFinite(numericValue)) {
-    return '—'
+  const numericValue = toFiniteNumber(value)
+  if (numericValue === null) {
+    return EMPTY
   }
-  const prefix = numericValue > 0 ? '+' : ''
-  return `${prefix}${formatter(numericValue)}`
+  const cache = currency ? signedCaches.currency : signedCaches.units
+  return cachedFormat(cache, numericValue, (number) => {
+    const prefix = number > 0 ? '+' : ''
+    return `${prefix}${currency ? currencyFormat(number) : wholeNumberFormat(number)}`
+  })
 }
 
-const dateFormatter = new Intl.DateTimeFormat(DEFAULT_LOCALE, { dateStyle: 'medium' })
-const dateTimeFormatter = new Intl.DateTimeFormat(DEFAULT_LOCALE, {
-  dateStyle: 'medium',
-  timeStyle: 'short',
-})
+// Dates accept an epoch (ms), a Date or a timestamp string. Strings are parsed once
+// and remembered, so passing the same ISO string again costs a map lookup.
+const parsedTimestamps = createLruCache()
 
-export const formatDate = (value) => {
-  if (!value) {
-    return '—'
+const toEpoch = (value) => {
+  if (typeof value === 'number') {
+    return Number.isFinite(value) ? value : null
+  }
+  if (value instanceof Date) {
+    const epoch = value.valueOf()
+    return Number.isNaN(epoch) ? null : epoch
   }
-  const date = new Date(value)
-  if (Number.isNaN(date.valueOf())) {
-    return '—'
+  let epoch = parsedTimestamps.get(value)
+  if (epoch === undefined) {
+    epoch = parsedTimestamps.set(value, new Date(value).valueOf())
   }
-  return dateFormatter.format(date)
+  return Number.isNaN(epoch) ? null : epoch
 }
 
-export const formatDateTime = (value) => {
-  if (!value) {
-    return '—'
-  }
-  const date = new Date(value)
-  if (Number.isNaN(date.valueOf())) {
-    return '—'
+const createDateFormat = (options) => {
+  const formatter = new Intl.DateTimeFormat(DEFAULT_LOCALE, options)
+  const cache = createLruCache()
+  return (value) => {
+    // 0 reads as no date, like null and '' (an unset timestamp), not as 1 Jan 1970.
+    if (!value) {
+      return EMPTY
+    }
+    const epoch = toEpoch(value)
+    return epoch === null ? EMPTY : cachedFormat(cache, epoch, (ms) => formatter.format(ms))
   }
-  return dateTimeFormatter.format(date)
 }
 
+export const formatDate = createDateFormat({ dateStyle: 'medium' })
+
+export const formatDateTime = createDateFormat({ dateStyle: 'medium', timeStyle: 'short' })
+
 const relativeTimeFormatter = new Intl.RelativeTimeFormat(DEFAULT_LOCALE, { numeric: 'auto' })
 const relativeUnits = [
   ['year', 1000 * 60 * 60 * 24 * 365],
@@ -92,35 +158,54 @@ const relativeUnits = [
   ['minute', 1000 * 60],
 ]
 
+// Relative labels depend on the current time, so the cache is dropped each minute.
+const relativeCache = createLruCache()
+let relativeCacheMinute = null
+
 export const formatRelativeTime = (value) => {
   if (!value) {
-    return '—'
-  }
-  const date = new Date(value)
-  if (Number.isNaN(date.valueOf())) {
-    return '—'
-  }
-  const deltaMs = date.getTime() - Date.now()
-  for (const [unit, unitMs] of relativeUnits) {
-    if (Math.abs(deltaMs) >= unitMs || unit === 'minute') {
-      return relativeTimeFormatter.format(Math.round(deltaMs / unitMs), unit)
+    return EMPTY
+  }
+  const epoch = toEpoch(value)
+  if (epoch === null) {
+    return EMPTY
+  }
+  const now = Date.now()
+  const minute = Math.floor(now / 60000)
+  if (minute !== relativeCacheMinute) {
+    relativeCache.clear()
+    relativeCacheMinute = minute
+  }
+  return cachedFormat(relativeCache, epoch, (ms) => {
+    const deltaMs = ms - now
+    for (const [unit, unitMs] of relativeUnits) {
+      if (Math.abs(deltaMs) >= unitMs || unit === 'minute') {
+        return relativeTimeFormatter.format(Math.round(deltaMs / unitMs), unit)
+      }
     }
-  }
-  return 'just now'
+    return 'just now'
+  })
 }
 
 export const formatPercent = (value, { maximumFractionDigits = 1 } = {}) => {
-  if (value === null || value === undefined) {
-    return '—'
-  }
-  const numericValue = Number(value)
-  if (!Number.isFinite(numericValue)) {
-    return '—'
+  const numericValue = toFiniteNumber(value)
+  if (numericValue === null) {
+    return EMPTY
   }
-  const formatter = getNumberFormatter({
+  const format = getNumberFormatter({
     style: 'percent',
     maximumFractionDigits,
     minimumFractionDigits: 0,
   })
-  return formatter.format(numericValue)
+  return format(numericValue)
+}
+
+// Formats a whole column in one call, e.g. `formatColumn(epochs, formatDateTime)` or
+// `formatColumn(values, formatDelta, { currency: true })`. Accepts arrays and typed arrays.
+export const formatColumn = (values, format, options) => {
+  const formatted = new Array(values.length)
+  for (let index = 0; index < values.length; index += 1) {
+    formatted[index] = format(values[index], options)
+  }
+  return formatted
 }
@@ -0,0 +1,303 @@
+// Time-indexed movement history. Entries are held oldest first in append-only arrays that
+// every version of the index shares, the way the columnar table shares its location map:
+// a version only reads its first `length` entries, so a commit pushes its movements
+// instead of copying the whole history. Timestamps are parsed to epochs once, and entry
+// positions are listed by item id, category and operator. Positions only ever grow, so
+// each list is also in time order and a date range is two binary searches into it.
+// Running totals over the timeline answer summaries of an unfiltered range in O(1).
+
+const INITIAL_CAPACITY = 1024
+const SUM_FIELDS = ['sold', 'received', 'units', 'value']
+const EMPTY_LIST = []
+
+export const movementValueImpact = (entry) =>
+  entry.valueImpact ??
+  (entry.receivedValue ?? 0) -
+    (entry.soldValue ?? (entry.sold ?? 0) * (entry.soldUnitCost ?? entry.unitCost ?? 0))
+
+// Movements without a readable timestamp sort before everything else.
+const parseEpoch = (timestamp) => {
+  const epoch = timestamp ? Date.parse(timestamp) : Number.NaN
+  return Number.isNaN(epoch) ? Number.NEGATIVE_INFINITY : epoch
+}
+
+const operatorKey = (value) => (value ? String(value).trim().toLowerCase() : '')
+
+const createCore = (capacity) => ({
+  entries: [],
+  epochs: new Float64Array(capacity),
+  // sums[field][position] is the total of the entries before `position`.
+  sums: Object.fromEntries(SUM_FIELDS.map((field) => [field, new Float64Array(capacity + 1)])),
+  byItem: new Map(),
+  byCategory: new Map(),
+  byOperator: new Map(),
+  // Lower-cased search text, filled in the first time an entry is searched.
+  searchText: [],
+})
+
+const ensureCapacity = (core, needed) => {
+  let capacity = core.epochs.length
+  if (needed <= capacity) {
+    return
+  }
+  while (capacity < needed) {
+    capacity *= 2
+  }
+  const epochs = new Float64Array(capacity)
+  epochs.set(core.epochs)
+  core.epochs = epochs
+  SUM_FIELDS.forEach((field) => {
+    const sums = new Float64Array(capacity + 1)
+    sums.set(core.sums[field])
+    core.sums[field] = sums
+  })
+}
+
+const addPosition = (map, key, position) => {
+  if (!key) {
+    return
+  }
+  const list = map.get(key)
+  if (list) {
+    list.push(position)
+  } else {
+    map.set(key, [position])
+  }
+}
+
+const pushEntry = (core, entry, epoch) => {
+  const position = core.entries.length
+  ensureCapacity(core, position + 1)
+  core.entries.push(entry)
+  core.epochs[position] = epoch
+  const { sums } = core
+  sums.sold[position + 1] = sums.sold[position] + (entry.sold ?? 0)
+  sums.received[position + 1] = sums.received[position] + (entry.received ?? 0)
+  sums.units[position + 1] = sums.units[position] + (entry.delta ?? 0)
+  sums.value[position + 1] = sums.value[position] + movementValueImpact(entry)
+  addPosition(core.byItem, entry.itemId, position)
+  addPosition(core.byCategory, entry.category, position)
+  addPosition(core.byOperator, operatorKey(entry.performedBy), position)
+}
+
+// `entries` are oldest first; ties keep their given order.
+const buildCore = (entries) => {
+  const core = createCore(Math.max(INITIAL_CAPACITY, entries.length))
+  const epochs = entries.map((entry) => parseEpoch(entry.timestamp))
+  let order = null
+  for (let index = 1; index < epochs.length; index += 1) {
+    if (epochs[index] < epochs[index - 1]) {
+      order = epochs.map((_, position) => position)
+      order.sort((a, b) => (epochs[a] < epochs[b] ? -1 : epochs[a] > epochs[b] ? 1 : a - b))
+      break
+    }
+  }
+  if (order) {
+    order.forEach((position) => pushEntry(core, entries[position], epochs[position]))
+  } else {
+    entries.forEach((entry, position) => pushEntry(core, entry, epochs[position]))
+  }
+  return core
+}
+
+const versionOf = (core) => ({ core, length: core.entries.length })
+
+// `history` is newest first, as imported and persisted.
+export const createHistoryIndex = (history = []) => versionOf(buildCore(history.slice().reverse()))
+
+// Adds a commit's movements (newest first, like `history`). Entries stamped with the
+// commit time land at the end, which is a push per entry. Anything older than the
+// latest movement, or an append to a superseded version, rebuilds the index instead so
+// the arrays newer versions read are never rewritten.
+export const appendHistory = (index, entries) => {
+  if (!entries.length) {
+    return index
+  }
+  const { core, length } = index
+  const added = entries.slice().reverse()
+  const epochs = added.map((entry) => parseEpoch(entry.timestamp))
+  let previous = length ? core.epochs[length - 1] : Number.NEGATIVE_INFINITY
+  const inOrder = epochs.every((epoch) => {
+    const ordered = epoch >= previous
+    previous = epoch
+    return ordered
+  })
+  if (!inOrder || length !== core.entries.length) {
+    return versionOf(buildCore([...core.entries.slice(0, length), ...added]))
+  }
+  added.forEach((entry, position) => pushEntry(core, entry, epochs[position]))
+  return versionOf(core)
+}
+
+// Movements added since `previous` (newest first), or null when `index` is not an
+// extension of it and consumers need to start over.
+export const historyAddedSince = (index, previous) =>
+  previous && index.core === previous.core && index.length >= previous.length
+    ? index.core.entries.slice(previous.length, index.length).reverse()
+    : null
+
+export const historyToArray = (index) => index.core.entries.slice(0, index.length).reverse()
+
+export const latestHistoryTimestamp = (index) => {
+  const epoch = index.length ? index.core.epochs[index.length - 1] : Number.NEGATIVE_INFINITY
+  return Number.isFinite(epoch) ? new Date(epoch).toISOString() : null
+}
+
+export const historyCategories = (index) =>
+  Array.from(index.core.byCategory)
+    .filter(([, positions]) => positions[0] < index.length)
+    .map(([category]) => category)
+
+// Number of entries in `list` (ascending positions) that this version can see.
+const visibleCount = (list, length) => {
+  let low = 0
+  let high = list.length
+  while (low < high) {
+    const middle = (low + high) >>> 1
+    if (list[middle] < length) {
+      low = middle + 1
+    } else {
+      high = middle
+    }
+  }
+  return low
+}
+
+// First slot in [low, high) whose epoch is >= `epoch` (or > it, with `after`).
+const searchEpoch = (epochs, list, low, high, epoch, after = false) => {
+  while (low < high) {
+    const middle = (low + high) >>> 1
+    const value = epochs[list ? list[middle] : middle]
+    if (value < epoch || (after && value === epoch)) {
+      low = middle + 1
+    } else {
+      high = middle
+    }
+  }
+  return low
+}
+
+const searchTextAt = (core, position) => {
+  let text = core.searchText[position]
+  if (text === undefined) {
+    const entry = core.entries[position]
+    text = (
+      `${entry.name ?? ''}\u0000${entry.sku ?? ''}\u0000` +
+      `${entry.performedBy ?? ''}\u0000${entry.countedBy ?? ''}`
+    ).toLowerCase()
+    core.searchText[position] = text
+  }
+  return text
+}
+
+// A selection is a run of slots [start, end) over either the whole timeline
+// (`positions` null) or a list of positions, read newest first.
+const createSelection = (index, positions, start, end) => ({
+  index,
+  positions,
+  start,
+  end,
+  length: end - start,
+})
+
+// Movements between `from` and `to` (epoch ms, inclusive) matching every given key.
+// `search` matches item name, SKU, operator or counters as a substring. The shortest matching
+// index list bounds the work; the range is found by binary search within it.
+export const queryHistory = (index, { from, to, itemId, category, operator, search } = {}) => {
+  const { core } = index
+  const lists = []
+  if (itemId) {
+    lists.push(core.byItem.get(itemId) ?? EMPTY_LIST)
+  }
+  if (category) {
+    lists.push(core.byCategory.get(category) ?? EMPTY_LIST)
+  }
+  const operatorMatch = operatorKey(operator)
+  if (operatorMatch) {
+    lists.push(core.byOperator.get(operatorMatch) ?? EMPTY_LIST)
+  }
+  lists.sort((a, b) => a.length - b.length)
+  const list = lists[0] ?? null
+  let start = 0
+  let end = list ? visibleCount(list, index.length) : index.length
+  if (from !== undefined && from !== null) {
+    start = searchEpoch(core.epochs, list, start, end, from)
+  }
+  if (to !== undefined && to !== null) {
+    end = searchEpoch(core.epochs, list, start, end, to, true)
+  }
+  const needle = search?.trim().toLowerCase()
+  if (lists.length <= 1 && !needle) {
+    return createSelection(index, list, start, end)
+  }
+  const positions = []
+  for (let slot = start; slot < end; slot += 1) {
+    const position = list ? list[slot] : slot
+    const entry = core.entries[position]
+    if (
+      (itemId && entry.itemId !== itemId) ||
+      (category && entry.category !== category) ||
+      (operatorMatch && operatorKey(entry.performedBy) !== operatorMatch) ||
+      (needle && !searchTextAt(core, position).includes(needle))
+    ) {
+      continue
+    }
+    positions.push(position)
+  }
+  return createSelection(index, positions, 0, positions.length)
+}
+
+const positionAt = (selection, offset) => {
+  const slot = selection.end - 1 - offset
+  return selection.positions ? selection.positions[slot] : slot
+}
+
+// Entries `from` to `to` of the selection, newest first.
+export const selectionEntries = (selection, from = 0, to = selection.length) => {
+  const { entries } = selection.index.core
+  const last = Math.min(to, selection.length)
+  const rows = []
+  for (let offset = Math.max(0, from); offset < last; offset += 1) {
+    rows.push(entries[positionAt(selection, offset)])
+  }
+  return rows
+}
+
+// Parsed timestamps of the same entries, for formatting without re-parsing; entries
+// with no readable timestamp read as -Infinity.
+export const selectionEpochs = (selection, from = 0, to = selection.length) => {
+  const { epochs } = selection.index.core
+  const first = Math.max(0, from)
+  const last = Math.min(to, selection.length)
+  const values = new Float64Array(Math.max(0, last - first))
+  for (let offset = first; offset < last; offset += 1) {
+    values[offset - first] = epochs[positionAt(selection, offset)]
+  }
+  return values
+}
+
+export const summariseHistorySelection = (selection) => {
+  const { core } = selection.index
+  const summary = { adjustments: selection.length, sold: 0, received: 0, units: 0, value: 0, latest: null }
+  if (!selection.length) {
+    return summary
+  }
+  if (selection.positions) {
+    for (let slot = selection.start; slot < selection.end; slot += 1) {
+      const entry = core.entries[selection.positions[slot]]
+      summary.sold += entry.sold ?? 0
+      summary.received += entry.received ?? 0
+      summary.units += entry.delta ?? 0
+      summary.value += movementValueImpact(entry)
+    }
+  } else {
+    SUM_FIELDS.forEach((field) => {
+      summary[field] = core.sums[field][selection.end] - core.sums[field][selection.start]
+    })
+  }
+  const newest = positionAt(selection, 0)
+  if (Number.isFinite(core.epochs[newest])) {
+    summary.latest = core.entries[newest].timestamp
+  }
+  return summary
+}
@@ -0,0 +1,336 @@
+import {
+  buildHistoryEntry,
+  calculateLayersValue,
+  parseAdjustment,
+  summariseCostImpact,
+} from './costing.js'
+import { createSearchIndex, querySearchIndex, upsertSearchRecord } from './searchIndex.js'
+import { skuKey } from './skus.js'
+
+// An immutable inventory container that keeps the item array the pages render,
+// an id -> index lookup, a SKU -> id lookup, the ids that currently hold draft input, and
+// the ids whose lastCount still needs rolling forward. Edits and commits touch only those items.
+// Inventory totals and per-category units/value are kept alongside and adjusted per item.
+// The SKU/name/category search index is shared between versions and updated in place.
+
+const EMPTY_TOTALS = { totalSkus: 0, totalCurrent: 0, totalLast: 0, totalValue: 0 }
+
+const hasDraftInput = (item) =>
+  (item.draftSold !== '' && item.draftSold !== undefined) ||
+  (item.draftReceived !== '' && item.draftReceived !== undefined)
+
+const indexItems = (items) => {
+  const indexById = new Map()
+  items.forEach((item, index) => {
+    indexById.set(item.id, index)
+  })
+  return indexById
+}
+
+// Mutates `skuIndex`; the first item with a SKU keeps it.
+const indexSkus = (skuIndex, items) => {
+  items.forEach((item) => {
+    const key = skuKey(item.sku)
+    if (key && !skuIndex.has(key)) {
+      skuIndex.set(key, item.id)
+    }
+  })
+  return skuIndex
+}
+
+const SEARCH_OPTIONS = {
+  getId: (item) => item.id,
+  getFields: (item) => [item.sku, item.name, item.category],
+}
+
+export const addItemTotals = (totals, item, sign = 1) => ({
+  totalSkus: totals.totalSkus + sign,
+  totalCurrent: totals.totalCurrent + sign * item.currentCount,
+  totalLast: totals.totalLast + sign * item.lastCount,
+  totalValue: totals.totalValue + sign * calculateLayersValue(item.costLayers ?? []),
+})
+
+const categoryKey = (item) => item.category || 'Uncategorised'
+
+// Mutates `categories`; callers pass a copy they own.
+export const addCategoryTotals = (categories, item, sign = 1) => {
+  const key = categoryKey(item)
+  const previous = categories.get(key) ?? { skus: 0, units: 0, value: 0 }
+  const next = {
+    skus: previous.skus + sign,
+    units: previous.units + sign * item.currentCount,
+    value: previous.value + sign * calculateLayersValue(item.costLayers ?? []),
+  }
+  if (next.skus > 0) {
+    categories.set(key, next)
+  } else {
+    categories.delete(key)
+  }
+  return categories
+}
+
+export const createInventoryStore = (items = []) => {
+  const draftIds = new Set()
+  const staleIds = new Set()
+  const categories = new Map()
+  let totals = EMPTY_TOTALS
+  items.forEach((item) => {
+    if (hasDraftInput(item)) {
+      draftIds.add(item.id)
+    }
+    if (item.lastCount !== item.currentCount) {
+      staleIds.add(item.id)
+    }
+    totals = addItemTotals(totals, item)
+    addCategoryTotals(categories, item)
+  })
+  return {
+    items,
+    indexById: indexItems(items),
+    skuIndex: indexSkus(new Map(), items),
+    draftIds,
+    staleIds,
+    totals,
+    categories,
+    searchIndex: createSearchIndex(items, SEARCH_OPTIONS),
+  }
+}
+
+export const getStoreItem = (store, id) => {
+  const index = store.indexById.get(id)
+  return index === undefined ? undefined : store.items[index]
+}
+
+export const storeHasSku = (store, sku) => store.skuIndex.has(skuKey(sku))
+
+export const storeTotals = (store) => ({
+  ...store.totals,
+  totalDelta: store.totals.totalCurrent - store.totals.totalLast,
+})
+
+// Units and value per category, largest value first.
+export const storeCategoryBreakdown = (store) => {
+  const totalValue = store.totals.totalValue
+  return Array.from(store.categories, ([category, bucket]) => ({
+    category,
+    units: bucket.units,
+    value: bucket.value,
+    valueShare: totalValue ? bucket.value / totalValue : 0,
+  })).sort((a, b) => b.value - a.value)
+}
+
+// Applies `updater` to a single item. Returns the same store when nothing changed.
+export const updateStoreItem = (store, id, updater) => {
+  const index = store.indexById.get(id)
+  if (index === undefined) {
+    return store
+  }
+  const previous = store.items[index]
+  const next = updater(previous)
+  if (next === previous) {
+    return store
+  }
+  const items = store.items.slice()
+  items[index] = next
+  // Draft edits never touch the searchable fields, so most updates skip the index.
+  if (next.sku !== previous.sku || next.name !== previous.name || next.category !== previous.category) {
+    upsertSearchRecord(store.searchIndex, next)
+  }
+  let { draftIds } = store
+  if (hasDraftInput(next) !== draftIds.has(id)) {
+    draftIds = new Set(draftIds)
+    if (hasDraftInput(next)) {
+      draftIds.add(id)
+    } else {
+      draftIds.delete(id)
+    }
+  }
+  return { ...store, items, draftIds }
+}
+
+export const prependStoreItem = (store, item) => prependStoreItems(store, [item])
+
+// Adds `newItems` ahead of the existing items, in their order, re-indexing once for the
+// whole batch.
+export const prependStoreItems = (store, newItems) => {
+  if (!newItems.length) {
+    return store
+  }
+  const items = [...newItems, ...store.items]
+  const staleIds = new Set(store.staleIds)
+  const categories = new Map(store.categories)
+  let { totals } = store
+  newItems.forEach((item) => {
+    if (item.lastCount !== item.currentCount) {
+      staleIds.add(item.id)
+    }
+    upsertSearchRecord(store.searchIndex, item)
+    totals = addItemTotals(totals, item)
+    addCategoryTotals(categories, item)
+  })
+  return {
+    ...store,
+    items,
+    indexById: indexItems(items),
+    skuIndex: indexSkus(new Map(store.skuIndex), newItems),
+    staleIds,
+    totals,
+    categories,
+  }
+}
+
+// Items matching `query` (best match first), optionally limited to one category.
+export const searchStoreItems = (store, query, category = 'all') => {
+  const ids = querySearchIndex(store.searchIndex, query)
+  const items = ids === null ? store.items : []
+  if (ids !== null) {
+    ids.forEach((id) => {
+      const item = getStoreItem(store, id)
+      if (item) {
+        items.push(item)
+      }
+    })
+  }
+  return category === 'all' ? items : items.filter((item) => item.category === category)
+}
+
+export const clearStoreDrafts = (store) => {
+  if (!store.draftIds.size) {
+    return store
+  }
+  const items = store.items.slice()
+  store.draftIds.forEach((id) => {
+    const index = store.indexById.get(id)
+    items[index] = { ...items[index], draftSold: '', draftReceived: '' }
+  })
+  return { ...store, items, draftIds: new Set() }
+}
+
+// Swaps every draft for `drafts` (id -> { sold, received }) in one copy of the items,
+// e.g. the merged change sets of several operators ahead of commitStoreDrafts.
+export const replaceStoreDrafts = (store, drafts) => {
+  const items = store.items.slice()
+  store.draftIds.forEach((id) => {
+    if (!drafts.has(id)) {
+      const index = store.indexById.get(id)
+      items[index] = { ...items[index], draftSold: '', draftReceived: '' }
+    }
+  })
+  const draftIds = new Set()
+  drafts.forEach(({ sold, received }, id) => {
+    const index = store.indexById.get(id)
+    if (index === undefined) {
+      return
+    }
+    const draftSold = sold ? String(sold) : ''
+    const draftReceived = received ? String(received) : ''
+    items[index] = { ...items[index], draftSold, draftReceived }
+    if (draftSold || draftReceived) {
+      draftIds.add(id)
+    }
+  })
+  return { ...store, items, draftIds }
+}
+
+export const summariseStoreDrafts = (store) => {
+  const summary = { items: 0, sold: 0, received: 0, value: 0 }
+  store.draftIds.forEach((id) => {
+    const item = getStoreItem(store, id)
+    const sold = parseAdjustment(item.draftSold)
+    const received = parseAdjustment(item.draftReceived)
+    if (sold === 0 && received === 0) {
+      return
+    }
+    summary.items += 1
+    summary.sold += sold
+    summary.received += received
+    const costPreview = summariseCostImpact(item, sold, received)
+    summary.value += costPreview.receivedValue - costPreview.soldValue
+  })
+  return summary
+}
+
+export const storeHasDrafts = (store) => {
+  for (const id of store.draftIds) {
+    const item = getStoreItem(store, id)
+    if (parseAdjustment(item.draftSold) > 0 || parseAdjustment(item.draftReceived) > 0) {
+      return true
+    }
+  }
+  return false
+}
+
+export const buildNewItemEntry = (item, timestamp, meta) => ({
+  id: `${item.id}-${timestamp}-new`,
+  itemId: item.id,
+  sku: item.sku,
+  name: item.name,
+  category: item.category,
+  previousCount: 0,
+  newCount: item.currentCount,
+  sold: 0,
+  received: item.currentCount,
+  delta: item.currentCount,
+  unitCost: item.unitCost,
+  soldValue: 0,
+  receivedValue: item.currentCount * item.unitCost,
+  soldUnitCost: 0,
+  receivedUnitCost: item.unitCost,
+  valueImpact: item.currentCount * item.unitCost,
+  performedBy: meta.performedBy,
+  notes: meta.notes || 'New item',
+  itemNote: item.itemNote || '',
+  timestamp,
+})
+
+// Commits every drafted item and rolls lastCount forward for items changed since the
+// previous commit. Items outside those two sets are neither visited nor copied; their
+// ids are returned as `changedIds`.
+export const commitStoreDrafts = (store, timestamp, meta) => {
+  const touchedIds = new Set([...store.draftIds, ...store.staleIds])
+  if (!touchedIds.size) {
+    return { store, historyEntries: [], changedIds: touchedIds }
+  }
+  const items = store.items.slice()
+  const staleIds = new Set()
+  const historyEntries = []
+  const newItemEntries = []
+  const categories = new Map(store.categories)
+  let { totals } = store
+  const touchedIndexes = Array.from(touchedIds, (id) => store.indexById.get(id)).sort((a, b) => a - b)
+  touchedIndexes.forEach((index) => {
+    const item = items[index]
+    const { id } = item
+    if (item.lastCount === 0 && item.currentCount > 0) {
+      newItemEntries.push(buildNewItemEntry(item, timestamp, meta))
+    }
+    const sold = parseAdjustment(item.draftSold)
+    const received = parseAdjustment(item.draftReceived)
+    const costSummary = summariseCostImpact(item, sold, received, timestamp)
+    const nextCount = costSummary.totalQuantity
+    const historyEntry = buildHistoryEntry(item, sold, received, nextCount, timestamp, meta, costSummary)
+    if (historyEntry) {
+      historyEntries.push(historyEntry)
+    }
+    const nextItem = {
+      ...item,
+      lastCount: item.currentCount,
+      currentCount: nextCount,
+      draftSold: '',
+      draftReceived: '',
+      lastUpdated: historyEntry ? timestamp : item.lastUpdated,
+      costLayers: costSummary.layers,
+    }
+    if (nextItem.lastCount !== nextItem.currentCount) {
+      staleIds.add(id)
+    }
+    totals = addItemTotals(addItemTotals(totals, item, -1), nextItem)
+    addCategoryTotals(addCategoryTotals(categories, item, -1), nextItem)
+    items[index] = nextItem
+  })
+  return {
+    store: { ...store, items, draftIds: new Set(), staleIds, totals, categories },
+    historyEntries: historyEntries.length ? historyEntries : newItemEntries,
+    changedIds: touchedIds,
+  }
+}
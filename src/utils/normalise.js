@@ -0,0 +1,194 @@
+import { OPTIONAL_COLUMNS, CHUNKED_IMPORT_THRESHOLD_BYTES } from '../constants.js'
+import {
+  EPSILON,
+  calculateLayersQuantity,
+  createInitialCostLayers,
+  ensureFiniteNumber,
+  mergeCostLayers,
+  normaliseUnitCost,
+} from './costing.js'
+import { createStageTimer, profileStage } from './profiler.js'
+
+export const normaliseManualString = (value) => {
+  if (value === null || value === undefined) {
+    return ''
+  }
+  return String(value).trim()
+}
+
+export const normaliseInventoryItem = (item, workbookMeta) => {
+  const currentCount = Number.isFinite(item.currentCount) ? item.currentCount : 0
+  const unitCost = normaliseUnitCost(item.unitCost)
+  const lastCount = Number.isFinite(item.lastCount) ? item.lastCount : currentCount
+  const itemNote = normaliseManualString(
+    item.itemNote || item.note || item[OPTIONAL_COLUMNS.itemNote] || '',
+  )
+  const layerSourceTimestamp =
+    item.lastUpdated || workbookMeta.lastStocktakeAt || workbookMeta.importedAt || null
+  const initialLayers =
+    Array.isArray(item.costLayers) && item.costLayers.length
+      ? mergeCostLayers(item.costLayers)
+      : createInitialCostLayers(currentCount, unitCost, layerSourceTimestamp)
+  const layerQuantity = calculateLayersQuantity(initialLayers)
+  const costLayers =
+    Math.abs(layerQuantity - currentCount) > EPSILON
+      ? createInitialCostLayers(currentCount, unitCost, layerSourceTimestamp)
+      : initialLayers
+  return {
+    ...item,
+    currentCount,
+    lastCount,
+    unitCost,
+    costLayers,
+    draftSold: '',
+    draftReceived: '',
+    itemNote,
+  }
+}
+
+export const normaliseHistoryEntry = (entry) => {
+  const sold = ensureFiniteNumber(entry.sold, 0)
+  const received = ensureFiniteNumber(entry.received, 0)
+  const unitCost = normaliseUnitCost(entry.unitCost)
+  const soldValue =
+    entry.soldValue !== undefined
+      ? ensureFiniteNumber(entry.soldValue, sold * unitCost)
+      : sold * unitCost
+  const receivedValue =
+    entry.receivedValue !== undefined
+      ? ensureFiniteNumber(entry.receivedValue, received * unitCost)
+      : received * unitCost
+  const soldUnitCost =
+    entry.soldUnitCost !== undefined
+      ? ensureFiniteNumber(entry.soldUnitCost, sold > EPSILON ? soldValue / sold : 0)
+      : sold > EPSILON
+        ? soldValue / sold
+        : 0
+  const receivedUnitCost =
+    entry.receivedUnitCost !== undefined
+      ? ensureFiniteNumber(entry.receivedUnitCost, received > EPSILON ? receivedValue / received : 0)
+      : received > EPSILON
+        ? receivedValue / received
+        : 0
+  const valueImpact =
+    entry.valueImpact !== undefined
+      ? ensureFiniteNumber(entry.valueImpact, receivedValue - soldValue)
+      : receivedValue - soldValue
+  return {
+    ...entry,
+    soldValue,
+    receivedValue,
+    soldUnitCost,
+    receivedUnitCost,
+    valueImpact,
+  }
+}
+
+// excel.js pulls in xlsx-js-style, so it is only loaded once a workbook is imported.
+const loadExcel = () => import('./excel.js')
+
+const parseWorkbook = async (buffer) => {
+  const { parseInventoryWorkbook } = await loadExcel()
+  const { inventory, history = [], workbookMeta } = parseInventoryWorkbook(buffer)
+  return {
+    workbookMeta,
+    inventory: profileStage(
+      'normalise:inventory',
+      () => inventory.map((item) => normaliseInventoryItem(item, workbookMeta)),
+      { rows: inventory.length },
+    ),
+    history: profileStage('normalise:history', () => history.map(normaliseHistoryEntry), {
+      rows: history.length,
+    }),
+  }
+}
+
+const readWorkbookInChunks = async (buffer, { onProgress, signal }) => {
+  const inventory = []
+  const history = []
+  const { readInventoryWorkbookInChunks } = await loadExcel()
+  const historyTimer = createStageTimer('normalise:history')
+  const inventoryTimer = createStageTimer('normalise:inventory')
+  const { workbookMeta } = await readInventoryWorkbookInChunks(buffer, {
+    onHistory: (entries) => {
+      historyTimer.time(() => {
+        entries.forEach((entry) => history.push(normaliseHistoryEntry(entry)))
+      }, entries.length)
+    },
+    onInventory: (items, meta) => {
+      inventoryTimer.time(() => {
+        items.forEach((item) => inventory.push(normaliseInventoryItem(item, meta)))
+      }, items.length)
+    },
+    onProgress,
+    signal,
+  })
+  historyTimer.end()
+  inventoryTimer.end()
+  return { workbookMeta, inventory, history }
+}
+
+// Parses a workbook and normalises its items and movements the way the app stores them.
+export const importWorkbook = async (
+  buffer,
+  { chunked = buffer.byteLength >= CHUNKED_IMPORT_THRESHOLD_BYTES, onProgress, signal } = {},
+) => (chunked ? readWorkbookInChunks(buffer, { onProgress, signal }) : parseWorkbook(buffer))
+
+const deltaItemKey = (item) => item.sku || item.name || item.id
+const deltaMovementKey = (entry) =>
+  `${entry.sku || entry.name || entry.itemId}\u0000${entry.timestamp ?? ''}\u0000${entry.delta ?? 0}`
+
+// Applies parsed delta exports to the one full workbook among `workbooks` (each as
+// `parseWorkbook` returns it), oldest delta first. Changed items replace the base item
+// with the same SKU (or name), keeping its id; unknown items are appended. Movements
+// already in the base are skipped, so applying a delta twice is harmless.
+export const applyWorkbookDeltas = (workbooks) => {
+  const bases = workbooks.filter(({ workbookMeta }) => !workbookMeta.isDelta)
+  if (bases.length !== 1) {
+    throw new Error(
+      bases.length
+        ? 'Only one full workbook can be merged with delta exports.'
+        : 'Include the full workbook the delta exports were taken from.',
+    )
+  }
+  const [base] = bases
+  const deltas = workbooks
+    .filter(({ workbookMeta }) => workbookMeta.isDelta)
+    .sort((a, b) => (a.workbookMeta.deltaSince ?? '').localeCompare(b.workbookMeta.deltaSince ?? ''))
+
+  const inventory = base.inventory.slice()
+  const positions = new Map(inventory.map((item, position) => [deltaItemKey(item), position]))
+  const history = base.history.slice()
+  const seenMovements = new Set(history.map(deltaMovementKey))
+  deltas.forEach((delta) => {
+    delta.inventory.forEach((item) => {
+      const key = deltaItemKey(item)
+      const position = positions.get(key)
+      if (position === undefined) {
+        positions.set(key, inventory.length)
+        inventory.push(item)
+      } else {
+        inventory[position] = { ...item, id: inventory[position].id }
+      }
+    })
+    delta.history.forEach((entry) => {
+      const key = deltaMovementKey(entry)
+      if (!seenMovements.has(key)) {
+        seenMovements.add(key)
+        history.push(entry)
+      }
+    })
+  })
+  history.sort((a, b) => (b.timestamp ?? '').localeCompare(a.timestamp ?? ''))
+  return { workbookMeta: base.workbookMeta, inventory, history }
+}
+
+// Parses `buffers` and applies the delta exports among them to the full workbook (see
+// `applyWorkbookDeltas`). Returns the merged workbook's bytes.
+export const mergeWorkbookDeltas = async (buffers) => {
+  const { workbookMeta, inventory, history } = applyWorkbookDeltas(
+    await Promise.all(buffers.map(parseWorkbook)),
+  )
+  const { createUpdatedWorkbook } = await loadExcel()
+  return createUpdatedWorkbook(inventory, { sheetName: workbookMeta.sheetName }, history)
+}
@@ -1,10 +1,143 @@
-﻿export const parseNumericInput = (value, fallback = 0) => {
-  if (value === null || value === undefined || value === '') {
+﻿// One numeric parser for workbook cells and typed input, mirrored by
+// stocktake_engine/numbers.py. Numbers pass straight through. Text is read in a
+// single pass that accepts what spreadsheets and people type for quantities and money:
+//
+//   "1,234.50" -> 1234.5     "$1 234" -> 1234      "AUD 12.5" -> 12.5
+//   "-$12" / "$-12" -> -12   "(12.00)" -> -12      "1.2E+03" -> 1200    "15%" -> 15
+//
+// Commas, spaces and apostrophes are thousands separators between digits (en-AU, so a
+// comma is never a decimal point). Currency symbols, letters and "%" around the number
+// are ignored. Text with no digits, a second number ("12 of 24", "2025-01-03"), a
+// second decimal point or an unbalanced bracket is not a number and gives `fallback`.
+
+const CODE_0 = 48
+const CODE_9 = 57
+const CODE_DOT = 46
+const CODE_MINUS = 45
+const CODE_PLUS = 43
+const CODE_UNICODE_MINUS = 0x2212
+const CODE_OPEN = 40
+const CODE_CLOSE = 41
+const CODE_E = 101
+const CODE_UPPER_E = 69
+const SEPARATOR_PATTERN = /[,\s']/g
+
+// 10^0 to 10^22, all exact doubles.
+const POWERS_OF_TEN = Array.from({ length: 23 }, (_, power) => 10 ** power)
+
+const isDigit = (code) => code >= CODE_0 && code <= CODE_9
+
+// Comma, space, apostrophe, no-break space and narrow no-break space.
+const isSeparator = (code) => code === 44 || code === 32 || code === 39 || code === 0xa0 || code === 0x202f
+
+const parseText = (text, fallback) => {
+  const length = text.length
+  let index = 0
+  let negative = false
+  let bracketed = false
+
+  // Prefix: signs, an opening bracket, currency and labels before the first digit.
+  for (; index < length; index += 1) {
+    const code = text.charCodeAt(index)
+    if (isDigit(code) || code === CODE_DOT) {
+      break
+    }
+    if (code === CODE_MINUS || code === CODE_UNICODE_MINUS) {
+      if (negative) return fallback
+      negative = true
+    } else if (code === CODE_OPEN) {
+      if (bracketed) return fallback
+      bracketed = true
+    } else if (code === CODE_CLOSE || (code === CODE_PLUS && negative)) {
+      return fallback
+    }
+  }
+
+  // Body: digits, separators between digits, one decimal point and an exponent. The
+  // digits are gathered into an integer mantissa as they are read; while it stays exact
+  // (below 2^53, at most 22 decimals) mantissa / 10^decimals is the correctly rounded
+  // value, so no string is built.
+  const start = index
+  let mantissa = 0
+  let decimals = 0
+  let hasDigit = false
+  let hasDot = false
+  let hasSeparator = false
+  let hasExponent = false
+  for (; index < length; index += 1) {
+    const code = text.charCodeAt(index)
+    if (code >= CODE_0 && code <= CODE_9) {
+      hasDigit = true
+      mantissa = mantissa * 10 + (code - CODE_0)
+      if (hasDot) decimals += 1
+    } else if (code === CODE_DOT) {
+      if (hasDot) return fallback
+      hasDot = true
+    } else if (
+      isSeparator(code) &&
+      !hasDot &&
+      isDigit(text.charCodeAt(index - 1)) &&
+      isDigit(text.charCodeAt(index + 1))
+    ) {
+      hasSeparator = true
+    } else if ((code === CODE_E || code === CODE_UPPER_E) && hasDigit) {
+      const next = text.charCodeAt(index + 1)
+      const signed = next === CODE_PLUS || next === CODE_MINUS
+      if (!isDigit(signed ? text.charCodeAt(index + 2) : next)) {
+        break
+      }
+      hasExponent = true
+      index += signed ? 2 : 1
+      while (index < length && isDigit(text.charCodeAt(index))) {
+        index += 1
+      }
+      break
+    } else {
+      break
+    }
+  }
+  if (!hasDigit) {
+    return fallback
+  }
+  const end = index
+
+  // Suffix: a closing bracket, units, codes and "%" are fine; anything numeric is not.
+  let closed = false
+  for (; index < length; index += 1) {
+    const code = text.charCodeAt(index)
+    if (code === CODE_CLOSE) {
+      if (!bracketed || closed) return fallback
+      closed = true
+    } else if (isDigit(code) || code === CODE_DOT || code === CODE_MINUS || code === CODE_OPEN) {
+      return fallback
+    }
+  }
+  if (bracketed !== closed) {
     return fallback
   }
-  if (typeof value === 'number' && Number.isFinite(value)) {
-    return value
+
+  let magnitude
+  if (!hasExponent && mantissa <= Number.MAX_SAFE_INTEGER && decimals < POWERS_OF_TEN.length) {
+    magnitude = decimals ? mantissa / POWERS_OF_TEN[decimals] : mantissa
+  } else {
+    const body = text.slice(start, end)
+    magnitude = Number(hasSeparator ? body.replace(SEPARATOR_PATTERN, '') : body)
+    if (!Number.isFinite(magnitude)) {
+      return fallback
+    }
+  }
+  return negative !== bracketed ? -magnitude : magnitude
+}
+
+export const parseNumber = (value, fallback = 0) => {
+  if (typeof value === 'number') {
+    return Number.isFinite(value) ? value : fallback
+  }
+  if (value === null || value === undefined || value === '') {
+    return fallback
   }
-  const numeric = Number(String(value).replace(/[^0-9.-]/g, ''))
-  return Number.isFinite(numeric) ? numeric : fallback
+  return parseText(typeof value === 'string' ? value : String(value), fallback)
 }
+
+// Typed input: blank keeps the fallback (usually the current value).
+export const parseNumericInput = (value, fallback = 0) => parseNumber(value, fallback)
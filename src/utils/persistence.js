@@ -0,0 +1,247 @@
+import {
+  PERSIST_DATABASE_NAME,
+  PERSIST_DATABASE_VERSION,
+  PERSIST_DEBOUNCE_MS,
+} from '../constants.js'
+import { snapshotRecord } from './snapshots.js'
+
+// IndexedDB layout:
+//   items      { id, order, item }  current inventory, one record per item
+//   movements  { seq, entry }       append-only history, oldest first
+//   meta       { key, value }       workbook metadata
+//   snapshots  { epoch, ... }        point-in-time inventory (snapshotRecord), added in v2
+const ITEMS_STORE = 'items'
+const MOVEMENTS_STORE = 'movements'
+const META_STORE = 'meta'
+const SNAPSHOTS_STORE = 'snapshots'
+const ALL_STORES = [ITEMS_STORE, MOVEMENTS_STORE, META_STORE, SNAPSHOTS_STORE]
+const METADATA_KEY = 'metadata'
+
+const requestToPromise = (request) =>
+  new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result)
+    request.onerror = () => reject(request.error)
+  })
+
+const transactionDone = (transaction) =>
+  new Promise((resolve, reject) => {
+    transaction.oncomplete = () => resolve()
+    transaction.onabort = () => reject(transaction.error)
+    transaction.onerror = () => reject(transaction.error)
+  })
+
+export const openInventoryDatabase = () => {
+  if (typeof indexedDB === 'undefined') {
+    return Promise.resolve(null)
+  }
+  const request = indexedDB.open(PERSIST_DATABASE_NAME, PERSIST_DATABASE_VERSION)
+  request.onupgradeneeded = () => {
+    const db = request.result
+    if (!db.objectStoreNames.contains(ITEMS_STORE)) {
+      db.createObjectStore(ITEMS_STORE, { keyPath: 'id' }).createIndex('order', 'order')
+    }
+    if (!db.objectStoreNames.contains(MOVEMENTS_STORE)) {
+      db.createObjectStore(MOVEMENTS_STORE, { keyPath: 'seq', autoIncrement: true })
+    }
+    if (!db.objectStoreNames.contains(META_STORE)) {
+      db.createObjectStore(META_STORE, { keyPath: 'key' })
+    }
+    if (!db.objectStoreNames.contains(SNAPSHOTS_STORE)) {
+      db.createObjectStore(SNAPSHOTS_STORE, { keyPath: 'epoch' })
+    }
+  }
+  return requestToPromise(request).catch((err) => {
+    console.error(err)
+    return null
+  })
+}
+
+// Resolves to { inventory, history (newest first), metadata, orders, snapshots (records,
+// oldest first) } or null when empty.
+// Uses getAll rather than cursors; a cursor round-trip per record is far slower.
+export const loadPersistedInventory = async (db) => {
+  if (!db) {
+    return null
+  }
+  const transaction = db.transaction(ALL_STORES, 'readonly')
+  const [records, movements, metadataRecord, snapshots] = await Promise.all([
+    requestToPromise(transaction.objectStore(ITEMS_STORE).index('order').getAll()),
+    requestToPromise(transaction.objectStore(MOVEMENTS_STORE).getAll()),
+    requestToPromise(transaction.objectStore(META_STORE).get(METADATA_KEY)),
+    requestToPromise(transaction.objectStore(SNAPSHOTS_STORE).getAll()),
+  ])
+  if (!metadataRecord) {
+    return null
+  }
+  const orders = new Map()
+  const inventory = records.map(({ id, order, item }) => {
+    orders.set(id, order)
+    return item
+  })
+  return {
+    inventory,
+    history: movements.map(({ entry }) => entry).reverse(),
+    metadata: metadataRecord.value,
+    orders,
+    snapshots,
+  }
+}
+
+// Batches writes and flushes them in a single transaction shortly after the last change,
+// so keystrokes in draft fields cost one IndexedDB write per pause rather than per key.
+export const createPersistenceQueue = (databasePromise = openInventoryDatabase()) => {
+  let orders = new Map()
+  let leadingOrder = 0
+  let trailingOrder = 0
+  let pendingItems = new Map()
+  let pendingMovements = []
+  let pendingMetadata = null
+  let pendingSnapshots = []
+  let droppedSnapshots = []
+  let pendingReplace = null
+  let timer = null
+  let writing = Promise.resolve()
+
+  const write = async () => {
+    const db = await databasePromise
+    const replace = pendingReplace
+    const items = pendingItems
+    const movements = pendingMovements
+    const metadata = pendingMetadata
+    const snapshots = pendingSnapshots
+    const dropped = droppedSnapshots
+    pendingReplace = null
+    pendingItems = new Map()
+    pendingMovements = []
+    pendingMetadata = null
+    pendingSnapshots = []
+    droppedSnapshots = []
+    if (
+      !db ||
+      (!replace && !items.size && !movements.length && !metadata && !snapshots.length && !dropped.length)
+    ) {
+      return
+    }
+    const transaction = db.transaction(ALL_STORES, 'readwrite')
+    const itemStore = transaction.objectStore(ITEMS_STORE)
+    const movementStore = transaction.objectStore(MOVEMENTS_STORE)
+    const metaStore = transaction.objectStore(META_STORE)
+    const snapshotStore = transaction.objectStore(SNAPSHOTS_STORE)
+    if (replace) {
+      itemStore.clear()
+      movementStore.clear()
+      metaStore.clear()
+      snapshotStore.clear()
+    }
+    items.forEach((item, id) => {
+      itemStore.put({ id, order: orders.get(id), item })
+    })
+    movements.forEach((entry) => {
+      movementStore.add({ entry })
+    })
+    if (metadata) {
+      metaStore.put({ key: METADATA_KEY, value: metadata })
+    }
+    dropped.forEach((epoch) => snapshotStore.delete(epoch))
+    // Snapshots are flattened here, off the commit that took them.
+    snapshots.forEach((snapshot) => snapshotStore.put(snapshotRecord(snapshot)))
+    await transactionDone(transaction)
+  }
+
+  const flush = () => {
+    clearTimeout(timer)
+    timer = null
+    writing = writing.then(write).catch((err) => console.error(err))
+    return writing
+  }
+
+  const schedule = () => {
+    clearTimeout(timer)
+    timer = setTimeout(flush, PERSIST_DEBOUNCE_MS)
+  }
+
+  const replaceAll = ({ inventory, history, metadata, snapshots = [] }) => {
+    orders = new Map()
+    leadingOrder = 0
+    trailingOrder = inventory.length
+    pendingItems = new Map()
+    inventory.forEach((item, index) => {
+      orders.set(item.id, index)
+      pendingItems.set(item.id, item)
+    })
+    // History arrives newest first; the log is stored oldest first.
+    pendingMovements = history.slice().reverse()
+    pendingMetadata = metadata
+    pendingSnapshots = snapshots.slice()
+    droppedSnapshots = []
+    pendingReplace = true
+    return flush()
+  }
+
+  return {
+    flush,
+    replaceAll,
+    // Seeds item ordering from a previous loadPersistedInventory result.
+    restore(persisted) {
+      orders = persisted?.orders ?? new Map()
+      leadingOrder = 0
+      trailingOrder = 0
+      orders.forEach((order) => {
+        leadingOrder = Math.min(leadingOrder, order)
+        trailingOrder = Math.max(trailingOrder, order + 1)
+      })
+    },
+    putItems(items) {
+      items.forEach((item) => {
+        if (!orders.has(item.id)) {
+          orders.set(item.id, trailingOrder)
+          trailingOrder += 1
+        }
+        pendingItems.set(item.id, item)
+      })
+      schedule()
+    },
+    prependItem(item) {
+      leadingOrder -= 1
+      orders.set(item.id, leadingOrder)
+      pendingItems.set(item.id, item)
+      schedule()
+    },
+    // `items` in display order; the first ends up first.
+    prependItems(items) {
+      for (let index = items.length - 1; index >= 0; index -= 1) {
+        leadingOrder -= 1
+        orders.set(items[index].id, leadingOrder)
+        pendingItems.set(items[index].id, items[index])
+      }
+      schedule()
+    },
+    // `entries` are newest first, matching the history array they are prepended to.
+    appendMovements(entries) {
+      for (let index = entries.length - 1; index >= 0; index -= 1) {
+        pendingMovements.push(entries[index])
+      }
+      schedule()
+    },
+    putMetadata(metadata) {
+      pendingMetadata = metadata
+      schedule()
+    },
+    // `dropped` are snapshots addSnapshot let go of.
+    putSnapshot(snapshot, dropped = []) {
+      pendingSnapshots.push(snapshot)
+      dropped.forEach((old) => {
+        const index = pendingSnapshots.indexOf(old)
+        if (index >= 0) {
+          pendingSnapshots.splice(index, 1)
+        } else {
+          droppedSnapshots.push(old.epoch)
+        }
+      })
+      schedule()
+    },
+    clear() {
+      return replaceAll({ inventory: [], history: [], metadata: null })
+    },
+  }
+}
@@ -0,0 +1,163 @@
+// Per-stage timings for the import, commit and export hot paths. Stages are kept in a
+// bounded list that the diagnostics view (#diagnostics) reads and exports as JSON; the
+// Python engine's profiler writes the same shape, so traces from either side compare.
+// Heap deltas are estimates: they come from `performance.memory` (Chromium) or Node's
+// heap counter, and garbage collected mid-stage makes them read low.
+
+const MAX_STAGES = 500
+export const PROFILE_FORMAT = 'stocktake-profile'
+export const PROFILE_VERSION = 1
+
+const stages = []
+const listeners = new Set()
+let snapshot = []
+const source = typeof window === 'undefined' ? 'worker' : 'browser'
+
+const now = () => (typeof performance === 'undefined' ? Date.now() : performance.now())
+
+const heapUsed = () => {
+  if (typeof performance !== 'undefined' && performance.memory) {
+    return performance.memory.usedJSHeapSize
+  }
+  if (typeof process !== 'undefined' && process.memoryUsage) {
+    return process.memoryUsage().heapUsed
+  }
+  return null
+}
+
+const notify = () => {
+  snapshot = stages.slice()
+  listeners.forEach((listener) => listener())
+}
+
+// Adds finished stages, including those posted back from the workbook worker.
+export const recordStages = (records) => {
+  if (!records?.length) {
+    return
+  }
+  stages.push(...records)
+  if (stages.length > MAX_STAGES) {
+    stages.splice(0, stages.length - MAX_STAGES)
+  }
+  notify()
+}
+
+const createRecord = (name, startedAt, durationMs, { rows = null, calls = 1, heapDeltaBytes = null } = {}) => ({
+  stage: name,
+  source,
+  startedAt: new Date(startedAt).toISOString(),
+  durationMs,
+  rows,
+  calls,
+  heapDeltaBytes,
+})
+
+// `rows` may be a count or a function of the stage's result.
+const finishStage = (name, wallStart, started, heapBefore, rows, result) => {
+  const heapAfter = heapBefore === null ? null : heapUsed()
+  recordStages([
+    createRecord(name, wallStart, now() - started, {
+      rows: typeof rows === 'function' ? rows(result) : rows,
+      heapDeltaBytes: heapAfter === null ? null : heapAfter - heapBefore,
+    }),
+  ])
+}
+
+export const profileStage = (name, fn, { rows = null } = {}) => {
+  const wallStart = Date.now()
+  const heapBefore = heapUsed()
+  const started = now()
+  const result = fn()
+  finishStage(name, wallStart, started, heapBefore, rows, result)
+  return result
+}
+
+export const profileStageAsync = async (name, fn, { rows = null } = {}) => {
+  const wallStart = Date.now()
+  const heapBefore = heapUsed()
+  const started = now()
+  const result = await fn()
+  finishStage(name, wallStart, started, heapBefore, rows, result)
+  return result
+}
+
+// For work split across chunks (the chunked import): each `time` or `add` call adds
+// to one stage, recorded with its call count by `end`. No heap figure, as other stages run
+// in between.
+export const createStageTimer = (name) => {
+  const wallStart = Date.now()
+  let durationMs = 0
+  let rows = 0
+  let calls = 0
+  const timer = {
+    add(elapsedMs, count = 0) {
+      durationMs += elapsedMs
+      rows += count
+      calls += 1
+    },
+    time(fn, count = 0) {
+      const started = now()
+      const result = fn()
+      timer.add(now() - started, typeof count === 'function' ? count(result) : count)
+      return result
+    },
+    end() {
+      if (calls) {
+        recordStages([createRecord(name, wallStart, durationMs, { rows, calls })])
+      }
+    },
+  }
+  return timer
+}
+
+export const getProfileSnapshot = () => snapshot
+
+export const subscribeProfile = (listener) => {
+  listeners.add(listener)
+  return () => listeners.delete(listener)
+}
+
+// Returns and forgets the stages recorded so far; the worker sends these with each result.
+export const takeStages = () => stages.splice(0, stages.length)
+
+export const clearProfile = () => {
+  stages.length = 0
+  notify()
+}
+
+export const exportProfileJson = () =>
+  JSON.stringify(
+    {
+      format: PROFILE_FORMAT,
+      version: PROFILE_VERSION,
+      generatedAt: new Date().toISOString(),
+      environment: {
+        runtime: 'browser',
+        userAgent: typeof navigator === 'undefined' ? '' : navigator.userAgent,
+        hardwareConcurrency: typeof navigator === 'undefined' ? null : navigator.hardwareConcurrency ?? null,
+      },
+      stages: snapshot,
+    },
+    null,
+    2,
+  )
+
+// Totals per stage name, slowest first.
+export const summariseProfile = (records) => {
+  const byStage = new Map()
+  records.forEach((record) => {
+    const summary = byStage.get(record.stage) ?? {
+      stage: record.stage,
+      runs: 0,
+      totalMs: 0,
+      maxMs: 0,
+      rows: 0,
+    }
+    summary.runs += 1
+    summary.totalMs += record.durationMs
+    summary.maxMs = Math.max(summary.maxMs, record.durationMs)
+    summary.rows += record.rows ?? 0
+    byStage.set(record.stage, summary)
+  })
+  return Array.from(byStage.values()).sort((a, b) => b.totalMs - a.totalMs)
+}
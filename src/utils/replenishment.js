@@ -0,0 +1,213 @@
+import {
+  REPLENISHMENT_LEAD_TIME_DAYS,
+  REPLENISHMENT_LOOKBACK_DAYS,
+  REPLENISHMENT_REVIEW_DAYS,
+  REPLENISHMENT_SERVICE_Z,
+} from '../constants.js'
+import { calculateAverageLayerCost } from './costing.js'
+import { queryHistory } from './historyIndex.js'
+import { selectTop } from './analytics.js'
+
+// Reorder points and days of cover for every item. Demand is summed from the movement
+// history in one pass over the lookback window into typed arrays indexed by item slot:
+// units sold, the sum of squared daily totals (for the day-to-day variability) and the
+// total of the day still being summed. The history index holds movements in time order,
+// so an item's days arrive in order and each day is squared once, when the next begins.
+// A commit's movements extend the arrays in place; only a new day (which moves the window
+// start) or a rebuilt history index sums the window again. The plan itself is a pass over
+// the items reading those arrays.
+
+const DAY_MS = 24 * 60 * 60 * 1000
+const INITIAL_SLOTS = 1024
+
+const createDemand = (startDay, capacity) => ({
+  startDay,
+  firstDay: Number.POSITIVE_INFINITY,
+  core: null,
+  length: 0,
+  slotById: new Map(),
+  sold: new Float64Array(capacity),
+  sumSquares: new Float64Array(capacity),
+  openDay: new Int32Array(capacity).fill(-1),
+  openTotal: new Float64Array(capacity),
+})
+
+const growSlots = (demand, needed) => {
+  let capacity = demand.sold.length
+  if (needed <= capacity) {
+    return
+  }
+  while (capacity < needed) {
+    capacity *= 2
+  }
+  const grow = (source, ArrayType, fill) => {
+    const next = new ArrayType(capacity)
+    if (fill !== undefined) next.fill(fill)
+    next.set(source)
+    return next
+  }
+  demand.sold = grow(demand.sold, Float64Array)
+  demand.sumSquares = grow(demand.sumSquares, Float64Array)
+  demand.openDay = grow(demand.openDay, Int32Array, -1)
+  demand.openTotal = grow(demand.openTotal, Float64Array)
+}
+
+// Sums positions `from` to `to` of the history core into `demand`.
+const addRange = (demand, core, from, to) => {
+  const { entries, epochs } = core
+  const { slotById } = demand
+  for (let position = from; position < to; position += 1) {
+    const entry = entries[position]
+    const sold = entry.sold
+    if (!(sold > 0)) {
+      continue
+    }
+    let slot = slotById.get(entry.itemId)
+    if (slot === undefined) {
+      slot = slotById.size
+      growSlots(demand, slot + 1)
+      slotById.set(entry.itemId, slot)
+    }
+    const day = Math.floor(epochs[position] / DAY_MS)
+    if (demand.openDay[slot] !== day) {
+      const total = demand.openTotal[slot]
+      demand.sumSquares[slot] += total * total
+      demand.openDay[slot] = day
+      demand.openTotal[slot] = 0
+    }
+    demand.openTotal[slot] += sold
+    demand.sold[slot] += sold
+    if (day < demand.firstDay) {
+      demand.firstDay = day
+    }
+  }
+}
+
+// Demand over the `lookbackDays` UTC days up to and including `now`'s. `previous` is the
+// last result: when `historyIndex` extends it and the window starts on the same day, only
+// the new movements are summed, in place. Returns a new top-level object either way, with
+// `summed` the number of movements read.
+export const updateDemand = (
+  previous,
+  historyIndex,
+  now = Date.now(),
+  lookbackDays = REPLENISHMENT_LOOKBACK_DAYS,
+) => {
+  const { core, length } = historyIndex
+  const endDay = Math.floor(now / DAY_MS)
+  const startDay = endDay - lookbackDays + 1
+  if (
+    previous &&
+    previous.core === core &&
+    previous.startDay === startDay &&
+    previous.length <= length
+  ) {
+    addRange(previous, core, previous.length, length)
+    return { ...previous, endDay, length, summed: length - previous.length }
+  }
+  const { start, end } = queryHistory(historyIndex, { from: startDay * DAY_MS })
+  const demand = createDemand(startDay, INITIAL_SLOTS)
+  addRange(demand, core, start, end)
+  return { ...demand, endDay, core, length, summed: end - start }
+}
+
+// Per-item columns over `items`: dailyUse, deviation (of daily use), daysOfCover (Infinity
+// for an item with no use), reorderPoint, orderUpTo and suggestedOrder, plus totals for
+// the items at or below their reorder point. Days are counted from the first sale in the
+// window, so a short history is not read as slow demand.
+export const planReplenishment = (
+  demand,
+  items,
+  {
+    leadTimeDays = REPLENISHMENT_LEAD_TIME_DAYS,
+    reviewDays = REPLENISHMENT_REVIEW_DAYS,
+    serviceZ = REPLENISHMENT_SERVICE_Z,
+  } = {},
+) => {
+  const count = items.length
+  const days = Math.max(1, demand.endDay - Math.max(demand.startDay, demand.firstDay) + 1)
+  const coverDays = leadTimeDays + reviewDays
+  const leadRoot = Math.sqrt(leadTimeDays)
+  const coverRoot = Math.sqrt(coverDays)
+  const dailyUse = new Float64Array(count)
+  const deviation = new Float64Array(count)
+  const daysOfCover = new Float64Array(count).fill(Number.POSITIVE_INFINITY)
+  const reorderPoint = new Float64Array(count)
+  const orderUpTo = new Float64Array(count)
+  const suggestedOrder = new Float64Array(count)
+  let reorderCount = 0
+  let unitsToOrder = 0
+  let valueToOrder = 0
+  for (let index = 0; index < count; index += 1) {
+    const item = items[index]
+    const slot = demand.slotById.get(item.id)
+    if (slot === undefined) {
+      continue
+    }
+    const rate = demand.sold[slot] / days
+    const open = demand.openTotal[slot]
+    const variance = (demand.sumSquares[slot] + open * open) / days - rate * rate
+    const spread = Math.sqrt(Math.max(0, variance))
+    const onHand = item.currentCount ?? 0
+    dailyUse[index] = rate
+    deviation[index] = spread
+    daysOfCover[index] = onHand / rate
+    reorderPoint[index] = rate * leadTimeDays + serviceZ * spread * leadRoot
+    orderUpTo[index] = rate * coverDays + serviceZ * spread * coverRoot
+    if (onHand <= reorderPoint[index]) {
+      const units = Math.max(0, Math.ceil(orderUpTo[index] - onHand))
+      suggestedOrder[index] = units
+      if (units > 0) {
+        reorderCount += 1
+        unitsToOrder += units
+        valueToOrder += units * calculateAverageLayerCost(item.costLayers ?? [], item.unitCost ?? 0)
+      }
+    }
+  }
+  return {
+    items,
+    days,
+    leadTimeDays,
+    reviewDays,
+    dailyUse,
+    deviation,
+    daysOfCover,
+    reorderPoint,
+    orderUpTo,
+    suggestedOrder,
+    reorderCount,
+    unitsToOrder,
+    valueToOrder,
+  }
+}
+
+// The `limit` most urgent suggested orders: fewest days of cover first, then the larger order.
+export const topReorderSuggestions = (plan, limit = 8) => {
+  const candidates = []
+  for (let index = 0; index < plan.items.length; index += 1) {
+    if (plan.suggestedOrder[index] > 0) {
+      candidates.push(index)
+    }
+  }
+  return selectTop(
+    candidates,
+    limit,
+    (a, b) =>
+      plan.daysOfCover[a] < plan.daysOfCover[b] ||
+      (plan.daysOfCover[a] === plan.daysOfCover[b] && plan.suggestedOrder[a] > plan.suggestedOrder[b]),
+  ).map((index) => {
+    const item = plan.items[index]
+    return {
+      id: item.id,
+      sku: item.sku,
+      name: item.name,
+      category: item.category,
+      onHand: item.currentCount ?? 0,
+      dailyUse: plan.dailyUse[index],
+      deviation: plan.deviation[index],
+      daysOfCover: plan.daysOfCover[index],
+      reorderPoint: plan.reorderPoint[index],
+      suggestedOrder: plan.suggestedOrder[index],
+    }
+  })
+}
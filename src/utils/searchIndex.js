@@ -0,0 +1,247 @@
+// A trigram index over a few text fields per record. Queries of three or more characters
+// intersect trigram postings and confirm with `includes`; one- and two-character queries
+// read the postings of every one- and two-character substring. Either way they match
+// exactly what a substring scan would. SKUs get ranked ahead of other matches, and
+// near-miss SKUs are offered when a longer query has no exact hits. The index is mutable
+// and updated in place.
+
+const GRAM_LENGTH = 3
+const FUZZY_MIN_QUERY_LENGTH = 4
+const FUZZY_TWO_EDIT_LENGTH = 12
+
+const RANK_EXACT_SKU = 0
+const RANK_SKU_PREFIX = 1
+const RANK_SUBSTRING = 2
+
+export const normaliseSearchText = (value) => `${value ?? ''}`.trim().toLowerCase()
+
+const intersectSorted = (left, right) => {
+  const result = []
+  let i = 0
+  let j = 0
+  while (i < left.length && j < right.length) {
+    if (left[i] === right[j]) {
+      result.push(left[i])
+      i += 1
+      j += 1
+    } else if (left[i] < right[j]) {
+      i += 1
+    } else {
+      j += 1
+    }
+  }
+  return result
+}
+
+const containsSorted = (sorted, target) => {
+  let low = 0
+  let high = sorted.length
+  while (low < high) {
+    const middle = (low + high) >>> 1
+    if (sorted[middle] < target) {
+      low = middle + 1
+    } else {
+      high = middle
+    }
+  }
+  return sorted[low] === target
+}
+
+const gramsOf = (text, grams = new Set()) => {
+  for (let position = 0; position + GRAM_LENGTH <= text.length; position += 1) {
+    grams.add(text.slice(position, position + GRAM_LENGTH))
+  }
+  return grams
+}
+
+// Slots only ever grow, so postings stay in ascending order and a repeat of the same key
+// within one record is always the last entry.
+const addPosting = (postingsByKey, key, slot) => {
+  const postings = postingsByKey.get(key)
+  if (!postings) {
+    postingsByKey.set(key, [slot])
+  } else if (postings[postings.length - 1] !== slot) {
+    postings.push(slot)
+  }
+}
+
+// Fewest edits turning `query` into any substring of `text` (Sellers' algorithm).
+const substringEditDistance = (query, text) => {
+  let previous = new Array(text.length + 1).fill(0)
+  for (let i = 1; i <= query.length; i += 1) {
+    const current = [i]
+    for (let j = 1; j <= text.length; j += 1) {
+      const substitution = previous[j - 1] + (query[i - 1] === text[j - 1] ? 0 : 1)
+      current[j] = Math.min(substitution, previous[j] + 1, current[j - 1] + 1)
+    }
+    previous = current
+  }
+  return Math.min(...previous)
+}
+
+// Indexes every one-, two- and three-character substring of each field.
+const appendSlot = (index, id, fields) => {
+  const slot = index.ids.length
+  index.ids.push(id)
+  index.fields.push(fields)
+  index.slotById.set(id, slot)
+  fields.forEach((field) => {
+    for (let start = 0; start < field.length; start += 1) {
+      addPosting(index.shortGrams, field[start], slot)
+      if (start + 2 <= field.length) {
+        addPosting(index.shortGrams, field.slice(start, start + 2), slot)
+      }
+      if (start + GRAM_LENGTH <= field.length) {
+        addPosting(index.grams, field.slice(start, start + GRAM_LENGTH), slot)
+      }
+    }
+  })
+}
+
+const rebuild = (index, entries) => {
+  index.ids = []
+  index.fields = []
+  index.slotById = new Map()
+  index.grams = new Map()
+  index.shortGrams = new Map()
+  index.deadSlots = 0
+  entries.forEach(([id, fields]) => appendSlot(index, id, fields))
+  index.version += 1
+}
+
+// `getFields(record)` returns the searchable values with the SKU first.
+export const createSearchIndex = (records, { getId, getFields }) => {
+  const index = { getId, getFields, version: 0, cache: null }
+  rebuild(
+    index,
+    records.map((record) => [getId(record), getFields(record).map(normaliseSearchText)]),
+  )
+  return index
+}
+
+export const removeSearchRecord = (index, id) => {
+  const slot = index.slotById.get(id)
+  if (slot === undefined) {
+    return
+  }
+  index.slotById.delete(id)
+  index.fields[slot] = null
+  index.deadSlots += 1
+  index.version += 1
+  if (index.deadSlots > 1024 && index.deadSlots > index.slotById.size) {
+    const live = []
+    index.fields.forEach((fields, position) => {
+      if (fields) {
+        live.push([index.ids[position], fields])
+      }
+    })
+    rebuild(index, live)
+  }
+}
+
+// Adds a record, or re-indexes it when its searchable fields have changed.
+export const upsertSearchRecord = (index, record) => {
+  const id = index.getId(record)
+  const fields = index.getFields(record).map(normaliseSearchText)
+  const existing = index.slotById.get(id)
+  if (existing !== undefined) {
+    const previous = index.fields[existing]
+    if (previous.every((value, position) => value === fields[position])) {
+      return
+    }
+    removeSearchRecord(index, id)
+  }
+  appendSlot(index, id, fields)
+  index.version += 1
+}
+
+const substringSlots = (index, query) => {
+  const { cache } = index
+  if (cache && cache.version === index.version && query.includes(cache.query)) {
+    return cache.slots.filter((slot) => index.fields[slot]?.some((field) => field.includes(query)))
+  }
+  const postings = []
+  for (const gram of gramsOf(query)) {
+    const list = index.grams.get(gram)
+    if (!list) {
+      return []
+    }
+    postings.push(list)
+  }
+  postings.sort((a, b) => a.length - b.length)
+  let candidates = postings[0]
+  for (let position = 1; position < postings.length && candidates.length; position += 1) {
+    const list = postings[position]
+    // Walk both lists when they are of similar size; binary search when one is tiny.
+    candidates =
+      candidates.length * 16 > list.length
+        ? intersectSorted(candidates, list)
+        : candidates.filter((slot) => containsSorted(list, slot))
+  }
+  return candidates.filter((slot) => index.fields[slot]?.some((field) => field.includes(query)))
+}
+
+const shortSlots = (index, query) =>
+  (index.shortGrams.get(query) ?? []).filter((slot) => index.fields[slot])
+
+// A substring within `maxEdits` of the query shares at least this many of its trigrams,
+// which rules out most SKUs before any edit distance is computed.
+const fuzzySkuSlots = (index, query) => {
+  const maxEdits = query.length >= FUZZY_TWO_EDIT_LENGTH ? 2 : 1
+  const queryGrams = gramsOf(query)
+  // Grams shared by most records (e.g. a common "SKU-" prefix) are skipped and the
+  // threshold lowered to match, as long as it stays above zero.
+  const common = Math.ceil(index.ids.length / 4)
+  const selective = Array.from(queryGrams).filter((gram) => (index.grams.get(gram)?.length ?? 0) <= common)
+  const threshold = selective.length - GRAM_LENGTH * maxEdits
+  const grams = threshold >= 1 ? selective : Array.from(queryGrams)
+  const minShared = Math.max(1, threshold >= 1 ? threshold : queryGrams.size - GRAM_LENGTH * maxEdits)
+  const shared = new Uint8Array(index.ids.length)
+  const candidates = []
+  grams.forEach((gram) => {
+    index.grams.get(gram)?.forEach((slot) => {
+      shared[slot] += 1
+      if (shared[slot] === minShared) {
+        candidates.push(slot)
+      }
+    })
+  })
+  const matches = []
+  candidates.forEach((slot) => {
+    const sku = index.fields[slot]?.[0]
+    if (!sku) {
+      return
+    }
+    const distance = substringEditDistance(query, sku)
+    if (distance <= maxEdits) {
+      matches.push({ slot, distance })
+    }
+  })
+  return matches.sort((a, b) => a.distance - b.distance || a.slot - b.slot)
+}
+
+// Returns matching ids, best first, or null for a blank query (meaning "everything").
+// Fuzzy matching only applies to single-word queries, i.e. SKUs and barcodes.
+export const querySearchIndex = (index, rawQuery, { fuzzy = true } = {}) => {
+  const query = normaliseSearchText(rawQuery)
+  if (!query) {
+    return null
+  }
+  const slots = query.length < GRAM_LENGTH ? shortSlots(index, query) : substringSlots(index, query)
+  if (query.length >= GRAM_LENGTH) {
+    index.cache = { version: index.version, query, slots }
+  }
+  if (!slots.length) {
+    return fuzzy && query.length >= FUZZY_MIN_QUERY_LENGTH && !/\s/.test(query)
+      ? fuzzySkuSlots(index, query).map(({ slot }) => index.ids[slot])
+      : []
+  }
+  const ranked = [[], [], []]
+  slots.forEach((slot) => {
+    const sku = index.fields[slot][0]
+    const rank =
+      sku === query ? RANK_EXACT_SKU : sku.startsWith(query) ? RANK_SKU_PREFIX : RANK_SUBSTRING
+    ranked[rank].push(index.ids[slot])
+  })
+  return ranked[RANK_EXACT_SKU].concat(ranked[RANK_SKU_PREFIX], ranked[RANK_SUBSTRING])
+}
@@ -0,0 +1,32 @@
+import { SESSION_CHANNEL_NAME } from '../constants.js'
+
+// Local-only transport for multi-operator sessions: tabs and windows of this browser
+// exchange change sets (changeSets.js) over a BroadcastChannel, with no server involved.
+//
+//   { type: 'hello', sessionId }                     a tab joined; peers reply with their set
+//   { type: 'change-set', sessionId, changeSet }     a session's drafts changed
+//   { type: 'leave', sessionId }                     a tab closed
+//   { type: 'committed', sessionId, timestamp, consumed }
+//                                                    a tab committed these sets; their
+//                                                    sessions reload and keep any newer edits
+//
+// Returns null where BroadcastChannel is unavailable; other devices use change-set files.
+export const openSessionChannel = (sessionId, onMessage) => {
+  if (typeof BroadcastChannel === 'undefined') {
+    return null
+  }
+  const channel = new BroadcastChannel(SESSION_CHANNEL_NAME)
+  channel.onmessage = (event) => {
+    if (event.data?.sessionId && event.data.sessionId !== sessionId) {
+      onMessage(event.data)
+    }
+  }
+  return {
+    post(message) {
+      channel.postMessage({ ...message, sessionId })
+    },
+    close() {
+      channel.close()
+    },
+  }
+}
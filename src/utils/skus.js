@@ -0,0 +1,54 @@
+import { AUTO_SKU_PAD_LENGTH, AUTO_SKU_PREFIX } from '../constants.js'
+
+// Auto-SKU numbering and item ids. The next free SKU number is kept in metadata
+// (`nextSkuNumber`) and only recomputed from every item on import; additions allocate
+// from it and check candidates against the store's SKU index, so each new item costs O(1)
+// however large the inventory.
+
+const TRAILING_NUMBER = /(\d+)(?!.*\d)/
+
+export const formatAutoSku = (counter) => {
+  const number = String(counter).padStart(AUTO_SKU_PAD_LENGTH, '0')
+  return `${AUTO_SKU_PREFIX}${number}`
+}
+
+export const extractSkuNumber = (sku) => {
+  if (!sku) {
+    return null
+  }
+  const match = String(sku).match(TRAILING_NUMBER)
+  return match ? Number.parseInt(match[1], 10) : null
+}
+
+export const computeNextSkuNumber = (items, fallback = 1) => {
+  let max = fallback - 1
+  items.forEach((item) => {
+    const candidate = extractSkuNumber(item.sku)
+    if (candidate && candidate > max) {
+      max = candidate
+    }
+  })
+  return max + 1
+}
+
+// SKUs are matched ignoring case and surrounding space.
+export const skuKey = (sku) => String(sku ?? '').trim().toUpperCase()
+
+// Hands out unique ids from a base (the SKU or name), adding -1, -2... on a clash. The
+// next suffix is remembered per base, so many rows sharing a base do not rescan the
+// suffixes already taken. `isTaken` covers ids allocated elsewhere (the current store).
+export const createIdAllocator = (isTaken = () => false) => {
+  const allocated = new Set()
+  const nextSuffix = new Map()
+  return (baseId) => {
+    let id = baseId
+    let suffix = nextSuffix.get(baseId) ?? 1
+    while (allocated.has(id) || isTaken(id)) {
+      id = `${baseId}-${suffix}`
+      suffix += 1
+    }
+    nextSuffix.set(baseId, suffix)
+    allocated.add(id)
+    return id
+  }
+}
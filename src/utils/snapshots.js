@@ -0,0 +1,287 @@
+import { SNAPSHOT_EVERY_COMMITS, SNAPSHOT_EVERY_DAYS, SNAPSHOT_LIMIT } from '../constants.js'
+import {
+  EPSILON,
+  calculateLayersQuantity,
+  calculateLayersValue,
+  computeCostMovement,
+  createInitialCostLayers,
+} from './costing.js'
+import { movementValueImpact, queryHistory, selectionEntries } from './historyIndex.js'
+import { addCategoryTotals, addItemTotals, storeCategoryBreakdown } from './inventoryStore.js'
+
+// Point-in-time inventory. A snapshot is the inventory store's item array, totals and
+// category totals as a commit left them; store versions are never modified, so taking one
+// copies nothing. Stock as at a date starts from the latest snapshot at or before it and
+// replays the movements since through the same FIFO costing the commit used, so counts and
+// cost layers come out exactly. A date before every snapshot is rolled back from the first
+// one: counts come from each movement's previous count and values from its value change
+// (an estimate where a count sold more than was on hand), with each item's stock held as
+// one layer at its average cost.
+
+const DAY_MS = 24 * 60 * 60 * 1000
+
+const parseEpoch = (timestamp) => {
+  const epoch = timestamp ? Date.parse(timestamp) : Number.NaN
+  return Number.isNaN(epoch) ? Number.NEGATIVE_INFINITY : epoch
+}
+
+// `takenAt` is the commit time, or null for an inventory with no movements yet.
+export const createSnapshot = (store, takenAt) => ({
+  takenAt,
+  epoch: parseEpoch(takenAt),
+  items: store.items,
+  indexById: store.indexById,
+  totals: store.totals,
+  categories: store.categories,
+})
+
+export const shouldTakeSnapshot = (snapshots, commitsSince, epoch) => {
+  const latest = snapshots[snapshots.length - 1]
+  return (
+    !latest || commitsSince >= SNAPSHOT_EVERY_COMMITS || epoch - latest.epoch >= SNAPSHOT_EVERY_DAYS * DAY_MS
+  )
+}
+
+// Returns { snapshots, dropped }: the list (oldest first) with `snapshot` added, and any
+// dropped to stay within SNAPSHOT_LIMIT. The one dropped is whichever leaves the smallest
+// gap between its neighbours, so the kept snapshots thin out evenly over the whole history;
+// the first (the import) and the latest are always kept.
+export const addSnapshot = (snapshots, snapshot) => {
+  const next = [...snapshots, snapshot].sort((a, b) => a.epoch - b.epoch)
+  const dropped = []
+  while (next.length > Math.max(2, SNAPSHOT_LIMIT)) {
+    let drop = 1
+    for (let index = 2; index < next.length - 1; index += 1) {
+      if (next[index + 1].epoch - next[index - 1].epoch < next[drop + 1].epoch - next[drop - 1].epoch) {
+        drop = index
+      }
+    }
+    dropped.push(...next.splice(drop, 1))
+  }
+  return { snapshots: next, dropped }
+}
+
+// The IndexedDB form: draft input is left out and the lookups are rebuilt on load.
+export const snapshotRecord = (snapshot) => ({
+  epoch: snapshot.epoch,
+  takenAt: snapshot.takenAt,
+  totals: snapshot.totals,
+  categories: Array.from(snapshot.categories),
+  items: snapshot.items.map((item) => ({
+    id: item.id,
+    sku: item.sku,
+    name: item.name,
+    category: item.category,
+    unitCost: item.unitCost,
+    currentCount: item.currentCount,
+    lastCount: item.currentCount,
+    lastUpdated: item.lastUpdated,
+    costLayers: item.costLayers,
+    itemNote: item.itemNote,
+  })),
+})
+
+export const snapshotFromRecord = (record) => ({
+  takenAt: record.takenAt,
+  epoch: record.epoch,
+  items: record.items,
+  indexById: null,
+  totals: record.totals,
+  categories: new Map(record.categories),
+})
+
+// Persisted snapshots get their id lookup the first time they are replayed from.
+const snapshotIndex = (snapshot) => {
+  if (!snapshot.indexById) {
+    snapshot.indexById = new Map(snapshot.items.map((item, index) => [item.id, index]))
+  }
+  return snapshot.indexById
+}
+
+// Last snapshot at or before `epoch`, or -1.
+const snapshotBefore = (snapshots, epoch) => {
+  let low = 0
+  let high = snapshots.length
+  while (low < high) {
+    const middle = (low + high) >>> 1
+    if (snapshots[middle].epoch <= epoch) {
+      low = middle + 1
+    } else {
+      high = middle
+    }
+  }
+  return low - 1
+}
+
+// Brings `layers` to `count`, consuming the oldest first or adding a layer at `unitCost`.
+// Replayed counts can differ from a movement's own, e.g. where an imported workbook's
+// history records a recount or a new item's opening entry appears twice.
+const reconcileLayers = (layers, count, unitCost, timestamp) => {
+  const quantity = calculateLayersQuantity(layers)
+  if (Math.abs(quantity - count) <= EPSILON) {
+    return layers
+  }
+  return computeCostMovement({
+    layers,
+    sold: Math.max(0, quantity - count),
+    received: Math.max(0, count - quantity),
+    unitCost,
+    timestamp,
+  }).layers
+}
+
+const itemFromEntry = (entry) => ({
+  id: entry.itemId,
+  sku: entry.sku,
+  name: entry.name,
+  category: entry.category,
+  unitCost: entry.unitCost ?? 0,
+  currentCount: 0,
+  lastCount: 0,
+  lastUpdated: null,
+  costLayers: [],
+  itemNote: entry.itemNote || '',
+})
+
+// Builds the result from `base` with `changed` (id -> item, or null for an item that did
+// not exist yet) swapped in and `added` put ahead, adjusting the totals for those only.
+const withChanges = (base, changed, added) => {
+  const indexById = snapshotIndex(base)
+  const categories = new Map(base.categories)
+  let totals = base.totals
+  const items = base.items.slice()
+  let removed = false
+  changed.forEach((item, id) => {
+    const index = indexById.get(id)
+    const previous = items[index]
+    totals = addItemTotals(totals, previous, -1)
+    addCategoryTotals(categories, previous, -1)
+    if (item) {
+      totals = addItemTotals(totals, item)
+      addCategoryTotals(categories, item)
+    } else {
+      removed = true
+    }
+    items[index] = item
+  })
+  added.forEach((item) => {
+    totals = addItemTotals(totals, item)
+    addCategoryTotals(categories, item)
+  })
+  const kept = removed ? items.filter(Boolean) : items
+  return { items: added.length ? [...added.reverse(), ...kept] : kept, totals, categories }
+}
+
+const replayFrom = (base, historyIndex, epoch) => {
+  const indexById = snapshotIndex(base)
+  const entries = selectionEntries(queryHistory(historyIndex, { from: base.epoch + 1, to: epoch }))
+  const states = new Map()
+  for (let position = entries.length - 1; position >= 0; position -= 1) {
+    const entry = entries[position]
+    let state = states.get(entry.itemId)
+    if (!state) {
+      const index = indexById.get(entry.itemId)
+      const item = index === undefined ? itemFromEntry(entry) : base.items[index]
+      state = { item, isNew: index === undefined, layers: item.costLayers ?? [] }
+      states.set(entry.itemId, state)
+    }
+    const unitCost = entry.receivedUnitCost || entry.unitCost || 0
+    const layers = reconcileLayers(state.layers, entry.previousCount ?? 0, unitCost, entry.timestamp)
+    const movement = computeCostMovement({
+      layers,
+      sold: entry.sold ?? 0,
+      received: entry.received ?? 0,
+      unitCost,
+      timestamp: entry.timestamp,
+    })
+    const newCount = entry.newCount ?? movement.totalQuantity
+    state.layers = reconcileLayers(movement.layers, newCount, unitCost, entry.timestamp)
+    state.lastUpdated = entry.timestamp
+  }
+  const changed = new Map()
+  const added = []
+  states.forEach(({ item, isNew, layers, lastUpdated }, id) => {
+    const currentCount = calculateLayersQuantity(layers)
+    const next = { ...item, currentCount, lastCount: currentCount, lastUpdated, costLayers: layers }
+    if (isNew) {
+      added.push(next)
+    } else {
+      changed.set(id, next)
+    }
+  })
+  return { ...withChanges(base, changed, added), exact: true, movements: entries.length }
+}
+
+const rollBackFrom = (base, historyIndex, epoch) => {
+  const indexById = snapshotIndex(base)
+  const entries = selectionEntries(queryHistory(historyIndex, { from: epoch + 1, to: base.epoch }))
+  // Newest first, so each item ends on the previous count of its oldest movement.
+  const states = new Map()
+  entries.forEach((entry) => {
+    if (!indexById.has(entry.itemId)) {
+      return
+    }
+    const state = states.get(entry.itemId) ?? { count: 0, valueChange: 0 }
+    state.count = entry.previousCount ?? 0
+    state.valueChange += movementValueImpact(entry)
+    states.set(entry.itemId, state)
+  })
+  const changed = new Map()
+  states.forEach(({ count, valueChange }, id) => {
+    const item = base.items[indexById.get(id)]
+    const [before] = selectionEntries(queryHistory(historyIndex, { itemId: id, to: epoch }), 0, 1)
+    if (!before && count <= EPSILON) {
+      changed.set(id, null)
+      return
+    }
+    const value = Math.max(0, calculateLayersValue(item.costLayers ?? []) - valueChange)
+    const averageCost = count > EPSILON ? value / count : item.unitCost
+    changed.set(id, {
+      ...item,
+      currentCount: count,
+      lastCount: count,
+      lastUpdated: before?.timestamp ?? null,
+      costLayers: createInitialCostLayers(count, averageCost, before?.timestamp ?? null),
+    })
+  })
+  return { ...withChanges(base, changed, []), exact: false, movements: entries.length }
+}
+
+// Stock as at `epoch` (ms): { items, totals, categoryBreakdown, exact, basedOn, movements }.
+// `snapshots` are oldest first; `current` is a snapshot of the live store taken at the
+// latest movement, so dates after every kept snapshot replay from the nearest one and
+// dates after the latest movement read the live store. It is placed no earlier than the
+// latest snapshot: with no history its time is unknown, and a snapshot taken at a commit
+// that recorded no movements is newer than the latest movement.
+export const reconstructInventoryAt = (snapshots, current, historyIndex, epoch) => {
+  const latest = snapshots[snapshots.length - 1]
+  let live = current
+  if (live && latest && !(live.epoch >= latest.epoch)) {
+    live = { ...live, epoch: latest.epoch }
+  }
+  const candidates = live ? [...snapshots, live] : snapshots
+  if (!candidates.length) {
+    return null
+  }
+  const position = snapshotBefore(candidates, epoch)
+  const base = candidates[Math.max(0, position)]
+  const result =
+    position >= 0 ? replayFrom(base, historyIndex, epoch) : rollBackFrom(base, historyIndex, epoch)
+  return {
+    items: result.items,
+    totals: result.totals,
+    categoryBreakdown: storeCategoryBreakdown(result),
+    exact: result.exact,
+    basedOn: base === live ? null : base.takenAt,
+    movements: result.movements,
+  }
+}
+
+// The end of a yyyy-mm-dd day in local time, as the date inputs give it; NaN otherwise.
+export const endOfDayEpoch = (dateText) => {
+  const match = /^(\d{4})-(\d{2})-(\d{2})$/.exec(dateText ?? '')
+  if (!match) {
+    return Number.NaN
+  }
+  return new Date(Number(match[1]), Number(match[2]) - 1, Number(match[3]), 23, 59, 59, 999).getTime()
+}
@@ -0,0 +1,101 @@
+import { importWorkbook, mergeWorkbookDeltas } from './normalise.js'
+import { recordStages } from './profiler.js'
+
+let worker = null
+let nextJobId = 1
+const pendingJobs = new Map()
+
+const createAbortError = () => new DOMException('Workbook job was cancelled.', 'AbortError')
+
+const getWorker = () => {
+  if (typeof Worker === 'undefined') {
+    return null
+  }
+  if (!worker) {
+    worker = new Worker(new URL('../workers/workbook.worker.js', import.meta.url), { type: 'module' })
+    worker.onmessage = (event) => {
+      const { id, type, progress, result, error, profile } = event.data
+      const job = pendingJobs.get(id)
+      if (!job) {
+        return
+      }
+      if (type === 'progress') {
+        job.onProgress?.(progress)
+        return
+      }
+      pendingJobs.delete(id)
+      job.cleanup()
+      recordStages(profile)
+      if (type === 'result') {
+        job.resolve(result)
+      } else {
+        const failure = error?.name === 'AbortError' ? createAbortError() : new Error(error?.message)
+        job.reject(failure)
+      }
+    }
+    worker.onerror = (event) => {
+      pendingJobs.forEach((job) => {
+        job.cleanup()
+        job.reject(new Error(event.message || 'Workbook worker failed.'))
+      })
+      pendingJobs.clear()
+      worker?.terminate()
+      worker = null
+    }
+  }
+  return worker
+}
+
+const runJob = (type, payload, { transfer = [], onProgress, signal } = {}) => {
+  if (signal?.aborted) {
+    return Promise.reject(createAbortError())
+  }
+  const target = getWorker()
+  const id = nextJobId++
+  return new Promise((resolve, reject) => {
+    const handleAbort = () => {
+      if (!pendingJobs.has(id)) {
+        return
+      }
+      pendingJobs.delete(id)
+      target.postMessage({ id, type: 'cancel' })
+      reject(createAbortError())
+    }
+    const cleanup = () => signal?.removeEventListener('abort', handleAbort)
+    pendingJobs.set(id, { resolve, reject, onProgress, cleanup })
+    signal?.addEventListener('abort', handleAbort, { once: true })
+    target.postMessage({ id, type, payload }, transfer)
+  })
+}
+
+// The ArrayBuffer is transferred to the worker, so callers must not reuse it afterwards.
+export const importWorkbookInBackground = (buffer, { onProgress, signal } = {}) => {
+  if (typeof Worker === 'undefined') {
+    return importWorkbook(buffer, { onProgress, signal })
+  }
+  return runJob('import', { buffer }, { transfer: [buffer], onProgress, signal })
+}
+
+export const exportWorkbookInBackground = (inventory, metadata, history, { signal } = {}) => {
+  if (typeof Worker === 'undefined') {
+    return import('./excel.js').then(({ createUpdatedWorkbook }) =>
+      createUpdatedWorkbook(inventory, metadata, history),
+    )
+  }
+  return runJob('export', { inventory, metadata, history }, { signal })
+}
+
+export const exportDeltaInBackground = (items, movements, info, { signal } = {}) => {
+  if (typeof Worker === 'undefined') {
+    return import('./excel.js').then(({ createDeltaWorkbook }) => createDeltaWorkbook(items, movements, info))
+  }
+  return runJob('exportDelta', { items, movements, info }, { signal })
+}
+
+// The buffers are transferred to the worker, like an import's.
+export const mergeDeltasInBackground = (buffers, { signal } = {}) => {
+  if (typeof Worker === 'undefined') {
+    return mergeWorkbookDeltas(buffers)
+  }
+  return runJob('merge', { buffers }, { transfer: buffers, signal })
+}
@@ -0,0 +1,313 @@
+// Streaming .xlsx writer for the workbook exports (see excel.js). Styles are registered once
+// in a shared table and cells refer to them by index; strings go in the shared-strings table,
+// so repeated categories, names and operators are stored once; and rows are written straight
+// from the caller's records through per-column accessors, in chunks that go to the zip writer
+// as they fill. Cells carry no address unless a blank cell was skipped before them.
+
+import { createZipWriter } from './zipWriter.js'
+
+const NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+const NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+const NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+const NS_TYPES = 'http://schemas.openxmlformats.org/package/2006/content-types'
+const XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+const REL_TYPE = `${NS_REL}/`
+const CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.'
+
+const CHUNK_LENGTH = 64 * 1024
+const DAY_MS = 86_400_000
+// 1899-12-30, Excel's day zero, in Unix days.
+const EXCEL_EPOCH_DAYS = 25_569
+// Custom number formats are numbered from 164; lower ids are Excel's built-in formats.
+const FIRST_CUSTOM_FORMAT = 164
+const BORDER_SIDES = ['left', 'right', 'top', 'bottom']
+
+// Markup characters, and the control characters XML cannot hold at all (dropped).
+const ESCAPED = /[&<>"\u0000-\u0008\u000b\u000c\u000e-\u001f]/
+const ESCAPED_ALL = new RegExp(ESCAPED.source, 'g')
+const ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;' }
+
+const escapeXml = (text) =>
+  ESCAPED.test(text) ? text.replace(ESCAPED_ALL, (char) => ESCAPES[char] ?? '') : text
+
+// Dates are written as serials in the writer's local time, as the browser export always has
+// been, so a re-imported workbook reads back the times that were shown.
+export const toExcelSerial = (date) =>
+  (date.valueOf() - date.getTimezoneOffset() * 60_000) / DAY_MS + EXCEL_EPOCH_DAYS
+
+const columnLetter = (index) => {
+  let letters = ''
+  for (let value = index + 1; value > 0; value = Math.floor((value - 1) / 26)) {
+    letters = String.fromCharCode(65 + ((value - 1) % 26)) + letters
+  }
+  return letters
+}
+
+const colourXml = (tag, colour) => (colour?.rgb ? `<${tag} rgb="FF${colour.rgb}"/>` : '')
+
+const fontXml = (font = {}) =>
+  `<font>${font.bold ? '<b/>' : ''}${font.italic ? '<i/>' : ''}<sz val="${font.sz ?? 11}"/>` +
+  `${colourXml('color', font.color)}<name val="${escapeXml(font.name ?? 'Calibri')}"/></font>`
+
+const fillXml = (fill = {}) =>
+  `<fill><patternFill patternType="${fill.patternType ?? 'none'}">` +
+  `${colourXml('fgColor', fill.fgColor)}</patternFill></fill>`
+
+const borderXml = (border = {}) =>
+  `<border>${BORDER_SIDES.map((side) =>
+    border[side]?.style
+      ? `<${side} style="${border[side].style}">${colourXml('color', border[side].color)}</${side}>`
+      : `<${side}/>`,
+  ).join('')}<diagonal/></border>`
+
+const numFmtXml = (code, index) =>
+  `<numFmt numFmtId="${FIRST_CUSTOM_FORMAT + index}" formatCode="${escapeXml(code)}"/>`
+
+const alignmentXml = (alignment) => {
+  const attributes = []
+  if (alignment.horizontal) attributes.push(` horizontal="${alignment.horizontal}"`)
+  if (alignment.vertical) attributes.push(` vertical="${alignment.vertical}"`)
+  if (alignment.wrapText) attributes.push(' wrapText="1"')
+  return `<alignment${attributes.join('')}/>`
+}
+
+// Styles take the xlsx-js-style cell style shape ({ font, fill, border, alignment }), plus
+// `numFmt` as a built-in format id or a format string. Each distinct font, fill, border,
+// format and combination is stored once; `register` returns the index cells refer to.
+export const createStyleTable = () => {
+  const fonts = [fontXml()]
+  const fills = [fillXml(), fillXml({ patternType: 'gray125' })]
+  const borders = [borderXml()]
+  const formats = []
+  const cellXfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+  const indexes = new Map()
+  const registered = new Map()
+
+  // Font, fill, border and xf XML never collide, so one map serves all four lists.
+  const indexOf = (list, xml) => {
+    let index = indexes.get(xml)
+    if (index === undefined) {
+      index = list.push(xml) - 1
+      indexes.set(xml, index)
+    }
+    return index
+  }
+
+  const formatId = (numFmt) => {
+    if (numFmt === undefined || numFmt === null) return 0
+    if (typeof numFmt === 'number') return numFmt
+    let index = formats.indexOf(numFmt)
+    if (index === -1) index = formats.push(numFmt) - 1
+    return FIRST_CUSTOM_FORMAT + index
+  }
+
+  const register = (style = {}) => {
+    const key = JSON.stringify(style)
+    let index = registered.get(key)
+    if (index !== undefined) return index
+    const numFmtId = formatId(style.numFmt)
+    const fontId = style.font ? indexOf(fonts, fontXml(style.font)) : 0
+    const fillId = style.fill ? indexOf(fills, fillXml(style.fill)) : 0
+    const borderId = style.border ? indexOf(borders, borderXml(style.border)) : 0
+    const applied = [
+      numFmtId ? ' applyNumberFormat="1"' : '',
+      fontId ? ' applyFont="1"' : '',
+      fillId ? ' applyFill="1"' : '',
+      borderId ? ' applyBorder="1"' : '',
+      style.alignment ? ' applyAlignment="1"' : '',
+    ].join('')
+    const open =
+      `<xf numFmtId="${numFmtId}" fontId="${fontId}" fillId="${fillId}" borderId="${borderId}" xfId="0"` +
+      applied
+    const xml = style.alignment ? `${open}>${alignmentXml(style.alignment)}</xf>` : `${open}/>`
+    index = indexOf(cellXfs, xml)
+    registered.set(key, index)
+    return index
+  }
+
+  const toXml = () =>
+    XML_HEADER +
+    `<styleSheet xmlns="${NS_MAIN}">` +
+    (formats.length ? `<numFmts count="${formats.length}">${formats.map(numFmtXml).join('')}</numFmts>` : '') +
+    `<fonts count="${fonts.length}">${fonts.join('')}</fonts>` +
+    `<fills count="${fills.length}">${fills.join('')}</fills>` +
+    `<borders count="${borders.length}">${borders.join('')}</borders>` +
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>' +
+    `<cellXfs count="${cellXfs.length}">${cellXfs.join('')}</cellXfs>` +
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>' +
+    '</styleSheet>'
+
+  return { register, toXml }
+}
+
+const createSharedStrings = () => {
+  const indexes = new Map()
+  const strings = []
+  let references = 0
+
+  const indexOf = (text) => {
+    references += 1
+    let index = indexes.get(text)
+    if (index === undefined) {
+      index = strings.push(text) - 1
+      indexes.set(text, index)
+    }
+    return index
+  }
+
+  function* toXml() {
+    let chunk = `${XML_HEADER}<sst xmlns="${NS_MAIN}" count="${references}" uniqueCount="${strings.length}">`
+    for (let index = 0; index < strings.length; index += 1) {
+      const text = strings[index]
+      const space = text.trim() === text ? '' : ' xml:space="preserve"'
+      chunk += `<si><t${space}>${escapeXml(text)}</t></si>`
+      if (chunk.length >= CHUNK_LENGTH) {
+        yield chunk
+        chunk = ''
+      }
+    }
+    yield `${chunk}</sst>`
+  }
+
+  return { indexOf, toXml }
+}
+
+// One worksheet's XML, yielded in chunks of about CHUNK_LENGTH characters. `rows` are written
+// first as [values, style] pairs, where style is one index or one per column; then one row per
+// record in `records`, with `columns` giving each cell's `value(record)` and `style`.
+function* worksheetXml(strings, { widths = [], rows = [], records = [], columns = [] }) {
+  const cols = widths
+    .map((width, index) => `<col min="${index + 1}" max="${index + 1}" width="${width}" customWidth="1"/>`)
+    .join('')
+  let chunk =
+    `${XML_HEADER}<worksheet xmlns="${NS_MAIN}" xmlns:r="${NS_REL}">` +
+    `${cols ? `<cols>${cols}</cols>` : ''}<sheetData>`
+  let rowNumber = 0
+  let skipped = false
+
+  const cellXml = (value, style, column) => {
+    if (value === '' || value === null || value === undefined) {
+      skipped = true
+      return ''
+    }
+    let body
+    let type = ''
+    if (typeof value === 'number') {
+      if (!Number.isFinite(value)) {
+        skipped = true
+        return ''
+      }
+      body = `${value}`
+    } else if (value instanceof Date) {
+      if (Number.isNaN(value.valueOf())) {
+        skipped = true
+        return ''
+      }
+      body = `${toExcelSerial(value)}`
+    } else if (typeof value === 'boolean') {
+      type = ' t="b"'
+      body = value ? '1' : '0'
+    } else {
+      type = ' t="s"'
+      body = strings.indexOf(`${value}`)
+    }
+    const reference = skipped ? ` r="${columnLetter(column)}${rowNumber}"` : ''
+    skipped = false
+    return `<c${reference}${style ? ` s="${style}"` : ''}${type}><v>${body}</v></c>`
+  }
+
+  for (const [values, style = 0] of rows) {
+    rowNumber += 1
+    skipped = false
+    chunk += `<row r="${rowNumber}">`
+    values.forEach((value, column) => {
+      chunk += cellXml(value, Array.isArray(style) ? style[column] ?? 0 : style, column)
+    })
+    chunk += '</row>'
+  }
+  for (let index = 0; index < records.length; index += 1) {
+    const record = records[index]
+    rowNumber += 1
+    skipped = false
+    chunk += `<row r="${rowNumber}">`
+    for (let column = 0; column < columns.length; column += 1) {
+      chunk += cellXml(columns[column].value(record), columns[column].style ?? 0, column)
+    }
+    chunk += '</row>'
+    if (chunk.length >= CHUNK_LENGTH) {
+      yield chunk
+      chunk = ''
+    }
+  }
+  yield `${chunk}</sheetData></worksheet>`
+}
+
+const workbookXml = (names) =>
+  `${XML_HEADER}<workbook xmlns="${NS_MAIN}" xmlns:r="${NS_REL}"><sheets>` +
+  names
+    .map((name, index) => `<sheet name="${escapeXml(name)}" sheetId="${index + 1}" r:id="rId${index + 1}"/>`)
+    .join('') +
+  '</sheets></workbook>'
+
+const workbookRelsXml = (count) =>
+  `${XML_HEADER}<Relationships xmlns="${NS_PKG_REL}">` +
+  Array.from(
+    { length: count },
+    (_, index) =>
+      `<Relationship Id="rId${index + 1}" Type="${REL_TYPE}worksheet" ` +
+      `Target="worksheets/sheet${index + 1}.xml"/>`,
+  ).join('') +
+  `<Relationship Id="rId${count + 1}" Type="${REL_TYPE}styles" Target="styles.xml"/>` +
+  `<Relationship Id="rId${count + 2}" Type="${REL_TYPE}sharedStrings" Target="sharedStrings.xml"/>` +
+  '</Relationships>'
+
+const ROOT_RELS_XML =
+  `${XML_HEADER}<Relationships xmlns="${NS_PKG_REL}">` +
+  `<Relationship Id="rId1" Type="${REL_TYPE}officeDocument" Target="xl/workbook.xml"/></Relationships>`
+
+const contentTypesXml = (count) =>
+  `${XML_HEADER}<Types xmlns="${NS_TYPES}">` +
+  '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>' +
+  '<Default Extension="xml" ContentType="application/xml"/>' +
+  `<Override PartName="/xl/workbook.xml" ContentType="${CONTENT_TYPE}sheet.main+xml"/>` +
+  Array.from(
+    { length: count },
+    (_, index) =>
+      `<Override PartName="/xl/worksheets/sheet${index + 1}.xml" ` +
+      `ContentType="${CONTENT_TYPE}worksheet+xml"/>`,
+  ).join('') +
+  `<Override PartName="/xl/styles.xml" ContentType="${CONTENT_TYPE}styles+xml"/>` +
+  `<Override PartName="/xl/sharedStrings.xml" ContentType="${CONTENT_TYPE}sharedStrings+xml"/>` +
+  '</Types>'
+
+// `addSheet(name, sheet)` takes the worksheetXml options above, plus an optional `profile`
+// ({ name, rows }) for the sheet's stage; `write(profile)` zips the workbook and resolves to
+// its bytes, passing each sheet's write to `profile(sheet, fn)` when given.
+export const createXlsxWriter = () => {
+  const styles = createStyleTable()
+  const strings = createSharedStrings()
+  const sheets = []
+
+  const addSheet = (name, sheet) => {
+    sheets.push({ name, sheet })
+  }
+
+  const write = async (profile = (_sheet, fn) => fn()) => {
+    const zip = createZipWriter()
+    await zip.addEntry('[Content_Types].xml', [contentTypesXml(sheets.length)])
+    await zip.addEntry('_rels/.rels', [ROOT_RELS_XML])
+    await zip.addEntry('xl/workbook.xml', [workbookXml(sheets.map(({ name }) => name))])
+    await zip.addEntry('xl/_rels/workbook.xml.rels', [workbookRelsXml(sheets.length)])
+    for (let index = 0; index < sheets.length; index += 1) {
+      const { sheet } = sheets[index]
+      const path = `xl/worksheets/sheet${index + 1}.xml`
+      await profile(sheet, () => zip.addEntry(path, worksheetXml(strings, sheet)))
+    }
+    // Written last, once every sheet has added its strings and styles.
+    await zip.addEntry('xl/sharedStrings.xml', strings.toXml())
+    await zip.addEntry('xl/styles.xml', [styles.toXml()])
+    return zip.finish()
+  }
+
+  return { registerStyle: styles.register, addSheet, write }
+}
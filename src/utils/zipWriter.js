@@ -0,0 +1,164 @@
+// Minimal zip writer for the workbook export (see xlsxWriter.js). Entries are written one at a
+// time from their chunks: each chunk is CRC'd and handed to a `CompressionStream`, and the
+// deflated output is collected as it comes out, so an entry's text is never joined into one
+// string. Sizes and CRCs go in a data descriptor after each entry and in the central
+// directory, as the local header is written before they are known.
+
+const LOCAL_HEADER = 0x04034b50
+const DATA_DESCRIPTOR = 0x08074b50
+const CENTRAL_HEADER = 0x02014b50
+const END_OF_DIRECTORY = 0x06054b50
+// Bit 3: sizes follow in a data descriptor; bit 11: names are UTF-8.
+const FLAGS = 0x0808
+const STORED = 0
+const DEFLATED = 8
+
+const CRC_TABLE = (() => {
+  const table = new Uint32Array(256)
+  for (let index = 0; index < 256; index += 1) {
+    let value = index
+    for (let bit = 0; bit < 8; bit += 1) {
+      value = value & 1 ? 0xedb88320 ^ (value >>> 1) : value >>> 1
+    }
+    table[index] = value >>> 0
+  }
+  return table
+})()
+
+const updateCrc = (crc, bytes) => {
+  let value = crc ^ 0xffffffff
+  for (let index = 0; index < bytes.length; index += 1) {
+    value = CRC_TABLE[(value ^ bytes[index]) & 0xff] ^ (value >>> 8)
+  }
+  return (value ^ 0xffffffff) >>> 0
+}
+
+const dosDateTime = (date) => ({
+  time: (date.getHours() << 11) | (date.getMinutes() << 5) | (date.getSeconds() >> 1),
+  date: ((date.getFullYear() - 1980) << 9) | ((date.getMonth() + 1) << 5) | date.getDate(),
+})
+
+const canDeflate = () => typeof CompressionStream === 'function'
+
+export const createZipWriter = ({ compress = canDeflate() } = {}) => {
+  const encoder = new TextEncoder()
+  const parts = []
+  const entries = []
+  const stamp = dosDateTime(new Date())
+  let offset = 0
+
+  const push = (bytes) => {
+    parts.push(bytes)
+    offset += bytes.length
+  }
+
+  const header = (size) => {
+    const bytes = new Uint8Array(size)
+    return { bytes, view: new DataView(bytes.buffer) }
+  }
+
+  const writeLocalHeader = (name, method) => {
+    const { bytes, view } = header(30 + name.length)
+    view.setUint32(0, LOCAL_HEADER, true)
+    view.setUint16(4, 20, true)
+    view.setUint16(6, FLAGS, true)
+    view.setUint16(8, method, true)
+    view.setUint16(10, stamp.time, true)
+    view.setUint16(12, stamp.date, true)
+    view.setUint16(26, name.length, true)
+    bytes.set(name, 30)
+    push(bytes)
+  }
+
+  const writeDataDescriptor = ({ crc, compressedSize, size }) => {
+    const { bytes, view } = header(16)
+    view.setUint32(0, DATA_DESCRIPTOR, true)
+    view.setUint32(4, crc, true)
+    view.setUint32(8, compressedSize, true)
+    view.setUint32(12, size, true)
+    push(bytes)
+  }
+
+  // `chunks` is any iterable (or async iterable) of strings or byte arrays.
+  const addEntry = async (path, chunks) => {
+    const name = encoder.encode(path)
+    const method = compress ? DEFLATED : STORED
+    const entry = { name, method, offset, crc: 0, size: 0, compressedSize: 0 }
+    writeLocalHeader(name, method)
+    const dataStart = offset
+    if (compress) {
+      const stream = new CompressionStream('deflate-raw')
+      const writer = stream.writable.getWriter()
+      // Read while writing, or the stream's queue fills and `write` never resolves.
+      const draining = (async () => {
+        const reader = stream.readable.getReader()
+        for (;;) {
+          const { done, value } = await reader.read()
+          if (done) return
+          push(value)
+        }
+      })()
+      for await (const chunk of chunks) {
+        const bytes = typeof chunk === 'string' ? encoder.encode(chunk) : chunk
+        entry.crc = updateCrc(entry.crc, bytes)
+        entry.size += bytes.length
+        await writer.write(bytes)
+      }
+      await writer.close()
+      await draining
+    } else {
+      for await (const chunk of chunks) {
+        const bytes = typeof chunk === 'string' ? encoder.encode(chunk) : chunk
+        entry.crc = updateCrc(entry.crc, bytes)
+        entry.size += bytes.length
+        push(bytes)
+      }
+    }
+    entry.compressedSize = offset - dataStart
+    writeDataDescriptor(entry)
+    entries.push(entry)
+  }
+
+  const writeCentralDirectory = () => {
+    const start = offset
+    entries.forEach((entry) => {
+      const { bytes, view } = header(46 + entry.name.length)
+      view.setUint32(0, CENTRAL_HEADER, true)
+      view.setUint16(4, 20, true)
+      view.setUint16(6, 20, true)
+      view.setUint16(8, FLAGS, true)
+      view.setUint16(10, entry.method, true)
+      view.setUint16(12, stamp.time, true)
+      view.setUint16(14, stamp.date, true)
+      view.setUint32(16, entry.crc, true)
+      view.setUint32(20, entry.compressedSize, true)
+      view.setUint32(24, entry.size, true)
+      view.setUint16(28, entry.name.length, true)
+      view.setUint32(42, entry.offset, true)
+      bytes.set(entry.name, 46)
+      push(bytes)
+    })
+    const { bytes, view } = header(22)
+    view.setUint32(0, END_OF_DIRECTORY, true)
+    view.setUint16(8, entries.length, true)
+    view.setUint16(10, entries.length, true)
+    view.setUint32(12, offset - start, true)
+    view.setUint32(16, start, true)
+    push(bytes)
+  }
+
+  // The finished archive as one Uint8Array; the writer cannot be used afterwards.
+  const finish = () => {
+    writeCentralDirectory()
+    const output = new Uint8Array(offset)
+    let position = 0
+    parts.forEach((part) => {
+      output.set(part, position)
+      position += part.length
+    })
+    parts.length = 0
+    return output
+  }
+
+  return { addEntry, finish }
+}
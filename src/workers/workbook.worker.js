@@ -0,0 +1,49 @@
+import { createDeltaWorkbook, createUpdatedWorkbook } from '../utils/excel.js'
+import { importWorkbook, mergeWorkbookDeltas } from '../utils/normalise.js'
+import { takeStages } from '../utils/profiler.js'
+
+const toArrayBuffer = (bytes) => (bytes instanceof ArrayBuffer ? bytes : new Uint8Array(bytes).buffer)
+
+const activeJobs = new Map()
+
+const handlers = {
+  import: ({ buffer }, { signal, postProgress }) =>
+    importWorkbook(buffer, { chunked: true, onProgress: postProgress, signal }),
+  export: async ({ inventory, metadata, history }) =>
+    toArrayBuffer(await createUpdatedWorkbook(inventory, metadata, history)),
+  exportDelta: async ({ items, movements, info }) =>
+    toArrayBuffer(await createDeltaWorkbook(items, movements, info)),
+  merge: async ({ buffers }) => toArrayBuffer(await mergeWorkbookDeltas(buffers)),
+}
+
+self.onmessage = async (event) => {
+  const { id, type, payload } = event.data
+  if (type === 'cancel') {
+    activeJobs.get(id)?.abort()
+    return
+  }
+  const handler = handlers[type]
+  if (!handler) {
+    self.postMessage({ id, type: 'error', error: { name: 'Error', message: `Unknown job: ${type}` } })
+    return
+  }
+  const controller = new AbortController()
+  activeJobs.set(id, controller)
+  try {
+    const result = await handler(payload, {
+      signal: controller.signal,
+      postProgress: (progress) => self.postMessage({ id, type: 'progress', progress }),
+    })
+    const transfer = result instanceof ArrayBuffer ? [result] : []
+    self.postMessage({ id, type: 'result', result, profile: takeStages() }, transfer)
+  } catch (err) {
+    self.postMessage({
+      id,
+      type: 'error',
+      error: { name: err?.name, message: err?.message },
+      profile: takeStages(),
+    })
+  } finally {
+    activeJobs.delete(id)
+  }
+}
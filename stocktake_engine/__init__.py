@@ -0,0 +1,70 @@
+"""Headless stocktake engine mirroring the browser app's costing and history."""
+
+from .costing import (
+    EPSILON,
+    BatchMovement,
+    CostLayerBook,
+    build_history_entry,
+    calculate_layers_quantity,
+    calculate_layers_value,
+    compute_cost_movement,
+    create_initial_cost_layers,
+    merge_cost_layers,
+    parse_adjustment,
+    parse_numeric_input,
+    summarise_cost_impact,
+)
+from .consolidate import consolidate
+from .engine import StocktakeEngine, compute_next_sku_number, format_auto_sku, iso_timestamp
+from .normalise import normalise_history, normalise_inventory
+from .onboarding import BulkAddResult, add_items, parse_bulk_item_text
+from .profiler import Profiler, compare_profiles
+from .replenishment import (
+    DemandTracker,
+    ReplenishmentPlan,
+    compute_replenishment,
+    plan_replenishment,
+    reorder_suggestions,
+)
+from .service import StocktakeService
+from .sessions import apply_change_sets, merge_change_sets
+from .store import StocktakeStore
+from .writer import write_engine_workbook, write_workbook
+
+__all__ = [
+    "EPSILON",
+    "BatchMovement",
+    "BulkAddResult",
+    "CostLayerBook",
+    "DemandTracker",
+    "Profiler",
+    "ReplenishmentPlan",
+    "StocktakeEngine",
+    "StocktakeService",
+    "StocktakeStore",
+    "add_items",
+    "apply_change_sets",
+    "build_history_entry",
+    "calculate_layers_quantity",
+    "calculate_layers_value",
+    "compare_profiles",
+    "compute_cost_movement",
+    "compute_next_sku_number",
+    "compute_replenishment",
+    "consolidate",
+    "create_initial_cost_layers",
+    "format_auto_sku",
+    "iso_timestamp",
+    "merge_change_sets",
+    "merge_cost_layers",
+    "normalise_history",
+    "normalise_inventory",
+    "parse_adjustment",
+    "parse_bulk_item_text",
+    "parse_numeric_input",
+    "plan_replenishment",
+    "reorder_suggestions",
+    "summarise_cost_impact",
+    "write_engine_workbook",
+    "write_workbook",
+]
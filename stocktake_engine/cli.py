@@ -0,0 +1,320 @@
+"""Command line entry point: ``python -m stocktake_engine <command>``."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+from urllib.parse import urlsplit
+
+from .consolidate import consolidate
+from .loadtest import (
+    DEFAULT_CLIENTS,
+    DEFAULT_COMMIT_EVERY,
+    DEFAULT_DURATION,
+    print_report,
+    run_load_test,
+    synthetic_service,
+)
+from .onboarding import add_items, bulk_rows_from_engine, parse_bulk_item_text
+from .profiler import Profiler, compare_profiles, load_profile, summarise_profile
+from .reader import load_workbook
+from .replenishment import (
+    REPLENISHMENT_LEAD_TIME_DAYS,
+    REPLENISHMENT_LOOKBACK_DAYS,
+    REPLENISHMENT_REVIEW_DAYS,
+    compute_replenishment,
+    reorder_suggestions,
+)
+from .service import DEFAULT_BATCH_WINDOW, DEFAULT_HOST, DEFAULT_PORT, serve
+from .sessions import apply_drop_directory
+from .writer import write_engine_workbook
+
+
+def _run_consolidate(args: argparse.Namespace) -> int:
+    report = consolidate(args.directory, args.output, export_dir=args.per_store_dir, workers=args.workers)
+    for store in report.stores:
+        exported = f" -> {store.export_path}" if store.export_path else ""
+        print(f"  {store.name}: {store.rows:,} rows in {store.parse_seconds:.2f}s{exported}")
+    print(
+        f"Consolidated {len(report.stores)} stores ({report.skus:,} SKUs) into {report.output_path}"
+    )
+    print(
+        f"  parse {report.parse_seconds:.2f}s  merge {report.merge_seconds:.2f}s  "
+        f"write {report.write_seconds:.2f}s  ({report.rows_per_second:,.0f} rows/s)"
+    )
+    return 0
+
+
+def _run_profile(args: argparse.Namespace) -> int:
+    profiler = Profiler(trace_memory=args.trace_memory)
+    engine = load_workbook(args.workbook, profiler=profiler)
+    if not args.no_apply:
+        # Sells one unit of everything in stock, so a commit touches every SKU.
+        drafts = {
+            item["id"]: (1 if item["currentCount"] >= 1 else 0, 0)
+            for item in engine.iter_items(with_layers=False)
+        }
+        with profiler.stage("apply-stocktake", rows=len(drafts)):
+            engine.apply_stocktake(drafts, "Profiler")
+    with tempfile.TemporaryDirectory() as directory:
+        write_engine_workbook(os.path.join(directory, "profile.xlsx"), engine, profiler)
+    for name, summary in summarise_profile(profiler.stages).items():
+        print(f"  {name:<24} {summary['totalMs']:>10.1f} ms  {summary['rows']:>10,} rows")
+    if args.output:
+        profiler.write_json(args.output)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+def _run_compare(args: argparse.Namespace) -> int:
+    rows = compare_profiles(load_profile(args.before), load_profile(args.after))
+    for row in rows:
+        before = f"{row['beforeMs']:.1f}" if row["beforeMs"] is not None else "-"
+        after = f"{row['afterMs']:.1f}" if row["afterMs"] is not None else "-"
+        ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else ""
+        print(f"  {row['stage']:<24} {before:>10} ms -> {after:>10} ms  {ratio}")
+    return 0
+
+
+def _run_apply_sessions(args: argparse.Namespace) -> int:
+    engine = load_workbook(args.workbook)
+    entries, merged, paths = apply_drop_directory(
+        engine, args.directory, args.operator, args.notes, keep_files=args.keep
+    )
+    if not paths:
+        print(f"No change sets in {args.directory}")
+        return 1
+    print(
+        f"Merged {merged.sessions} change sets ({merged.lines:,} lines) into "
+        f"{len(merged.drafts):,} items; recorded {len(entries):,} movements"
+    )
+    if merged.unmatched:
+        print(f"  skipped {len(merged.unmatched):,} lines that were malformed or matched no item")
+    write_engine_workbook(args.output, engine)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+def _run_add_items(args: argparse.Namespace) -> int:
+    engine = load_workbook(args.workbook)
+    if args.source.lower().endswith((".xlsx", ".xlsm")):
+        rows = bulk_rows_from_engine(load_workbook(args.source))
+    else:
+        with open(args.source, encoding="utf-8-sig", newline="") as handle:
+            rows = parse_bulk_item_text(handle.read())
+    result = add_items(engine, rows, args.operator, args.notes)
+    print(f"Added {len(result.items):,} of {len(rows):,} items")
+    for number, reason in result.skipped[:10]:
+        print(f"  row {number}: {reason}")
+    if len(result.skipped) > 10:
+        print(f"  ... and {len(result.skipped) - 10:,} more skipped")
+    if not result.items:
+        return 1
+    write_engine_workbook(args.output, engine)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+def _run_reorder(args: argparse.Namespace) -> int:
+    engine = load_workbook(args.workbook)
+    plan = compute_replenishment(
+        engine,
+        lookback_days=args.lookback,
+        lead_time_days=args.lead_time,
+        review_days=args.review,
+    )
+    print(
+        f"{plan.reorder_count:,} of {len(engine):,} items at or below their reorder point: "
+        f"{plan.units_to_order:,.0f} units, ${plan.value_to_order:,.2f} "
+        f"(daily use over {plan.days} days)"
+    )
+    rows = reorder_suggestions(engine, plan)
+    for row in rows[: args.limit]:
+        print(
+            f"  {row['sku'] or '-':<14} {row['name'][:32]:<32} on hand {row['onHand']:>8,.0f}  "
+            f"cover {row['daysOfCover']:>6.1f} d  order {row['suggestedOrder']:>6,.0f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(rows[0]) if rows else ["sku"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+def _run_serve(args: argparse.Namespace) -> int:
+    if not args.workbook and not args.database:
+        print("Give a workbook to serve, or --database to resume from", file=sys.stderr)
+        return 2
+    engine = load_workbook(args.workbook) if args.workbook else None
+
+    def ready(host: str, port: int) -> None:
+        # The load test reads the address from this line.
+        print(f"Serving on http://{host}:{port}", flush=True)
+
+    try:
+        asyncio.run(
+            serve(
+                engine,
+                args.host,
+                args.port,
+                database=args.database,
+                batch_window=args.batch_ms / 1000,
+                export_workers=args.export_workers,
+                on_ready=ready,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _run_load_test(args: argparse.Namespace) -> int:
+    async def drive(host: str, port: int):
+        return await run_load_test(host, port, args.clients, args.duration, args.commit_every)
+
+    if args.url:
+        address = urlsplit(args.url)
+        report = asyncio.run(drive(address.hostname, address.port or 80))
+    else:
+        with synthetic_service(args.items, args.batch_ms) as (host, port):
+            report = asyncio.run(drive(host, port))
+    print_report(report)
+    return 1 if report.errors else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m stocktake_engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge = commands.add_parser(
+        "consolidate",
+        help="merge every store workbook in a directory into one export",
+    )
+    merge.add_argument("directory", help="directory of store .xlsx workbooks")
+    merge.add_argument("-o", "--output", required=True, help="consolidated workbook to write")
+    merge.add_argument("--per-store-dir", help="also write each store's updated export here")
+    merge.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    merge.set_defaults(handler=_run_consolidate)
+
+    profile = commands.add_parser(
+        "profile",
+        help="time importing, committing and exporting a workbook, stage by stage",
+    )
+    profile.add_argument("workbook", help="stocktake .xlsx workbook")
+    profile.add_argument("-o", "--output", help="write the trace as JSON here")
+    profile.add_argument(
+        "--trace-memory", action="store_true", help="record heap deltas (slower)"
+    )
+    profile.add_argument("--no-apply", action="store_true", help="skip the stocktake commit")
+    profile.set_defaults(handler=_run_profile)
+
+    sessions = commands.add_parser(
+        "apply-sessions",
+        help="merge the operators' change sets in a drop directory and commit them",
+    )
+    sessions.add_argument("workbook", help="stocktake .xlsx workbook the sets were counted against")
+    sessions.add_argument("directory", help="drop directory of saved change sets (.json)")
+    sessions.add_argument("-o", "--output", required=True, help="updated workbook to write")
+    sessions.add_argument("--operator", required=True, help="who is confirming the stocktake")
+    sessions.add_argument("--notes", default="", help="notes recorded with each movement")
+    sessions.add_argument(
+        "--keep", action="store_true", help="leave applied sets in place instead of moving them"
+    )
+    sessions.set_defaults(handler=_run_apply_sessions)
+
+    onboard = commands.add_parser(
+        "add-items", help="add new items in bulk from a CSV/TSV file or another workbook"
+    )
+    onboard.add_argument("workbook", help="stocktake .xlsx workbook to add the items to")
+    onboard.add_argument("source", help="items to add: .csv/.tsv/.txt, or a workbook's inventory")
+    onboard.add_argument("-o", "--output", required=True, help="updated workbook to write")
+    onboard.add_argument("--operator", default="Bulk import", help="recorded as Performed By")
+    onboard.add_argument("--notes", default="", help="notes recorded with each new item")
+    onboard.set_defaults(handler=_run_add_items)
+
+    reorder = commands.add_parser(
+        "reorder", help="suggest orders from each item's daily use and days of cover"
+    )
+    reorder.add_argument("workbook", help="stocktake .xlsx workbook")
+    reorder.add_argument("-o", "--output", help="write every suggested order as CSV here")
+    reorder.add_argument("--limit", type=int, default=20, help="suggestions to print")
+    reorder.add_argument(
+        "--lookback",
+        type=int,
+        default=REPLENISHMENT_LOOKBACK_DAYS,
+        help="days of sales to average over",
+    )
+    reorder.add_argument(
+        "--lead-time",
+        type=float,
+        default=REPLENISHMENT_LEAD_TIME_DAYS,
+        help="supplier lead time in days",
+    )
+    reorder.add_argument(
+        "--review", type=float, default=REPLENISHMENT_REVIEW_DAYS, help="days between orders"
+    )
+    reorder.set_defaults(handler=_run_reorder)
+
+    service = commands.add_parser(
+        "serve",
+        help="hold a workbook in memory and serve drafts, commits, valuation and export over HTTP",
+    )
+    service.add_argument("workbook", nargs="?", help="stocktake .xlsx workbook to load")
+    service.add_argument(
+        "--database", help="SQLite file to persist commits to (resumed from when no workbook)"
+    )
+    service.add_argument("--host", default=DEFAULT_HOST, help=f"default {DEFAULT_HOST}")
+    service.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"default {DEFAULT_PORT}")
+    service.add_argument(
+        "--batch-ms",
+        type=float,
+        default=DEFAULT_BATCH_WINDOW * 1000,
+        help="commit requests arriving this close together share one commit",
+    )
+    service.add_argument(
+        "--export-workers", type=int, help="export processes (default: one per CPU)"
+    )
+    service.set_defaults(handler=_run_serve)
+
+    load = commands.add_parser(
+        "load-test",
+        help="time concurrent scanners against a service (a synthetic one unless --url)",
+    )
+    load.add_argument("--url", help="running service, e.g. http://127.0.0.1:8765")
+    load.add_argument("--clients", type=int, default=DEFAULT_CLIENTS, help="concurrent scanners")
+    load.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds to run")
+    load.add_argument(
+        "--commit-every", type=int, default=DEFAULT_COMMIT_EVERY, help="requests between commits"
+    )
+    load.add_argument("--items", type=int, default=20_000, help="items in the synthetic store")
+    load.add_argument(
+        "--batch-ms",
+        type=float,
+        default=DEFAULT_BATCH_WINDOW * 1000,
+        help="batch window of the synthetic service",
+    )
+    load.set_defaults(handler=_run_load_test)
+
+    compare = commands.add_parser(
+        "compare-profiles",
+        help="compare per-stage totals of two traces (browser or headless)",
+    )
+    compare.add_argument("before", help="baseline trace JSON")
+    compare.add_argument("after", help="trace JSON to compare against it")
+    compare.set_defaults(handler=_run_compare)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Consolidate a directory of store workbooks into one export.
+
+The batch counterpart of importing each store's workbook in the browser and
+exporting it again. Workbooks are parsed in a process pool, each worker also
+writing that store's own export, and the parent merges inventories by SKU:
+counts are summed and cost layers from every store are combined in FIFO
+order, so the consolidated valuation equals the sum of the stores'.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable
+
+from .costing import merge_cost_layers
+from .engine import compute_next_sku_number, iso_timestamp
+from .reader import load_workbook
+from .writer import average_layer_cost, write_engine_workbook, write_workbook
+
+WORKBOOK_SUFFIXES = (".xlsx",)
+
+
+@dataclass
+class StoreWorkbook:
+    """One store's parsed inventory and history, as returned by a worker."""
+
+    name: str
+    path: str
+    inventory: list[dict]
+    history: list[dict]
+    metadata: dict
+    export_path: str | None = None
+    parse_seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return len(self.inventory) + len(self.history)
+
+
+@dataclass
+class ConsolidationReport:
+    stores: list[StoreWorkbook]
+    output_path: str
+    skus: int
+    rows: int
+    parse_seconds: float
+    merge_seconds: float
+    write_seconds: float
+
+    @property
+    def total_seconds(self) -> float:
+        return self.parse_seconds + self.merge_seconds + self.write_seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total_seconds if self.total_seconds else 0.0
+
+
+def find_workbooks(directory: str) -> list[str]:
+    """Store workbooks in ``directory``, skipping Excel lock files, in name order."""
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(WORKBOOK_SUFFIXES) and not name.startswith("~$")
+    )
+
+
+def store_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def load_store(path: str, export_dir: str | None = None) -> StoreWorkbook:
+    """Parse one workbook and, with ``export_dir``, write its updated export there.
+
+    Runs inside the worker processes, so it is kept at module level.
+    """
+    started = time.perf_counter()
+    engine = load_workbook(path)
+    export_path = None
+    if export_dir:
+        export_path = os.path.join(export_dir, f"{store_name(path)}-updated.xlsx")
+        write_engine_workbook(export_path, engine)
+    return StoreWorkbook(
+        name=store_name(path),
+        path=path,
+        inventory=engine.to_records(),
+        history=engine.history,
+        metadata=dict(engine.metadata),
+        export_path=export_path,
+        parse_seconds=time.perf_counter() - started,
+    )
+
+
+def merge_key(item: dict) -> str:
+    """Items are matched across stores by SKU, or by name when they have none."""
+    return item.get("sku") or item.get("name") or item["id"]
+
+
+def _layer_order(layer: dict) -> tuple[bool, str]:
+    acquired_at = layer.get("acquiredAt")
+    return (acquired_at is not None, acquired_at or "")
+
+
+def merge_inventories(stores: Iterable[StoreWorkbook]) -> list[dict]:
+    """One item per SKU, in first-seen order across ``stores``.
+
+    Undated layers sort first, as the oldest stock. Name, category and unit
+    cost come from the first store holding the SKU; notes from every store
+    are kept.
+    """
+    merged: dict[str, dict] = {}
+    layers: dict[str, list[dict]] = {}
+    notes: dict[str, list[str]] = {}
+    for store in stores:
+        for item in store.inventory:
+            key = merge_key(item)
+            target = merged.get(key)
+            if target is None:
+                merged[key] = target = {
+                    **item,
+                    "id": key,
+                    "currentCount": 0.0,
+                    "lastCount": 0.0,
+                    "lastUpdated": None,
+                }
+                layers[key] = []
+                notes[key] = []
+            target["currentCount"] += item.get("currentCount") or 0
+            target["lastCount"] += item.get("lastCount") or 0
+            updated = item.get("lastUpdated")
+            if updated and (target["lastUpdated"] is None or updated > target["lastUpdated"]):
+                target["lastUpdated"] = updated
+            layers[key].extend(item.get("costLayers") or [])
+            note = item.get("itemNote")
+            if note and note not in notes[key]:
+                notes[key].append(note)
+    for key, item in merged.items():
+        item_layers = merge_cost_layers(sorted(layers[key], key=_layer_order))
+        item["costLayers"] = item_layers
+        item["unitCost"] = average_layer_cost(item_layers, item.get("unitCost"))
+        item["itemNote"] = "; ".join(notes[key])
+    return list(merged.values())
+
+
+def merge_histories(stores: Iterable[StoreWorkbook]) -> list[dict]:
+    """Every store's movements, newest first, with item ids keyed like the merged items."""
+    history = [
+        {**entry, "itemId": entry.get("sku") or entry.get("name") or entry.get("itemId")}
+        for store in stores
+        for entry in store.history
+    ]
+    history.sort(key=lambda entry: entry.get("timestamp") or "", reverse=True)
+    return history
+
+
+def consolidate(
+    directory: str,
+    output_path: str,
+    export_dir: str | None = None,
+    workers: int | None = None,
+) -> ConsolidationReport:
+    """Parse every workbook in ``directory`` and write the consolidated export."""
+    paths = find_workbooks(directory)
+    if not paths:
+        raise FileNotFoundError(f"No .xlsx workbooks found in {directory}")
+    if export_dir:
+        os.makedirs(export_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        stores = list(pool.map(load_store, paths, [export_dir] * len(paths)))
+    parsed = time.perf_counter()
+
+    inventory = merge_inventories(stores)
+    history = merge_histories(stores)
+    merged = time.perf_counter()
+
+    stocktakes = [store.metadata.get("lastStocktakeAt") for store in stores]
+    metadata = {
+        "sourceFileName": f"Consolidated ({len(stores)} stores)",
+        "sheetName": None,
+        "lastImportedAt": iso_timestamp(),
+        "lastStocktakeAt": max((stamp for stamp in stocktakes if stamp), default=None),
+        "nextSkuNumber": compute_next_sku_number(inventory),
+    }
+    write_workbook(output_path, inventory, metadata, history)
+    written = time.perf_counter()
+
+    return ConsolidationReport(
+        stores=stores,
+        output_path=output_path,
+        skus=len(inventory),
+        rows=sum(store.rows for store in stores),
+        parse_seconds=parsed - started,
+        merge_seconds=merged - parsed,
+        write_seconds=written - merged,
+    )
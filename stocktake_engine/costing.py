@@ -0,0 +1,528 @@
+"""FIFO cost-layer maths, ported from ``src/hooks/useInventory.js``.
+
+Every function here mirrors its JavaScript namesake operation-for-operation so
+that float results match the browser bit-for-bit. Layers and history entries
+are plain dicts using the same camelCase keys as the app, which keeps them
+JSON-compatible with workbooks and browser state.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Iterable, Sequence
+
+from .numbers import parse_number
+
+EPSILON = 1e-9
+
+# Mirrors COST_LAYER_COST_STEP / COST_LAYER_AGE_BUCKET_DAYS in src/constants.js.
+COST_LAYER_COST_STEP = 0
+COST_LAYER_AGE_BUCKET_DAYS = 0
+DEFAULT_LAYER_POLICY = {"costStep": COST_LAYER_COST_STEP, "ageBucketDays": COST_LAYER_AGE_BUCKET_DAYS}
+
+_DAY_MS = 24 * 60 * 60 * 1000
+
+
+def js_number(value: Any) -> float:
+    """Approximate JavaScript ``Number(value)`` for the inputs the app sees."""
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if not text:
+        return 0.0
+    try:
+        return float(text)
+    except ValueError:
+        return float("nan")
+
+
+def is_finite(value: float) -> bool:
+    return value == value and value not in (float("inf"), float("-inf"))
+
+
+def ensure_finite_number(value: Any, fallback: float = 0.0) -> float:
+    if value is None:
+        return fallback
+    numeric = js_number(value)
+    return numeric if is_finite(numeric) else fallback
+
+
+def normalise_unit_cost(value: Any) -> float:
+    return ensure_finite_number(value, 0.0)
+
+
+def parse_numeric_input(value: Any, fallback: float = 0.0) -> float:
+    """Port of ``parseNumericInput`` in ``src/utils/numbers.js``."""
+    return parse_number(value, fallback)
+
+
+def parse_adjustment(value: Any) -> float:
+    parsed = parse_numeric_input(value, 0.0)
+    if not is_finite(parsed):
+        return 0.0
+    return max(0.0, parsed)
+
+
+def create_initial_cost_layers(
+    quantity: Any, unit_cost: Any, acquired_at: str | None = None
+) -> list[dict]:
+    normalised_quantity = ensure_finite_number(quantity, 0.0)
+    if normalised_quantity <= EPSILON:
+        return []
+    return [
+        {
+            "quantity": normalised_quantity,
+            "unitCost": normalise_unit_cost(unit_cost),
+            "acquiredAt": acquired_at,
+        }
+    ]
+
+
+def _js_round(value: float) -> int:
+    return math.floor(value + 0.5)
+
+
+@lru_cache(maxsize=4096)
+def _epoch_ms(value: str) -> float:
+    """``Date.parse`` for the ISO timestamps layers carry; NaN when unreadable."""
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return math.nan
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() * 1000
+
+
+def _same_cost(a: float, b: float, cost_step: float) -> bool:
+    return abs(a - b) <= EPSILON or (
+        cost_step > 0 and _js_round(a / cost_step) == _js_round(b / cost_step)
+    )
+
+
+def _same_age(a: str | None, b: str | None, age_bucket_days: float) -> bool:
+    if not a or not b or a == b:
+        return True
+    if not age_bucket_days > 0:
+        return False
+    bucket_ms = age_bucket_days * _DAY_MS
+    epoch_a, epoch_b = _epoch_ms(a), _epoch_ms(b)
+    if not is_finite(epoch_a) or not is_finite(epoch_b):
+        return False
+    return math.floor(epoch_a / bucket_ms) == math.floor(epoch_b / bucket_ms)
+
+
+def _can_merge(
+    prev_cost: float,
+    prev_at: str | None,
+    cost: float,
+    at: str | None,
+    policy: dict = DEFAULT_LAYER_POLICY,
+) -> bool:
+    return _same_cost(prev_cost, cost, policy.get("costStep") or 0) and _same_age(
+        prev_at, at, policy.get("ageBucketDays") or 0
+    )
+
+
+def _merged_cost(prev_quantity: float, prev_cost: float, quantity: float, cost: float) -> float:
+    if abs(prev_cost - cost) <= EPSILON:
+        return prev_cost
+    return (prev_quantity * prev_cost + quantity * cost) / (prev_quantity + quantity)
+
+
+def merge_cost_layers(layers: Iterable[dict] = (), policy: dict = DEFAULT_LAYER_POLICY) -> list[dict]:
+    """Merge neighbouring layers per ``policy`` and drop exhausted ones (see ``mergeCostLayers``)."""
+    merged: list[dict] = []
+    for layer in layers:
+        quantity = ensure_finite_number(layer.get("quantity"), 0.0)
+        if quantity <= EPSILON:
+            continue
+        unit_cost = normalise_unit_cost(layer.get("unitCost"))
+        acquired_at = layer.get("acquiredAt") or None
+        previous = merged[-1] if merged else None
+        if previous and _can_merge(
+            previous["unitCost"], previous["acquiredAt"], unit_cost, acquired_at, policy
+        ):
+            previous["unitCost"] = _merged_cost(
+                previous["quantity"], previous["unitCost"], quantity, unit_cost
+            )
+            previous["quantity"] += quantity
+            continue
+        merged.append({"quantity": quantity, "unitCost": unit_cost, "acquiredAt": acquired_at})
+    return merged
+
+
+def calculate_layers_quantity(layers: Iterable[dict] = ()) -> float:
+    total = 0.0
+    for layer in layers:
+        total += ensure_finite_number(layer.get("quantity"), 0.0)
+    return total
+
+
+def calculate_layers_value(layers: Iterable[dict] = ()) -> float:
+    total = 0.0
+    for layer in layers:
+        total += ensure_finite_number(layer.get("quantity"), 0.0) * normalise_unit_cost(
+            layer.get("unitCost")
+        )
+    return total
+
+
+def compute_cost_movement(
+    layers: Iterable[dict] = (),
+    sold: float = 0.0,
+    received: float = 0.0,
+    unit_cost: float = 0.0,
+    timestamp: str | None = None,
+    policy: dict = DEFAULT_LAYER_POLICY,
+) -> dict:
+    working_layers = [
+        {
+            "quantity": ensure_finite_number(layer.get("quantity"), 0.0),
+            "unitCost": normalise_unit_cost(layer.get("unitCost")),
+            "acquiredAt": layer.get("acquiredAt") or None,
+        }
+        for layer in layers
+    ]
+    working_layers = [layer for layer in working_layers if layer["quantity"] > EPSILON]
+
+    remaining_sold = max(0.0, ensure_finite_number(sold, 0.0))
+    sold_value = 0.0
+    remainder_layers: list[dict] = []
+
+    for layer in working_layers:
+        if remaining_sold <= EPSILON:
+            remainder_layers.append(dict(layer))
+            continue
+        consume = min(layer["quantity"], remaining_sold)
+        if consume > EPSILON:
+            sold_value += consume * layer["unitCost"]
+            remaining_sold -= consume
+        leftover = layer["quantity"] - consume
+        if leftover > EPSILON:
+            remainder_layers.append(
+                {"quantity": leftover, "unitCost": layer["unitCost"], "acquiredAt": layer["acquiredAt"]}
+            )
+
+    if remaining_sold > EPSILON:
+        fallback_cost = (
+            remainder_layers[-1]["unitCost"] if remainder_layers else normalise_unit_cost(unit_cost)
+        )
+        sold_value += remaining_sold * fallback_cost
+        remaining_sold = 0.0
+
+    received_quantity = max(0.0, ensure_finite_number(received, 0.0))
+    received_unit_cost = normalise_unit_cost(unit_cost)
+    received_value = 0.0
+    if received_quantity > EPSILON:
+        received_value = received_quantity * received_unit_cost
+        remainder_layers.append(
+            {"quantity": received_quantity, "unitCost": received_unit_cost, "acquiredAt": timestamp}
+        )
+
+    merged_layers = merge_cost_layers(remainder_layers, policy)
+    return {
+        "layers": merged_layers,
+        "totalQuantity": calculate_layers_quantity(merged_layers),
+        "soldValue": sold_value,
+        "soldUnitCost": sold_value / sold if sold > EPSILON else 0.0,
+        "receivedValue": received_value,
+        "receivedUnitCost": received_unit_cost if received_quantity > EPSILON else 0.0,
+    }
+
+
+def summarise_cost_impact(
+    item: dict | None, sold: float, received: float, timestamp: str | None = None
+) -> dict:
+    item = item or {}
+    return compute_cost_movement(
+        layers=item.get("costLayers") or [],
+        sold=sold,
+        received=received,
+        unit_cost=item.get("unitCost") or 0.0,
+        timestamp=timestamp,
+    )
+
+
+def build_history_entry(
+    item: dict,
+    sold: float,
+    received: float,
+    next_count: float,
+    timestamp: str,
+    meta: dict | None = None,
+    cost_summary: dict | None = None,
+) -> dict | None:
+    cost_summary = cost_summary or {}
+    meta = meta or {}
+    delta = next_count - item["currentCount"]
+    if delta == 0 and sold == 0 and received == 0:
+        return None
+    item_unit_cost = normalise_unit_cost(item.get("unitCost"))
+    sold_value = ensure_finite_number(cost_summary.get("soldValue"), sold * item_unit_cost)
+    received_value = ensure_finite_number(
+        cost_summary.get("receivedValue"), received * item_unit_cost
+    )
+    sold_unit_cost = sold_value / sold if sold > EPSILON else 0.0
+    if received > EPSILON:
+        received_unit_cost = received_value / received
+    else:
+        received_unit_cost = cost_summary.get("receivedUnitCost")
+        received_unit_cost = 0.0 if received_unit_cost is None else received_unit_cost
+    value_impact = received_value - sold_value
+    if delta != 0:
+        unit_cost = value_impact / delta
+    else:
+        unit_cost = (
+            cost_summary.get("receivedUnitCost")
+            or cost_summary.get("soldUnitCost")
+            or item.get("unitCost")
+        )
+    return {
+        "id": f"{item['id']}-{timestamp}",
+        "itemId": item["id"],
+        "sku": item.get("sku"),
+        "name": item.get("name"),
+        "category": item.get("category"),
+        "previousCount": item["currentCount"],
+        "newCount": next_count,
+        "sold": sold,
+        "received": received,
+        "delta": delta,
+        "unitCost": unit_cost,
+        "soldValue": sold_value,
+        "receivedValue": received_value,
+        "soldUnitCost": sold_unit_cost,
+        "receivedUnitCost": received_unit_cost,
+        "valueImpact": value_impact,
+        "performedBy": meta.get("performedBy") or "",
+        "notes": meta.get("notes") or "",
+        "itemNote": item.get("itemNote") or "",
+        "timestamp": timestamp,
+    }
+
+
+@dataclass
+class BatchMovement:
+    """Per-item results of :meth:`CostLayerBook.apply`, indexed like the book."""
+
+    book: "CostLayerBook"
+    total_quantity: array
+    sold_value: array
+    sold_unit_cost: array
+    received_value: array
+    received_unit_cost: array
+
+    def summary(self, index: int) -> dict:
+        """The ``computeCostMovement`` result for a single item."""
+        return {
+            "layers": self.book.layers_for(index),
+            "totalQuantity": self.total_quantity[index],
+            "soldValue": self.sold_value[index],
+            "soldUnitCost": self.sold_unit_cost[index],
+            "receivedValue": self.received_value[index],
+            "receivedUnitCost": self.received_unit_cost[index],
+        }
+
+
+class CostLayerBook:
+    """Cost layers for many items packed into flat arrays.
+
+    Layers for item ``i`` live at ``offsets[i]:offsets[i + 1]`` of the
+    ``quantities``/``unit_costs``/``acquired_at`` columns. Stored layers are
+    always in merged form, so items without movement can be copied through a
+    batch apply as whole slices. Each item's quantity and value are kept in
+    ``item_quantity``/``item_value`` as layers are written, so valuation reads
+    never walk the layers.
+    """
+
+    __slots__ = ("quantities", "unit_costs", "acquired_at", "offsets", "item_quantity", "item_value")
+
+    def __init__(
+        self,
+        quantities: array | None = None,
+        unit_costs: array | None = None,
+        acquired_at: list[str | None] | None = None,
+        offsets: array | None = None,
+        item_quantity: array | None = None,
+        item_value: array | None = None,
+    ) -> None:
+        self.quantities = quantities if quantities is not None else array("d")
+        self.unit_costs = unit_costs if unit_costs is not None else array("d")
+        self.acquired_at = acquired_at if acquired_at is not None else []
+        self.offsets = offsets if offsets is not None else array("q", [0])
+        if item_quantity is None or item_value is None:
+            item_quantity, item_value = array("d"), array("d")
+            for index in range(len(self.offsets) - 1):
+                quantity, value = self._walk(self.offsets[index], self.offsets[index + 1])
+                item_quantity.append(quantity)
+                item_value.append(value)
+        self.item_quantity = item_quantity
+        self.item_value = item_value
+
+    def _walk(self, start: int, end: int) -> tuple[float, float]:
+        quantity = 0.0
+        value = 0.0
+        for position in range(start, end):
+            quantity += self.quantities[position]
+            value += self.quantities[position] * self.unit_costs[position]
+        return quantity, value
+
+    @classmethod
+    def from_layers(cls, per_item_layers: Iterable[Iterable[dict]]) -> "CostLayerBook":
+        book = cls()
+        for layers in per_item_layers:
+            book.append(layers)
+        return book
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def append(self, layers: Iterable[dict]) -> int:
+        """Add an item's layers (merged on the way in) and return its index."""
+        start = len(self.quantities)
+        for layer in merge_cost_layers(layers):
+            self.quantities.append(layer["quantity"])
+            self.unit_costs.append(layer["unitCost"])
+            self.acquired_at.append(layer["acquiredAt"])
+        self.offsets.append(len(self.quantities))
+        quantity, value = self._walk(start, len(self.quantities))
+        self.item_quantity.append(quantity)
+        self.item_value.append(value)
+        return len(self) - 1
+
+    def layers_for(self, index: int) -> list[dict]:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return [
+            {
+                "quantity": self.quantities[position],
+                "unitCost": self.unit_costs[position],
+                "acquiredAt": self.acquired_at[position],
+            }
+            for position in range(start, end)
+        ]
+
+    def quantity(self, index: int) -> float:
+        return self.item_quantity[index]
+
+    def value(self, index: int) -> float:
+        return self.item_value[index]
+
+    def apply(
+        self,
+        sold: Sequence[float],
+        received: Sequence[float],
+        unit_costs: Sequence[float],
+        timestamp: str | None = None,
+    ) -> BatchMovement:
+        """Run ``computeCostMovement`` for every item in one pass over the book.
+
+        This is a columnar loop, not a vectorised one: items are walked one by
+        one in Python over the ``array('d')`` columns. Items with no movement are
+        copied through as whole slices, so the per-layer work is only done for
+        the items a stocktake touches.
+
+        ``sold``, ``received`` and ``unit_costs`` are indexed like the book and
+        must already be parsed (non-negative, finite). Returns a new book; this
+        one is left untouched.
+        """
+        count = len(self)
+        quantities, costs, stamps = self.quantities, self.unit_costs, self.acquired_at
+        offsets = self.offsets
+        next_quantities = array("d")
+        next_costs = array("d")
+        next_stamps: list[str | None] = []
+        next_offsets = array("q", [0])
+        total_quantity = array("d", bytes(8 * count))
+        sold_value_out = array("d", bytes(8 * count))
+        sold_unit_cost_out = array("d", bytes(8 * count))
+        received_value_out = array("d", bytes(8 * count))
+        received_unit_cost_out = array("d", bytes(8 * count))
+        next_item_value = array("d", bytes(8 * count))
+
+        for index in range(count):
+            start, end = offsets[index], offsets[index + 1]
+            item_sold = sold[index]
+            item_received = received[index]
+            if item_sold <= EPSILON and item_received <= EPSILON:
+                next_quantities.extend(quantities[start:end])
+                next_costs.extend(costs[start:end])
+                next_stamps.extend(stamps[start:end])
+                next_offsets.append(len(next_quantities))
+                total_quantity[index] = self.item_quantity[index]
+                next_item_value[index] = self.item_value[index]
+                continue
+
+            remaining_sold = item_sold
+            sold_value = 0.0
+            remainder: list[tuple[float, float, str | None]] = []
+            for position in range(start, end):
+                layer_quantity = quantities[position]
+                if remaining_sold <= EPSILON:
+                    remainder.append((layer_quantity, costs[position], stamps[position]))
+                    continue
+                consume = min(layer_quantity, remaining_sold)
+                if consume > EPSILON:
+                    sold_value += consume * costs[position]
+                    remaining_sold -= consume
+                leftover = layer_quantity - consume
+                if leftover > EPSILON:
+                    remainder.append((leftover, costs[position], stamps[position]))
+            if remaining_sold > EPSILON:
+                fallback_cost = remainder[-1][1] if remainder else unit_costs[index]
+                sold_value += remaining_sold * fallback_cost
+
+            received_cost = unit_costs[index]
+            received_value = 0.0
+            if item_received > EPSILON:
+                received_value = item_received * received_cost
+                remainder.append((item_received, received_cost, timestamp))
+
+            merged_start = len(next_quantities)
+            for layer_quantity, layer_cost, layer_at in remainder:
+                if layer_quantity <= EPSILON:
+                    continue
+                last = len(next_quantities) - 1
+                if last >= merged_start and _can_merge(
+                    next_costs[last], next_stamps[last], layer_cost, layer_at or None
+                ):
+                    next_costs[last] = _merged_cost(
+                        next_quantities[last], next_costs[last], layer_quantity, layer_cost
+                    )
+                    next_quantities[last] += layer_quantity
+                    continue
+                next_quantities.append(layer_quantity)
+                next_costs.append(layer_cost)
+                next_stamps.append(layer_at or None)
+            next_offsets.append(len(next_quantities))
+
+            total = 0.0
+            value = 0.0
+            for position in range(merged_start, len(next_quantities)):
+                total += next_quantities[position]
+                value += next_quantities[position] * next_costs[position]
+            total_quantity[index] = total
+            next_item_value[index] = value
+            sold_value_out[index] = sold_value
+            sold_unit_cost_out[index] = sold_value / item_sold if item_sold > EPSILON else 0.0
+            received_value_out[index] = received_value
+            received_unit_cost_out[index] = received_cost if item_received > EPSILON else 0.0
+
+        return BatchMovement(
+            book=CostLayerBook(
+                next_quantities, next_costs, next_stamps, next_offsets, total_quantity, next_item_value
+            ),
+            total_quantity=total_quantity,
+            sold_value=sold_value_out,
+            sold_unit_cost=sold_unit_cost_out,
+            received_value=received_value_out,
+            received_unit_cost=received_unit_cost_out,
+        )
@@ -0,0 +1,289 @@
+"""Headless counterpart of the ``useInventory`` hook."""
+
+from __future__ import annotations
+
+import re
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Mapping
+
+from .costing import (
+    CostLayerBook,
+    build_history_entry,
+    parse_adjustment,
+)
+from .normalise import normalise_history, normalise_inventory, normalise_manual_string
+
+AUTO_SKU_PREFIX = "SKU-"
+AUTO_SKU_PAD_LENGTH = 4
+
+_TRAILING_NUMBER = re.compile(r"(\d+)(?!.*\d)")
+
+_ITEM_FIELDS = ("id", "sku", "name", "category", "lastUpdated", "itemNote")
+
+
+def iso_timestamp(moment: datetime | None = None) -> str:
+    """Format like JavaScript ``Date#toISOString``."""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def extract_sku_number(sku: Any) -> int | None:
+    if not sku:
+        return None
+    match = _TRAILING_NUMBER.search(str(sku))
+    return int(match.group(1)) if match else None
+
+
+def compute_next_sku_number(items: Iterable[dict], fallback: int = 1) -> int:
+    highest = fallback - 1
+    for item in items:
+        candidate = extract_sku_number(item.get("sku"))
+        if candidate and candidate > highest:
+            highest = candidate
+    return highest + 1
+
+
+def format_auto_sku(counter: int) -> str:
+    return f"{AUTO_SKU_PREFIX}{str(counter).zfill(AUTO_SKU_PAD_LENGTH)}"
+
+
+def sku_key(sku: Any) -> str:
+    """SKUs are matched ignoring case and surrounding space."""
+    return str(sku if sku is not None else "").strip().upper()
+
+
+def create_id_allocator(is_taken: Callable[[str], bool] = lambda _: False) -> Callable[[str], str]:
+    """Mirror of ``createIdAllocator``: unique ids from a base, suffixed -1, -2... on a clash.
+
+    The next suffix is remembered per base, so many rows sharing one do not rescan the
+    suffixes already taken; ``is_taken`` covers ids allocated elsewhere.
+    """
+    allocated: set[str] = set()
+    next_suffix: dict[str, int] = {}
+
+    def allocate(base_id: str) -> str:
+        item_id = base_id
+        suffix = next_suffix.get(base_id, 1)
+        while item_id in allocated or is_taken(item_id):
+            item_id = f"{base_id}-{suffix}"
+            suffix += 1
+        next_suffix[base_id] = suffix
+        allocated.add(item_id)
+        return item_id
+
+    return allocate
+
+
+def build_new_item_entry(
+    item: Mapping[str, Any], timestamp: str, operator: str, notes: str
+) -> dict:
+    """The "New item" history entry for an item's opening count (``buildNewItemEntry``)."""
+    current = item["currentCount"]
+    unit_cost = item["unitCost"]
+    return {
+        "id": f"{item['id']}-{timestamp}-new",
+        "itemId": item["id"],
+        "sku": item["sku"],
+        "name": item["name"],
+        "category": item["category"],
+        "previousCount": 0,
+        "newCount": current,
+        "sold": 0,
+        "received": current,
+        "delta": current,
+        "unitCost": unit_cost,
+        "soldValue": 0,
+        "receivedValue": current * unit_cost,
+        "soldUnitCost": 0,
+        "receivedUnitCost": unit_cost,
+        "valueImpact": current * unit_cost,
+        "performedBy": operator,
+        "notes": notes or "New item",
+        "itemNote": item.get("itemNote") or "",
+        "timestamp": timestamp,
+    }
+
+
+class StocktakeEngine:
+    """Inventory, cost layers and history for one store, held column-wise.
+
+    Counts and unit costs sit in ``array('d')`` columns and cost layers in a
+    :class:`CostLayerBook`, so :meth:`apply_stocktake` runs over every SKU in a
+    single pass. Items passed in are expected in the normalised shape produced
+    by :func:`stocktake_engine.normalise.normalise_inventory`.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[dict] = (),
+        history: Iterable[dict] = (),
+        metadata: Mapping[str, Any] | None = None,
+    ) -> None:
+        self.fields: dict[str, list[Any]] = {field: [] for field in _ITEM_FIELDS}
+        self.current_counts = array("d")
+        self.last_counts = array("d")
+        self.unit_costs = array("d")
+        self.layers = CostLayerBook()
+        self.index: dict[str, int] = {}
+        self.sku_index: dict[str, int] = {}
+        self.history: list[dict] = list(history)
+        for item in items:
+            self.append_item(item)
+        self.metadata: dict[str, Any] = {
+            "sourceFileName": "",
+            "lastImportedAt": None,
+            "lastStocktakeAt": None,
+            "sheetName": None,
+            "nextSkuNumber": compute_next_sku_number(self.iter_items()),
+            **(metadata or {}),
+        }
+
+    @classmethod
+    def from_workbook_records(
+        cls,
+        inventory: Iterable[dict],
+        history: Iterable[dict] = (),
+        workbook_meta: Mapping[str, Any] | None = None,
+        source_file_name: str = "",
+    ) -> "StocktakeEngine":
+        """Build an engine from raw parsed rows, normalising like ``loadFromFile``."""
+        workbook_meta = dict(workbook_meta or {})
+        normalised_history = normalise_history(history)
+        engine = cls(normalise_inventory(inventory, workbook_meta), normalised_history)
+        engine.metadata.update(
+            sourceFileName=source_file_name,
+            sheetName=workbook_meta.get("sheetName"),
+            lastImportedAt=workbook_meta.get("importedAt"),
+            lastStocktakeAt=workbook_meta.get("lastStocktakeAt")
+            or (normalised_history[0].get("timestamp") if normalised_history else None),
+        )
+        return engine
+
+    def __len__(self) -> int:
+        return len(self.current_counts)
+
+    def append_item(self, item: Mapping[str, Any]) -> int:
+        """Add a normalised item and return its row index."""
+        index = len(self.current_counts)
+        for field in _ITEM_FIELDS:
+            self.fields[field].append(item.get(field))
+        self.current_counts.append(item["currentCount"])
+        self.last_counts.append(item.get("lastCount", item["currentCount"]))
+        self.unit_costs.append(item.get("unitCost") or 0.0)
+        self.layers.append(item.get("costLayers") or [])
+        self.index[item["id"]] = index
+        key = sku_key(item.get("sku"))
+        if key and key not in self.sku_index:
+            self.sku_index[key] = index
+        return index
+
+    def has_sku(self, sku: Any) -> bool:
+        return sku_key(sku) in self.sku_index
+
+    def item(self, index: int, with_layers: bool = True) -> dict:
+        """The app-shaped item dict at ``index``."""
+        record = {field: self.fields[field][index] for field in _ITEM_FIELDS}
+        record.update(
+            currentCount=self.current_counts[index],
+            lastCount=self.last_counts[index],
+            unitCost=self.unit_costs[index],
+            draftSold="",
+            draftReceived="",
+        )
+        if with_layers:
+            record["costLayers"] = self.layers.layers_for(index)
+        return record
+
+    def iter_items(self, with_layers: bool = True) -> Iterable[dict]:
+        for index in range(len(self)):
+            yield self.item(index, with_layers)
+
+    def to_records(self) -> list[dict]:
+        return list(self.iter_items())
+
+    def totals(self) -> dict:
+        total_current = sum(self.current_counts)
+        total_last = sum(self.last_counts)
+        total_value = 0.0
+        for index in range(len(self)):
+            total_value += self.layers.value(index)
+        return {
+            "totalSkus": len(self),
+            "totalCurrent": total_current,
+            "totalLast": total_last,
+            "totalDelta": total_current - total_last,
+            "totalValue": total_value,
+        }
+
+    def apply_stocktake(
+        self,
+        drafts: Mapping[str, Any],
+        performed_by: str,
+        notes: str = "",
+        timestamp: str | None = None,
+    ) -> list[dict]:
+        """Commit sold/received drafts for many items at once.
+
+        ``drafts`` maps item id to either a ``(sold, received)`` pair or a dict
+        with ``draftSold``/``draftReceived``; values go through the same parsing
+        as the browser inputs. Returns the new history entries (also prepended
+        to :attr:`history`), or ``[]`` when no operator is given.
+        """
+        operator = normalise_manual_string(performed_by)
+        if not operator:
+            return []
+        notes = normalise_manual_string(notes)
+        timestamp = timestamp or iso_timestamp()
+        count = len(self)
+        sold = array("d", bytes(8 * count))
+        received = array("d", bytes(8 * count))
+        for item_id, draft in drafts.items():
+            index = self.index.get(item_id)
+            if index is None:
+                raise KeyError(f"Unknown item id: {item_id}")
+            if isinstance(draft, Mapping):
+                raw_sold, raw_received = draft.get("draftSold"), draft.get("draftReceived")
+            else:
+                raw_sold, raw_received = draft
+            sold[index] = parse_adjustment(raw_sold)
+            received[index] = parse_adjustment(raw_received)
+
+        movement = self.layers.apply(sold, received, self.unit_costs, timestamp)
+        meta = {"performedBy": operator, "notes": notes}
+        history_entries: list[dict] = []
+        new_counts = movement.total_quantity
+        for index in range(count):
+            if not sold[index] and not received[index] and new_counts[index] == self.current_counts[index]:
+                continue
+            entry = build_history_entry(
+                self.item(index, with_layers=False),
+                sold[index],
+                received[index],
+                new_counts[index],
+                timestamp,
+                meta,
+                movement.summary(index),
+            )
+            if entry:
+                history_entries.append(entry)
+                self.fields["lastUpdated"][index] = timestamp
+
+        if not history_entries:
+            history_entries = self._new_item_entries(timestamp, operator, notes)
+
+        self.last_counts = array("d", self.current_counts)
+        self.current_counts = array("d", new_counts)
+        self.layers = movement.book
+        self.history[:0] = history_entries
+        self.metadata["lastStocktakeAt"] = timestamp
+        return history_entries
+
+    def _new_item_entries(self, timestamp: str, operator: str, notes: str) -> list[dict]:
+        entries = []
+        for index in range(len(self)):
+            if self.last_counts[index] != 0 or self.current_counts[index] <= 0:
+                continue
+            item = self.item(index, with_layers=False)
+            entries.append(build_new_item_entry(item, timestamp, operator, notes))
+        return entries
@@ -0,0 +1,260 @@
+"""Load test for :mod:`stocktake_engine.service`: many scanners on one service.
+
+Each simulated scanner keeps one keep-alive connection and loops: it scans an
+item and re-posts its whole change set to ``/drafts`` (as the app does while
+someone types), reads ``/valuation`` every tenth request and commits its
+staged set every ``commit_every`` requests. Latency is measured per request
+from send to last byte received, and reported per endpoint with the overall
+requests per second and how many commit requests each engine pass absorbed.
+
+Without a URL a synthetic store is written to a temporary workbook and served
+from a separate ``python -m stocktake_engine serve`` process, so the clients
+and the service do not share an interpreter.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+from .engine import StocktakeEngine, format_auto_sku, iso_timestamp
+from .normalise import normalise_inventory
+from .writer import write_engine_workbook
+
+DEFAULT_CLIENTS = 50
+DEFAULT_DURATION = 10.0
+DEFAULT_COMMIT_EVERY = 25
+VALUATION_EVERY = 10
+_CATEGORIES = ("Beverage", "Bakery", "Dairy", "Produce", "Pantry", "Frozen")
+
+
+@dataclass
+class LoadTestReport:
+    clients: int
+    seconds: float
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    errors: int = 0
+    service: dict = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return sum(len(samples) for samples in self.latencies.values())
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    def percentile(self, percent: float, endpoint: str | None = None) -> float:
+        """Latency in milliseconds at ``percent`` (nearest rank), for one endpoint or all."""
+        if endpoint is None:
+            samples = sorted(sample for values in self.latencies.values() for sample in values)
+        else:
+            samples = sorted(self.latencies.get(endpoint, ()))
+        if not samples:
+            return 0.0
+        rank = max(math.ceil(percent / 100 * len(samples)), 1)
+        return samples[rank - 1] * 1000
+
+
+def synthetic_engine(items: int, seed: int = 7) -> StocktakeEngine:
+    """A store of ``items`` SKUs, seeded so repeat runs scan the same stock."""
+    generator = random.Random(seed)
+    stamp = iso_timestamp()
+    records = [
+        {
+            "id": f"item-{index + 1}",
+            "sku": format_auto_sku(index + 1),
+            "name": f"Item {index + 1}",
+            "category": _CATEGORIES[index % len(_CATEGORIES)],
+            "currentCount": float(generator.randint(20, 400)),
+            "unitCost": round(generator.uniform(0.5, 40), 2),
+            "lastUpdated": stamp,
+        }
+        for index in range(items)
+    ]
+    return StocktakeEngine(normalise_inventory(records))
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection, enough for the service's JSON replies."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def open(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+    async def request(self, method: str, path: str, payload: Any = None) -> tuple[int, bytes]:
+        body = b"" if payload is None else json.dumps(payload, separators=(",", ":")).encode()
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+        status_line, *header_lines = (
+            (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        )
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return int(status_line.split(" ", 2)[1]), await self.reader.readexactly(length)
+
+
+async def _scanner(
+    number: int,
+    host: str,
+    port: int,
+    skus: list[str],
+    deadline: float,
+    commit_every: int,
+    report: LoadTestReport,
+) -> None:
+    generator = random.Random(number)
+    connection = _Connection(host, port)
+    await connection.open()
+    session_id = f"scanner-{number}"
+    operator = f"Scanner {number}"
+    counts: dict[str, list[float]] = {}
+    revision = 0
+    step = 0
+    try:
+        while time.perf_counter() < deadline:
+            step += 1
+            if step % commit_every == 0 and counts:
+                endpoint, method, payload = "/commit", "POST", {
+                    "sessionId": session_id,
+                    "performedBy": operator,
+                    "notes": "Load test",
+                }
+                counts = {}
+            elif step % VALUATION_EVERY == 0:
+                endpoint, method, payload = "/valuation", "GET", None
+            else:
+                sku = generator.choice(skus)
+                line = counts.setdefault(sku, [0.0, 0.0])
+                # Mostly sales, with the odd delivery.
+                line[1 if generator.random() < 0.1 else 0] += 1
+                revision += 1
+                endpoint, method, payload = "/drafts", "POST", {
+                    "sessionId": session_id,
+                    "operator": operator,
+                    "revision": revision,
+                    "lines": [
+                        ["", code, sold, received] for code, (sold, received) in counts.items()
+                    ],
+                }
+            started = time.perf_counter()
+            status, _ = await connection.request(method, endpoint, payload)
+            report.latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+            if status != 200:
+                report.errors += 1
+    finally:
+        await connection.close()
+
+
+async def run_load_test(
+    host: str,
+    port: int,
+    clients: int = DEFAULT_CLIENTS,
+    duration: float = DEFAULT_DURATION,
+    commit_every: int = DEFAULT_COMMIT_EVERY,
+) -> LoadTestReport:
+    """Drive ``clients`` scanners against the service at ``host:port`` for ``duration`` s."""
+    connection = _Connection(host, port)
+    await connection.open()
+    skus: list[str] = []
+    offset = 0
+    while len(skus) < 5000:
+        _, body = await connection.request("GET", f"/items?offset={offset}&limit=1000")
+        page = json.loads(body)
+        skus.extend(item["sku"] for item in page["items"] if item.get("sku"))
+        offset += len(page["items"])
+        if not page["items"] or offset >= page["total"]:
+            break
+    if not skus:
+        raise ValueError("The service has no items with SKUs to scan")
+
+    report = LoadTestReport(clients=clients, seconds=duration)
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _scanner(number, host, port, skus, started + duration, commit_every, report)
+            for number in range(1, clients + 1)
+        )
+    )
+    report.seconds = time.perf_counter() - started
+    _, body = await connection.request("GET", "/health")
+    report.service = json.loads(body)
+    await connection.close()
+    return report
+
+
+@contextmanager
+def synthetic_service(items: int, batch_ms: float) -> Iterator[tuple[str, int]]:
+    """Serve a synthetic store from a child process; yields its host and port."""
+    with tempfile.TemporaryDirectory() as directory:
+        workbook = os.path.join(directory, "load-test.xlsx")
+        write_engine_workbook(workbook, synthetic_engine(items))
+        process = subprocess.Popen(
+            [
+                sys.executable, "-m", "stocktake_engine", "serve", workbook,
+                "--port", "0", "--batch-ms", str(batch_ms),
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            # The first line is "Serving on http://host:port".
+            address = urlsplit(process.stdout.readline().rsplit(" ", 1)[-1].strip())
+            if not address.port:
+                raise RuntimeError("The service did not start")
+            yield address.hostname, address.port
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def print_report(report: LoadTestReport) -> None:
+    print(
+        f"{report.clients} clients for {report.seconds:.1f}s: {report.requests:,} requests, "
+        f"{report.requests_per_second:,.0f} req/s, {report.errors:,} errors"
+    )
+    print(f"  {'endpoint':<12} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint in sorted(report.latencies):
+        print(
+            f"  {endpoint:<12} {len(report.latencies[endpoint]):>9,} "
+            f"{report.percentile(50, endpoint):>8.1f} {report.percentile(95, endpoint):>8.1f} "
+            f"{report.percentile(99, endpoint):>8.1f}"
+        )
+    print(
+        f"  {'all':<12} {report.requests:>9,} {report.percentile(50):>8.1f} "
+        f"{report.percentile(95):>8.1f} {report.percentile(99):>8.1f}"
+    )
+    commits = report.service.get("commits", 0)
+    if commits:
+        print(
+            f"  {report.service['commit_requests']:,} commit requests in {commits:,} engine passes "
+            f"({report.service['committed_lines']:,} lines)"
+        )
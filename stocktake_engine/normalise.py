@@ -0,0 +1,110 @@
+"""Import-time normalisation, ported from ``loadFromFile`` in ``useInventory``."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from .costing import (
+    EPSILON,
+    calculate_layers_quantity,
+    create_initial_cost_layers,
+    ensure_finite_number,
+    is_finite,
+    merge_cost_layers,
+    normalise_unit_cost,
+)
+
+ITEM_NOTE_COLUMN = "Notes"
+
+
+def normalise_manual_string(value: Any) -> str:
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _finite_or(value: Any, fallback: float) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and is_finite(float(value)):
+        return float(value)
+    return fallback
+
+
+def normalise_inventory_item(item: dict, workbook_meta: dict | None = None) -> dict:
+    workbook_meta = workbook_meta or {}
+    current_count = _finite_or(item.get("currentCount"), 0.0)
+    unit_cost = normalise_unit_cost(item.get("unitCost"))
+    last_count = _finite_or(item.get("lastCount"), current_count)
+    item_note = normalise_manual_string(
+        item.get("itemNote") or item.get("note") or item.get(ITEM_NOTE_COLUMN) or ""
+    )
+    layer_source_timestamp = (
+        item.get("lastUpdated")
+        or workbook_meta.get("lastStocktakeAt")
+        or workbook_meta.get("importedAt")
+        or None
+    )
+    existing_layers = item.get("costLayers")
+    if isinstance(existing_layers, list) and existing_layers:
+        initial_layers = merge_cost_layers(existing_layers)
+    else:
+        initial_layers = create_initial_cost_layers(current_count, unit_cost, layer_source_timestamp)
+    if abs(calculate_layers_quantity(initial_layers) - current_count) > EPSILON:
+        cost_layers = create_initial_cost_layers(current_count, unit_cost, layer_source_timestamp)
+    else:
+        cost_layers = initial_layers
+    return {
+        **item,
+        "currentCount": current_count,
+        "lastCount": last_count,
+        "unitCost": unit_cost,
+        "costLayers": cost_layers,
+        "draftSold": "",
+        "draftReceived": "",
+        "itemNote": item_note,
+    }
+
+
+def normalise_history_entry(entry: dict) -> dict:
+    sold = ensure_finite_number(entry.get("sold"), 0.0)
+    received = ensure_finite_number(entry.get("received"), 0.0)
+    unit_cost = normalise_unit_cost(entry.get("unitCost"))
+    sold_value = (
+        ensure_finite_number(entry["soldValue"], sold * unit_cost)
+        if "soldValue" in entry
+        else sold * unit_cost
+    )
+    received_value = (
+        ensure_finite_number(entry["receivedValue"], received * unit_cost)
+        if "receivedValue" in entry
+        else received * unit_cost
+    )
+    default_sold_unit_cost = sold_value / sold if sold > EPSILON else 0.0
+    default_received_unit_cost = received_value / received if received > EPSILON else 0.0
+    return {
+        **entry,
+        "soldValue": sold_value,
+        "receivedValue": received_value,
+        "soldUnitCost": (
+            ensure_finite_number(entry["soldUnitCost"], default_sold_unit_cost)
+            if "soldUnitCost" in entry
+            else default_sold_unit_cost
+        ),
+        "receivedUnitCost": (
+            ensure_finite_number(entry["receivedUnitCost"], default_received_unit_cost)
+            if "receivedUnitCost" in entry
+            else default_received_unit_cost
+        ),
+        "valueImpact": (
+            ensure_finite_number(entry["valueImpact"], received_value - sold_value)
+            if "valueImpact" in entry
+            else received_value - sold_value
+        ),
+    }
+
+
+def normalise_inventory(items: Iterable[dict], workbook_meta: dict | None = None) -> list[dict]:
+    return [normalise_inventory_item(item, workbook_meta) for item in items]
+
+
+def normalise_history(entries: Iterable[dict]) -> list[dict]:
+    return [normalise_history_entry(entry) for entry in entries]
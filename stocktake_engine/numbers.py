@@ -0,0 +1,83 @@
+"""Numeric cell and input parsing, ported from ``src/utils/numbers.js``.
+
+Numbers pass straight through. Text is matched against one compiled pattern
+that accepts what spreadsheets and people type for quantities and money:
+``"1,234.50"``, ``"$1 234"``, ``"AUD 12.5"``, ``"-$12"``, ``"(12.00)"``,
+``"1.2E+03"`` and ``"15%"``. Commas, spaces and apostrophes are thousands
+separators between digits. Text with no digits, a second number, a second
+decimal point or an unbalanced bracket gives ``fallback``, exactly as the
+browser does, so both sides read a workbook to the same values.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Any
+
+_SEPARATORS = ", '\u00a0\u202f"
+_NUMBER = re.compile(
+    r"(?P<prefix>[^0-9.]*)"
+    r"(?P<body>(?:[0-9]+(?:[" + _SEPARATORS + r"][0-9]+)*(?:\.[0-9]*)?|\.[0-9]+)"
+    r"(?:[eE][+-]?[0-9]+)?)"
+    r"(?P<suffix>[^0-9.(\-]*)"
+)
+_DIGITS = frozenset("0123456789")
+_PLAIN_START = frozenset("0123456789+-. ")
+
+
+def _parse_text(text: str, fallback: float) -> float:
+    # Plain numbers ("12", "-3.5", "1e3") are the common case and float() is C;
+    # only try it when the text could be one, as a failed float() is slow.
+    if (
+        text[-1:] in _DIGITS
+        and text[:1] in _PLAIN_START
+        and "," not in text
+        and "_" not in text
+        and text.isascii()
+    ):
+        try:
+            number = float(text)
+        except ValueError:
+            pass
+        else:
+            if math.isfinite(number):
+                return number
+
+    match = _NUMBER.fullmatch(text)
+    if match is None:
+        return fallback
+    prefix, body, suffix = match.group("prefix", "body", "suffix")
+
+    negative = bracketed = False
+    if prefix:
+        minus_count = prefix.count("-") + prefix.count("\u2212")
+        if minus_count > 1 or prefix.count("(") > 1 or ")" in prefix:
+            return fallback
+        if minus_count and "+" in prefix:
+            minus_at = prefix.find("-") if "-" in prefix else prefix.find("\u2212")
+            if "+" in prefix[minus_at:]:
+                return fallback
+        negative = minus_count == 1
+        bracketed = "(" in prefix
+    if suffix.count(")") != bracketed:
+        return fallback
+
+    for separator in _SEPARATORS:
+        if separator in body:
+            body = body.replace(separator, "")
+    magnitude = float(body)
+    if not math.isfinite(magnitude):
+        return fallback
+    return -magnitude if negative != bracketed else magnitude
+
+
+def parse_number(value: Any, fallback: float = 0.0) -> float:
+    """Port of ``parseNumber``: a finite float, or ``fallback``."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        number = float(value)
+        return number if math.isfinite(number) else fallback
+    if value is None or value == "":
+        return fallback
+    # JavaScript's String(true) is "true", which has no digits.
+    return _parse_text(value if isinstance(value, str) else str(value), fallback)
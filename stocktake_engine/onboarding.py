@@ -0,0 +1,181 @@
+"""Bulk item onboarding, the counterpart of ``src/utils/bulkItems.js``.
+
+Rows from a CSV/TSV file, or another workbook's inventory, become new items in
+one pass: each row is validated, its SKU is checked against the engine's SKU
+index and the rest of the batch, blank SKUs are numbered from the
+``nextSkuNumber`` counter, and every new item gets its opening cost layer and
+"New item" history entry. Supplied SKUs are reserved before any are
+allocated, so an allocated SKU never takes one a later row names.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import math
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping
+
+from .costing import create_initial_cost_layers
+from .engine import (
+    StocktakeEngine,
+    build_new_item_entry,
+    create_id_allocator,
+    extract_sku_number,
+    format_auto_sku,
+    iso_timestamp,
+    sku_key,
+)
+from .normalise import normalise_manual_string
+from .numbers import parse_number
+
+BULK_ITEM_FIELDS = ("sku", "name", "category", "currentCount", "unitCost", "itemNote")
+
+_FIELD_HEADERS = {
+    "sku": {"sku", "code", "item code", "product code", "barcode", "plu"},
+    "name": {"item", "item name", "name", "product", "description"},
+    "category": {"category", "department", "group"},
+    "currentCount": {"count", "qty", "quantity", "on hand", "stock", "opening count"},
+    "unitCost": {"unit cost", "cost", "price", "unit price"},
+    "itemNote": {"note", "notes", "item note", "comment"},
+}
+
+
+@dataclass
+class BulkAddResult:
+    items: list[dict] = field(default_factory=list)
+    entries: list[dict] = field(default_factory=list)
+    # (1-based row number, reason) for each row left out.
+    skipped: list[tuple[int, str]] = field(default_factory=list)
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or str(value).strip() == ""
+
+
+def _header_fields(cells: list[str]) -> list[str | None] | None:
+    fields = []
+    for cell in cells:
+        header = normalise_manual_string(cell).lower()
+        fields.append(
+            next((name for name in BULK_ITEM_FIELDS if header in _FIELD_HEADERS[name]), None)
+        )
+    return fields if any(fields) else None
+
+
+def parse_bulk_item_text(text: str) -> list[dict]:
+    """Delimited text as bulk rows; see ``parseBulkItemText`` for the header rules."""
+    first_line = text.split("\n", 1)[0]
+    delimiter = ","
+    if "\t" in first_line:
+        delimiter = "\t"
+    elif ";" in first_line and "," not in first_line:
+        delimiter = ";"
+    rows = [
+        cells
+        for cells in csv.reader(io.StringIO(text), delimiter=delimiter)
+        if any(not _is_blank(cell) for cell in cells)
+    ]
+    headers = _header_fields(rows[0]) if rows else None
+    fields = headers or list(BULK_ITEM_FIELDS)
+    parsed = []
+    for cells in rows[1:] if headers else rows:
+        row: dict[str, Any] = {}
+        for column, name in enumerate(fields):
+            if name and name not in row:
+                row[name] = cells[column] if column < len(cells) else ""
+        parsed.append(row)
+    return parsed
+
+
+def bulk_rows_from_engine(engine: StocktakeEngine) -> list[dict]:
+    """Another store's items (for example a supplier workbook) as bulk rows."""
+    return [
+        {name: item.get(name) for name in BULK_ITEM_FIELDS}
+        for item in engine.iter_items(with_layers=False)
+    ]
+
+
+def _read_quantity(value: Any) -> float:
+    if _is_blank(value):
+        return 0.0
+    parsed = parse_number(value, math.nan)
+    return parsed if math.isfinite(parsed) and parsed >= 0 else math.nan
+
+
+def add_items(
+    engine: StocktakeEngine,
+    rows: Iterable[Mapping[str, Any]],
+    performed_by: str = "Bulk import",
+    notes: str = "",
+    timestamp: str | None = None,
+) -> BulkAddResult:
+    """Validate ``rows`` and add them to ``engine`` as new items in one commit.
+
+    Items are appended with ``lastCount`` equal to their count, as their opening
+    entries are recorded here (newest first at the front of the history).
+    """
+    timestamp = timestamp or iso_timestamp()
+    operator = normalise_manual_string(performed_by) or "Bulk import"
+    notes = normalise_manual_string(notes)
+    result = BulkAddResult()
+    accepted = []
+    batch_skus: set[str] = set()
+    highest_supplied = 0
+
+    for number, row in enumerate(rows, start=1):
+        sku = normalise_manual_string(row.get("sku"))
+        name = normalise_manual_string(row.get("name"))
+        current_count = _read_quantity(row.get("currentCount"))
+        unit_cost = _read_quantity(row.get("unitCost"))
+        reason = None
+        if not sku and not name:
+            reason = "No SKU or item name"
+        elif math.isnan(current_count):
+            reason = f'Count "{row.get("currentCount")}" is not a number of zero or more'
+        elif math.isnan(unit_cost):
+            reason = f'Unit cost "{row.get("unitCost")}" is not an amount of zero or more'
+        elif sku and engine.has_sku(sku):
+            reason = f"SKU {sku} is already in the inventory"
+        elif sku and sku_key(sku) in batch_skus:
+            reason = f"SKU {sku} appears more than once"
+        if reason:
+            result.skipped.append((number, reason))
+            continue
+        if sku:
+            batch_skus.add(sku_key(sku))
+            highest_supplied = max(highest_supplied, extract_sku_number(sku) or 0)
+        accepted.append((row, sku, name, current_count, unit_cost))
+
+    counter = int(engine.metadata.get("nextSkuNumber") or 1)
+    allocate_id = create_id_allocator(lambda item_id: item_id in engine.index)
+    for row, supplied_sku, name, current_count, unit_cost in accepted:
+        sku = supplied_sku
+        if not sku:
+            sku = format_auto_sku(counter)
+            while engine.has_sku(sku) or sku_key(sku) in batch_skus:
+                counter += 1
+                sku = format_auto_sku(counter)
+            counter += 1
+            batch_skus.add(sku_key(sku))
+        item = {
+            "id": allocate_id(sku),
+            "sku": sku,
+            "name": name or sku,
+            "category": normalise_manual_string(row.get("category")) or "Uncategorised",
+            "unitCost": unit_cost,
+            "currentCount": current_count,
+            "lastCount": current_count,
+            "lastUpdated": timestamp,
+            "costLayers": create_initial_cost_layers(current_count, unit_cost, timestamp),
+            "itemNote": normalise_manual_string(row.get("itemNote")),
+        }
+        engine.append_item(item)
+        result.items.append(item)
+        result.entries.append(build_new_item_entry(item, timestamp, operator, notes))
+
+    if result.items:
+        engine.history[:0] = result.entries
+        engine.metadata["lastStocktakeAt"] = timestamp
+        engine.metadata["nextSkuNumber"] = max(counter, highest_supplied + 1)
+    return result
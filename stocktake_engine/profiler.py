@@ -0,0 +1,179 @@
+"""Per-stage timings for the headless import, commit and export paths.
+
+Traces use the same JSON shape and stage names as the browser's diagnostics
+export (``src/utils/profiler.js``), so a trace from either side can be
+compared with :func:`compare_profiles`. The reader streams rows rather than
+parsing the whole package first, so its ``read-rows:*`` stages include the
+XML parsing the browser reports separately as ``xlsx-read``.
+
+Heap deltas are only recorded with ``trace_memory=True``, which starts
+:mod:`tracemalloc` and slows everything down noticeably.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Mapping
+
+from .engine import iso_timestamp
+
+PROFILE_FORMAT = "stocktake-profile"
+PROFILE_VERSION = 1
+
+
+class StageTimer:
+    """Accumulates one stage across many short calls; see :meth:`Profiler.timer`."""
+
+    __slots__ = ("profiler", "name", "started_at", "seconds", "rows", "calls")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.started_at = iso_timestamp()
+        self.seconds = 0.0
+        self.rows = 0
+        self.calls = 0
+
+    def add(self, seconds: float, rows: int = 0) -> None:
+        self.seconds += seconds
+        self.rows += rows
+        self.calls += 1
+
+    def end(self) -> None:
+        if self.calls:
+            self.profiler.record(
+                self.name, self.started_at, self.seconds, rows=self.rows, calls=self.calls
+            )
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def add(self, seconds: float, rows: int = 0) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """Collects stage records; a disabled profiler records nothing."""
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = False) -> None:
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.stages: list[dict] = []
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def record(
+        self,
+        name: str,
+        started_at: str,
+        seconds: float,
+        rows: int | None = None,
+        calls: int = 1,
+        heap_delta: int | None = None,
+    ) -> None:
+        if self.enabled:
+            self.stages.append(
+                {
+                    "stage": name,
+                    "source": "python",
+                    "startedAt": started_at,
+                    "durationMs": seconds * 1000,
+                    "rows": rows,
+                    "calls": calls,
+                    "heapDeltaBytes": heap_delta,
+                }
+            )
+
+    @contextmanager
+    def stage(self, name: str, rows: int | None = None) -> Iterator[dict]:
+        """Time the ``with`` block. Set ``rows`` on the yielded dict once known."""
+        details: dict[str, Any] = {"rows": rows}
+        if not self.enabled:
+            yield details
+            return
+        started_at = iso_timestamp()
+        heap_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else None
+        started = time.perf_counter()
+        try:
+            yield details
+        finally:
+            seconds = time.perf_counter() - started
+            heap_delta = (
+                tracemalloc.get_traced_memory()[0] - heap_before if heap_before is not None else None
+            )
+            self.record(name, started_at, seconds, rows=details["rows"], heap_delta=heap_delta)
+
+    def timer(self, name: str) -> StageTimer | _NullTimer:
+        """A stage built up from many short spans, for work interleaved with other stages."""
+        return StageTimer(self, name) if self.enabled else _NULL_TIMER
+
+    def to_dict(self) -> dict:
+        return {
+            "format": PROFILE_FORMAT,
+            "version": PROFILE_VERSION,
+            "generatedAt": iso_timestamp(),
+            "environment": {
+                "runtime": "python",
+                "version": sys.version.split()[0],
+                "platform": platform.platform(),
+            },
+            "stages": self.stages,
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+
+
+NULL_PROFILER = Profiler(enabled=False)
+
+
+def load_profile(path: str) -> dict:
+    with open(path, encoding="utf-8") as handle:
+        trace = json.load(handle)
+    if trace.get("format") != PROFILE_FORMAT:
+        raise ValueError(f"{path} is not a stocktake profile")
+    return trace
+
+
+def summarise_profile(stages: Iterable[Mapping[str, Any]]) -> dict[str, dict]:
+    """Runs, total and slowest duration and rows per stage name."""
+    summary: dict[str, dict] = {}
+    for record in stages:
+        entry = summary.setdefault(
+            record["stage"], {"runs": 0, "totalMs": 0.0, "maxMs": 0.0, "rows": 0}
+        )
+        entry["runs"] += 1
+        entry["totalMs"] += record["durationMs"]
+        entry["maxMs"] = max(entry["maxMs"], record["durationMs"])
+        entry["rows"] += record.get("rows") or 0
+    return summary
+
+
+def compare_profiles(before: Mapping[str, Any], after: Mapping[str, Any]) -> list[dict]:
+    """Per-stage total time in two traces, slowest regression first.
+
+    ``ratio`` is ``after / before`` and is None for stages only one trace has.
+    """
+    old = summarise_profile(before["stages"])
+    new = summarise_profile(after["stages"])
+    rows = []
+    for name in dict.fromkeys([*old, *new]):
+        before_ms = old[name]["totalMs"] if name in old else None
+        after_ms = new[name]["totalMs"] if name in new else None
+        ratio = after_ms / before_ms if before_ms and after_ms is not None else None
+        rows.append({"stage": name, "beforeMs": before_ms, "afterMs": after_ms, "ratio": ratio})
+    rows.sort(key=lambda row: row["ratio"] if row["ratio"] is not None else 0.0, reverse=True)
+    return rows
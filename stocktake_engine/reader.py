@@ -0,0 +1,259 @@
+"""Streaming counterpart of ``parseInventoryWorkbook`` in ``src/utils/excel.js``."""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Any, Callable, Iterator
+
+from .engine import StocktakeEngine, compute_next_sku_number, create_id_allocator, iso_timestamp
+from .normalise import normalise_history_entry, normalise_inventory_item
+from .numbers import parse_number
+from .profiler import NULL_PROFILER, Profiler
+from .xlsx import ProgressCallback, XlsxReader
+
+HISTORY_SHEET_NAME = "Movements"
+
+REQUIRED_COLUMNS = {
+    "sku": "SKU",
+    "name": "Item",
+    "category": "Category",
+    "count": "Count",
+    "unitCost": "Unit Cost",
+    "lastUpdated": "Last Updated",
+}
+
+OPTIONAL_COLUMNS = {"itemNote": "Notes"}
+
+MOVEMENT_HEADERS = [
+    "SKU",
+    "Item",
+    "Category",
+    "Previous Count",
+    "Sold",
+    "Received",
+    "New Count",
+    "Delta",
+    "Unit Cost",
+    "Value Change",
+    "Performed By",
+    "Notes",
+    "Item Note",
+    "Timestamp",
+    # Added after Timestamp so workbooks written before it still read by position.
+    "Counted By",
+]
+
+
+class WorkbookFormatError(ValueError):
+    """Raised when a workbook is missing the sheets or headers the app requires."""
+
+
+def normalise_string(value: Any) -> str:
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+parse_currency = parse_number
+
+
+def to_iso_timestamp(value: Any) -> str | None:
+    if not value and value != 0:
+        return None
+    if isinstance(value, datetime):
+        moment = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        return iso_timestamp(moment)
+    try:
+        moment = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return iso_timestamp(moment)
+
+
+def _row_dict(headers: list[str], values: list[Any]) -> dict[str, Any]:
+    return {
+        header: values[position] if position < len(values) else ""
+        for position, header in enumerate(headers)
+        if header
+    }
+
+
+@dataclass
+class WorkbookStream:
+    """Stream normalised records out of a stocktake workbook.
+
+    Iterating yields ``("history", entry)`` events for the Movements sheet
+    followed by ``("inventory", item)`` events for the first sheet. Movements
+    are read first because inventory normalisation falls back to the latest
+    movement timestamp for its opening cost layers. ``workbook_meta`` is
+    complete once iteration finishes. Time spent reading rows and normalising
+    them is added to ``profiler``, excluding the consumer's own work.
+    """
+
+    source: str | IO[bytes]
+    on_progress: ProgressCallback | None = None
+    progress_every: int = 5000
+    workbook_meta: dict[str, Any] = field(default_factory=dict)
+    profiler: Profiler = NULL_PROFILER
+
+    def __iter__(self) -> Iterator[tuple[str, dict]]:
+        with XlsxReader(self.source) as reader:
+            if not reader.sheet_names:
+                raise WorkbookFormatError("No sheets found in the workbook.")
+            sheet_name = reader.sheet_names[0]
+            self.workbook_meta = {
+                "sheetName": sheet_name,
+                "importedAt": iso_timestamp(),
+                "lastStocktakeAt": None,
+            }
+            inventory_rows = reader.iter_rows(sheet_name, self.on_progress, self.progress_every)
+            headers = [normalise_string(header) for header in next(inventory_rows, [])]
+            header_set = {header.lower() for header in headers}
+            missing = [
+                header for header in REQUIRED_COLUMNS.values() if header.lower() not in header_set
+            ]
+            if missing:
+                raise WorkbookFormatError(f"Missing required columns: {', '.join(missing)}")
+
+            clock = time.perf_counter
+            latest = None
+            if HISTORY_SHEET_NAME in reader.sheet_paths:
+                read_timer = self.profiler.timer("read-rows:movements")
+                normalise_timer = self.profiler.timer("normalise:history")
+                history_rows = reader.iter_rows(
+                    HISTORY_SHEET_NAME, self.on_progress, self.progress_every
+                )
+                tick = clock()
+                next(history_rows, None)
+                index = 0
+                for values in history_rows:
+                    entry = map_movement_row(_row_dict(MOVEMENT_HEADERS, values), index)
+                    if entry is None:
+                        continue
+                    index += 1
+                    if entry["timestamp"] and (latest is None or entry["timestamp"] > latest):
+                        latest = entry["timestamp"]
+                    mapped = clock()
+                    read_timer.add(mapped - tick, 1)
+                    record = normalise_history_entry(entry)
+                    normalise_timer.add(clock() - mapped, 1)
+                    yield "history", record
+                    tick = clock()
+                read_timer.end()
+                normalise_timer.end()
+            self.workbook_meta["lastStocktakeAt"] = latest
+
+            read_timer = self.profiler.timer("read-rows:inventory")
+            normalise_timer = self.profiler.timer("normalise:inventory")
+            allocate_id = create_id_allocator()
+            tick = clock()
+            for index, values in enumerate(inventory_rows):
+                item = map_inventory_row(_row_dict(headers, values), index, allocate_id)
+                mapped = clock()
+                read_timer.add(mapped - tick, 1)
+                record = normalise_inventory_item(item, self.workbook_meta)
+                normalise_timer.add(clock() - mapped, 1)
+                yield "inventory", record
+                tick = clock()
+            read_timer.end()
+            normalise_timer.end()
+
+
+def map_inventory_row(
+    row: dict[str, Any], index: int, allocate_id: Callable[[str], str]
+) -> dict:
+    sku = normalise_string(row.get(REQUIRED_COLUMNS["sku"]))
+    name = normalise_string(row.get(REQUIRED_COLUMNS["name"])) or f"Item {index + 1}"
+    item_id = allocate_id(sku or name or f"row-{index + 1}")
+    current_count = parse_number(row.get(REQUIRED_COLUMNS["count"]))
+    return {
+        "id": item_id,
+        "sku": sku,
+        "name": name,
+        "category": normalise_string(row.get(REQUIRED_COLUMNS["category"])) or "Uncategorised",
+        "unitCost": parse_currency(row.get(REQUIRED_COLUMNS["unitCost"])),
+        "currentCount": current_count,
+        "lastCount": current_count,
+        "draftSold": "",
+        "draftReceived": "",
+        "lastUpdated": to_iso_timestamp(row.get(REQUIRED_COLUMNS["lastUpdated"])),
+        "itemNote": normalise_string(row.get(OPTIONAL_COLUMNS["itemNote"])),
+    }
+
+
+def map_movement_row(row: dict[str, Any], index: int) -> dict | None:
+    sku = normalise_string(row.get("SKU"))
+    raw_name = normalise_string(row.get("Item"))
+    if not sku and not raw_name:
+        return None
+    name = raw_name or "Unnamed item"
+    previous_count = parse_number(row.get("Previous Count"))
+    sold = parse_number(row.get("Sold"))
+    received = parse_number(row.get("Received"))
+    new_count = (
+        parse_number(row["New Count"])
+        if row.get("New Count", "") != ""
+        else previous_count - sold + received
+    )
+    delta = parse_number(row["Delta"]) if row.get("Delta", "") != "" else new_count - previous_count
+    unit_cost = parse_currency(row.get("Unit Cost"))
+    raw_value_change = parse_currency(row.get("Value Change"))
+    sold_value = sold * unit_cost
+    received_value = received * unit_cost
+    return {
+        "id": f"{sku or name or 'movement'}-{index}",
+        "itemId": sku or name or f"movement-{index}",
+        "sku": sku,
+        "name": name,
+        "category": normalise_string(row.get("Category")) or "Uncategorised",
+        "previousCount": previous_count,
+        "sold": sold,
+        "received": received,
+        "newCount": new_count,
+        "delta": delta,
+        "unitCost": unit_cost,
+        "soldValue": sold_value,
+        "receivedValue": received_value,
+        "soldUnitCost": sold_value / sold if sold > 0 else 0.0,
+        "receivedUnitCost": received_value / received if received > 0 else 0.0,
+        "valueImpact": raw_value_change if raw_value_change != 0 else received_value - sold_value,
+        "performedBy": normalise_string(row.get("Performed By")),
+        "countedBy": normalise_string(row.get("Counted By")),
+        "notes": normalise_string(row.get("Notes")),
+        "itemNote": normalise_string(row.get("Item Note")),
+        "timestamp": to_iso_timestamp(row.get("Timestamp")),
+    }
+
+
+def load_workbook(
+    source: str | IO[bytes],
+    on_progress: ProgressCallback | None = None,
+    source_file_name: str = "",
+    profiler: Profiler = NULL_PROFILER,
+) -> StocktakeEngine:
+    """Stream a workbook straight into a :class:`StocktakeEngine`."""
+    stream = WorkbookStream(source, on_progress, profiler=profiler)
+    engine = StocktakeEngine()
+    with profiler.stage("import") as stage:
+        for kind, record in stream:
+            if kind == "history":
+                engine.history.append(record)
+            else:
+                engine.append_item(record)
+        stage["rows"] = len(engine) + len(engine.history)
+    meta = stream.workbook_meta
+    engine.metadata.update(
+        sourceFileName=source_file_name
+        or (os.path.basename(source) if isinstance(source, str) else ""),
+        sheetName=meta.get("sheetName"),
+        lastImportedAt=meta.get("importedAt"),
+        lastStocktakeAt=meta.get("lastStocktakeAt")
+        or (engine.history[0].get("timestamp") if engine.history else None),
+        nextSkuNumber=compute_next_sku_number(engine.iter_items(with_layers=False)),
+    )
+    return engine
@@ -0,0 +1,352 @@
+"""Reorder points and days of cover, the counterpart of ``src/utils/replenishment.js``.
+
+:class:`DemandTracker` sums the units each item sold over the lookback window:
+the total, the sum of squared daily totals (for the day-to-day variability) and
+the total of the item's latest day, which is squared once the next day begins.
+The first pass groups every movement by item and UTC day in one vectorised
+step when NumPy is installed, and in a plain loop when it is not; the figures
+are the same. After that, :meth:`DemandTracker.update` only reads the
+movements a commit prepended to the history, unless the window has moved on a
+day or the history was replaced. :func:`plan_replenishment` then works out
+every item's daily use, variability, days of cover, reorder point and
+suggested order over the engine's columns.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Any, Iterable, Sequence
+
+from .engine import StocktakeEngine
+
+try:
+    import numpy as np
+except ImportError:  # optional: the loops below give the same figures
+    np = None
+
+# Mirrors REPLENISHMENT_* in src/constants.js.
+REPLENISHMENT_LOOKBACK_DAYS = 90
+REPLENISHMENT_LEAD_TIME_DAYS = 7
+REPLENISHMENT_REVIEW_DAYS = 7
+REPLENISHMENT_SERVICE_Z = 1.65
+
+_DAY_MS = 24 * 60 * 60 * 1000
+_UNIX_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=4096)
+def _utc_day_of_date(text: str) -> int:
+    return date.fromisoformat(text).toordinal() - _UNIX_ORDINAL
+
+
+def movement_day(timestamp: Any) -> int | None:
+    """UTC day number (days since 1970-01-01) of a movement; None when unreadable."""
+    if not timestamp:
+        return None
+    text = str(timestamp).strip()
+    if text.endswith("Z"):
+        # Commits and imports write UTC, so the date part is the day.
+        try:
+            return _utc_day_of_date(text[:10])
+        except ValueError:
+            pass
+    try:
+        moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return math.floor(moment.timestamp() * 1000 / _DAY_MS)
+
+
+class DemandTracker:
+    """Units sold per item over the ``lookback_days`` UTC days up to today.
+
+    Items get a slot the first time they sell; the columns are indexed by slot.
+    Keep one tracker per engine and call :meth:`update` before planning.
+    """
+
+    def __init__(self, lookback_days: int = REPLENISHMENT_LOOKBACK_DAYS) -> None:
+        self.lookback_days = lookback_days
+        self.start_day: int | None = None
+        self.end_day: int | None = None
+        self.first_day: int | None = None
+        self.slot_by_id: dict[str, int] = {}
+        self.sold = array("d")
+        # Squared totals of every day but each item's latest, which is still open.
+        self.sum_squares = array("d")
+        self.open_day = array("q")
+        self.open_total = array("d")
+        self._history: list[dict] | None = None
+        self._seen = 0
+        self._newest: dict | None = None
+
+    def update(self, engine: StocktakeEngine, now_ms: float | None = None) -> int:
+        """Bring the sums up to date with ``engine.history``; returns the movements read."""
+        now_ms = time.time() * 1000 if now_ms is None else now_ms
+        end_day = math.floor(now_ms / _DAY_MS)
+        start_day = end_day - self.lookback_days + 1
+        history = engine.history
+        added = len(history) - self._seen
+        self.end_day = end_day
+        extends = (
+            history is self._history
+            and start_day == self.start_day
+            and added >= 0
+            and (self._newest is None or history[added] is self._newest)
+        )
+        if extends:
+            # Prepended newest first; summed oldest first so each item's days stay in order.
+            movements = list(self._movements(reversed(history[:added])))
+            if all(day >= self.open_day[self._slot(item_id)] for item_id, day, _ in movements):
+                for item_id, day, sold in movements:
+                    self._add(self._slot(item_id), day, sold)
+                self._remember(history)
+                return added
+        self._rebuild(history, start_day)
+        self._remember(history)
+        return len(history)
+
+    def _remember(self, history: list[dict]) -> None:
+        self._history = history
+        self._seen = len(history)
+        self._newest = history[0] if history else None
+
+    def _movements(self, entries: Iterable[dict]) -> Iterable[tuple[str, int, float]]:
+        start_day = self.start_day
+        for entry in entries:
+            sold = entry.get("sold") or 0
+            if not sold > 0:
+                continue
+            day = movement_day(entry.get("timestamp"))
+            if day is None or day < start_day:
+                continue
+            yield entry.get("itemId"), day, float(sold)
+
+    def _slot(self, item_id: str) -> int:
+        slot = self.slot_by_id.get(item_id)
+        if slot is None:
+            slot = len(self.slot_by_id)
+            self.slot_by_id[item_id] = slot
+            self.sold.append(0.0)
+            self.sum_squares.append(0.0)
+            self.open_day.append(-1)
+            self.open_total.append(0.0)
+        return slot
+
+    def _add(self, slot: int, day: int, sold: float) -> None:
+        if self.open_day[slot] != day:
+            self.sum_squares[slot] += self.open_total[slot] ** 2
+            self.open_day[slot] = day
+            self.open_total[slot] = 0.0
+        self.open_total[slot] += sold
+        self.sold[slot] += sold
+        if self.first_day is None or day < self.first_day:
+            self.first_day = day
+
+    def _rebuild(self, history: list[dict], start_day: int) -> None:
+        self.start_day = start_day
+        self.first_day = None
+        self.slot_by_id = {}
+        self.sold = array("d")
+        self.sum_squares = array("d")
+        self.open_day = array("q")
+        self.open_total = array("d")
+        slots: list[int] = []
+        days: list[int] = []
+        units: list[float] = []
+        for item_id, day, sold in self._movements(history):
+            slots.append(self._slot(item_id))
+            days.append(day)
+            units.append(sold)
+        if not slots:
+            return
+        self.first_day = min(days)
+        if np is None:
+            self._rebuild_loop(slots, days, units)
+        else:
+            self._rebuild_vectorised(slots, days, units)
+
+    def _rebuild_loop(self, slots: list[int], days: list[int], units: list[float]) -> None:
+        day_totals: dict[tuple[int, int], float] = {}
+        for slot, day, sold in zip(slots, days, units):
+            day_totals[slot, day] = day_totals.get((slot, day), 0.0) + sold
+        for (slot, day), total in day_totals.items():
+            self.sold[slot] += total
+            if day > self.open_day[slot]:
+                self.sum_squares[slot] += self.open_total[slot] ** 2
+                self.open_day[slot] = day
+                self.open_total[slot] = total
+            else:
+                self.sum_squares[slot] += total * total
+
+    def _rebuild_vectorised(self, slots: list[int], days: list[int], units: list[float]) -> None:
+        count = len(self.slot_by_id)
+        slot_column = np.asarray(slots, dtype=np.int64)
+        day_column = np.asarray(days, dtype=np.int64) - self.start_day
+        span = int(day_column.max()) + 1
+        # One key per item and day, sorted by item then day.
+        keys, inverse = np.unique(slot_column * span + day_column, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.asarray(units), minlength=len(keys))
+        key_slots = keys // span
+        sold = np.bincount(key_slots, weights=totals, minlength=count)
+        squares = np.bincount(key_slots, weights=totals * totals, minlength=count)
+        latest = np.flatnonzero(np.append(key_slots[1:] != key_slots[:-1], True))
+        open_day = np.full(count, -1, dtype=np.int64)
+        open_total = np.zeros(count)
+        open_day[key_slots[latest]] = keys[latest] % span + self.start_day
+        open_total[key_slots[latest]] = totals[latest]
+        self.sold = array("d", sold.tobytes())
+        self.sum_squares = array("d", np.maximum(squares - open_total * open_total, 0).tobytes())
+        self.open_day = array("q", open_day.tobytes())
+        self.open_total = array("d", open_total.tobytes())
+
+
+@dataclass
+class ReplenishmentPlan:
+    """Per-item columns in engine row order; ``days_of_cover`` is inf for an item with no use."""
+
+    days: int
+    lead_time_days: float
+    review_days: float
+    daily_use: Sequence[float]
+    deviation: Sequence[float]
+    days_of_cover: Sequence[float]
+    reorder_point: Sequence[float]
+    order_up_to: Sequence[float]
+    suggested_order: Sequence[float]
+    reorder_count: int = 0
+    units_to_order: float = 0.0
+    value_to_order: float = 0.0
+
+
+def _average_cost(engine: StocktakeEngine, index: int) -> float:
+    quantity = engine.layers.quantity(index)
+    return engine.layers.value(index) / quantity if quantity else engine.unit_costs[index]
+
+
+def plan_replenishment(
+    engine: StocktakeEngine,
+    tracker: DemandTracker,
+    lead_time_days: float = REPLENISHMENT_LEAD_TIME_DAYS,
+    review_days: float = REPLENISHMENT_REVIEW_DAYS,
+    service_z: float = REPLENISHMENT_SERVICE_Z,
+) -> ReplenishmentPlan:
+    """Reorder points and suggested orders from ``tracker``'s demand; see ``planReplenishment``.
+
+    Days are counted from the first sale in the window, so a short history is
+    not read as slow demand.
+    """
+    first_day = tracker.first_day if tracker.first_day is not None else tracker.start_day
+    days = max(1, tracker.end_day - max(tracker.start_day, first_day) + 1)
+    cover_days = lead_time_days + review_days
+    lead_root = math.sqrt(lead_time_days)
+    cover_root = math.sqrt(cover_days)
+    slot_by_id = tracker.slot_by_id
+    slots = [slot_by_id.get(item_id, -1) for item_id in engine.fields["id"]]
+    count = len(slots)
+
+    if np is not None:
+        slot_column = np.asarray(slots, dtype=np.int64)
+        moving = slot_column >= 0
+        rows = slot_column[moving]
+        on_hand = np.frombuffer(engine.current_counts, dtype=np.float64) if count else np.zeros(0)
+        daily_use = np.zeros(count)
+        deviation = np.zeros(count)
+        if len(rows):
+            open_total = np.frombuffer(tracker.open_total, dtype=np.float64)[rows]
+            rate = np.frombuffer(tracker.sold, dtype=np.float64)[rows] / days
+            squares = np.frombuffer(tracker.sum_squares, dtype=np.float64)[rows]
+            daily_use[moving] = rate
+            deviation[moving] = np.sqrt(
+                np.maximum((squares + open_total * open_total) / days - rate * rate, 0)
+            )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            days_of_cover = np.where(moving, on_hand / daily_use, np.inf)
+        reorder_point = daily_use * lead_time_days + service_z * deviation * lead_root
+        order_up_to = daily_use * cover_days + service_z * deviation * cover_root
+        due = moving & (on_hand <= reorder_point)
+        suggested_order = np.where(due, np.maximum(np.ceil(order_up_to - on_hand), 0), 0)
+        ordering = np.flatnonzero(suggested_order > 0).tolist()
+    else:
+        daily_use = [0.0] * count
+        deviation = [0.0] * count
+        days_of_cover = [math.inf] * count
+        reorder_point = [0.0] * count
+        order_up_to = [0.0] * count
+        suggested_order = [0.0] * count
+        ordering = []
+        for index, slot in enumerate(slots):
+            if slot < 0:
+                continue
+            rate = tracker.sold[slot] / days
+            squares = tracker.sum_squares[slot] + tracker.open_total[slot] ** 2
+            spread = math.sqrt(max(0.0, squares / days - rate * rate))
+            on_hand = engine.current_counts[index]
+            daily_use[index] = rate
+            deviation[index] = spread
+            days_of_cover[index] = on_hand / rate
+            reorder_point[index] = rate * lead_time_days + service_z * spread * lead_root
+            order_up_to[index] = rate * cover_days + service_z * spread * cover_root
+            if on_hand <= reorder_point[index]:
+                suggested_order[index] = max(0.0, math.ceil(order_up_to[index] - on_hand))
+                if suggested_order[index] > 0:
+                    ordering.append(index)
+
+    return ReplenishmentPlan(
+        days=days,
+        lead_time_days=lead_time_days,
+        review_days=review_days,
+        daily_use=daily_use,
+        deviation=deviation,
+        days_of_cover=days_of_cover,
+        reorder_point=reorder_point,
+        order_up_to=order_up_to,
+        suggested_order=suggested_order,
+        reorder_count=len(ordering),
+        units_to_order=float(sum(suggested_order[index] for index in ordering)),
+        value_to_order=sum(
+            suggested_order[index] * _average_cost(engine, index) for index in ordering
+        ),
+    )
+
+
+def compute_replenishment(
+    engine: StocktakeEngine,
+    now_ms: float | None = None,
+    lookback_days: int = REPLENISHMENT_LOOKBACK_DAYS,
+    **options: Any,
+) -> ReplenishmentPlan:
+    """One-off plan for ``engine``; keep a :class:`DemandTracker` to plan after each commit."""
+    tracker = DemandTracker(lookback_days)
+    tracker.update(engine, now_ms)
+    return plan_replenishment(engine, tracker, **options)
+
+
+def reorder_suggestions(
+    engine: StocktakeEngine, plan: ReplenishmentPlan, limit: int | None = None
+) -> list[dict]:
+    """Items with a suggested order, fewest days of cover first, then the larger order."""
+    ordering = [index for index in range(len(engine)) if plan.suggested_order[index] > 0]
+    ordering.sort(key=lambda index: (plan.days_of_cover[index], -plan.suggested_order[index]))
+    fields = engine.fields
+    return [
+        {
+            "id": fields["id"][index],
+            "sku": fields["sku"][index],
+            "name": fields["name"][index],
+            "category": fields["category"][index],
+            "onHand": engine.current_counts[index],
+            "dailyUse": float(plan.daily_use[index]),
+            "deviation": float(plan.deviation[index]),
+            "daysOfCover": float(plan.days_of_cover[index]),
+            "reorderPoint": float(plan.reorder_point[index]),
+            "suggestedOrder": float(plan.suggested_order[index]),
+        }
+        for index in ordering[:limit]
+    ]
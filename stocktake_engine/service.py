@@ -0,0 +1,591 @@
+"""Local HTTP service holding one store's engine in memory.
+
+Back-office scripts and handheld scanners use it instead of a browser tab::
+
+    GET  /health                 counters, for monitoring and the load test
+    GET  /items?offset=&limit=   items without cost layers; ``?sku=`` looks one up
+    GET  /valuation              :meth:`StocktakeEngine.totals` and the last stocktake
+    GET  /reorder?limit=         suggested orders, fewest days of cover first
+    GET  /drafts                 the staged change sets, summarised
+    POST /drafts                 stage a scanner's change set (newest revision wins)
+    POST /commit                 commit change sets, like ``applyStocktake``
+    GET  /export                 the updated workbook (.xlsx)
+
+Drafts and commits use the change-set format of ``src/utils/changeSets.js``
+(see :mod:`stocktake_engine.sessions`). A commit body carries ``performedBy``
+and optional ``notes``, plus either its own ``lines``, the ``sessionId`` of a
+staged set, or neither to commit every staged set. Commit requests arriving
+within ``batch_window`` seconds of each other are handed to the engine thread
+together, and those with the same ``performedBy`` and ``notes`` are merged into
+one :func:`apply_change_sets` pass, so a scanner's bursts cost one walk over
+the inventory. Movements record the operator who committed them as
+``performedBy`` and the operators whose lines they sum as ``countedBy``.
+
+The engine is only touched from one thread, so a read never sees a
+half-applied commit. With a ``database`` the SQLite store is opened on that
+thread too and every commit is persisted there. Exports snapshot the engine
+on that thread and are written in a process pool. The HTTP handling is
+standard library only and covers what these clients send (HTTP/1.1,
+keep-alive, ``Content-Length`` bodies); it is meant for localhost or a
+trusted shop network.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import itertools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Mapping
+from urllib.parse import parse_qs, quote, urlsplit
+
+from .engine import StocktakeEngine, sku_key
+from .normalise import normalise_manual_string
+from .numbers import parse_number
+from .replenishment import DemandTracker, plan_replenishment, reorder_suggestions
+from .sessions import CHANGE_SET_FORMAT, CHANGE_SET_VERSION, apply_change_sets
+from .store import StocktakeStore
+from .writer import write_workbook
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_WINDOW = 0.005
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 32 * 1024 * 1024
+ITEMS_PAGE_LIMIT = 1000
+JSON_CONTENT_TYPE = "application/json"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    """A request the service refuses; reported to the client with ``status``."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    commit_requests: int = 0
+    commits: int = 0
+    committed_lines: int = 0
+    exports: int = 0
+
+
+@dataclass
+class _PendingCommit:
+    change_set: dict
+    performed_by: str
+    notes: str
+    future: asyncio.Future
+
+
+@dataclass
+class _Response:
+    status: int
+    body: bytes
+    content_type: str = JSON_CONTENT_TYPE
+    headers: Mapping[str, str] | None = None
+
+
+def _json_response(payload: Any, status: int = 200) -> _Response:
+    return _Response(status, json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def _error_response(status: int, message: str) -> _Response:
+    return _json_response({"error": message}, status)
+
+
+def _attachment(filename: str) -> str:
+    """A Content-Disposition value for ``filename``, safe to send as latin-1.
+
+    The plain ``filename`` is an ASCII stand-in; clients that read RFC 5987's
+    ``filename*`` get the name as it was.
+    """
+    fallback = "".join(
+        char if " " <= char <= "~" and char not in '"\\' else "_" for char in filename
+    )
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def render_workbook(inventory: list[dict], metadata: dict, history: list[dict]) -> bytes:
+    """An engine snapshot as workbook bytes; runs in the export worker processes."""
+    buffer = io.BytesIO()
+    write_workbook(buffer, inventory, metadata, history)
+    return buffer.getvalue()
+
+
+def _read_json(body: bytes) -> dict:
+    if not body:
+        return {}
+    try:
+        payload = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise RequestError(400, f"Body is not JSON: {error}") from None
+    if not isinstance(payload, dict):
+        raise RequestError(400, "Body must be a JSON object")
+    return payload
+
+
+def _read_lines(lines: Any) -> list[list]:
+    if not isinstance(lines, list):
+        raise RequestError(400, "lines must be a list of [itemId, sku, sold, received]")
+    parsed = []
+    for number, line in enumerate(lines, start=1):
+        if not isinstance(line, (list, tuple)) or len(line) != 4:
+            raise RequestError(400, f"line {number} is not [itemId, sku, sold, received]")
+        item_id, sku, sold, received = line
+        parsed.append(
+            [
+                "" if item_id is None else str(item_id),
+                "" if sku is None else str(sku),
+                parse_number(sold),
+                parse_number(received),
+            ]
+        )
+    return parsed
+
+
+def _change_set(payload: Mapping[str, Any], session_id: str) -> dict:
+    return {
+        "format": CHANGE_SET_FORMAT,
+        "version": CHANGE_SET_VERSION,
+        "sessionId": session_id,
+        "operator": normalise_manual_string(payload.get("operator")),
+        "revision": int(parse_number(payload.get("revision"))),
+        "lines": _read_lines(payload.get("lines")),
+    }
+
+
+class StocktakeService:
+    """The HTTP front end and commit batcher for one :class:`StocktakeEngine`.
+
+    With ``database`` every commit is also persisted to that SQLite file. The
+    engine is then saved there on start, or, when ``engine`` is ``None``,
+    loaded from it.
+    """
+
+    def __init__(
+        self,
+        engine: StocktakeEngine | None,
+        database: str | None = None,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        export_workers: int | None = None,
+    ) -> None:
+        if engine is None and database is None:
+            raise ValueError("An engine or a database to load one from is required")
+        self.engine = engine
+        self.database = database
+        self.store: StocktakeStore | None = None
+        self.batch_window = batch_window
+        self.stats = ServiceStats()
+        self.drafts: dict[str, dict] = {}
+        self._engine_thread = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="stocktake-engine"
+        )
+        # Workers are started lazily, once the engine and event-loop threads exist; a
+        # forked child can inherit a lock held by one of them and never hand back its
+        # result, so they are spawned fresh instead.
+        self._export_pool = ProcessPoolExecutor(
+            max_workers=export_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._sequence = itertools.count(1)
+        self._queue: asyncio.Queue[_PendingCommit] | None = None
+        self._batcher: asyncio.Task | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.Task] = set()
+        self._valuation: dict | None = None
+        # Commits prepend to the history, so the tracker only reads their movements.
+        self._demand = DemandTracker()
+        self._routes: dict[str, dict[str, Callable]] = {
+            "/health": {"GET": self._get_health},
+            "/items": {"GET": self._get_items},
+            "/valuation": {"GET": self._get_valuation},
+            "/reorder": {"GET": self._get_reorder},
+            "/drafts": {"GET": self._get_drafts, "POST": self._post_drafts},
+            "/commit": {"POST": self._post_commit},
+            "/export": {"GET": self._get_export},
+        }
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> tuple[str, int]:
+        """Start listening; returns the bound address (``port=0`` picks a free one)."""
+        if self.database is not None:
+            await self._on_engine(self._open_store)
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_server(
+            self._handle_connection, host, port, limit=MAX_HEADER_BYTES
+        )
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for connection in list(self._connections):
+                connection.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._batcher
+        if self.store is not None:
+            await self._on_engine(self.store.close)
+        self._engine_thread.shutdown()
+        self._export_pool.shutdown()
+
+    def _open_store(self) -> None:
+        # sqlite3 connections stay on the thread that opened them.
+        self.store = StocktakeStore(self.database)
+        if self.engine is None:
+            self.engine = self.store.load_engine()
+            if self.engine is None:
+                raise ValueError(f"{self.database} holds no stocktake to serve")
+        else:
+            self.store.save_engine(self.engine)
+
+    async def _on_engine(self, function: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._engine_thread, function, *args)
+
+    # Commits
+
+    async def _run_batches(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if self.batch_window:
+                await asyncio.sleep(self.batch_window)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # The operator and notes are recorded per movement, so requests that differ in
+            # either commit apart.
+            groups: dict[tuple[str, str], list[_PendingCommit]] = {}
+            for pending in batch:
+                groups.setdefault((pending.performed_by, pending.notes), []).append(pending)
+            for (performed_by, notes), pendings in groups.items():
+                try:
+                    results = await self._on_engine(
+                        self._commit_batch, pendings, performed_by, notes
+                    )
+                except Exception as error:  # reported to every request in the group
+                    for pending in pendings:
+                        if not pending.future.done():
+                            pending.future.set_exception(error)
+                    continue
+                for pending, result in zip(pendings, results):
+                    if not pending.future.done():
+                        pending.future.set_result(result)
+
+    def _commit_batch(
+        self, pendings: list[_PendingCommit], performed_by: str, notes: str
+    ) -> list[dict]:
+        entries, merged = apply_change_sets(
+            self.engine,
+            [pending.change_set for pending in pendings],
+            performed_by,
+            notes,
+            store=self.store,
+        )
+        self._valuation = None
+        self.stats.commits += 1
+        self.stats.committed_lines += merged.lines
+        batch = {
+            "requests": len(pendings),
+            "lines": merged.lines,
+            "items": len(merged.drafts),
+            "movements": len(entries),
+            "timestamp": self.engine.metadata.get("lastStocktakeAt"),
+        }
+        unmatched: dict[str, list] = {}
+        for line in merged.unmatched:
+            unmatched.setdefault(line["sessionId"], []).append(line["line"])
+        return [
+            {"batch": batch, "unmatched": unmatched.get(pending.change_set["sessionId"], [])}
+            for pending in pendings
+        ]
+
+    async def _post_commit(self, query: dict, body: bytes) -> _Response:
+        payload = _read_json(body)
+        performed_by = normalise_manual_string(
+            payload.get("performedBy") or payload.get("operator")
+        )
+        if not performed_by:
+            raise RequestError(400, "performedBy is required")
+        notes = normalise_manual_string(payload.get("notes"))
+        session_id = normalise_manual_string(payload.get("sessionId"))
+        if "lines" in payload:
+            change_sets = [_change_set(payload, session_id or "request")]
+            self.drafts.pop(session_id, None)
+        elif session_id:
+            staged = self.drafts.pop(session_id, None)
+            if staged is None:
+                raise RequestError(404, f"No drafts are staged for session {session_id}")
+            change_sets = [staged]
+        else:
+            change_sets = list(self.drafts.values())
+            self.drafts.clear()
+        if not change_sets:
+            raise RequestError(400, "Nothing to commit: no lines and no staged drafts")
+
+        loop = asyncio.get_running_loop()
+        pendings = []
+        for change_set in change_sets:
+            # Only the newest revision of a session is merged, so every request gets its
+            # own session id within the batch. A set with no operator is credited to the
+            # one committing it.
+            queued = {
+                **change_set,
+                "sessionId": f"{change_set['sessionId']}#{next(self._sequence)}",
+                "operator": change_set["operator"] or performed_by,
+            }
+            pendings.append(_PendingCommit(queued, performed_by, notes, loop.create_future()))
+        self.stats.commit_requests += 1
+        for pending in pendings:
+            self._queue.put_nowait(pending)
+        results = await asyncio.gather(*(pending.future for pending in pendings))
+        return _json_response(
+            {
+                "sessions": len(results),
+                "batch": results[-1]["batch"],
+                "unmatched": [line for result in results for line in result["unmatched"]],
+            }
+        )
+
+    # Drafts
+
+    async def _post_drafts(self, query: dict, body: bytes) -> _Response:
+        payload = _read_json(body)
+        session_id = normalise_manual_string(payload.get("sessionId"))
+        if not session_id:
+            raise RequestError(400, "sessionId is required")
+        change_set = _change_set(payload, session_id)
+        existing = self.drafts.get(session_id)
+        accepted = existing is None or change_set["revision"] >= existing["revision"]
+        if accepted:
+            self.drafts[session_id] = change_set
+        current = self.drafts[session_id]
+        return _json_response(
+            {
+                "sessionId": session_id,
+                "accepted": accepted,
+                "revision": current["revision"],
+                "lines": len(current["lines"]),
+            }
+        )
+
+    async def _get_drafts(self, query: dict, body: bytes) -> _Response:
+        return _json_response(
+            [
+                {
+                    "sessionId": change_set["sessionId"],
+                    "operator": change_set["operator"],
+                    "revision": change_set["revision"],
+                    "lines": len(change_set["lines"]),
+                }
+                for change_set in self.drafts.values()
+            ]
+        )
+
+    # Reads
+
+    async def _get_health(self, query: dict, body: bytes) -> _Response:
+        return _json_response(
+            {
+                "status": "ok",
+                "items": len(self.engine),
+                "stagedSessions": len(self.drafts),
+                **asdict(self.stats),
+            }
+        )
+
+    def _valuation_snapshot(self) -> dict:
+        if self._valuation is None:
+            self._valuation = {
+                **self.engine.totals(),
+                "lastStocktakeAt": self.engine.metadata.get("lastStocktakeAt"),
+                "sourceFileName": self.engine.metadata.get("sourceFileName"),
+            }
+        return self._valuation
+
+    async def _get_valuation(self, query: dict, body: bytes) -> _Response:
+        return _json_response(await self._on_engine(self._valuation_snapshot))
+
+    def _reorder_snapshot(self, limit: int) -> dict:
+        self._demand.update(self.engine)
+        plan = plan_replenishment(self.engine, self._demand)
+        return {
+            "days": plan.days,
+            "reorderCount": plan.reorder_count,
+            "unitsToOrder": plan.units_to_order,
+            "valueToOrder": plan.value_to_order,
+            "items": reorder_suggestions(self.engine, plan, limit),
+        }
+
+    async def _get_reorder(self, query: dict, body: bytes) -> _Response:
+        try:
+            limit = min(max(int(query.get("limit", ["100"])[0]), 0), ITEMS_PAGE_LIMIT)
+        except ValueError:
+            raise RequestError(400, "limit must be a whole number") from None
+        return _json_response(await self._on_engine(self._reorder_snapshot, limit))
+
+    def _items_page(self, sku: str | None, offset: int, limit: int) -> Any:
+        engine = self.engine
+        if sku is not None:
+            index = engine.sku_index.get(sku_key(sku))
+            if index is None:
+                raise RequestError(404, f"No item has SKU {sku}")
+            return engine.item(index, with_layers=False)
+        end = min(len(engine), offset + limit)
+        return {
+            "total": len(engine),
+            "offset": offset,
+            "items": [engine.item(index, with_layers=False) for index in range(offset, end)],
+        }
+
+    async def _get_items(self, query: dict, body: bytes) -> _Response:
+        sku = query.get("sku", [None])[0]
+        try:
+            offset = max(int(query.get("offset", ["0"])[0]), 0)
+            limit = min(max(int(query.get("limit", ["100"])[0]), 0), ITEMS_PAGE_LIMIT)
+        except ValueError:
+            raise RequestError(400, "offset and limit must be whole numbers") from None
+        return _json_response(await self._on_engine(self._items_page, sku, offset, limit))
+
+    def _export_snapshot(self) -> tuple[list[dict], dict, list[dict]]:
+        engine = self.engine
+        return engine.to_records(), dict(engine.metadata), list(engine.history)
+
+    async def _get_export(self, query: dict, body: bytes) -> _Response:
+        inventory, metadata, history = await self._on_engine(self._export_snapshot)
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(
+            self._export_pool, render_workbook, inventory, metadata, history
+        )
+        self.stats.exports += 1
+        name = (metadata.get("sourceFileName") or "stocktake").rsplit(".", 1)[0]
+        return _Response(
+            200,
+            content,
+            XLSX_CONTENT_TYPE,
+            {"Content-Disposition": _attachment(f"{name}-updated.xlsx")},
+        )
+
+    # HTTP
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> _Response:
+        url = urlsplit(target)
+        methods = self._routes.get(url.path.rstrip("/") or "/")
+        try:
+            if methods is None:
+                raise RequestError(404, f"No such endpoint: {url.path}")
+            handler = methods.get(method)
+            if handler is None:
+                raise RequestError(405, f"{url.path} accepts {', '.join(methods)}")
+            return await handler(parse_qs(url.query), body)
+        except RequestError as error:
+            return _error_response(error.status, str(error))
+        except Exception as error:  # keep serving; the client sees what went wrong
+            return _error_response(500, f"{type(error).__name__}: {error}")
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, _error_response(413, "Headers too large"), False)
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                parts = request_line.split(" ")
+                if len(parts) != 3:
+                    await self._respond(writer, _error_response(400, "Malformed request"), False)
+                    break
+                method, target, version = parts
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_BYTES:
+                    response = _error_response(413 if length > 0 else 400, "Bad Content-Length")
+                    await self._respond(writer, response, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.1":
+                    keep_alive = connection != "close"
+                else:
+                    keep_alive = connection == "keep-alive"
+                self.stats.requests += 1
+                response = await self._dispatch(method.upper(), target, body)
+                await self._respond(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _respond(
+        self, writer: asyncio.StreamWriter, response: _Response, keep_alive: bool
+    ) -> None:
+        lines = [
+            f"HTTP/1.1 {response.status} {_REASONS.get(response.status, '')}",
+            f"Content-Type: {response.content_type}",
+            f"Content-Length: {len(response.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (response.headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + response.body)
+        await writer.drain()
+
+
+async def serve(
+    engine: StocktakeEngine | None,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    database: str | None = None,
+    batch_window: float = DEFAULT_BATCH_WINDOW,
+    export_workers: int | None = None,
+    on_ready: Callable[[str, int], None] | None = None,
+) -> None:
+    """Run a :class:`StocktakeService` until cancelled."""
+    service = StocktakeService(engine, database, batch_window, export_workers)
+    bound_host, bound_port = await service.start(host, port)
+    if on_ready is not None:
+        on_ready(bound_host, bound_port)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
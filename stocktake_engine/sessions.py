@@ -0,0 +1,255 @@
+"""Multi-operator change sets, the counterpart of ``src/utils/changeSets.js``.
+
+Each operator's sold/received drafts are a change set saved as JSON, with
+lines as ``[itemId, sku, sold, received]``. Operators on other devices save
+their sets into a shared drop directory; :func:`apply_drop_directory` merges
+every set there into one :meth:`StocktakeEngine.apply_stocktake` pass and
+moves the files it applied into ``applied/``. Merging sums lines per item,
+so the order sets are read in does not matter, and only the newest revision
+of each session is used. Lines are read through :func:`read_change_set_line`
+rather than trusted, as they come from other devices.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping
+
+from .costing import parse_adjustment
+from .engine import StocktakeEngine, iso_timestamp
+from .store import StocktakeStore
+
+CHANGE_SET_FORMAT = "stocktake-change-set"
+CHANGE_SET_VERSION = 1
+CHANGE_SET_SUFFIX = ".json"
+APPLIED_DIRECTORY = "applied"
+
+
+class ChangeSetError(ValueError):
+    """Raised for a file that is not a change set this version can read."""
+
+
+@dataclass
+class MergedChangeSets:
+    """Summed drafts per item id, ready for :meth:`StocktakeEngine.apply_stocktake`."""
+
+    drafts: dict[str, tuple[float, float]] = field(default_factory=dict)
+    operators: dict[str, list[str]] = field(default_factory=dict)
+    #: Lines matching no item (``reason`` ``"unknown-item"``) or malformed (``"invalid"``).
+    unmatched: list[dict] = field(default_factory=list)
+    lines: int = 0
+    sessions: int = 0
+
+
+def read_change_set(path: str) -> dict:
+    with open(path, encoding="utf-8") as handle:
+        change_set = json.load(handle)
+    if (
+        not isinstance(change_set, dict)
+        or change_set.get("format") != CHANGE_SET_FORMAT
+        or not isinstance(change_set.get("sessionId"), str)
+        or not isinstance(change_set.get("lines"), list)
+    ):
+        raise ChangeSetError(f"{path} is not a stocktake change set")
+    if change_set.get("version", 0) > CHANGE_SET_VERSION:
+        raise ChangeSetError(f"{path} was saved by a newer version of the app")
+    return change_set
+
+
+def write_change_set(path: str, change_set: Mapping) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(change_set, handle, separators=(",", ":"))
+
+
+def change_set_from_drafts(
+    engine: StocktakeEngine,
+    drafts: Mapping[str, tuple[float, float]],
+    session_id: str,
+    operator: str = "",
+    revision: int = 0,
+) -> dict:
+    """A change set for ``drafts`` (item id to sold/received) against ``engine``."""
+    skus = engine.fields["sku"]
+    lines = [
+        [item_id, skus[engine.index[item_id]] or "", sold, received]
+        for item_id, (sold, received) in drafts.items()
+        if sold or received
+    ]
+    return {
+        "format": CHANGE_SET_FORMAT,
+        "version": CHANGE_SET_VERSION,
+        "sessionId": session_id,
+        "operator": operator,
+        "revision": revision,
+        "updatedAt": iso_timestamp(),
+        "lines": lines,
+    }
+
+
+def _read_quantity(value: Any) -> float:
+    # Only numbers and text are read, as in the browser, so a list or object counts as 0.
+    if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        return parse_adjustment(value)
+    return 0.0
+
+
+def read_change_set_line(line: Any) -> tuple[str | None, str, float, float] | None:
+    """Port of ``readChangeSetLine``: ``(item_id, sku, sold, received)`` or None.
+
+    Sold and received are parsed like typed input and never negative. None
+    means the line is not an ``[itemId, sku, sold, received]`` list with a
+    text id or SKU.
+    """
+    if not isinstance(line, (list, tuple)) or len(line) < 4:
+        return None
+    item_id, sku = line[0], line[1]
+    has_id = isinstance(item_id, str) and item_id != ""
+    has_sku = isinstance(sku, str) and sku != ""
+    if not has_id and not has_sku:
+        return None
+    return (
+        item_id if has_id else None,
+        sku if has_sku else "",
+        _read_quantity(line[2]),
+        _read_quantity(line[3]),
+    )
+
+
+def newest_revisions(change_sets: Iterable[dict]) -> list[dict]:
+    """One set per session: the highest revision seen.
+
+    A set without a session id cannot be a revision of another, so each is kept.
+    """
+    newest: dict[Any, dict] = {}
+    for position, change_set in enumerate(change_sets):
+        key = change_set.get("sessionId") or ("", position)
+        existing = newest.get(key)
+        if existing is None or change_set.get("revision", 0) > existing.get("revision", 0):
+            newest[key] = change_set
+    return list(newest.values())
+
+
+def merge_change_sets(change_sets: Iterable[dict], engine: StocktakeEngine) -> MergedChangeSets:
+    """Sum every set's lines per item, matching by item id and then by SKU.
+
+    Lines matching neither, and malformed lines, go to ``unmatched``.
+    """
+    merged = MergedChangeSets()
+    id_by_sku: dict[str, str] | None = None
+    sold_by_id: dict[str, float] = {}
+    received_by_id: dict[str, float] = {}
+    for change_set in change_sets:
+        merged.sessions += 1
+        session_id = change_set.get("sessionId")
+        operator = change_set.get("operator") or ""
+        lines = change_set.get("lines")
+        for line in lines if isinstance(lines, list) else ():
+            merged.lines += 1
+            read = read_change_set_line(line)
+            if read is None:
+                merged.unmatched.append(
+                    {
+                        "sessionId": session_id,
+                        "operator": operator,
+                        "line": line,
+                        "reason": "invalid",
+                    }
+                )
+                continue
+            item_id, sku, sold, received = read
+            if item_id not in engine.index:
+                if id_by_sku is None:
+                    id_by_sku = {
+                        sku_value: engine.fields["id"][index]
+                        for index, sku_value in enumerate(engine.fields["sku"])
+                        if sku_value
+                    }
+                item_id = id_by_sku.get(sku) if sku else None
+                if item_id is None:
+                    merged.unmatched.append(
+                        {
+                            "sessionId": session_id,
+                            "operator": operator,
+                            "line": line,
+                            "reason": "unknown-item",
+                        }
+                    )
+                    continue
+            if not sold and not received:
+                continue
+            sold_by_id[item_id] = sold_by_id.get(item_id, 0.0) + sold
+            received_by_id[item_id] = received_by_id.get(item_id, 0.0) + received
+            operators = merged.operators.setdefault(item_id, [])
+            if operator and operator not in operators:
+                operators.append(operator)
+    merged.drafts = {
+        item_id: (sold, received_by_id[item_id]) for item_id, sold in sold_by_id.items()
+    }
+    return merged
+
+
+def apply_change_sets(
+    engine: StocktakeEngine,
+    change_sets: Iterable[dict],
+    performed_by: str,
+    notes: str = "",
+    timestamp: str | None = None,
+    store: StocktakeStore | None = None,
+) -> tuple[list[dict], MergedChangeSets]:
+    """Merge ``change_sets`` and commit them in one pass.
+
+    Every movement is recorded as performed by ``performed_by``, the operator
+    committing; the operators who counted the item, when their sets carried
+    names, go in ``countedBy``. With ``store`` the commit is also persisted
+    there.
+    """
+    merged = merge_change_sets(newest_revisions(change_sets), engine)
+
+    def credit_operators(entries: list[dict]) -> None:
+        for entry in entries:
+            operators = merged.operators.get(entry["itemId"])
+            if operators:
+                entry["countedBy"] = ", ".join(operators)
+
+    if store is not None:
+        entries = store.apply_stocktake(
+            engine, merged.drafts, performed_by, notes, timestamp, on_entries=credit_operators
+        )
+    else:
+        entries = engine.apply_stocktake(merged.drafts, performed_by, notes, timestamp)
+        credit_operators(entries)
+    return entries, merged
+
+
+def find_change_sets(directory: str) -> list[str]:
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(CHANGE_SET_SUFFIX) and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def apply_drop_directory(
+    engine: StocktakeEngine,
+    directory: str,
+    performed_by: str,
+    notes: str = "",
+    keep_files: bool = False,
+) -> tuple[list[dict], MergedChangeSets, list[str]]:
+    """Apply every change set in ``directory``; returns entries, the merge and the files used.
+
+    Unless ``keep_files`` is set, applied files are moved into ``applied/``
+    so the next run does not count them again.
+    """
+    paths = find_change_sets(directory)
+    entries, merged = apply_change_sets(
+        engine, (read_change_set(path) for path in paths), performed_by, notes
+    )
+    if entries and not keep_files:
+        applied = os.path.join(directory, APPLIED_DIRECTORY)
+        os.makedirs(applied, exist_ok=True)
+        for path in paths:
+            os.replace(path, os.path.join(applied, os.path.basename(path)))
+    return entries, merged, paths
@@ -0,0 +1,152 @@
+"""SQLite persistence for :class:`StocktakeEngine`, the counterpart of ``src/utils/persistence.js``.
+
+Items are stored one row each, keyed by id with their display position, and
+history as an append-only ``movements`` log. The database runs in WAL mode so
+a stocktake commit is one short transaction that only rewrites the items it
+touched, and readers are never blocked by it.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Callable, Iterable, Mapping
+
+from .engine import StocktakeEngine
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_position ON items (position);
+CREATE TABLE IF NOT EXISTS movements (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id TEXT,
+    timestamp TEXT,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_METADATA_KEY = "metadata"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class StocktakeStore:
+    """A SQLite file holding one store's inventory, movement log and metadata."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "StocktakeStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def save_engine(self, engine: StocktakeEngine) -> None:
+        """Replace everything stored with the engine's current state."""
+        with self.connection:
+            self.connection.execute("DELETE FROM items")
+            self.connection.execute("DELETE FROM movements")
+            self.connection.execute("DELETE FROM meta")
+            self.connection.executemany(
+                "INSERT INTO items (id, position, record) VALUES (?, ?, ?)",
+                (
+                    (record["id"], position, _dumps(record))
+                    for position, record in enumerate(engine.iter_items())
+                ),
+            )
+            self._append_movements(engine.history)
+            self._put_metadata(engine.metadata)
+
+    def load_engine(self) -> StocktakeEngine | None:
+        """Rebuild an engine from the database, or ``None`` if nothing is stored."""
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (_METADATA_KEY,)
+        ).fetchone()
+        if row is None:
+            return None
+        items = (
+            json.loads(record)
+            for (record,) in self.connection.execute("SELECT record FROM items ORDER BY position")
+        )
+        history = [
+            json.loads(record)
+            for (record,) in self.connection.execute("SELECT record FROM movements ORDER BY seq DESC")
+        ]
+        return StocktakeEngine(items, history, json.loads(row[0]))
+
+    def apply_stocktake(
+        self,
+        engine: StocktakeEngine,
+        drafts: Mapping[str, Any],
+        performed_by: str,
+        notes: str = "",
+        timestamp: str | None = None,
+        on_entries: Callable[[list[dict]], None] | None = None,
+    ) -> list[dict]:
+        """Run :meth:`StocktakeEngine.apply_stocktake` and persist only what changed.
+
+        The rewritten items are the drafted ones plus any whose last count
+        differed from their current count, since the commit rolls those forward.
+        ``on_entries`` may amend the new entries before they are saved.
+        """
+        touched = {
+            index
+            for index in range(len(engine))
+            if engine.last_counts[index] != engine.current_counts[index]
+        }
+        touched.update(engine.index[item_id] for item_id in drafts if item_id in engine.index)
+        entries = engine.apply_stocktake(drafts, performed_by, notes, timestamp)
+        if on_entries is not None:
+            on_entries(entries)
+        if not entries and not touched:
+            return entries
+        with self.connection:
+            self._put_items(engine, sorted(touched))
+            self._append_movements(entries)
+            self._put_metadata(engine.metadata)
+        return entries
+
+    def _put_items(self, engine: StocktakeEngine, indexes: Iterable[int]) -> None:
+        self.connection.executemany(
+            "INSERT INTO items (id, position, record) VALUES (?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET record = excluded.record",
+            (
+                (engine.fields["id"][index], index, _dumps(engine.item(index)))
+                for index in indexes
+            ),
+        )
+
+    def _append_movements(self, entries: list[Mapping[str, Any]]) -> None:
+        # Entries arrive newest first; the log is written oldest first.
+        self.connection.executemany(
+            "INSERT INTO movements (item_id, timestamp, record) VALUES (?, ?, ?)",
+            (
+                (entry.get("itemId"), entry.get("timestamp"), _dumps(entry))
+                for entry in reversed(entries)
+            ),
+        )
+
+    def _put_metadata(self, metadata: Mapping[str, Any]) -> None:
+        self.connection.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (_METADATA_KEY, _dumps(dict(metadata))),
+        )
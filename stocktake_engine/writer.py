@@ -0,0 +1,341 @@
+"""Streaming counterpart of ``createUpdatedWorkbook`` in ``src/utils/excel.js``.
+
+Writes the Stocktake, Movements and Summary sheets with the same headers,
+column widths and header styling as the browser export. Rows go straight into
+the zip entry as they are produced and strings are written inline, so no sheet
+is ever held in memory; the summary totals are gathered while the inventory
+sheet is written.
+"""
+
+from __future__ import annotations
+
+import re
+import zipfile
+from datetime import datetime, timezone
+from typing import IO, Any, Iterable, Mapping
+from xml.sax.saxutils import escape, quoteattr
+
+from .costing import (
+    calculate_layers_quantity,
+    calculate_layers_value,
+    ensure_finite_number,
+    is_finite,
+)
+from .engine import StocktakeEngine, iso_timestamp
+from .profiler import NULL_PROFILER, Profiler
+from .reader import HISTORY_SHEET_NAME, MOVEMENT_HEADERS, OPTIONAL_COLUMNS, REQUIRED_COLUMNS
+from .xlsx import NS_MAIN, NS_PKG_REL, NS_REL
+
+EXCEL_SHEET_NAME = "Stocktake"
+SUMMARY_SHEET_NAME = "Summary"
+
+INVENTORY_HEADERS = [*REQUIRED_COLUMNS.values(), OPTIONAL_COLUMNS["itemNote"]]
+INVENTORY_WIDTHS = [14, 28, 18, 12, 14, 16, 28]
+MOVEMENT_WIDTHS = [14, 26, 18, 14, 12, 12, 14, 12, 12, 16, 18, 28, 28, 22, 22]
+SUMMARY_WIDTHS = [20, 28]
+
+# Indexes into cellXfs in STYLES_XML.
+STYLE_DEFAULT = 0
+STYLE_HEADER = 1
+STYLE_DATE = 2
+STYLE_LABEL = 3
+STYLE_VALUE = 4
+STYLE_VALUE_DATE = 5
+
+STYLES_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="{NS_MAIN}">
+<fonts count="3"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font><font><b/><sz val="11"/><color rgb="FF1F2937"/><name val="Calibri"/></font></fonts>
+<fills count="3"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill><fill><patternFill patternType="solid"><fgColor rgb="FF4F46E5"/></patternFill></fill></fills>
+<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border><border><left style="thin"><color rgb="FFE2E8F0"/></left><right style="thin"><color rgb="FFE2E8F0"/></right><top style="thin"><color rgb="FFE2E8F0"/></top><bottom style="thin"><color rgb="FFE2E8F0"/></bottom><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="6">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1"><alignment horizontal="center" vertical="center" wrapText="1"/></xf>
+<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1"/>
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1"><alignment horizontal="left" vertical="center"/></xf>
+<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1" applyAlignment="1"><alignment horizontal="left" vertical="center"/></xf>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>
+"""
+
+_EXCEL_EPOCH = datetime(1899, 12, 30, tzinfo=timezone.utc)
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_ROW_BUFFER = 512
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def iso_to_excel_serial(value: str | None) -> float | None:
+    """Excel date serial for an ISO timestamp, or ``None`` when it does not parse."""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - _EXCEL_EPOCH).total_seconds() / 86400
+
+
+def average_layer_cost(layers: Iterable[dict], fallback: Any = 0.0) -> float:
+    """Mirror of ``calculateAverageLayerCost``: value over quantity, else ``fallback``."""
+    layers = list(layers)
+    quantity = calculate_layers_quantity(layers)
+    if quantity == 0:
+        return ensure_finite_number(fallback, 0.0)
+    return calculate_layers_value(layers) / quantity
+
+
+class _SheetWriter:
+    """Writes one worksheet's XML into an open zip entry, a few hundred rows at a time."""
+
+    def __init__(self, handle: IO[bytes], widths: list[int]) -> None:
+        self.handle = handle
+        self.letters: list[str] = []
+        self.row_number = 0
+        self.buffer: list[str] = []
+        cols = "".join(
+            f'<col min="{position}" max="{position}" width="{width}" customWidth="1"/>'
+            for position, width in enumerate(widths, start=1)
+        )
+        self._write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<worksheet xmlns="{NS_MAIN}" xmlns:r="{NS_REL}"><cols>{cols}</cols><sheetData>'
+        )
+
+    def _write(self, text: str) -> None:
+        self.handle.write(text.encode("utf-8"))
+
+    def row(self, values: Iterable[Any], styles: Iterable[int] | int = STYLE_DEFAULT) -> None:
+        self.row_number += 1
+        number = self.row_number
+        column_styles = styles if not isinstance(styles, int) else None
+        cells = []
+        for position, value in enumerate(values):
+            if position >= len(self.letters):
+                self.letters.append(_column_letter(position))
+            if value is None or value == "":
+                continue
+            style = column_styles[position] if column_styles is not None else styles
+            reference = f"{self.letters[position]}{number}"
+            style_attribute = f' s="{style}"' if style else ""
+            if isinstance(value, bool):
+                cells.append(f'<c r="{reference}"{style_attribute} t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float)):
+                if not is_finite(float(value)):
+                    continue
+                cells.append(f'<c r="{reference}"{style_attribute}><v>{value!r}</v></c>')
+            else:
+                text = escape(_ILLEGAL_XML.sub("", str(value)))
+                cells.append(
+                    f'<c r="{reference}"{style_attribute} t="inlineStr">'
+                    f'<is><t xml:space="preserve">{text}</t></is></c>'
+                )
+        self.buffer.append(f'<row r="{number}">{"".join(cells)}</row>')
+        if len(self.buffer) >= _ROW_BUFFER:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self._write("".join(self.buffer))
+            self.buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        self._write("</sheetData></worksheet>")
+
+
+def _movement_row(entry: Mapping[str, Any]) -> list[Any]:
+    sold = entry.get("sold") or 0
+    value_change = entry.get("valueImpact")
+    if value_change is None:
+        sold_value = entry.get("soldValue")
+        if sold_value is None:
+            sold_value = sold * (entry.get("soldUnitCost") or entry.get("unitCost") or 0)
+        value_change = (entry.get("receivedValue") or 0) - sold_value
+    unit_cost = entry.get("unitCost")
+    return [
+        entry.get("sku"),
+        entry.get("name"),
+        entry.get("category"),
+        entry.get("previousCount"),
+        sold,
+        entry.get("received") or 0,
+        entry.get("newCount"),
+        entry.get("delta"),
+        "" if unit_cost is None else unit_cost,
+        value_change,
+        entry.get("performedBy") or "",
+        entry.get("notes") or "",
+        entry.get("itemNote") or "",
+        iso_to_excel_serial(entry.get("timestamp")),
+        entry.get("countedBy") or "",
+    ]
+
+
+_MOVEMENT_STYLES = [STYLE_DEFAULT] * 13 + [STYLE_DATE, STYLE_DEFAULT]
+_INVENTORY_STYLES = [STYLE_DEFAULT] * 5 + [STYLE_DATE, STYLE_DEFAULT]
+
+
+def _workbook_xml(sheet_names: list[str]) -> str:
+    sheets = "".join(
+        f'<sheet name={quoteattr(name)} sheetId="{position}" r:id="rId{position}"/>'
+        for position, name in enumerate(sheet_names, start=1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<workbook xmlns="{NS_MAIN}" xmlns:r="{NS_REL}"><sheets>{sheets}</sheets></workbook>'
+    )
+
+
+def _workbook_rels(sheet_count: int) -> str:
+    sheet_type = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+    styles_type = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+    relations = "".join(
+        f'<Relationship Id="rId{position}" Type="{sheet_type}" Target="worksheets/sheet{position}.xml"/>'
+        for position in range(1, sheet_count + 1)
+    )
+    relations += (
+        f'<Relationship Id="rId{sheet_count + 1}" Type="{styles_type}" Target="styles.xml"/>'
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<Relationships xmlns="{NS_PKG_REL}">{relations}</Relationships>'
+    )
+
+
+def _content_types(sheet_count: int) -> str:
+    sheet_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{position}.xml" ContentType="{sheet_type}"/>'
+        for position in range(1, sheet_count + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f"{overrides}</Types>"
+    )
+
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<Relationships xmlns="{NS_PKG_REL}"><Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+
+
+def write_workbook(
+    target: str | IO[bytes],
+    inventory: Iterable[Mapping[str, Any]],
+    metadata: Mapping[str, Any] | None = None,
+    history: Iterable[Mapping[str, Any]] = (),
+    profiler: Profiler = NULL_PROFILER,
+) -> dict:
+    """Write an updated stocktake workbook and return its summary totals.
+
+    ``inventory`` and ``history`` may be generators; each is read once.
+    """
+    metadata = metadata or {}
+    sheet_names = [metadata.get("sheetName") or EXCEL_SHEET_NAME, HISTORY_SHEET_NAME, SUMMARY_SHEET_NAME]
+    totals = {"totalSkus": 0, "unitsOnHand": 0.0, "inventoryValue": 0.0, "movements": 0}
+    with profiler.stage("export") as export_stage:
+        _write_package(target, inventory, metadata, history, sheet_names, totals, profiler)
+        export_stage["rows"] = totals["totalSkus"] + totals["movements"]
+    return totals
+
+
+def _write_package(
+    target: str | IO[bytes],
+    inventory: Iterable[Mapping[str, Any]],
+    metadata: Mapping[str, Any],
+    history: Iterable[Mapping[str, Any]],
+    sheet_names: list[str],
+    totals: dict,
+    profiler: Profiler,
+) -> None:
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _content_types(len(sheet_names)))
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _workbook_xml(sheet_names))
+        archive.writestr("xl/_rels/workbook.xml.rels", _workbook_rels(len(sheet_names)))
+        archive.writestr("xl/styles.xml", STYLES_XML)
+
+        with profiler.stage("write-sheet:inventory") as stage, archive.open(
+            "xl/worksheets/sheet1.xml", "w", force_zip64=True
+        ) as handle:
+            sheet = _SheetWriter(handle, INVENTORY_WIDTHS)
+            sheet.row(INVENTORY_HEADERS, STYLE_HEADER)
+            for item in inventory:
+                layers = item.get("costLayers") or []
+                sheet.row(
+                    [
+                        item.get("sku"),
+                        item.get("name"),
+                        item.get("category"),
+                        item.get("currentCount"),
+                        average_layer_cost(layers, item.get("unitCost")),
+                        iso_to_excel_serial(item.get("lastUpdated")),
+                        item.get("itemNote") or "",
+                    ],
+                    _INVENTORY_STYLES,
+                )
+                totals["totalSkus"] += 1
+                totals["unitsOnHand"] += item.get("currentCount") or 0
+                totals["inventoryValue"] += calculate_layers_value(layers)
+            sheet.close()
+            stage["rows"] = totals["totalSkus"]
+
+        with profiler.stage("write-sheet:movements") as stage, archive.open(
+            "xl/worksheets/sheet2.xml", "w", force_zip64=True
+        ) as handle:
+            sheet = _SheetWriter(handle, MOVEMENT_WIDTHS)
+            sheet.row(MOVEMENT_HEADERS, STYLE_HEADER)
+            for entry in history:
+                sheet.row(_movement_row(entry), _MOVEMENT_STYLES)
+                totals["movements"] += 1
+            sheet.close()
+            stage["rows"] = totals["movements"]
+
+        with archive.open("xl/worksheets/sheet3.xml", "w") as handle:
+            sheet = _SheetWriter(handle, SUMMARY_WIDTHS)
+            sheet.row(["Stocktake Inventory Tool"], STYLE_HEADER)
+            summary = [
+                ("Generated At", iso_to_excel_serial(iso_timestamp())),
+                ("Source File", metadata.get("sourceFileName") or ""),
+                ("Imported At", iso_to_excel_serial(metadata.get("lastImportedAt"))),
+                ("Last Stocktake", iso_to_excel_serial(metadata.get("lastStocktakeAt"))),
+                ("Total SKUs", totals["totalSkus"]),
+                ("Units On Hand", totals["unitsOnHand"]),
+                ("Inventory Value", totals["inventoryValue"]),
+            ]
+            date_labels = {"Generated At", "Imported At", "Last Stocktake"}
+            for label, value in summary:
+                value_style = STYLE_VALUE_DATE if label in date_labels else STYLE_VALUE
+                sheet.row([label, value], [STYLE_LABEL, value_style])
+            sheet.close()
+
+
+def write_engine_workbook(
+    target: str | IO[bytes],
+    engine: StocktakeEngine,
+    profiler: Profiler = NULL_PROFILER,
+) -> dict:
+    """:func:`write_workbook` for everything held by ``engine``."""
+    return write_workbook(target, engine.iter_items(), engine.metadata, engine.history, profiler)
@@ -0,0 +1,212 @@
+"""Minimal streaming .xlsx reader built on ``zipfile`` and ``iterparse``.
+
+Only what the stocktake workbooks need: sheet lookup by name, shared and
+inline strings, booleans, numbers and date-formatted numbers. Rows are yielded
+one at a time and their XML elements cleared straight away, so memory stays
+flat no matter how long a sheet grows; only the shared-string table is held.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import re
+import zipfile
+from datetime import datetime, timedelta, timezone
+from typing import IO, Any, Callable, Iterator
+from xml.etree.ElementTree import iterparse
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_CELL = f"{{{NS_MAIN}}}c"
+_ROW = f"{{{NS_MAIN}}}row"
+_VALUE = f"{{{NS_MAIN}}}v"
+_INLINE = f"{{{NS_MAIN}}}is"
+_TEXT = f"{{{NS_MAIN}}}t"
+_SHARED_ITEM = f"{{{NS_MAIN}}}si"
+_SHEET_DATA = f"{{{NS_MAIN}}}sheetData"
+
+_BUILTIN_DATE_FORMATS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 46, 47}
+_DATE_CODE = re.compile(r"[dmyhs]", re.IGNORECASE)
+_QUOTED_OR_BRACKETED = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.')
+_EXCEL_EPOCH = datetime(1899, 12, 30, tzinfo=timezone.utc)
+
+ProgressCallback = Callable[[str, int, float], None]
+
+
+def column_index(reference: str) -> int:
+    """Zero-based column index of a cell reference such as ``"AB12"``."""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def excel_serial_to_iso(serial: float) -> str:
+    """Convert an Excel date serial to an ISO string, dropping fractional seconds."""
+    moment = _EXCEL_EPOCH + timedelta(days=serial)
+    moment = moment.replace(microsecond=0)
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class _CountingReader:
+    """Wraps a zip member and counts bytes consumed, for progress reporting."""
+
+    def __init__(self, handle: IO[bytes]) -> None:
+        self.handle = handle
+        self.consumed = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.handle.read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+class XlsxReader:
+    """Read worksheets from an .xlsx file row by row."""
+
+    def __init__(self, source: str | IO[bytes]) -> None:
+        self.archive = zipfile.ZipFile(source)
+        self.sheet_paths = self._read_sheet_paths()
+        self.shared_strings = self._read_shared_strings()
+        self.date_styles = self._read_date_styles()
+
+    def __enter__(self) -> "XlsxReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.archive.close()
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self.sheet_paths)
+
+    def _read_sheet_paths(self) -> dict[str, str]:
+        targets: dict[str, str] = {}
+        with self.archive.open("xl/_rels/workbook.xml.rels") as handle:
+            for _, element in iterparse(handle):
+                if element.tag == f"{{{NS_PKG_REL}}}Relationship":
+                    target = element.get("Target", "")
+                    if target.startswith("/"):
+                        path = target.lstrip("/")
+                    else:
+                        path = posixpath.normpath(posixpath.join("xl", target))
+                    targets[element.get("Id", "")] = path
+        sheets: dict[str, str] = {}
+        with self.archive.open("xl/workbook.xml") as handle:
+            for _, element in iterparse(handle):
+                if element.tag == f"{{{NS_MAIN}}}sheet":
+                    relation = element.get(f"{{{NS_REL}}}id", "")
+                    sheets[element.get("name", "")] = targets.get(relation, "")
+        return sheets
+
+    def _read_shared_strings(self) -> list[str]:
+        if "xl/sharedStrings.xml" not in self.archive.namelist():
+            return []
+        strings: list[str] = []
+        with self.archive.open("xl/sharedStrings.xml") as handle:
+            for _, element in iterparse(handle):
+                if element.tag == _SHARED_ITEM:
+                    strings.append("".join(node.text or "" for node in element.iter(_TEXT)))
+                    element.clear()
+        return strings
+
+    def _read_date_styles(self) -> set[int]:
+        if "xl/styles.xml" not in self.archive.namelist():
+            return set()
+        custom_formats: dict[int, str] = {}
+        format_ids: list[int] = []
+        in_cell_xfs = False
+        with self.archive.open("xl/styles.xml") as handle:
+            for event, element in iterparse(handle, events=("start", "end")):
+                tag = element.tag
+                if tag == f"{{{NS_MAIN}}}cellXfs":
+                    in_cell_xfs = event == "start"
+                elif event == "end" and tag == f"{{{NS_MAIN}}}numFmt":
+                    custom_formats[int(element.get("numFmtId", "0"))] = element.get("formatCode", "")
+                elif event == "start" and in_cell_xfs and tag == f"{{{NS_MAIN}}}xf":
+                    format_ids.append(int(element.get("numFmtId", "0")))
+        date_styles = set()
+        for style_index, format_id in enumerate(format_ids):
+            if format_id in _BUILTIN_DATE_FORMATS:
+                date_styles.add(style_index)
+            elif format_id in custom_formats:
+                code = _QUOTED_OR_BRACKETED.sub("", custom_formats[format_id])
+                if _DATE_CODE.search(code):
+                    date_styles.add(style_index)
+        return date_styles
+
+    def sheet_size(self, sheet_name: str) -> int:
+        return self.archive.getinfo(self.sheet_paths[sheet_name]).file_size
+
+    def _cell_value(self, cell: Any) -> Any:
+        cell_type = cell.get("t", "n")
+        if cell_type == "inlineStr":
+            inline = cell.find(_INLINE)
+            return "".join(node.text or "" for node in inline.iter(_TEXT)) if inline is not None else ""
+        raw = cell.findtext(_VALUE)
+        if raw is None:
+            return ""
+        if cell_type == "s":
+            return self.shared_strings[int(raw)]
+        if cell_type == "b":
+            return raw == "1"
+        if cell_type in ("str", "e"):
+            return raw
+        number = float(raw)
+        if int(cell.get("s", "0")) in self.date_styles:
+            return excel_serial_to_iso(number)
+        return int(number) if number.is_integer() else number
+
+    def iter_rows(
+        self,
+        sheet_name: str,
+        on_progress: ProgressCallback | None = None,
+        progress_every: int = 5000,
+    ) -> Iterator[list[Any]]:
+        """Yield each row of ``sheet_name`` as a dense list of cell values.
+
+        Blank rows are skipped. ``on_progress(sheet_name, rows, fraction)`` is
+        called every ``progress_every`` rows and once at the end, with the
+        fraction of the sheet's XML consumed so far.
+        """
+        path = self.sheet_paths[sheet_name]
+        total_bytes = self.archive.getinfo(path).file_size or 1
+        rows_read = 0
+        with self.archive.open(path) as member:
+            reader = _CountingReader(member)
+            sheet_data = None
+            for event, element in iterparse(reader, events=("start", "end")):
+                if event == "start":
+                    if element.tag == _SHEET_DATA:
+                        sheet_data = element
+                    continue
+                if element.tag != _ROW:
+                    continue
+                values: list[Any] = []
+                for cell in element.iter(_CELL):
+                    reference = cell.get("r")
+                    if reference:
+                        position = column_index(reference)
+                        if position > len(values):
+                            values.extend([""] * (position - len(values)))
+                    values.append(self._cell_value(cell))
+                element.clear()
+                if sheet_data is not None:
+                    sheet_data.clear()
+                while values and values[-1] == "":
+                    values.pop()
+                if not values:
+                    continue
+                rows_read += 1
+                if on_progress and rows_read % progress_every == 0:
+                    on_progress(sheet_name, rows_read, min(1.0, reader.consumed / total_bytes))
+                yield values
+        if on_progress:
+            on_progress(sheet_name, rows_read, 1.0)
@@ -0,0 +1,119 @@
+// Writes costing_parity.json from src/utils/costing.js and normalise.js, for
+// tests/test_costing_parity.py to check stocktake_engine against. Seeded, so the output
+// only changes when the JS maths does. Run with `node tests/fixtures/generate_costing_fixtures.js`.
+import { writeFileSync } from 'node:fs'
+import { dirname, join } from 'node:path'
+import { fileURLToPath } from 'node:url'
+import { createRandom } from '../../benchmarks/synthetic.js'
+import {
+  buildHistoryEntry,
+  computeCostMovement,
+  mergeCostLayers,
+  summariseCostImpact,
+} from '../../src/utils/costing.js'
+import { normaliseHistoryEntry, normaliseInventoryItem } from '../../src/utils/normalise.js'
+
+const CASES = 80
+const DAY_MS = 24 * 60 * 60 * 1000
+const START = Date.parse('2026-01-05T09:00:00.000Z')
+const POLICIES = [
+  undefined,
+  { costStep: 0, ageBucketDays: 0 },
+  { costStep: 0.01, ageBucketDays: 7 },
+  { costStep: 0.05, ageBucketDays: 30 },
+]
+
+const random = createRandom(2024)
+const pick = (values) => values[Math.floor(random() * values.length)]
+const quantity = () => pick([0, 1, 2.5, 3, 12, 40, 0.333]) * (1 + Math.floor(random() * 4))
+const cost = () => Math.round(random() * 4000) / pick([100, 1000, 10000])
+const timestamp = () =>
+  pick([null, new Date(START + (Math.floor(random() * 40) * DAY_MS) / 2).toISOString()])
+const layers = () =>
+  Array.from({ length: Math.floor(random() * 5) }, () => ({
+    quantity: quantity(),
+    unitCost: cost(),
+    acquiredAt: timestamp(),
+  }))
+const layerQuantity = (source) => source.reduce((total, layer) => total + layer.quantity, 0)
+const item = (index) => ({
+  id: `item-${index}`,
+  sku: `SKU-${String(index).padStart(4, '0')}`,
+  name: `Item ${index}`,
+  category: pick(['Produce', 'Dairy', 'Frozen']),
+  unitCost: cost(),
+  currentCount: 0,
+  itemNote: pick(['', 'Check shelf']),
+  costLayers: layers(),
+})
+
+const movements = []
+const merges = []
+const impacts = []
+const entries = []
+for (let index = 0; index < CASES; index += 1) {
+  const input = {
+    layers: layers(),
+    sold: pick([0, 0, 1, 5, 7.5, 60]),
+    received: pick([0, 0, 3, 24]),
+    unitCost: cost(),
+    timestamp: timestamp(),
+    policy: pick(POLICIES),
+  }
+  movements.push({ input, expected: computeCostMovement(input) })
+
+  const mergeInput = { layers: layers(), policy: pick(POLICIES) }
+  merges.push({
+    input: mergeInput,
+    expected: mergeCostLayers(mergeInput.layers, mergeInput.policy),
+  })
+
+  const source = item(index)
+  source.currentCount = layerQuantity(source.costLayers)
+  const sold = pick([0, 1, 4, 30])
+  const received = pick([0, 6, 12])
+  const at = new Date(START + index * DAY_MS).toISOString()
+  const summary = summariseCostImpact(source, sold, received, at)
+  impacts.push({ input: { item: source, sold, received, timestamp: at }, expected: summary })
+  const meta = { performedBy: pick(['Avery', 'Sam', '']), notes: pick(['', 'Weekly count']) }
+  entries.push({
+    input: { item: source, sold, received, timestamp: at, meta, costSummary: summary },
+    expected: buildHistoryEntry(source, sold, received, summary.totalQuantity, at, meta, summary),
+  })
+}
+
+// Rows as the workbook reader gives them: counts that disagree with their layers, missing
+// costs and values, and notes under each of the columns the app reads.
+const workbookMeta = {
+  importedAt: '2026-02-01T00:00:00.000Z',
+  lastStocktakeAt: '2026-01-31T17:00:00.000Z',
+}
+const inventory = Array.from({ length: CASES / 4 }, (_, index) => {
+  const row = item(index)
+  row.currentCount = pick([layerQuantity(row.costLayers), 5, 0])
+  if (random() < 0.3) delete row.costLayers
+  if (random() < 0.2) row.lastCount = pick([3, 10])
+  if (random() < 0.2) row.lastUpdated = timestamp()
+  if (random() < 0.2) row.Notes = ' From the Notes column '
+  return { input: row, expected: normaliseInventoryItem(row, workbookMeta) }
+})
+const history = Array.from({ length: CASES / 4 }, (_, index) => {
+  const entry = {
+    id: `entry-${index}`,
+    itemId: `item-${index}`,
+    sold: pick([0, 2, 9]),
+    received: pick([0, 12]),
+    unitCost: cost(),
+  }
+  if (random() < 0.5) entry.soldValue = Math.round(entry.sold * cost() * 100) / 100
+  if (random() < 0.5) entry.receivedValue = Math.round(entry.received * cost() * 100) / 100
+  if (random() < 0.3) entry.soldUnitCost = cost()
+  if (random() < 0.3) entry.valueImpact = pick([-4.5, 0, 12.25])
+  return { input: entry, expected: normaliseHistoryEntry(entry) }
+})
+
+const folder = dirname(fileURLToPath(import.meta.url))
+writeFileSync(
+  join(folder, 'costing_parity.json'),
+  `${JSON.stringify({ movements, merges, impacts, entries, workbookMeta, inventory, history })}\n`,
+)
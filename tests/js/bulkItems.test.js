@@ -0,0 +1,78 @@
+import assert from 'node:assert/strict'
+import { readFileSync } from 'node:fs'
+import { test } from 'node:test'
+import { parseBulkItemText, prepareBulkItems } from '../../src/utils/bulkItems.js'
+import { createInventoryStore } from '../../src/utils/inventoryStore.js'
+
+// Shared with tests/test_onboarding.py, so both sides allocate the same SKUs.
+const CASES = JSON.parse(
+  readFileSync(new URL('../fixtures/bulk_item_cases.json', import.meta.url), 'utf8'),
+)
+const TIMESTAMP = '2026-02-01T09:00:00.000Z'
+
+const storeWith = (existing) =>
+  createInventoryStore(
+    existing.map(([id, sku]) => ({
+      id,
+      sku,
+      name: sku,
+      category: 'Pantry',
+      currentCount: 1,
+      lastCount: 1,
+      unitCost: 0,
+      costLayers: [],
+    })),
+  )
+
+test('parseBulkItemText reads the shared cases', () => {
+  CASES.text.forEach(({ text, rows }) => {
+    assert.deepEqual(parseBulkItemText(text), rows, JSON.stringify(text))
+  })
+})
+
+CASES.allocation.forEach((testCase) => {
+  test(testCase.name, () => {
+    const store = storeWith(testCase.existing)
+    const result = prepareBulkItems(store, testCase.rows, {
+      nextSkuNumber: testCase.nextSkuNumber,
+      timestamp: TIMESTAMP,
+    })
+    assert.deepEqual(
+      result.items.map((item) => item.sku),
+      testCase.skus,
+    )
+    assert.deepEqual(
+      result.items.map((item) => item.id),
+      testCase.ids,
+    )
+    assert.deepEqual(
+      result.items.map((item) => item.currentCount),
+      testCase.counts,
+    )
+    assert.deepEqual(
+      result.skipped.map(({ row, reason }) => [row, reason]),
+      testCase.skipped,
+    )
+    assert.equal(result.nextSkuNumber, testCase.nextSkuNumberAfter)
+    assert.equal(store.items.length, testCase.existing.length)
+  })
+})
+
+test('each new item gets its opening layer and history entry', () => {
+  const result = prepareBulkItems(
+    storeWith([]),
+    [{ name: 'Jam', currentCount: '4', unitCost: '2.5' }, { sku: 'H-1', name: 'Honey' }],
+    { timestamp: TIMESTAMP, performedBy: ' Sam ' },
+  )
+  const [jam] = result.items
+  assert.equal(jam.lastCount, 4)
+  assert.equal(jam.category, 'Uncategorised')
+  assert.deepEqual(jam.costLayers, [{ quantity: 4, unitCost: 2.5, acquiredAt: TIMESTAMP }])
+  assert.deepEqual(
+    result.historyEntries.map((entry) => [entry.sku, entry.performedBy]),
+    [
+      ['SKU-0001', 'Sam'],
+      ['H-1', 'Sam'],
+    ],
+  )
+})
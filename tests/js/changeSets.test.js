@@ -0,0 +1,149 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import {
+  CHANGE_SET_FORMAT,
+  attributeMergedEntries,
+  changeSetFromStore,
+  mergeChangeSets,
+  parseChangeSet,
+  readChangeSetLine,
+  remainingDrafts,
+  summariseChangeSet,
+  upsertChangeSet,
+} from '../../src/utils/changeSets.js'
+import { createInventoryStore, updateStoreItem } from '../../src/utils/inventoryStore.js'
+
+const store = createInventoryStore(
+  ['A', 'B', 'C'].map((letter) => ({
+    id: `id-${letter}`,
+    sku: `SKU-${letter}`,
+    name: `Item ${letter}`,
+    category: 'Pantry',
+    currentCount: 10,
+    lastCount: 10,
+    unitCost: 1,
+    costLayers: [{ quantity: 10, unitCost: 1, acquiredAt: null }],
+    draftSold: '',
+    draftReceived: '',
+  })),
+)
+
+const changeSet = (sessionId, lines, { operator = '', revision = 0 } = {}) => ({
+  format: CHANGE_SET_FORMAT,
+  version: 1,
+  sessionId,
+  operator,
+  revision,
+  lines,
+})
+
+test('lines are read as numbers, never negative', () => {
+  assert.deepEqual(readChangeSetLine(['id-A', 'SKU-A', '2', '1,200']), {
+    itemId: 'id-A',
+    sku: 'SKU-A',
+    sold: 2,
+    received: 1200,
+  })
+  assert.deepEqual(readChangeSetLine(['', 'SKU-A', -4, { count: 3 }]), {
+    itemId: null,
+    sku: 'SKU-A',
+    sold: 0,
+    received: 0,
+  })
+  const malformed = [null, 'id-A', ['id-A', 'SKU-A', 1], [7, null, 1, 1], [{}, [], 1, 1]]
+  malformed.forEach((line) => {
+    assert.equal(readChangeSetLine(line), null, JSON.stringify(line))
+  })
+})
+
+test('merging sums text and numeric quantities numerically', () => {
+  const merged = mergeChangeSets(
+    [
+      changeSet('s1', [['id-A', 'SKU-A', '2', '0']], { operator: 'Avery' }),
+      changeSet('s2', [['id-A', 'SKU-A', 3, '1']], { operator: 'Sam' }),
+    ],
+    store,
+  )
+  assert.deepEqual(merged.drafts.get('id-A'), { sold: 5, received: 1, operators: ['Avery', 'Sam'] })
+  assert.equal(merged.lines, 2)
+  assert.equal(merged.sessions, 2)
+})
+
+test('lines match by SKU when the id is unknown, and bad lines are reported', () => {
+  const lines = [
+    ['tab-2-id', 'SKU-B', 4, 0],
+    ['nope', 'SKU-Z', 1, 0],
+    ['id-C', 'SKU-C', -3, 'abc'],
+    'not a line',
+    [null, null, 1, 1],
+  ]
+  const merged = mergeChangeSets([changeSet('s1', lines, { operator: 'Avery' })], store)
+  assert.deepEqual([...merged.drafts.keys()], ['id-B'])
+  assert.equal(merged.drafts.get('id-B').sold, 4)
+  assert.deepEqual(
+    merged.unmatched.map(({ reason, line }) => [reason, line]),
+    [
+      ['unknown-item', lines[1]],
+      ['invalid', lines[3]],
+      ['invalid', lines[4]],
+    ],
+  )
+  assert.equal(merged.lines, 5)
+})
+
+test('counters go in countedBy and performedBy stays the committer', () => {
+  const counted = changeSet('s1', [['id-A', 'SKU-A', 1, 0]], { operator: 'Sam' })
+  const merged = mergeChangeSets([counted], store)
+  const entries = [
+    { itemId: 'id-A', performedBy: 'Avery' },
+    { itemId: 'id-B', performedBy: 'Avery' },
+  ]
+  assert.deepEqual(attributeMergedEntries(entries, merged.drafts), [
+    { itemId: 'id-A', performedBy: 'Avery', countedBy: 'Sam' },
+    { itemId: 'id-B', performedBy: 'Avery' },
+  ])
+})
+
+test('a newer revision replaces a session set and an older one is ignored', () => {
+  const first = changeSet('s1', [['id-A', 'SKU-A', 1, 0]], { revision: 1 })
+  const second = changeSet('s1', [['id-A', 'SKU-A', 5, 0]], { revision: 2 })
+  const sets = upsertChangeSet(upsertChangeSet(new Map(), first), second)
+  assert.equal(sets.get('s1'), second)
+  assert.equal(upsertChangeSet(sets, first), sets)
+  const merged = mergeChangeSets([...sets.values()], store)
+  assert.equal(merged.drafts.get('id-A').sold, 5)
+})
+
+test('a set built from drafts round-trips and summarises numerically', () => {
+  const drafted = updateStoreItem(store, 'id-B', (item) => ({
+    ...item,
+    draftSold: '3',
+    draftReceived: '2',
+  }))
+  const built = changeSetFromStore(drafted, { sessionId: 's1', operator: 'Avery', revision: 4 })
+  assert.deepEqual(built.lines, [['id-B', 'SKU-B', 3, 2]])
+  const parsed = parseChangeSet(JSON.stringify(built))
+  assert.deepEqual(summariseChangeSet(parsed), { lines: 1, sold: 3, received: 2 })
+  assert.deepEqual(summariseChangeSet(changeSet('s2', [['id-A', '', '4', '1'], 'bad'])), {
+    lines: 2,
+    sold: 4,
+    received: 1,
+  })
+})
+
+test('files that are not change sets, or are from a newer version, are rejected', () => {
+  const text = (fields) => JSON.stringify({ ...changeSet('s', []), ...fields })
+  assert.throws(() => parseChangeSet(text({ format: 'other' })), /not a stocktake/)
+  assert.throws(() => parseChangeSet(text({ sessionId: 7 })), /not a stocktake/)
+  assert.throws(() => parseChangeSet(text({ version: 2 })), /newer/)
+})
+
+test('remaining drafts subtract what another tab already committed', () => {
+  const drafted = updateStoreItem(store, 'id-A', (item) => ({
+    ...item,
+    draftSold: '5',
+    draftReceived: '1',
+  }))
+  const consumed = changeSet('s1', [['id-A', 'SKU-A', '3', 1], 'bad'])
+  assert.deepEqual([...remainingDrafts(drafted, consumed)], [['id-A', { sold: 2, received: 0 }]])
+})
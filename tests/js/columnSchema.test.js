@@ -0,0 +1,129 @@
+import assert from 'node:assert/strict'
+import { beforeEach, test } from 'node:test'
+import { addColumn, createColumnarTable } from '../../src/utils/columnarTable.js'
+import {
+  attachColumnSchema,
+  columnSchemaFor,
+  inferColumnSchema,
+  loadRoleOverrides,
+  saveRoleOverrides,
+  setColumnRole,
+} from '../../src/utils/columnSchema.js'
+
+// Enough of localStorage for the saved layouts.
+const storage = new Map()
+globalThis.localStorage = {
+  getItem: (key) => storage.get(key) ?? null,
+  setItem: (key, value) => storage.set(key, String(value)),
+}
+beforeEach(() => storage.clear())
+
+const cellReader = (rows) => (rowIndex, _column, columnIndex) => rows[rowIndex][columnIndex]
+const infer = (columns, rows, overrides) =>
+  inferColumnSchema(columns, rows.length, cellReader(rows), overrides)
+
+const tableOf = (columns, rows) => {
+  const schema = infer(columns, rows)
+  const table = createColumnarTable(columns, rows.length, cellReader(rows), {
+    isNumeric: (column) => schema.numeric.has(column),
+  })
+  return attachColumnSchema(table, schema)
+}
+
+const STOCK_COLUMNS = ['Week', 'SKU', 'Product', 'Opening Stock', 'Received', 'Sold', 'Closing Stock']
+const STOCK_ROWS = Array.from({ length: 40 }, (_, index) => [
+  `Week ${(index % 4) + 1}`,
+  `BRY-${String(100 + index)}`,
+  `Berry ${index}`,
+  20 + index,
+  '5',
+  3,
+  22 + index,
+])
+
+test('roles come from headers confirmed by values', () => {
+  const schema = infer(STOCK_COLUMNS, STOCK_ROWS)
+  assert.deepEqual(schema.roles, {
+    week: 'Week',
+    sku: 'SKU',
+    item: 'Product',
+    opening: 'Opening Stock',
+    received: 'Received',
+    used: 'Sold',
+    closing: 'Closing Stock',
+  })
+  assert.equal(schema.quantity, 'Closing Stock')
+  assert.deepEqual([...schema.movementColumns], ['Received', 'Sold'])
+  assert.ok(schema.numeric.has('Received'))
+  assert.ok(!schema.numeric.has('Product'))
+})
+
+test('week labels and product codes are found without telling headers', () => {
+  const rows = STOCK_ROWS.map(([week, sku, name]) => [week, sku, name])
+  const { roles } = infer(['Col A', 'Col B', 'Name'], rows)
+  assert.equal(roles.week, 'Col A')
+  assert.equal(roles.sku, 'Col B')
+  assert.equal(roles.item, 'Name')
+})
+
+test('one item column serves as the SKU too', () => {
+  const { roles, numeric } = infer(
+    ['Item', 'Stock on hand'],
+    [
+      ['Blueberries', '12'],
+      ['Raspberries', '$1,204'],
+    ],
+  )
+  assert.equal(roles.item, 'Item')
+  assert.equal(roles.sku, 'Item')
+  assert.equal(roles.closing, 'Stock on hand')
+  assert.ok(numeric.has('Stock on hand'))
+})
+
+test('overrides win, and null clears a role', () => {
+  const overrides = { closing: 'Opening Stock', week: null }
+  const { roles, confidence } = infer(STOCK_COLUMNS, STOCK_ROWS, overrides)
+  assert.equal(roles.closing, 'Opening Stock')
+  assert.equal(confidence.closing, 1)
+  assert.equal(roles.opening, undefined)
+  assert.equal(roles.week, undefined)
+  const ignored = infer(STOCK_COLUMNS, STOCK_ROWS, { closing: 'Missing', colour: 'SKU' })
+  assert.equal(ignored.roles.closing, 'Closing Stock')
+})
+
+test('setting a role by hand reuses the scores and can be undone', () => {
+  const table = tableOf(STOCK_COLUMNS, STOCK_ROWS)
+  const changed = setColumnRole(table, 'used', 'Received')
+  assert.equal(changed.schema.roles.used, 'Received')
+  assert.equal(changed.schema.roles.received, undefined)
+  assert.equal(changed.schema.scores, table.schema.scores)
+  const restored = setColumnRole(changed, 'used', undefined)
+  assert.deepEqual(restored.schema.roles, table.schema.roles)
+})
+
+test('a new column re-infers once per columns array and keeps the overrides', () => {
+  const table = setColumnRole(tableOf(STOCK_COLUMNS, STOCK_ROWS), 'item', 'SKU')
+  assert.equal(columnSchemaFor(table), table.schema)
+  const widened = addColumn(table, 'Wastage', 0)
+  const schema = columnSchemaFor(widened)
+  assert.notEqual(schema, table.schema)
+  assert.equal(schema.roles.item, 'SKU')
+  assert.deepEqual(schema.columns, [...STOCK_COLUMNS, 'Wastage'])
+  assert.equal(columnSchemaFor({ ...widened }), schema)
+})
+
+test('saved overrides are found by header layout, ignoring case and spacing', () => {
+  saveRoleOverrides(['Week', 'Product '], { item: 'Product ' })
+  assert.deepEqual(loadRoleOverrides([' week', 'PRODUCT']), { item: 'Product ' })
+  saveRoleOverrides(['Week', 'Product '], {})
+  assert.deepEqual(loadRoleOverrides(['Week', 'Product ']), {})
+})
+
+test('only the newest saved layouts are kept', () => {
+  for (let index = 0; index < 25; index += 1) {
+    saveRoleOverrides([`Layout ${index}`], { item: `Layout ${index}` })
+  }
+  assert.deepEqual(loadRoleOverrides(['Layout 0']), {})
+  assert.deepEqual(loadRoleOverrides(['Layout 24']), { item: 'Layout 24' })
+  assert.equal(Object.keys(JSON.parse(storage.get('stocktake-column-roles'))).length, 20)
+})
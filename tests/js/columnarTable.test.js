@@ -0,0 +1,125 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import {
+  TABLE_CHUNK_ROWS,
+  addColumn,
+  appendRow,
+  createColumnarTable,
+  fillBlankCells,
+  readRow,
+  removeRow,
+  setCells,
+  sumColumn,
+  tableRows,
+  tableToMatrix,
+} from '../../src/utils/columnarTable.js'
+import {
+  attachColumnSchema,
+  columnSchemaFor,
+  inferColumnSchema,
+} from '../../src/utils/columnSchema.js'
+
+const COLUMNS = ['SKU', 'Product', 'Count']
+const ROWS = 2 * TABLE_CHUNK_ROWS + 500
+const cell = (rowIndex, column) => {
+  if (column === 'SKU') return `SKU-${rowIndex}`
+  if (column === 'Product') return rowIndex % 7 ? `Berry ${rowIndex % 3}` : ''
+  return rowIndex
+}
+const build = () => createColumnarTable(COLUMNS, ROWS, cell)
+const plain = (row) => Object.fromEntries(COLUMNS.map((column) => [column, row[column]]))
+
+test('rows are split into chunks and read back by position and id', () => {
+  const table = build()
+  assert.deepEqual(
+    table.chunks.map((chunk) => chunk.rowIds.length),
+    [TABLE_CHUNK_ROWS, TABLE_CHUNK_ROWS, 500],
+  )
+  const rows = tableRows(table)
+  assert.equal(rows.length, ROWS)
+  const last = rows[ROWS - 1]
+  assert.deepEqual(plain(last), {
+    SKU: `SKU-${ROWS - 1}`,
+    Product: cell(ROWS - 1, 'Product'),
+    Count: ROWS - 1,
+  })
+  assert.equal(readRow(table, last.__rowId), last)
+  assert.equal(readRow(table, 'missing'), undefined)
+  assert.ok(table.chunks[0].parts.Count.values instanceof Float64Array)
+  assert.equal(sumColumn(table, 'Count'), (ROWS * (ROWS - 1)) / 2)
+})
+
+test('setting cells copies only the chunk that holds the row', () => {
+  const table = build()
+  const before = tableRows(table)
+  const rowId = before[TABLE_CHUNK_ROWS + 3].__rowId
+  const next = setCells(table, rowId, { Count: 'n/a', Product: 'Jam', Missing: 1 })
+  assert.equal(next.chunks[0], table.chunks[0])
+  assert.equal(next.chunks[2], table.chunks[2])
+  assert.notEqual(next.chunks[1], table.chunks[1])
+  assert.deepEqual(plain(readRow(next, rowId)), {
+    SKU: `SKU-${TABLE_CHUNK_ROWS + 3}`,
+    Product: 'Jam',
+    Count: 'n/a',
+  })
+  // The old version and the untouched chunks' row views are unchanged.
+  assert.equal(readRow(table, rowId).Count, TABLE_CHUNK_ROWS + 3)
+  const after = tableRows(next)
+  assert.equal(after[0], before[0])
+  assert.notEqual(after[TABLE_CHUNK_ROWS], before[TABLE_CHUNK_ROWS])
+  assert.equal(sumColumn(next, 'Count'), sumColumn(table, 'Count') - (TABLE_CHUNK_ROWS + 3))
+  assert.equal(setCells(table, 'missing', { Count: 1 }), table)
+})
+
+test('appending fills the last chunk before starting a new one', () => {
+  let table = createColumnarTable(COLUMNS, TABLE_CHUNK_ROWS - 1, cell)
+  table = appendRow(table, { SKU: 'A', Count: 1 }, 'row-a')
+  assert.equal(table.chunks.length, 1)
+  const full = table.chunks[0]
+  table = appendRow(table, { SKU: 'B', Product: 'Beans', Count: '2' }, 'row-b')
+  assert.equal(table.chunks.length, 2)
+  assert.equal(table.chunks[0], full)
+  assert.equal(table.rowCount, TABLE_CHUNK_ROWS + 1)
+  assert.deepEqual(plain(readRow(table, 'row-b')), { SKU: 'B', Product: 'Beans', Count: '2' })
+  assert.equal(readRow(table, 'row-a').Product, undefined)
+})
+
+test('removing a row keeps the text held in numeric columns aligned', () => {
+  let table = createColumnarTable(COLUMNS, 4, cell)
+  const ids = tableRows(table).map((row) => row.__rowId)
+  table = setCells(table, ids[3], { Count: 'later' })
+  table = removeRow(table, ids[1])
+  assert.equal(table.rowCount, 3)
+  assert.equal(readRow(table, ids[1]), undefined)
+  assert.deepEqual(
+    tableToMatrix(table).map((row) => row[2]),
+    ['Count', 0, 2, 'later'],
+  )
+  assert.equal(removeRow(table, ids[1]), table)
+})
+
+test('filling blanks leaves chunks without blanks shared', () => {
+  const blank = TABLE_CHUNK_ROWS + 2
+  const table = createColumnarTable(COLUMNS, TABLE_CHUNK_ROWS + 10, (rowIndex, column) => {
+    if (column !== 'Product') return cell(rowIndex, column)
+    return rowIndex === blank ? '' : 'Berry'
+  })
+  const filled = fillBlankCells(table, 'Product', 'Unnamed')
+  assert.equal(filled.chunks[0], table.chunks[0])
+  assert.equal(tableRows(filled)[blank].Product, 'Unnamed')
+  assert.equal(fillBlankCells(filled, 'Product', 'Unnamed'), filled)
+})
+
+test('edited versions share the column roles; a new column infers them once', () => {
+  const schema = inferColumnSchema(COLUMNS, ROWS, (rowIndex, column) => cell(rowIndex, column))
+  const table = attachColumnSchema(build(), schema)
+  const rowId = tableRows(table)[5].__rowId
+  const edited = removeRow(appendRow(setCells(table, rowId, { Count: 9 }), { SKU: 'Z' }), rowId)
+  assert.equal(columnSchemaFor(edited), schema)
+
+  const widened = addColumn(edited, 'Notes')
+  const inferred = columnSchemaFor(widened)
+  assert.notEqual(inferred, schema)
+  const noted = setCells(widened, tableRows(widened)[0].__rowId, { Notes: 'x' })
+  assert.equal(columnSchemaFor(noted), inferred)
+})
@@ -0,0 +1,80 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+
+// Counts the date formatter's work, so the tests can tell a cache hit from a fresh format.
+let dateFormats = 0
+const BaseDateTimeFormat = Intl.DateTimeFormat
+Intl.DateTimeFormat = class extends BaseDateTimeFormat {
+  get format() {
+    const format = super.format
+    return (value) => {
+      dateFormats += 1
+      return format(value)
+    }
+  }
+}
+const {
+  createLruCache,
+  formatColumn,
+  formatDate,
+  formatDateTime,
+  formatDelta,
+  formatRelativeTime,
+} = await import('../../src/utils/format.js')
+
+const MORNING = new Date(2026, 1, 1, 9, 30)
+
+test('the cache keeps recent keys and drops those unused for a generation', () => {
+  const cache = createLruCache(3)
+  cache.set('a', 1)
+  cache.set('b', 2)
+  cache.set('c', 3)
+  // The newer generation is full, so 'd' starts another and a, b, c become the older one.
+  cache.set('d', 4)
+  assert.equal(cache.get('a'), 1)
+  cache.set('e', 5)
+  // b and c went unused while d, a and e filled the newer generation, so they are gone.
+  cache.set('f', 6)
+  assert.equal(cache.get('b'), undefined)
+  assert.equal(cache.get('c'), undefined)
+  assert.equal(cache.get('a'), 1)
+  assert.equal(cache.get('f'), 6)
+  cache.clear()
+  assert.equal(cache.get('a'), undefined)
+})
+
+test('epochs, Dates and ISO strings format alike', () => {
+  const expected = '1 Feb 2026, 9:30 am'
+  assert.equal(formatDateTime(MORNING), expected)
+  assert.equal(formatDateTime(MORNING.valueOf()), expected)
+  assert.equal(formatDateTime(MORNING.toISOString()), expected)
+  assert.equal(formatDate(MORNING.toISOString()), '1 Feb 2026')
+})
+
+test('repeated values are formatted once', () => {
+  const epoch = new Date(2026, 2, 3, 14, 0).valueOf()
+  const before = dateFormats
+  const expected = '3 Mar 2026, 2:00 pm'
+  assert.deepEqual(formatColumn([epoch, epoch, epoch], formatDateTime), Array(3).fill(expected))
+  assert.equal(formatDateTime(new Date(epoch).toISOString()), expected)
+  assert.equal(dateFormats - before, 1)
+})
+
+test('missing and unreadable dates show a dash, 0 included', () => {
+  const values = [0, null, undefined, '', 'not a date', Number.NaN, Number.NEGATIVE_INFINITY]
+  values.forEach((value) => {
+    assert.equal(formatDate(value), '—', String(value))
+    assert.equal(formatDateTime(value), '—', String(value))
+    assert.equal(formatRelativeTime(value), '—', String(value))
+  })
+  assert.equal(formatRelativeTime(Date.now() - 3 * 60 * 60 * 1000), '3 hours ago')
+})
+
+test('columns pass their options to each value', () => {
+  assert.deepEqual(formatColumn(new Float64Array([1, -2, 0]), formatDelta, { currency: true }), [
+    '+$1.00',
+    '-$2.00',
+    '—',
+  ])
+  assert.deepEqual(formatColumn([0], formatDelta, { showZero: true }), ['0'])
+})
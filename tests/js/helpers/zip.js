@@ -0,0 +1,40 @@
+import { crc32, inflateRawSync } from 'node:zlib'
+
+// Reads an archive back through its central directory, checking each entry's sizes and CRC.
+// Returns a Map of entry name to { method, text }.
+export const readZip = (bytes) => {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength)
+  const decoder = new TextDecoder()
+  const end = bytes.byteLength - 22
+  if (view.getUint32(end, true) !== 0x06054b50) {
+    throw new Error('No end-of-directory record')
+  }
+  const count = view.getUint16(end + 10, true)
+  const entries = new Map()
+  let position = view.getUint32(end + 16, true)
+  for (let index = 0; index < count; index += 1) {
+    if (view.getUint32(position, true) !== 0x02014b50) {
+      throw new Error(`Bad central header ${index}`)
+    }
+    const method = view.getUint16(position + 10, true)
+    const crc = view.getUint32(position + 16, true)
+    const compressedSize = view.getUint32(position + 20, true)
+    const size = view.getUint32(position + 24, true)
+    const nameLength = view.getUint16(position + 28, true)
+    const offset = view.getUint32(position + 42, true)
+    const name = decoder.decode(bytes.subarray(position + 46, position + 46 + nameLength))
+    if (view.getUint32(offset, true) !== 0x04034b50) {
+      throw new Error(`Bad local header for ${name}`)
+    }
+    const extraLength = view.getUint16(offset + 28, true)
+    const dataStart = offset + 30 + view.getUint16(offset + 26, true) + extraLength
+    const stored = bytes.subarray(dataStart, dataStart + compressedSize)
+    const data = method === 8 ? inflateRawSync(stored) : stored
+    if (data.length !== size || crc32(data) !== crc) {
+      throw new Error(`Size or CRC mismatch for ${name}`)
+    }
+    entries.set(name, { method, text: decoder.decode(data) })
+    position += 46 + nameLength
+  }
+  return entries
+}
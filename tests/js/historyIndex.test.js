@@ -0,0 +1,153 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import {
+  appendHistory,
+  createHistoryIndex,
+  historyAddedSince,
+  historyToArray,
+  movementValueImpact,
+  queryHistory,
+  selectionEntries,
+  summariseHistorySelection,
+} from '../../src/utils/historyIndex.js'
+
+const HOUR_MS = 60 * 60 * 1000
+const START = Date.parse('2026-01-01T00:00:00.000Z')
+const CATEGORIES = ['Pantry', 'Dairy', 'Frozen']
+const OPERATORS = ['Sam', 'sam ', 'Alex', 'Jo']
+
+// `count` movements an hour or two apart from `first`, newest first, with some sharing
+// a timestamp. Seeded, so every run checks the same history.
+const movements = (count, seed, first = START) => {
+  let state = seed
+  const random = (limit) => {
+    state = (state * 1103515245 + 12345) % 2147483648
+    return state % limit
+  }
+  let epoch = first
+  const entries = Array.from({ length: count }, (_, index) => {
+    epoch += random(3) * HOUR_MS
+    const sold = random(6)
+    const received = random(3) ? 0 : random(10)
+    return {
+      id: `${seed}-${index}`,
+      itemId: `item-${random(12)}`,
+      category: CATEGORIES[random(CATEGORIES.length)],
+      performedBy: OPERATORS[random(OPERATORS.length)],
+      sold,
+      received,
+      delta: received - sold,
+      unitCost: 1 + random(4),
+      timestamp: new Date(epoch).toISOString(),
+    }
+  })
+  return entries.reverse()
+}
+
+// The same query as a scan of the newest-first array.
+const naive = (history, { from = -Infinity, to = Infinity, itemId, category, operator } = {}) =>
+  history.filter((entry) => {
+    const epoch = Date.parse(entry.timestamp)
+    return (
+      epoch >= from &&
+      epoch <= to &&
+      (!itemId || entry.itemId === itemId) &&
+      (!category || entry.category === category) &&
+      (!operator || entry.performedBy.trim().toLowerCase() === operator.trim().toLowerCase())
+    )
+  })
+
+const ids = (entries) => entries.map((entry) => entry.id)
+const close = (actual, expected) =>
+  assert.ok(Math.abs(actual - expected) < 1e-9, `${actual} vs ${expected}`)
+
+test('appending in order pushes onto the shared arrays', () => {
+  const older = movements(300, 1)
+  const newer = movements(20, 2, Date.parse(older[0].timestamp) + HOUR_MS)
+  const index = createHistoryIndex(older)
+  const extended = appendHistory(index, newer)
+  assert.equal(extended.core, index.core)
+  assert.equal(extended.length, 320)
+  assert.deepEqual(ids(historyToArray(extended)), ids([...newer, ...older]))
+  assert.deepEqual(ids(historyToArray(index)), ids(older))
+  assert.deepEqual(ids(historyAddedSince(extended, index)), ids(newer))
+  assert.equal(appendHistory(extended, []), extended)
+})
+
+test('an out-of-order append rebuilds the index in time order', () => {
+  const history = movements(200, 3)
+  const index = createHistoryIndex(history)
+  const late = { ...history[150], id: 'late' }
+  const rebuilt = appendHistory(index, [late])
+  assert.notEqual(rebuilt.core, index.core)
+  const array = historyToArray(rebuilt)
+  assert.equal(array.length, 201)
+  const epochs = array.map((entry) => Date.parse(entry.timestamp))
+  assert.ok(epochs.every((epoch, position) => !position || epochs[position - 1] >= epoch))
+  assert.equal(historyAddedSince(rebuilt, index), null)
+})
+
+test('appending to a superseded version leaves the newer version as it was', () => {
+  const base = createHistoryIndex(movements(50, 4))
+  const next = movements(5, 5, Date.parse('2026-03-01T00:00:00.000Z'))
+  const newer = appendHistory(base, next)
+  const before = ids(historyToArray(newer))
+  const other = movements(3, 6, Date.parse('2026-04-01T00:00:00.000Z'))
+  const branch = appendHistory(base, other)
+  assert.notEqual(branch.core, newer.core)
+  assert.deepEqual(ids(historyToArray(newer)), before)
+  assert.deepEqual(ids(historyToArray(branch)).slice(0, 3), ids(other))
+  assert.equal(branch.length, 53)
+  assert.equal(historyAddedSince(branch, newer), null)
+})
+
+test('queries match a scan with inclusive bounds and combined filters', () => {
+  const history = movements(600, 7)
+  const index = createHistoryIndex(history)
+  const at = (position) => Date.parse(history[position].timestamp)
+  const queries = [
+    {},
+    { from: at(400), to: at(100) },
+    { from: at(10) },
+    { to: at(590) },
+    { itemId: 'item-3' },
+    { category: 'Dairy', from: at(300) },
+    { operator: 'SAM', to: at(200) },
+    { itemId: 'item-5', category: 'Frozen', operator: 'alex', from: at(500), to: at(50) },
+    { itemId: 'missing' },
+    { from: at(0) + 1 },
+  ]
+  queries.forEach((query) => {
+    const selection = queryHistory(index, query)
+    const expected = ids(naive(history, query))
+    assert.deepEqual(ids(selectionEntries(selection)), expected, JSON.stringify(query))
+  })
+  // Entries on either bound are included.
+  const edge = queryHistory(index, { from: at(20), to: at(20) })
+  assert.ok(selectionEntries(edge).every((entry) => entry.timestamp === history[20].timestamp))
+  assert.ok(edge.length >= 1)
+  // Paging reads the newest first.
+  assert.deepEqual(ids(selectionEntries(queryHistory(index), 5, 8)), ids(history.slice(5, 8)))
+})
+
+test('summaries from running totals equal a plain sum', () => {
+  const history = movements(500, 8)
+  const index = appendHistory(createHistoryIndex(history.slice(100)), history.slice(0, 100))
+  const at = (position) => Date.parse(history[position].timestamp)
+  const queries = [
+    {},
+    { from: at(300), to: at(40) },
+    { category: 'Pantry' },
+    { operator: 'jo', from: at(250) },
+  ]
+  queries.forEach((query) => {
+    const summary = summariseHistorySelection(queryHistory(index, query))
+    const expected = naive(history, query)
+    assert.equal(summary.adjustments, expected.length)
+    close(summary.sold, expected.reduce((sum, entry) => sum + entry.sold, 0))
+    close(summary.received, expected.reduce((sum, entry) => sum + entry.received, 0))
+    close(summary.units, expected.reduce((sum, entry) => sum + entry.delta, 0))
+    close(summary.value, expected.reduce((sum, entry) => sum + movementValueImpact(entry), 0))
+    assert.equal(summary.latest, expected[0]?.timestamp ?? null)
+  })
+})
@@ -0,0 +1,103 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import {
+  commitStoreDrafts,
+  createInventoryStore,
+  searchStoreItems,
+  storeCategoryBreakdown,
+  updateStoreItem,
+} from '../../src/utils/inventoryStore.js'
+
+const TIMESTAMP = '2026-02-01T09:00:00.000Z'
+const META = { performedBy: 'Sam', notes: '' }
+const CATEGORIES = ['Pantry', 'Dairy', 'Frozen']
+
+const item = (index) => ({
+  id: `id-${index}`,
+  sku: `SKU-${index}`,
+  name: `Item ${index}`,
+  category: CATEGORIES[index % CATEGORIES.length],
+  unitCost: 1 + (index % 5),
+  currentCount: 10 + index,
+  lastCount: 10 + index,
+  draftSold: '',
+  draftReceived: '',
+  lastUpdated: null,
+  costLayers: [{ quantity: 10 + index, unitCost: 1 + (index % 5), acquiredAt: null }],
+  itemNote: '',
+})
+
+const draft = (store, id, sold, received) =>
+  updateStoreItem(store, id, (current) => ({
+    ...current,
+    draftSold: sold,
+    draftReceived: received,
+  }))
+
+const round = (value) => Math.round(value * 1e9) / 1e9
+const breakdown = (store) =>
+  storeCategoryBreakdown(store).map(({ category, units, value }) => [category, units, round(value)])
+
+test('a commit touches only drafted and stale items', () => {
+  let store = createInventoryStore(Array.from({ length: 30 }, (_, index) => item(index)))
+  store = draft(store, 'id-3', '4', '')
+  store = draft(store, 'id-7', '', '2.5')
+  const first = commitStoreDrafts(store, TIMESTAMP, META)
+  assert.deepEqual([...first.changedIds].sort(), ['id-3', 'id-7'])
+  assert.deepEqual([...first.store.staleIds].sort(), ['id-3', 'id-7'])
+  assert.deepEqual(
+    first.historyEntries.map(({ itemId, sold, received }) => [itemId, sold, received]),
+    [
+      ['id-3', 4, 0],
+      ['id-7', 0, 2.5],
+    ],
+  )
+  first.store.items.forEach((current, index) => {
+    const touched = current.id === 'id-3' || current.id === 'id-7'
+    assert.equal(current === store.items[index], !touched, current.id)
+  })
+
+  // The next commit rolls lastCount forward for the stale items alongside the new draft.
+  const next = commitStoreDrafts(draft(first.store, 'id-9', '1', ''), TIMESTAMP, META)
+  assert.deepEqual([...next.changedIds].sort(), ['id-3', 'id-7', 'id-9'])
+  assert.equal(next.store.items[3].lastCount, next.store.items[3].currentCount)
+  assert.deepEqual([...next.store.staleIds], ['id-9'])
+  assert.equal(next.historyEntries.length, 1)
+
+  const idle = commitStoreDrafts(createInventoryStore(store.items.slice(10)), TIMESTAMP, META)
+  assert.equal(idle.changedIds.size, 0)
+  assert.deepEqual(idle.historyEntries, [])
+})
+
+test('totals and category totals match a full recompute after commits', () => {
+  let store = createInventoryStore(Array.from({ length: 40 }, (_, index) => item(index)))
+  for (let pass = 0; pass < 3; pass += 1) {
+    for (let index = pass; index < 40; index += 4) {
+      store = draft(store, `id-${index}`, String(index % 3), String(index % 2 ? 5 : 0))
+    }
+    store = commitStoreDrafts(store, `2026-02-0${pass + 1}T09:00:00.000Z`, META).store
+    const fresh = createInventoryStore(store.items)
+    assert.equal(store.totals.totalSkus, fresh.totals.totalSkus)
+    assert.equal(store.totals.totalCurrent, fresh.totals.totalCurrent)
+    assert.equal(store.totals.totalLast, fresh.totals.totalLast)
+    assert.ok(Math.abs(store.totals.totalValue - fresh.totals.totalValue) < 1e-9)
+    assert.deepEqual(breakdown(store), breakdown(fresh))
+  }
+})
+
+test('store versions share one search index, updated in place', () => {
+  const store = createInventoryStore([item(1), item(2)])
+  const committed = commitStoreDrafts(draft(store, 'id-1', '1', ''), TIMESTAMP, META).store
+  assert.equal(committed.searchIndex, store.searchIndex)
+
+  const renamed = updateStoreItem(committed, 'id-2', (current) => ({
+    ...current,
+    name: 'Raspberry jam',
+  }))
+  assert.equal(renamed.searchIndex, store.searchIndex)
+  assert.deepEqual(
+    searchStoreItems(renamed, 'raspberry').map(({ id }) => id),
+    ['id-2'],
+  )
+  assert.deepEqual(searchStoreItems(renamed, 'item 2', 'all'), [])
+})
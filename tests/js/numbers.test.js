@@ -0,0 +1,26 @@
+import assert from 'node:assert/strict'
+import { readFileSync } from 'node:fs'
+import { test } from 'node:test'
+import { parseNumber, parseNumericInput } from '../../src/utils/numbers.js'
+
+// Shared with tests/test_numbers.py, so both parsers read every case the same way.
+const CASES = JSON.parse(readFileSync(new URL('../fixtures/number_cases.json', import.meta.url), 'utf8'))
+
+test('parseNumber reads the shared cases', () => {
+  CASES.forEach(([value, expected]) => {
+    assert.equal(parseNumber(value, null), expected, JSON.stringify(value))
+  })
+})
+
+test('non-numbers give the fallback', () => {
+  const values = [Number.NaN, Number.POSITIVE_INFINITY, '1e400', 'n/a', undefined, null]
+  values.forEach((value) => {
+    assert.equal(parseNumber(value), 0)
+    assert.equal(parseNumber(value, 5), 5)
+  })
+})
+
+test('blank typed input keeps the current value', () => {
+  assert.equal(parseNumericInput('', 12), 12)
+  assert.equal(parseNumericInput('3', 12), 3)
+})
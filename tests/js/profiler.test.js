@@ -0,0 +1,102 @@
+import assert from 'node:assert/strict'
+import { beforeEach, test } from 'node:test'
+import {
+  PROFILE_FORMAT,
+  clearProfile,
+  createStageTimer,
+  exportProfileJson,
+  getProfileSnapshot,
+  profileStage,
+  profileStageAsync,
+  recordStages,
+  subscribeProfile,
+  summariseProfile,
+  takeStages,
+} from '../../src/utils/profiler.js'
+
+beforeEach(() => clearProfile())
+
+test('a stage records its rows, from a count or from its result', () => {
+  const result = profileStage('normalise:inventory', () => [1, 2, 3], { rows: (items) => items.length })
+  profileStage('build-store', () => null, { rows: 7 })
+  assert.deepEqual(result, [1, 2, 3])
+  const [first, second] = getProfileSnapshot()
+  assert.equal(first.stage, 'normalise:inventory')
+  assert.equal(first.rows, 3)
+  assert.equal(first.calls, 1)
+  assert.ok(first.durationMs >= 0)
+  assert.equal(typeof first.heapDeltaBytes, 'number')
+  assert.equal(second.rows, 7)
+})
+
+test('async stages wait for their result', async () => {
+  const value = await profileStageAsync('xlsx-write', async () => new Uint8Array(4), {
+    rows: (bytes) => bytes.length,
+  })
+  assert.equal(value.length, 4)
+  assert.equal(getProfileSnapshot()[0].rows, 4)
+})
+
+test('a stage timer records one stage for many chunks, and nothing when unused', () => {
+  const timer = createStageTimer('read-rows:inventory')
+  timer.time(() => 'chunk', 100)
+  timer.time(() => [1, 2], (rows) => rows.length)
+  timer.add(1.5, 10)
+  timer.end()
+  createStageTimer('never').end()
+  const records = getProfileSnapshot()
+  assert.equal(records.length, 1)
+  assert.equal(records[0].calls, 3)
+  assert.equal(records[0].rows, 112)
+  assert.ok(records[0].durationMs >= 1.5)
+  assert.equal(records[0].heapDeltaBytes, null)
+})
+
+test('the record list is bounded and listeners hear about new stages', () => {
+  let heard = 0
+  const unsubscribe = subscribeProfile(() => {
+    heard += 1
+  })
+  recordStages(Array.from({ length: 600 }, (_, index) => ({ stage: `s${index}`, durationMs: 1 })))
+  unsubscribe()
+  recordStages([{ stage: 'late', durationMs: 1 }])
+  const records = getProfileSnapshot()
+  assert.equal(heard, 1)
+  assert.equal(records.length, 500)
+  assert.equal(records[0].stage, 's101')
+  assert.equal(records.at(-1).stage, 'late')
+})
+
+test('taking stages hands them over once, as the worker does with each result', () => {
+  profileStage('apply-stocktake', () => 0)
+  assert.deepEqual(takeStages().map((record) => record.stage), ['apply-stocktake'])
+  assert.deepEqual(takeStages(), [])
+})
+
+test('the export uses the shared trace format', () => {
+  profileStage('export', () => 0, { rows: 2 })
+  const trace = JSON.parse(exportProfileJson())
+  assert.equal(trace.format, PROFILE_FORMAT)
+  assert.equal(trace.version, 1)
+  assert.deepEqual(Object.keys(trace.stages[0]).sort(), [
+    'calls',
+    'durationMs',
+    'heapDeltaBytes',
+    'rows',
+    'source',
+    'stage',
+    'startedAt',
+  ])
+})
+
+test('the summary totals each stage, slowest first', () => {
+  const summary = summariseProfile([
+    { stage: 'export', durationMs: 10, rows: 5 },
+    { stage: 'import', durationMs: 25, rows: null },
+    { stage: 'export', durationMs: 30, rows: 1 },
+  ])
+  assert.deepEqual(summary, [
+    { stage: 'export', runs: 2, totalMs: 40, maxMs: 30, rows: 6 },
+    { stage: 'import', runs: 1, totalMs: 25, maxMs: 25, rows: 0 },
+  ])
+})
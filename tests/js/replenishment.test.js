@@ -0,0 +1,119 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import { appendHistory, createHistoryIndex } from '../../src/utils/historyIndex.js'
+import {
+  planReplenishment,
+  topReorderSuggestions,
+  updateDemand,
+} from '../../src/utils/replenishment.js'
+
+const DAY_MS = 24 * 60 * 60 * 1000
+const TODAY = 20_500
+const NOW = TODAY * DAY_MS + 15 * 60 * 60 * 1000
+
+const stamp = (day, hour = 10) => new Date(day * DAY_MS + hour * 60 * 60 * 1000).toISOString()
+const item = (id, currentCount, unitCost = 2) => ({
+  id,
+  sku: id.toUpperCase(),
+  name: `Item ${id}`,
+  category: 'Pantry',
+  currentCount,
+  unitCost,
+  costLayers: [{ quantity: currentCount, unitCost, acquiredAt: null }],
+})
+
+// `count` movements (newest first) over the `days` days up to `lastDay`, seeded.
+const movements = (items, count, seed, days = 120, lastDay = TODAY - 1) => {
+  let state = seed
+  const random = (limit) => {
+    state = (state * 1103515245 + 12345) % 2147483648
+    return state % limit
+  }
+  const entries = Array.from({ length: count }, () => ({
+    itemId: items[random(items.length / 2)].id,
+    sold: [0, 1, 2, 3, 5, 8, 13.5][random(7)],
+    received: [0, 0, 4][random(3)],
+    timestamp: stamp(lastDay - random(days), random(24)),
+  }))
+  return entries.sort((a, b) => b.timestamp.localeCompare(a.timestamp))
+}
+
+const columns = (plan) =>
+  ['dailyUse', 'deviation', 'daysOfCover', 'reorderPoint', 'orderUpTo', 'suggestedOrder'].map(
+    (name) => Array.from(plan[name]),
+  )
+
+const assertClose = (actual, expected) => {
+  actual.forEach((column, index) => {
+    column.forEach((value, row) => {
+      const target = expected[index][row]
+      assert.ok(value === target || Math.abs(value - target) < 1e-9, `${index}/${row}`)
+    })
+  })
+}
+
+test('an item selling on two days', () => {
+  const history = createHistoryIndex([
+    { itemId: 'a', sold: 4, timestamp: stamp(TODAY) },
+    { itemId: 'a', sold: 2, timestamp: stamp(TODAY - 2, 9) },
+  ])
+  const plan = planReplenishment(updateDemand(null, history, NOW), [item('a', 10), item('b', 3)])
+  const spread = Math.sqrt((4 + 16) / 3 - 4)
+  assert.equal(plan.days, 3)
+  assert.equal(plan.dailyUse[0], 2)
+  assert.ok(Math.abs(plan.deviation[0] - spread) < 1e-12)
+  assert.equal(plan.daysOfCover[0], 5)
+  assert.ok(Math.abs(plan.reorderPoint[0] - (14 + 1.65 * spread * Math.sqrt(7))) < 1e-12)
+  assert.equal(plan.suggestedOrder[0], Math.ceil(28 + 1.65 * spread * Math.sqrt(14) - 10))
+  assert.equal(plan.daysOfCover[1], Number.POSITIVE_INFINITY)
+  assert.equal(plan.suggestedOrder[1], 0)
+  assert.equal(plan.reorderCount, 1)
+  assert.equal(plan.valueToOrder, plan.suggestedOrder[0] * 2)
+})
+
+test('a commit extends the demand already summed', () => {
+  const items = Array.from({ length: 300 }, (_, index) => item(`i-${index}`, 5 + (index % 40)))
+  const entries = movements(items, 4_000, 5)
+  const history = createHistoryIndex(entries)
+  const demand = updateDemand(null, history, NOW)
+  const windowStart = demand.startDay * DAY_MS
+  const inWindow = entries.filter((entry) => Date.parse(entry.timestamp) >= windowStart)
+  assert.equal(demand.summed, inWindow.length)
+  const extended = appendHistory(history, movements(items, 50, 9, 1, TODAY))
+  const next = updateDemand(demand, extended, NOW)
+  assert.equal(next.summed, 50)
+  assertClose(
+    columns(planReplenishment(next, items)),
+    columns(planReplenishment(updateDemand(null, extended, NOW), items)),
+  )
+})
+
+test('a new day sums the window again', () => {
+  const items = [item('a', 10)]
+  const history = createHistoryIndex(movements(items, 200, 3, 200))
+  const demand = updateDemand(null, history, NOW)
+  const tomorrow = updateDemand(demand, history, NOW + DAY_MS)
+  assert.notEqual(tomorrow.sold, demand.sold)
+  assert.equal(tomorrow.startDay, demand.startDay + 1)
+  assert.deepEqual(tomorrow.sold, updateDemand(null, history, NOW + DAY_MS).sold)
+})
+
+test('suggestions put the fewest days of cover first, then the larger order', () => {
+  const items = [item('a', 6), item('b', 1), item('c', 2), item('d', 50)]
+  const history = createHistoryIndex(
+    ['a', 'b', 'c', 'd'].flatMap((id) => [
+      { itemId: id, sold: id === 'a' ? 3 : 1, timestamp: stamp(TODAY) },
+      { itemId: id, sold: id === 'a' ? 3 : 1, timestamp: stamp(TODAY - 1) },
+    ]),
+  )
+  const plan = planReplenishment(updateDemand(null, history, NOW), items)
+  const suggestions = topReorderSuggestions(plan)
+  assert.deepEqual(
+    suggestions.map(({ id }) => id),
+    ['b', 'a', 'c'],
+  )
+  assert.deepEqual(
+    topReorderSuggestions(plan, 1).map(({ id }) => id),
+    ['b'],
+  )
+})
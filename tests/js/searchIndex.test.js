@@ -0,0 +1,61 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import { createInventoryStore, searchStoreItems, updateStoreItem } from '../../src/utils/inventoryStore.js'
+import { createSearchIndex, querySearchIndex, upsertSearchRecord } from '../../src/utils/searchIndex.js'
+
+const OPTIONS = { getId: (item) => item.id, getFields: (item) => [item.sku, item.name, item.category] }
+const ITEMS = Array.from({ length: 300 }, (_, index) => ({
+  id: `item-${index}`,
+  sku: `SKU-${String(index).padStart(3, '0')}`,
+  name: `${['Blueberry Muffin', 'Oat Milk', 'Cold Brew 2L'][index % 3]} ${index}`,
+  category: ['Bakery', 'Dairy', 'Beverage'][index % 3],
+}))
+
+const scan = (items, query) => {
+  const needle = query.trim().toLowerCase()
+  return items
+    .filter((item) => [item.sku, item.name, item.category].some((field) => field.toLowerCase().includes(needle)))
+    .map((item) => item.id)
+    .sort()
+}
+
+test('queries of every length match a substring scan', () => {
+  const index = createSearchIndex(ITEMS, OPTIONS)
+  for (const query of ['2', 'l', '02', 'k 1', 'rew', 'sku-10', 'muffin 12', 'DAIRY', '2l']) {
+    assert.deepEqual(querySearchIndex(index, query, { fuzzy: false }).slice().sort(), scan(ITEMS, query), query)
+  }
+})
+
+test('a one-character query finds digits inside a SKU', () => {
+  const index = createSearchIndex(ITEMS, OPTIONS)
+  assert.ok(querySearchIndex(index, '2').includes('item-102'))
+})
+
+test('exact and prefix SKU hits rank first', () => {
+  const index = createSearchIndex(ITEMS, OPTIONS)
+  const ids = querySearchIndex(index, 'sku-012')
+  assert.equal(ids[0], 'item-12')
+})
+
+test('near-miss SKUs are offered when nothing matches', () => {
+  const index = createSearchIndex(ITEMS, OPTIONS)
+  assert.ok(querySearchIndex(index, 'sku-l23').includes('item-123'))
+  assert.deepEqual(querySearchIndex(index, 'sku-l23', { fuzzy: false }), [])
+})
+
+test('upserting a renamed record re-indexes it', () => {
+  const index = createSearchIndex(ITEMS, OPTIONS)
+  upsertSearchRecord(index, { ...ITEMS[5], name: 'Raspberry Tart' })
+  assert.deepEqual(querySearchIndex(index, 'raspberry'), ['item-5'])
+  assert.ok(!querySearchIndex(index, 'oat milk 5').includes('item-5'))
+})
+
+test('draft edits leave the search index alone', () => {
+  const store = createInventoryStore(ITEMS.map((item) => ({ ...item, currentCount: 4, unitCost: 1 })))
+  const { version } = store.searchIndex
+  const drafted = updateStoreItem(store, 'item-7', (item) => ({ ...item, draftSold: '2' }))
+  assert.equal(drafted.searchIndex.version, version)
+  const renamed = updateStoreItem(drafted, 'item-7', (item) => ({ ...item, name: 'Lemon Slice' }))
+  assert.ok(renamed.searchIndex.version > version)
+  assert.deepEqual(searchStoreItems(renamed, 'lemon').map((item) => item.id), ['item-7'])
+})
@@ -0,0 +1,118 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import { appendHistory, createHistoryIndex } from '../../src/utils/historyIndex.js'
+import {
+  commitStoreDrafts,
+  createInventoryStore,
+  updateStoreItem,
+} from '../../src/utils/inventoryStore.js'
+import { createSnapshot, reconstructInventoryAt } from '../../src/utils/snapshots.js'
+
+const at = (day) => `2026-01-${String(day).padStart(2, '0')}T12:00:00.000Z`
+const endOf = (day) => Date.parse(at(day)) + 6 * 60 * 60 * 1000
+
+const item = (sku, count, unitCost) => ({
+  id: `id-${sku}`,
+  sku,
+  name: `Item ${sku}`,
+  category: 'Pantry',
+  unitCost,
+  currentCount: count,
+  lastCount: count,
+  draftSold: '',
+  draftReceived: '',
+  lastUpdated: null,
+  costLayers: [{ quantity: count, unitCost, acquiredAt: null }],
+  itemNote: '',
+})
+
+// Commits `drafts` (sku -> [sold, received]) the way the stocktake page does.
+const commit = ({ store, history }, drafts, timestamp) => {
+  let next = store
+  Object.entries(drafts).forEach(([sku, [sold, received]]) => {
+    next = updateStoreItem(next, `id-${sku}`, (current) => ({
+      ...current,
+      draftSold: String(sold),
+      draftReceived: String(received),
+    }))
+  })
+  const result = commitStoreDrafts(next, timestamp, { performedBy: 'Sam', notes: '' })
+  return { store: result.store, history: appendHistory(history, result.historyEntries) }
+}
+
+const stock = (position) =>
+  position.items.map(({ sku, currentCount, costLayers }) => [
+    sku,
+    currentCount,
+    costLayers.reduce((sum, layer) => sum + layer.quantity * layer.unitCost, 0),
+  ])
+
+// Three commits; a snapshot is kept of the import and of the second commit.
+const imported = { store: createInventoryStore([item('A', 10, 2), item('B', 5, 4)]) }
+imported.history = createHistoryIndex()
+const second = commit(imported, { A: [3, 0], B: [0, 6] }, at(2))
+const fifth = commit(second, { A: [2, 4], B: [7, 0] }, at(5))
+const ninth = commit(fifth, { A: [9, 0] }, at(9))
+const history = ninth.history
+const snapshots = [createSnapshot(imported.store, null), createSnapshot(fifth.store, at(5))]
+const live = createSnapshot(ninth.store, at(9))
+
+test('dates between snapshots replay the movements since the nearest one', () => {
+  const position = reconstructInventoryAt(snapshots, live, history, endOf(3))
+  assert.equal(position.exact, true)
+  assert.equal(position.basedOn, null)
+  assert.equal(position.movements, 2)
+  assert.deepEqual(stock(position), stock(second.store))
+  assert.equal(position.totals.totalCurrent, second.store.totals.totalCurrent)
+  assert.ok(Math.abs(position.totals.totalValue - second.store.totals.totalValue) < 1e-9)
+})
+
+test('a date on a snapshot reads it without replaying', () => {
+  const position = reconstructInventoryAt(snapshots, live, history, endOf(6))
+  assert.equal(position.basedOn, at(5))
+  assert.equal(position.movements, 0)
+  assert.deepEqual(position.items, fifth.store.items)
+})
+
+test('dates after the latest movement read the live store', () => {
+  const position = reconstructInventoryAt(snapshots, live, history, endOf(20))
+  assert.equal(position.basedOn, null)
+  assert.deepEqual(position.items, ninth.store.items)
+})
+
+test('dates before every snapshot roll back from the first', () => {
+  const position = reconstructInventoryAt(snapshots.slice(1), live, history, endOf(3))
+  assert.equal(position.exact, false)
+  assert.equal(position.basedOn, at(5))
+  assert.deepEqual(
+    position.items.map(({ sku, currentCount }) => [sku, currentCount]),
+    [
+      ['A', 7],
+      ['B', 11],
+    ],
+  )
+  assert.ok(Math.abs(position.totals.totalValue - second.store.totals.totalValue) < 1e-9)
+  const before = reconstructInventoryAt(snapshots.slice(1), live, history, endOf(1))
+  assert.deepEqual(stock(before), stock(imported.store))
+})
+
+test('the live store is never placed before the latest snapshot', () => {
+  // A commit with no movements (here a rename) is snapshotted after the latest movement.
+  const renamed = updateStoreItem(ninth.store, 'id-B', (current) => ({ ...current, name: 'Beans' }))
+  const kept = [...snapshots, createSnapshot(ninth.store, at(9)), createSnapshot(renamed, at(12))]
+  const current = createSnapshot(renamed, at(9))
+  const names = (position) => position.items.map(({ name }) => name)
+  const before = reconstructInventoryAt(kept, current, history, endOf(10))
+  assert.equal(before.basedOn, at(9))
+  assert.deepEqual(names(before), ['Item A', 'Item B'])
+  const after = reconstructInventoryAt(kept, current, history, endOf(14))
+  assert.equal(after.basedOn, null)
+  assert.deepEqual(names(after), ['Item A', 'Beans'])
+
+  // With no history the live store has no time at all.
+  const fresh = [createSnapshot(imported.store, at(1)), createSnapshot(renamed, at(3))]
+  const empty = createHistoryIndex()
+  const position = reconstructInventoryAt(fresh, createSnapshot(renamed, null), empty, endOf(2))
+  assert.equal(position.basedOn, at(1))
+  assert.deepEqual(names(position), ['Item A', 'Item B'])
+})
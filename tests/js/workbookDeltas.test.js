@@ -0,0 +1,106 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import { applyWorkbookDeltas, mergeWorkbookDeltas } from '../../src/utils/normalise.js'
+
+// excel.js reads workbooks through xlsx-js-style; the round trip is skipped without it.
+const excel = await import('../../src/utils/excel.js').catch(() => null)
+const needsXlsx = { skip: !excel && 'xlsx-js-style is not installed' }
+
+const item = (sku, currentCount, fields = {}) => ({
+  id: `id-${sku}`,
+  sku,
+  name: `Item ${sku}`,
+  category: 'Pantry',
+  currentCount,
+  lastCount: currentCount,
+  unitCost: 2,
+  costLayers: [{ quantity: currentCount, unitCost: 2, acquiredAt: '2026-01-01T00:00:00.000Z' }],
+  ...fields,
+})
+const movement = (sku, timestamp, delta) => ({
+  itemId: `id-${sku}`,
+  sku,
+  name: `Item ${sku}`,
+  timestamp,
+  delta,
+})
+const workbook = (inventory, history, workbookMeta = {}) => ({ workbookMeta, inventory, history })
+const delta = (since, inventory, history) =>
+  workbook(inventory, history, { isDelta: true, deltaSince: since })
+
+const base = workbook(
+  [item('A', 5), item('B', 8)],
+  [movement('A', '2026-01-02T00:00:00.000Z', 5)],
+  { sheetName: 'Stocktake' },
+)
+
+test('deltas replace items by SKU, keep base ids and append new items', () => {
+  const merged = applyWorkbookDeltas([
+    delta('2026-01-03T00:00:00.000Z', [item('B', 3, { id: 'other-id' }), item('C', 4)], []),
+    base,
+  ])
+  assert.deepEqual(
+    merged.inventory.map(({ id, sku, currentCount }) => [id, sku, currentCount]),
+    [
+      ['id-A', 'A', 5],
+      ['id-B', 'B', 3],
+      ['id-C', 'C', 4],
+    ],
+  )
+  assert.equal(merged.workbookMeta.sheetName, 'Stocktake')
+})
+
+test('deltas apply oldest first whatever order they are given in', () => {
+  const older = delta('2026-01-03T00:00:00.000Z', [item('A', 1)], [])
+  const newer = delta('2026-01-05T00:00:00.000Z', [item('A', 9)], [])
+  const merged = applyWorkbookDeltas([newer, base, older])
+  assert.equal(merged.inventory[0].currentCount, 9)
+})
+
+test('movements already merged are skipped and history stays newest first', () => {
+  const first = delta('2026-01-03T00:00:00.000Z', [], [movement('B', '2026-01-04T00:00:00.000Z', -2)])
+  const second = delta('2026-01-05T00:00:00.000Z', [], [
+    movement('B', '2026-01-04T00:00:00.000Z', -2),
+    movement('A', '2026-01-06T00:00:00.000Z', 1),
+  ])
+  const once = applyWorkbookDeltas([base, first, second])
+  const twice = applyWorkbookDeltas([base, first, second, first, second])
+  assert.deepEqual(
+    once.history.map((entry) => `${entry.sku} ${entry.timestamp.slice(0, 10)}`),
+    ['A 2026-01-06', 'B 2026-01-04', 'A 2026-01-02'],
+  )
+  assert.deepEqual(twice.history, once.history)
+})
+
+test('exactly one full workbook is required', () => {
+  const only = delta('2026-01-03T00:00:00.000Z', [], [])
+  assert.throws(() => applyWorkbookDeltas([only]), /Include the full workbook/)
+  assert.throws(() => applyWorkbookDeltas([base, base, only]), /Only one full workbook/)
+})
+
+test('a delta export merged into its base workbook round-trips', needsXlsx, async () => {
+  const baseBytes = await excel.createUpdatedWorkbook(
+    base.inventory,
+    { sheetName: 'Stocktake' },
+    base.history,
+  )
+  const deltaBytes = await excel.createDeltaWorkbook(
+    [item('B', 3), item('C', 4)],
+    [movement('B', '2026-01-04T00:00:00.000Z', -5)],
+    { sourceFileName: 'stocktake.xlsx', since: '2026-01-03T00:00:00.000Z' },
+  )
+  const parsedDelta = excel.parseInventoryWorkbook(deltaBytes)
+  assert.equal(parsedDelta.workbookMeta.isDelta, true)
+  assert.equal(parsedDelta.workbookMeta.deltaBaseFile, 'stocktake.xlsx')
+
+  const merged = excel.parseInventoryWorkbook(await mergeWorkbookDeltas([deltaBytes, baseBytes]))
+  assert.deepEqual(
+    merged.inventory.map(({ sku, currentCount }) => [sku, currentCount]),
+    [
+      ['A', 5],
+      ['B', 3],
+      ['C', 4],
+    ],
+  )
+  assert.equal(merged.history.length, 2)
+})
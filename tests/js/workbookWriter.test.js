@@ -0,0 +1,128 @@
+import assert from 'node:assert/strict'
+import { test } from 'node:test'
+import { createStyleTable, createXlsxWriter, toExcelSerial } from '../../src/utils/xlsxWriter.js'
+import { createZipWriter } from '../../src/utils/zipWriter.js'
+import { readZip } from './helpers/zip.js'
+
+async function* slowly(chunks) {
+  for (const chunk of chunks) {
+    await null
+    yield chunk
+  }
+}
+
+const sharedStrings = (xml) =>
+  [...xml.matchAll(/<si><t[^>]*>(.*?)<\/t><\/si>/g)].map((match) => match[1])
+
+for (const compress of [true, false]) {
+  test(`zip entries read back intact (${compress ? 'deflated' : 'stored'})`, async () => {
+    const zip = createZipWriter({ compress })
+    const long = 'stocktake,'.repeat(20_000)
+    await zip.addEntry('a.txt', ['hello ', 'world'])
+    await zip.addEntry('dir/bytes.bin', [new TextEncoder().encode('bytes ✓')])
+    await zip.addEntry('streamed.csv', slowly([long, long]))
+    await zip.addEntry('empty.txt', [])
+    await zip.addEntry('café.xml', ['<ok/>'])
+    const entries = readZip(zip.finish())
+    assert.deepEqual(
+      [...entries.keys()],
+      ['a.txt', 'dir/bytes.bin', 'streamed.csv', 'empty.txt', 'café.xml'],
+    )
+    assert.equal(entries.get('a.txt').text, 'hello world')
+    assert.equal(entries.get('dir/bytes.bin').text, 'bytes ✓')
+    assert.equal(entries.get('streamed.csv').text, long + long)
+    assert.equal(entries.get('empty.txt').text, '')
+    assert.equal(entries.get('café.xml').method, compress ? 8 : 0)
+  })
+}
+
+test('styles are stored once and referred to by index', () => {
+  const styles = createStyleTable()
+  const highlight = { patternType: 'solid', fgColor: { rgb: 'FFEEAA' } }
+  const header = styles.register({ font: { bold: true }, fill: highlight })
+  const money = styles.register({ numFmt: '"$"#,##0.00' })
+  assert.equal(styles.register({ font: { bold: true }, fill: { ...highlight } }), header)
+  assert.notEqual(money, header)
+  assert.equal(styles.register({ numFmt: 14 }), money + 1)
+  const xml = styles.toXml()
+  assert.match(xml, /<numFmt numFmtId="164" formatCode="&quot;\$&quot;#,##0.00"\/>/)
+  assert.match(xml, /<numFmts count="1">/)
+  assert.match(xml, /<cellXfs count="4">/)
+  assert.match(xml, /<fonts count="2">/)
+})
+
+test('a workbook round-trips through the zip with shared strings and sparse cells', async () => {
+  const book = createXlsxWriter()
+  const bold = book.registerStyle({ font: { bold: true } })
+  const date = book.registerStyle({ numFmt: 14 })
+  const when = new Date(2026, 0, 1)
+  book.addSheet('Stock & Co', {
+    widths: [12, 20],
+    rows: [[['SKU', 'Item', 'Count', 'Counted'], bold]],
+    records: [
+      { sku: 'SKU-1', name: 'Jam <strawberry>', count: 3, at: when },
+      { sku: 'SKU-2', name: '', count: 4.5, at: null },
+      { sku: 'SKU-1', name: ' padded\u0001', count: Number.NaN, at: when },
+    ],
+    columns: [
+      { value: (record) => record.sku },
+      { value: (record) => record.name },
+      { value: (record) => record.count },
+      { value: (record) => record.at, style: date },
+    ],
+  })
+  book.addSheet('Flags', { rows: [[[true, false, 'SKU-1']]] })
+  const entries = readZip(await book.write())
+
+  assert.match(
+    entries.get('xl/workbook.xml').text,
+    /<sheet name="Stock &amp; Co" sheetId="1" r:id="rId1"\/>/,
+  )
+  assert.match(entries.get('[Content_Types].xml').text, /sheet2\.xml/)
+  const strings = entries.get('xl/sharedStrings.xml').text
+  assert.deepEqual(sharedStrings(strings), [
+    'SKU',
+    'Item',
+    'Count',
+    'Counted',
+    'SKU-1',
+    'Jam &lt;strawberry&gt;',
+    'SKU-2',
+    ' padded',
+  ])
+  assert.match(strings, /count="10" uniqueCount="8"/)
+  assert.match(strings, /<t xml:space="preserve"> padded<\/t>/)
+
+  const sheet = entries.get('xl/worksheets/sheet1.xml').text
+  assert.match(sheet, /<col min="2" max="2" width="20" customWidth="1"\/>/)
+  assert.match(sheet, /<row r="1"><c s="1" t="s"><v>0<\/v><\/c>/)
+  const dated = `<c><v>3</v></c><c s="${date}"><v>${toExcelSerial(when)}</v></c></row>`
+  assert.match(sheet, new RegExp(`<row r="2">.*${dated}`))
+  // The blank name is skipped, so the count that follows carries its address.
+  assert.match(sheet, /<row r="3"><c t="s"><v>6<\/v><\/c><c r="C3"><v>4.5<\/v><\/c><\/row>/)
+  assert.match(sheet, /<row r="4">.*<c r="D4" s="\d+"><v>/)
+  assert.match(
+    entries.get('xl/worksheets/sheet2.xml').text,
+    /<c t="b"><v>1<\/v><\/c><c t="b"><v>0<\/v><\/c>/,
+  )
+})
+
+test('large sheets are written in chunks without losing rows', async () => {
+  const book = createXlsxWriter()
+  const records = Array.from({ length: 20_000 }, (_, index) => ({
+    sku: `SKU-${index}`,
+    count: index,
+  }))
+  book.addSheet('Stocktake', {
+    records,
+    columns: [{ value: (record) => record.sku }, { value: (record) => record.count }],
+  })
+  const sheet = readZip(await book.write()).get('xl/worksheets/sheet1.xml').text
+  assert.equal(sheet.match(/<row /g).length, records.length)
+  assert.match(sheet, /<row r="20000"><c t="s"><v>19999<\/v><\/c><c><v>19999<\/v><\/c><\/row>/)
+})
+
+test('Excel serials count days from 1899-12-30 in local time', () => {
+  assert.equal(toExcelSerial(new Date(2026, 0, 1)), 46023)
+  assert.equal(toExcelSerial(new Date(2026, 0, 1, 18)), 46023.75)
+})
@@ -0,0 +1,93 @@
+"""Consolidating store workbooks: merge rules and the written export."""
+
+from __future__ import annotations
+
+import pytest
+
+from stocktake_engine.consolidate import (
+    StoreWorkbook,
+    consolidate,
+    find_workbooks,
+    merge_histories,
+    merge_inventories,
+)
+from stocktake_engine.loadtest import synthetic_engine
+from stocktake_engine.reader import load_workbook
+from stocktake_engine.writer import write_engine_workbook
+
+
+def store(name, inventory, history=()):
+    return StoreWorkbook(
+        name=name, path=f"{name}.xlsx", inventory=inventory, history=list(history), metadata={}
+    )
+
+
+def item(sku, count, layers, **fields):
+    return {
+        "id": sku,
+        "sku": sku,
+        "name": sku,
+        "currentCount": count,
+        "lastCount": count,
+        "costLayers": layers,
+        **fields,
+    }
+
+
+def test_find_workbooks_skips_lock_files_and_other_files(tmp_path):
+    for name in ("b.xlsx", "A.XLSX", "~$b.xlsx", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    names = [path.rsplit("/", 1)[-1] for path in find_workbooks(str(tmp_path))]
+    assert names == ["A.XLSX", "b.xlsx"]
+
+
+def test_merge_sums_counts_and_orders_layers_oldest_first():
+    march = {"quantity": 5, "unitCost": 2.0, "acquiredAt": "2024-03-01T00:00:00.000Z"}
+    january = {"quantity": 3, "unitCost": 1.5, "acquiredAt": "2024-01-01T00:00:00.000Z"}
+    north = store("north", [item("SKU-1", 5, [march], itemNote="back room")])
+    south = store(
+        "south",
+        [
+            item("SKU-1", 3, [january], itemNote="back room"),
+            item("SKU-2", 4, [{"quantity": 4, "unitCost": 3.0, "acquiredAt": None}]),
+        ],
+    )
+    merged = merge_inventories([north, south])
+    assert [entry["sku"] for entry in merged] == ["SKU-1", "SKU-2"]
+    first = merged[0]
+    assert first["currentCount"] == 8
+    assert [layer["unitCost"] for layer in first["costLayers"]] == [1.5, 2.0]
+    assert first["unitCost"] == pytest.approx((3 * 1.5 + 5 * 2.0) / 8)
+    assert first["itemNote"] == "back room"
+
+
+def test_merge_histories_is_newest_first_and_keyed_by_sku():
+    older = {"itemId": "n-1", "sku": "SKU-1", "timestamp": "2024-01-02T00:00:00.000Z"}
+    newer = {"itemId": "s-9", "sku": "SKU-1", "timestamp": "2024-01-03T00:00:00.000Z"}
+    history = merge_histories([store("north", [], [older]), store("south", [], [newer])])
+    assert [entry["timestamp"][:10] for entry in history] == ["2024-01-03", "2024-01-02"]
+    assert {entry["itemId"] for entry in history} == {"SKU-1"}
+
+
+def test_consolidated_valuation_is_the_sum_of_the_stores(tmp_path):
+    stores = tmp_path / "stores"
+    stores.mkdir()
+    engines = [synthetic_engine(40, seed=1), synthetic_engine(60, seed=2)]
+    for index, engine in enumerate(engines):
+        write_engine_workbook(str(stores / f"store-{index}.xlsx"), engine)
+
+    output = tmp_path / "all.xlsx"
+    report = consolidate(str(stores), str(output), export_dir=str(tmp_path / "exports"), workers=2)
+
+    assert report.skus == 60
+    assert all(entry.export_path for entry in report.stores)
+    totals = load_workbook(str(output)).totals()
+    assert totals["totalSkus"] == 60
+    assert totals["totalCurrent"] == sum(engine.totals()["totalCurrent"] for engine in engines)
+    expected_value = sum(engine.totals()["totalValue"] for engine in engines)
+    assert totals["totalValue"] == pytest.approx(expected_value, abs=0.01)
+
+
+def test_consolidate_without_workbooks_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        consolidate(str(tmp_path), str(tmp_path / "out.xlsx"))
@@ -0,0 +1,140 @@
+"""stocktake_engine against the browser's costing, from JS-generated fixtures.
+
+``tests/fixtures/costing_parity.json`` is written by
+``node tests/fixtures/generate_costing_fixtures.js``; regenerate it whenever
+``src/utils/costing.js`` or ``normalise.js`` changes.
+"""
+
+from __future__ import annotations
+
+import json
+from array import array
+from pathlib import Path
+
+import pytest
+
+from stocktake_engine.costing import (
+    DEFAULT_LAYER_POLICY,
+    CostLayerBook,
+    build_history_entry,
+    compute_cost_movement,
+    merge_cost_layers,
+    summarise_cost_impact,
+)
+from stocktake_engine.normalise import normalise_history_entry, normalise_inventory_item
+
+FIXTURES = json.loads(
+    (Path(__file__).parent / "fixtures" / "costing_parity.json").read_text(encoding="utf-8")
+)
+
+
+def assert_cents(actual, expected, path="result"):
+    """Same structure and strings, and every amount equal to the cent."""
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict), path
+        assert set(actual) == set(expected), path
+        for key, value in expected.items():
+            assert_cents(actual[key], value, f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(actual) == len(expected), path
+        for index, value in enumerate(expected):
+            assert_cents(actual[index], value, f"{path}[{index}]")
+    elif isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        assert round(actual * 100) == round(expected * 100), f"{path}: {actual} != {expected}"
+    else:
+        assert actual == expected, path
+
+
+def _ids(cases):
+    return [str(index) for index in range(len(cases))]
+
+
+@pytest.mark.parametrize("case", FIXTURES["movements"], ids=_ids(FIXTURES["movements"]))
+def test_compute_cost_movement(case):
+    given = case["input"]
+    result = compute_cost_movement(
+        layers=given["layers"],
+        sold=given["sold"],
+        received=given["received"],
+        unit_cost=given["unitCost"],
+        timestamp=given["timestamp"],
+        policy=given.get("policy", DEFAULT_LAYER_POLICY),
+    )
+    assert_cents(result, case["expected"])
+
+
+@pytest.mark.parametrize("case", FIXTURES["merges"], ids=_ids(FIXTURES["merges"]))
+def test_merge_cost_layers(case):
+    given = case["input"]
+    result = merge_cost_layers(given["layers"], given.get("policy", DEFAULT_LAYER_POLICY))
+    assert_cents(result, case["expected"])
+
+
+def test_default_policy_only_merges_identical_layers():
+    """Layers a cent apart or a day apart stay separate unless compaction is opted in to."""
+    layers = [
+        {"quantity": 10, "unitCost": 2.30, "acquiredAt": "2026-01-05T09:00:00.000Z"},
+        {"quantity": 10, "unitCost": 2.301, "acquiredAt": "2026-01-06T09:00:00.000Z"},
+        {"quantity": 5, "unitCost": 2.301, "acquiredAt": "2026-01-06T09:00:00.000Z"},
+    ]
+    assert DEFAULT_LAYER_POLICY == {"costStep": 0, "ageBucketDays": 0}
+    assert [layer["quantity"] for layer in merge_cost_layers(layers)] == [10, 15]
+    compacted = merge_cost_layers(layers, {"costStep": 0.01, "ageBucketDays": 7})
+    assert [layer["quantity"] for layer in compacted] == [25]
+
+
+@pytest.mark.parametrize("case", FIXTURES["impacts"], ids=_ids(FIXTURES["impacts"]))
+def test_summarise_cost_impact(case):
+    given = case["input"]
+    result = summarise_cost_impact(
+        given["item"], given["sold"], given["received"], given["timestamp"]
+    )
+    assert_cents(result, case["expected"])
+
+
+@pytest.mark.parametrize("case", FIXTURES["entries"], ids=_ids(FIXTURES["entries"]))
+def test_build_history_entry(case):
+    given = case["input"]
+    summary = given["costSummary"]
+    result = build_history_entry(
+        given["item"],
+        given["sold"],
+        given["received"],
+        summary["totalQuantity"],
+        given["timestamp"],
+        given["meta"],
+        summary,
+    )
+    assert_cents(result, case["expected"])
+
+
+def test_batch_apply_matches_single_movements():
+    """CostLayerBook.apply gives each item what compute_cost_movement would."""
+    cases = [case["input"] for case in FIXTURES["impacts"]]
+    book = CostLayerBook.from_layers(case["item"]["costLayers"] for case in cases)
+    timestamp = cases[0]["timestamp"]
+    movement = book.apply(
+        array("d", [case["sold"] for case in cases]),
+        array("d", [case["received"] for case in cases]),
+        array("d", [case["item"]["unitCost"] for case in cases]),
+        timestamp,
+    )
+    for index, case in enumerate(cases):
+        expected = compute_cost_movement(
+            layers=merge_cost_layers(case["item"]["costLayers"]),
+            sold=case["sold"],
+            received=case["received"],
+            unit_cost=case["item"]["unitCost"],
+            timestamp=timestamp,
+        )
+        assert_cents(movement.summary(index), expected, f"item {index}")
+
+
+@pytest.mark.parametrize("case", FIXTURES["inventory"], ids=_ids(FIXTURES["inventory"]))
+def test_normalise_inventory_item(case):
+    assert_cents(normalise_inventory_item(case["input"], FIXTURES["workbookMeta"]), case["expected"])
+
+
+@pytest.mark.parametrize("case", FIXTURES["history"], ids=_ids(FIXTURES["history"]))
+def test_normalise_history_entry(case):
+    assert_cents(normalise_history_entry(case["input"]), case["expected"])
@@ -0,0 +1,26 @@
+"""parse_number against the cases tests/js/numbers.test.js checks parseNumber with."""
+
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from stocktake_engine.numbers import parse_number
+
+CASES = json.loads(
+    (Path(__file__).parent / "fixtures" / "number_cases.json").read_text(encoding="utf-8")
+)
+
+
+@pytest.mark.parametrize(("value", "expected"), CASES, ids=[repr(value) for value, _ in CASES])
+def test_parse_number(value, expected):
+    assert parse_number(value, None) == expected
+
+
+@pytest.mark.parametrize("value", [math.nan, math.inf, -math.inf, "1e400", "n/a", None])
+def test_non_numbers_give_the_fallback(value):
+    assert parse_number(value) == 0.0
+    assert parse_number(value, 5.0) == 5.0
@@ -0,0 +1,67 @@
+"""Bulk item onboarding against the cases tests/js/bulkItems.test.js checks."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from stocktake_engine.engine import StocktakeEngine
+from stocktake_engine.normalise import normalise_inventory
+from stocktake_engine.onboarding import add_items, parse_bulk_item_text
+
+CASES = json.loads(
+    (Path(__file__).parent / "fixtures" / "bulk_item_cases.json").read_text(encoding="utf-8")
+)
+TIMESTAMP = "2026-02-01T09:00:00.000Z"
+
+
+def engine_with(existing, next_sku_number):
+    records = [
+        {"id": item_id, "sku": sku, "name": sku, "category": "Pantry", "currentCount": 1.0}
+        for item_id, sku in existing
+    ]
+    return StocktakeEngine(
+        normalise_inventory(records), metadata={"nextSkuNumber": next_sku_number}
+    )
+
+
+@pytest.mark.parametrize("case", CASES["text"], ids=[repr(case["text"]) for case in CASES["text"]])
+def test_parse_bulk_item_text(case):
+    assert parse_bulk_item_text(case["text"]) == case["rows"]
+
+
+@pytest.mark.parametrize(
+    "case", CASES["allocation"], ids=[case["name"] for case in CASES["allocation"]]
+)
+def test_add_items_allocates_skus(case):
+    engine = engine_with(case["existing"], case["nextSkuNumber"])
+    result = add_items(engine, case["rows"], timestamp=TIMESTAMP)
+    assert [item["sku"] for item in result.items] == case["skus"]
+    assert [item["id"] for item in result.items] == case["ids"]
+    assert [item["currentCount"] for item in result.items] == case["counts"]
+    assert [list(entry) for entry in result.skipped] == case["skipped"]
+    assert engine.metadata["nextSkuNumber"] == case["nextSkuNumberAfter"]
+
+
+def test_added_items_are_appended_with_their_opening_entries():
+    engine = engine_with([["old", "OLD-1"]], 1)
+    engine.history = [{"itemId": "old", "sku": "OLD-1", "timestamp": "2026-01-01T00:00:00.000Z"}]
+    result = add_items(
+        engine,
+        [{"name": "Jam", "currentCount": "4", "unitCost": "2.5"}, {"sku": "H-1", "name": "Honey"}],
+        performed_by=" Sam ",
+        timestamp=TIMESTAMP,
+    )
+    assert [item["sku"] for item in engine.iter_items(with_layers=False)] == [
+        "OLD-1",
+        "SKU-0001",
+        "H-1",
+    ]
+    assert [entry["sku"] for entry in engine.history] == ["SKU-0001", "H-1", "OLD-1"]
+    assert engine.history[0]["performedBy"] == "Sam"
+    jam = result.items[0]
+    assert jam["lastCount"] == jam["currentCount"] == 4
+    assert jam["costLayers"] == [{"quantity": 4, "unitCost": 2.5, "acquiredAt": TIMESTAMP}]
+    assert engine.metadata["lastStocktakeAt"] == TIMESTAMP
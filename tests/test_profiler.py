@@ -0,0 +1,115 @@
+"""Stage records, traces and profile comparison for the headless profiler."""
+
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from stocktake_engine.loadtest import synthetic_engine
+from stocktake_engine.profiler import (
+    NULL_PROFILER,
+    PROFILE_FORMAT,
+    Profiler,
+    compare_profiles,
+    load_profile,
+    summarise_profile,
+)
+from stocktake_engine.reader import load_workbook
+from stocktake_engine.writer import write_engine_workbook
+
+
+def trace(*stages):
+    records = [{"stage": name, "durationMs": ms, "rows": rows} for name, ms, rows in stages]
+    return {"stages": records}
+
+
+def test_stage_records_rows_set_inside_the_block():
+    profiler = Profiler()
+    with profiler.stage("normalise:inventory") as stage:
+        stage["rows"] = 12
+    (record,) = profiler.stages
+    assert record["stage"] == "normalise:inventory"
+    assert record["source"] == "python"
+    assert record["rows"] == 12
+    assert record["calls"] == 1
+    assert record["durationMs"] >= 0
+    assert record["heapDeltaBytes"] is None
+
+
+def test_stage_is_recorded_when_the_block_raises():
+    profiler = Profiler()
+    with pytest.raises(RuntimeError):
+        with profiler.stage("export"):
+            raise RuntimeError("disk full")
+    assert [record["stage"] for record in profiler.stages] == ["export"]
+
+
+def test_timer_adds_spans_into_one_record():
+    profiler = Profiler()
+    timer = profiler.timer("read-rows:inventory")
+    timer.add(0.002, 100)
+    timer.add(0.003, 50)
+    timer.end()
+    (record,) = profiler.stages
+    assert record["calls"] == 2
+    assert record["rows"] == 150
+    assert record["durationMs"] == pytest.approx(5.0)
+
+
+def test_unused_timer_and_disabled_profiler_record_nothing():
+    profiler = Profiler()
+    profiler.timer("never").end()
+    assert profiler.stages == []
+    with NULL_PROFILER.stage("export") as stage:
+        stage["rows"] = 3
+    NULL_PROFILER.timer("read-rows").add(1.0, 1)
+    assert NULL_PROFILER.stages == []
+
+
+def test_trace_round_trips_and_other_json_is_rejected(tmp_path):
+    profiler = Profiler()
+    with profiler.stage("export", rows=4):
+        pass
+    path = tmp_path / "trace.json"
+    profiler.write_json(str(path))
+    loaded = load_profile(str(path))
+    assert loaded["format"] == PROFILE_FORMAT
+    assert loaded["environment"]["runtime"] == "python"
+    assert loaded["stages"] == profiler.stages
+
+    other = tmp_path / "other.json"
+    other.write_text('{"stages": []}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_profile(str(other))
+
+
+def test_summary_totals_runs_rows_and_slowest():
+    stages = trace(("export", 10, 5), ("export", 30, None), ("import", 4, 2))["stages"]
+    summary = summarise_profile(stages)
+    assert summary["export"] == {"runs": 2, "totalMs": 40, "maxMs": 30, "rows": 5}
+    assert summary["import"]["runs"] == 1
+
+
+def test_compare_lists_the_worst_regression_first():
+    before = trace(("import", 100, 0), ("export", 50, 0), ("xlsx-read", 20, 0))
+    after = trace(("import", 90, 0), ("export", 100, 0), ("read-rows:history", 30, 0))
+    rows = compare_profiles(before, after)
+    assert [row["stage"] for row in rows[:2]] == ["export", "import"]
+    assert rows[0]["ratio"] == pytest.approx(2.0)
+    one_sided = {row["stage"]: row for row in rows[2:]}
+    assert one_sided["xlsx-read"]["afterMs"] is None
+    assert one_sided["read-rows:history"]["beforeMs"] is None
+    assert all(row["ratio"] is None for row in one_sided.values())
+
+
+def test_reader_and_writer_emit_their_stages():
+    profiler = Profiler()
+    buffer = io.BytesIO()
+    write_engine_workbook(buffer, synthetic_engine(25), profiler)
+    buffer.seek(0)
+    engine = load_workbook(buffer, profiler=profiler)
+    assert len(engine) == 25
+    stages = {record["stage"]: record for record in profiler.stages}
+    assert stages["export"]["rows"] == 25
+    assert stages["import"]["rows"] == 25
@@ -0,0 +1,114 @@
+"""Demand sums and reorder plans, with and without NumPy."""
+
+from __future__ import annotations
+
+import math
+import random
+from datetime import date
+
+import pytest
+
+from stocktake_engine import replenishment
+from stocktake_engine.engine import StocktakeEngine
+from stocktake_engine.loadtest import synthetic_engine
+from stocktake_engine.normalise import normalise_inventory
+from stocktake_engine.replenishment import (
+    DemandTracker,
+    compute_replenishment,
+    plan_replenishment,
+    reorder_suggestions,
+)
+
+DAY_MS = 24 * 60 * 60 * 1000
+NOW_MS = 20_500 * DAY_MS + 15 * 60 * 60 * 1000
+COLUMNS = ("daily_use", "deviation", "days_of_cover", "reorder_point", "order_up_to")
+
+
+def stamp(day, hour=10):
+    return f"{date.fromordinal(day + date(1970, 1, 1).toordinal())}T{hour:02d}:00:00Z"
+
+
+def movements(engine, count, seed, days=120, last_day=20_499):
+    """``count`` movements over ``days`` days, newest first, with some to be skipped."""
+    generator = random.Random(seed)
+    ids = engine.fields["id"]
+    entries = []
+    for _ in range(count):
+        day = last_day - generator.randint(0, days - 1)
+        entries.append(
+            {
+                "itemId": ids[generator.randrange(len(ids) // 2)],
+                "sold": generator.choice([0, 1, 2, 3, 5, 8, 13.5]),
+                "received": generator.choice([0, 0, 4]),
+                "timestamp": stamp(day, generator.randint(0, 23)),
+            }
+        )
+    entries.sort(key=lambda entry: entry["timestamp"], reverse=True)
+    return [*entries, {"itemId": ids[0], "sold": 3, "timestamp": "not a date"}]
+
+
+def figures(engine, plan):
+    columns = {name: [float(value) for value in getattr(plan, name)] for name in COLUMNS}
+    totals = (plan.days, plan.reorder_count, plan.units_to_order, plan.value_to_order)
+    return columns, totals, reorder_suggestions(engine, plan, limit=10)
+
+
+@pytest.fixture
+def engine():
+    engine = synthetic_engine(300, seed=3)
+    engine.history = movements(engine, 4_000, seed=5)
+    return engine
+
+
+def test_an_item_selling_on_two_days():
+    engine = StocktakeEngine(
+        normalise_inventory([{"id": "a", "sku": "A", "name": "A", "currentCount": 10.0}])
+    )
+    engine.history = [
+        {"itemId": "a", "sold": 4, "timestamp": stamp(20_500)},
+        {"itemId": "a", "sold": 2, "timestamp": stamp(20_498, 9)},
+    ]
+    plan = compute_replenishment(engine, NOW_MS)
+    spread = math.sqrt((4 + 16) / 3 - 4)
+    assert plan.days == 3
+    assert plan.daily_use[0] == pytest.approx(2)
+    assert plan.deviation[0] == pytest.approx(spread)
+    assert plan.days_of_cover[0] == pytest.approx(5)
+    assert plan.reorder_point[0] == pytest.approx(14 + 1.65 * spread * math.sqrt(7))
+    assert plan.suggested_order[0] == math.ceil(28 + 1.65 * spread * math.sqrt(14) - 10)
+
+
+def test_numpy_and_loops_give_the_same_figures(engine, monkeypatch):
+    pytest.importorskip("numpy")
+    vectorised = figures(engine, compute_replenishment(engine, NOW_MS))
+    monkeypatch.setattr(replenishment, "np", None)
+    looped = figures(engine, compute_replenishment(engine, NOW_MS))
+    assert vectorised[0] == {name: pytest.approx(values) for name, values in looped[0].items()}
+    assert vectorised[1] == pytest.approx(looped[1])
+    assert [row["id"] for row in vectorised[2]] == [row["id"] for row in looped[2]]
+
+
+@pytest.mark.parametrize("vectorised", [True, False], ids=["numpy", "loops"])
+def test_commits_extend_the_sums_in_place(engine, monkeypatch, vectorised):
+    if vectorised:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(replenishment, "np", None)
+    tracker = DemandTracker()
+    assert tracker.update(engine, NOW_MS) == len(engine.history)
+    later = movements(engine, 50, seed=9, days=1, last_day=20_500)[:-1]
+    engine.history[:0] = later
+    assert tracker.update(engine, NOW_MS) == len(later)
+    fresh = compute_replenishment(engine, NOW_MS)
+    extended = plan_replenishment(engine, tracker)
+    for name in COLUMNS:
+        assert list(map(float, getattr(extended, name))) == pytest.approx(
+            list(map(float, getattr(fresh, name)))
+        )
+
+
+def test_a_new_day_sums_the_window_again(engine):
+    tracker = DemandTracker()
+    tracker.update(engine, NOW_MS)
+    assert tracker.update(engine, NOW_MS + DAY_MS) == len(engine.history)
+    assert tracker.start_day == 20_500 - replenishment.REPLENISHMENT_LOOKBACK_DAYS + 2
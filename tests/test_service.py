@@ -0,0 +1,200 @@
+"""The HTTP service, driven over real sockets: reads, drafts, batched commits and exports."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import zipfile
+
+from stocktake_engine.loadtest import synthetic_engine
+from stocktake_engine.reader import load_workbook
+from stocktake_engine.service import StocktakeService
+
+
+class Client:
+    """One request per connection, enough to check status, headers and body."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def request(self, method, path, payload=None, body=None, headers=()):
+        if body is None:
+            body = b"" if payload is None else json.dumps(payload).encode()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", "Connection: close"]
+        head += [f"Content-Length: {len(body)}", *headers]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        status_head, _, content = response.partition(b"\r\n\r\n")
+        status_line, *header_lines = status_head.decode("latin-1").split("\r\n")
+        received = dict(line.split(": ", 1) for line in header_lines)
+        return int(status_line.split(" ")[1]), received, content
+
+    async def json(self, method, path, payload=None, **options):
+        status, _, content = await self.request(method, path, payload, **options)
+        return status, json.loads(content)
+
+
+def run(scenario, engine=None, batch_window=0.005):
+    engine = engine or synthetic_engine(20, seed=11)
+
+    async def main():
+        service = StocktakeService(engine, batch_window=batch_window, export_workers=1)
+        host, port = await service.start(port=0)
+        try:
+            await scenario(Client(host, port), service)
+        finally:
+            await service.close()
+
+    asyncio.run(main())
+    return engine
+
+
+def movements_by_sku(engine, count):
+    return {entry["sku"]: entry for entry in engine.history[:count]}
+
+
+def test_reads_items_by_page_and_by_sku_ignoring_case():
+    async def scenario(client, service):
+        status, page = await client.json("GET", "/items?offset=15&limit=10")
+        assert status == 200
+        assert (page["total"], page["offset"], len(page["items"])) == (20, 15, 5)
+        assert "costLayers" not in page["items"][0]
+        status, item = await client.json("GET", "/items?sku=%20sku-0003")
+        assert (status, item["sku"]) == (200, "SKU-0003")
+        status, error = await client.json("GET", "/items?sku=SKU-9999")
+        assert status == 404 and "SKU-9999" in error["error"]
+        status, health = await client.json("GET", "/health")
+        assert (health["status"], health["items"]) == ("ok", 20)
+
+    run(scenario)
+
+
+def test_requests_that_are_refused():
+    async def scenario(client, service):
+        cases = [
+            ("GET", "/items?limit=lots", None, 400),
+            ("GET", "/reorder?limit=x", None, 400),
+            ("GET", "/nowhere", None, 404),
+            ("DELETE", "/drafts", None, 405),
+            ("POST", "/drafts", {"lines": []}, 400),
+            ("POST", "/drafts", {"sessionId": "a", "lines": [["x", "y"]]}, 400),
+            ("POST", "/commit", {"lines": []}, 400),
+            ("POST", "/commit", {"performedBy": "Sam"}, 400),
+            ("POST", "/commit", {"performedBy": "Sam", "sessionId": "gone"}, 404),
+            ("POST", "/commit", [1, 2], 400),
+        ]
+        for method, path, payload, expected in cases:
+            status, body = await client.json(method, path, payload)
+            assert status == expected, (method, path, payload, body)
+            assert body["error"]
+        status, body = await client.json("POST", "/commit", body=b"{not json")
+        assert status == 400
+        status, _, _ = await client.request(
+            "POST", "/commit", body=b"", headers=["Content-Length: 999999999999"]
+        )
+        assert status == 413
+        # The service keeps serving after every refusal.
+        assert (await client.json("GET", "/health"))[0] == 200
+
+    engine = run(scenario)
+    assert engine.history == []
+
+
+def test_staged_drafts_keep_the_newest_revision_and_credit_their_operators():
+    async def scenario(client, service):
+        ids = service.engine.fields["id"]
+        drafts = [
+            {"sessionId": "a", "operator": "Alice", "revision": 2, "lines": [[ids[0], "", 2, 0]]},
+            {"sessionId": "a", "operator": "Alice", "revision": 1, "lines": [[ids[0], "", 9, 0]]},
+            {"sessionId": "b", "operator": "Bob", "revision": 1, "lines": [[ids[0], "", 1, 0]]},
+        ]
+        replies = [(await client.json("POST", "/drafts", draft))[1] for draft in drafts]
+        assert [reply["accepted"] for reply in replies] == [True, False, True]
+        status, staged = await client.json("GET", "/drafts")
+        assert sorted((row["sessionId"], row["revision"]) for row in staged) == [
+            ("a", 2),
+            ("b", 1),
+        ]
+        status, result = await client.json("POST", "/commit", {"performedBy": "Sue"})
+        assert (status, result["sessions"], result["batch"]["movements"]) == (200, 2, 1)
+        assert (await client.json("GET", "/drafts"))[1] == []
+
+    engine = run(scenario)
+    entry = engine.history[0]
+    assert (entry["sold"], entry["performedBy"], entry["countedBy"]) == (3, "Sue", "Alice, Bob")
+
+
+def test_commits_in_one_window_are_batched_per_operator():
+    async def scenario(client, service):
+        def commit(operator, sku, sold):
+            return client.json(
+                "POST", "/commit", {"performedBy": operator, "lines": [["", sku, sold, 0]]}
+            )
+
+        results = await asyncio.gather(
+            commit("Alice", "SKU-0001", 2),
+            commit("Bob", "SKU-0002", 3),
+            commit("Alice", "SKU-0003", 1),
+            commit("Alice", "SKU-0404", 1),
+        )
+        assert [status for status, _ in results] == [200] * 4
+        batches = [result["batch"] for _, result in results]
+        assert [batch["requests"] for batch in batches] == [3, 1, 3, 3]
+        assert results[3][1]["unmatched"] == [["", "SKU-0404", 1, 0]]
+        status, health = await client.json("GET", "/health")
+        assert (health["commit_requests"], health["commits"]) == (4, 2)
+
+    engine = run(scenario, batch_window=0.2)
+    committed = movements_by_sku(engine, 3)
+    assert {sku: entry["performedBy"] for sku, entry in committed.items()} == {
+        "SKU-0001": "Alice",
+        "SKU-0002": "Bob",
+        "SKU-0003": "Alice",
+    }
+    assert {sku: entry["countedBy"] for sku, entry in committed.items()} == {
+        "SKU-0001": "Alice",
+        "SKU-0002": "Bob",
+        "SKU-0003": "Alice",
+    }
+
+
+def test_valuation_follows_commits():
+    async def scenario(client, service):
+        before = (await client.json("GET", "/valuation"))[1]
+        line = [service.engine.fields["id"][0], "", 5, 0]
+        await client.json("POST", "/commit", {"performedBy": "Sam", "lines": [line]})
+        after = (await client.json("GET", "/valuation"))[1]
+        assert after["totalCurrent"] == before["totalCurrent"] - 5
+        assert after["totalValue"] < before["totalValue"]
+        assert after["lastStocktakeAt"]
+
+    run(scenario)
+
+
+def test_export_is_a_workbook_named_after_the_source(tmp_path):
+    engine = synthetic_engine(20, seed=11)
+    engine.metadata["sourceFileName"] = 'Café "North".xlsx'
+
+    async def scenario(client, service):
+        line = [engine.fields["id"][1], "", 0, 4]
+        await client.json("POST", "/commit", {"performedBy": "Sam", "lines": [line]})
+        status, headers, body = await client.request("GET", "/export")
+        assert status == 200
+        assert headers["Content-Disposition"] == (
+            "attachment; filename=\"Caf_ _North_-updated.xlsx\"; "
+            "filename*=UTF-8''Caf%C3%A9%20%22North%22-updated.xlsx"
+        )
+        assert "xl/workbook.xml" in zipfile.ZipFile(io.BytesIO(body)).namelist()
+        path = tmp_path / "export.xlsx"
+        path.write_bytes(body)
+        exported = load_workbook(str(path))
+        assert exported.totals()["totalCurrent"] == service.engine.totals()["totalCurrent"]
+        assert exported.history[0]["performedBy"] == "Sam"
+
+    run(scenario, engine)
@@ -0,0 +1,176 @@
+"""Merging multi-operator change sets and applying a drop directory."""
+
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from stocktake_engine.engine import StocktakeEngine
+from stocktake_engine.normalise import normalise_inventory
+from stocktake_engine.reader import load_workbook
+from stocktake_engine.sessions import (
+    APPLIED_DIRECTORY,
+    CHANGE_SET_FORMAT,
+    ChangeSetError,
+    apply_change_sets,
+    apply_drop_directory,
+    change_set_from_drafts,
+    merge_change_sets,
+    newest_revisions,
+    read_change_set,
+    read_change_set_line,
+    write_change_set,
+)
+from stocktake_engine.writer import write_engine_workbook
+
+
+@pytest.fixture
+def engine():
+    records = [
+        {
+            "id": f"id-{letter}",
+            "sku": f"SKU-{letter}",
+            "name": f"Item {letter}",
+            "category": "Pantry",
+            "currentCount": 10.0,
+            "unitCost": 1.0,
+        }
+        for letter in "ABC"
+    ]
+    return StocktakeEngine(normalise_inventory(records))
+
+
+def change_set(session_id, lines, operator="", revision=0):
+    return {
+        "format": CHANGE_SET_FORMAT,
+        "version": 1,
+        "sessionId": session_id,
+        "operator": operator,
+        "revision": revision,
+        "lines": lines,
+    }
+
+
+def test_lines_are_read_as_numbers_never_negative():
+    assert read_change_set_line(["id-A", "SKU-A", "2", "1,200"]) == ("id-A", "SKU-A", 2.0, 1200.0)
+    assert read_change_set_line(["", "SKU-A", -4, {"count": 3}]) == (None, "SKU-A", 0.0, 0.0)
+    assert read_change_set_line(["id-A", "SKU-A", True, [5]]) == ("id-A", "SKU-A", 0.0, 0.0)
+    for line in (None, "id-A", ["id-A", "SKU-A", 1], [7, None, 1, 1], [{}, [], 1, 1]):
+        assert read_change_set_line(line) is None, line
+
+
+def test_merge_sums_text_and_numbers_and_keeps_operators(engine):
+    merged = merge_change_sets(
+        [
+            change_set("s1", [["id-A", "SKU-A", "2", "0"]], operator="Avery"),
+            change_set("s2", [["id-A", "SKU-A", 3, "1"]], operator="Sam"),
+        ],
+        engine,
+    )
+    assert merged.drafts == {"id-A": (5.0, 1.0)}
+    assert merged.operators == {"id-A": ["Avery", "Sam"]}
+    assert (merged.lines, merged.sessions) == (2, 2)
+
+
+def test_bad_lines_are_reported_not_raised(engine):
+    lines = [
+        ["tab-2-id", "SKU-B", 4, 0],
+        ["nope", "SKU-Z", 1, 0],
+        ["id-C", "SKU-C", -3, "abc"],
+        "not a line",
+        [None, None, 1, 1],
+        ["id-A", "SKU-A", "1", "0", "extra"],
+    ]
+    merged = merge_change_sets([change_set("s1", lines)], engine)
+    assert merged.drafts == {"id-B": (4.0, 0.0), "id-A": (1.0, 0.0)}
+    assert [(entry["reason"], entry["line"]) for entry in merged.unmatched] == [
+        ("unknown-item", lines[1]),
+        ("invalid", lines[3]),
+        ("invalid", lines[4]),
+    ]
+    assert merged.lines == 6
+
+
+def test_sets_without_a_session_id_are_merged_not_dropped(engine):
+    anonymous = [
+        {"format": CHANGE_SET_FORMAT, "lines": [["id-A", "SKU-A", 1, 0]]},
+        {"format": CHANGE_SET_FORMAT, "lines": [["id-A", "SKU-A", 2, 0], "bad"]},
+    ]
+    merged = merge_change_sets(newest_revisions(anonymous), engine)
+    assert merged.drafts == {"id-A": (3.0, 0.0)}
+    assert merged.unmatched[0]["sessionId"] is None
+
+
+def test_only_the_newest_revision_of_a_session_counts(engine):
+    sets = [
+        change_set("s1", [["id-A", "SKU-A", 5, 0]], revision=2),
+        change_set("s1", [["id-A", "SKU-A", 1, 0]], revision=1),
+        change_set("s2", [["id-B", "SKU-B", 2, 0]]),
+    ]
+    merged = merge_change_sets(newest_revisions(sets), engine)
+    assert merged.drafts == {"id-A": (5.0, 0.0), "id-B": (2.0, 0.0)}
+
+
+def test_committer_is_performed_by_and_counters_are_counted_by(engine):
+    entries, _ = apply_change_sets(
+        engine,
+        [
+            change_set("s1", [["id-A", "SKU-A", 2, 0]], operator="Sam"),
+            change_set("s2", [["id-A", "SKU-A", 1, 0], ["id-B", "SKU-B", 0, 3]]),
+        ],
+        "Avery",
+    )
+    by_item = {entry["itemId"]: entry for entry in entries}
+    assert {entry["performedBy"] for entry in entries} == {"Avery"}
+    assert by_item["id-A"]["countedBy"] == "Sam"
+    assert by_item["id-A"]["sold"] == 3
+    assert "countedBy" not in by_item["id-B"]
+
+    buffer = io.BytesIO()
+    write_engine_workbook(buffer, engine)
+    buffer.seek(0)
+    history = {entry["sku"]: entry for entry in load_workbook(buffer).history}
+    assert history["SKU-A"]["performedBy"] == "Avery"
+    assert history["SKU-A"]["countedBy"] == "Sam"
+    assert history["SKU-B"]["countedBy"] == ""
+
+
+def test_read_change_set_rejects_other_files(tmp_path):
+    cases = {
+        "other.json": {"format": "other", "sessionId": "s", "lines": []},
+        "no-session.json": {"format": CHANGE_SET_FORMAT, "lines": []},
+        "newer.json": {**change_set("s", []), "version": 2},
+        "list.json": [],
+    }
+    for name, content in cases.items():
+        path = tmp_path / name
+        path.write_text(json.dumps(content), encoding="utf-8")
+        with pytest.raises(ChangeSetError):
+            read_change_set(str(path))
+
+
+def test_drop_directory_applies_once_and_moves_files(engine, tmp_path):
+    write_change_set(
+        str(tmp_path / "avery.json"),
+        change_set_from_drafts(engine, {"id-A": (2, 0)}, "s1", operator="Avery"),
+    )
+    write_change_set(
+        str(tmp_path / "sam.json"),
+        change_set_from_drafts(engine, {"id-A": (1, 0), "id-C": (0, 4)}, "s2", operator="Sam"),
+    )
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    entries, merged, paths = apply_drop_directory(engine, str(tmp_path), "Lee")
+    assert len(paths) == 2 and merged.sessions == 2
+    assert engine.current_counts[engine.index["id-A"]] == 7
+    assert engine.current_counts[engine.index["id-C"]] == 14
+    assert {entry["countedBy"] for entry in entries} == {"Avery, Sam", "Sam"}
+    assert sorted(path.name for path in (tmp_path / APPLIED_DIRECTORY).iterdir()) == [
+        "avery.json",
+        "sam.json",
+    ]
+
+    entries, _, paths = apply_drop_directory(engine, str(tmp_path), "Lee")
+    assert (entries, paths) == ([], [])
@@ -0,0 +1,101 @@
+"""SQLite persistence: full saves, incremental commits and reopening the file."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from stocktake_engine.loadtest import synthetic_engine
+from stocktake_engine.store import StocktakeStore
+
+# Records every write to the tables, so a test can check which rows a commit touched.
+AUDIT = """
+CREATE TEMP TABLE writes (kind TEXT, id TEXT);
+CREATE TEMP TRIGGER item_inserted AFTER INSERT ON items
+BEGIN INSERT INTO writes VALUES ('item', NEW.id); END;
+CREATE TEMP TRIGGER item_updated AFTER UPDATE ON items
+BEGIN INSERT INTO writes VALUES ('item', NEW.id); END;
+CREATE TEMP TRIGGER item_deleted AFTER DELETE ON items
+BEGIN INSERT INTO writes VALUES ('item deleted', OLD.id); END;
+CREATE TEMP TRIGGER movement_inserted AFTER INSERT ON movements
+BEGIN INSERT INTO writes VALUES ('movement', NEW.item_id); END;
+CREATE TEMP TRIGGER movement_updated AFTER UPDATE ON movements
+BEGIN INSERT INTO writes VALUES ('movement rewritten', OLD.item_id); END;
+CREATE TEMP TRIGGER movement_deleted AFTER DELETE ON movements
+BEGIN INSERT INTO writes VALUES ('movement deleted', OLD.item_id); END;
+"""
+
+
+def writes(store):
+    return sorted(store.connection.execute("SELECT kind, id FROM writes"))
+
+
+def snapshot(engine):
+    return list(engine.iter_items()), engine.history, engine.metadata
+
+
+@pytest.fixture
+def engine():
+    engine = synthetic_engine(25, seed=4)
+    ids = engine.fields["id"]
+    drafts = {ids[0]: (3, 0), ids[1]: (0, 12)}
+    engine.apply_stocktake(drafts, "Sam", timestamp="2026-01-02T09:00:00.000Z")
+    engine.apply_stocktake({ids[0]: (1, 5)}, "Alex", timestamp="2026-01-03T09:00:00.000Z")
+    engine.metadata["sourceFileName"] = "store-4.xlsx"
+    return engine
+
+
+def test_an_empty_database_loads_nothing(tmp_path):
+    with StocktakeStore(str(tmp_path / "store.db")) as store:
+        assert store.load_engine() is None
+
+
+def test_save_and_load_round_trip(tmp_path, engine):
+    with StocktakeStore(str(tmp_path / "store.db")) as store:
+        store.save_engine(engine)
+        loaded = store.load_engine()
+    assert snapshot(loaded) == snapshot(engine)
+    assert [entry["performedBy"] for entry in loaded.history[:2]] == ["Alex", "Sam"]
+    assert loaded.item(0)["costLayers"] == engine.item(0)["costLayers"]
+    assert len(loaded.item(1)["costLayers"]) == 2
+
+
+def test_a_commit_rewrites_only_touched_items_and_appends_history(tmp_path, engine):
+    ids = engine.fields["id"]
+    with StocktakeStore(str(tmp_path / "store.db")) as store:
+        store.save_engine(engine)
+        store.connection.executescript(AUDIT)
+        # Item 0 was counted in the last commit, so its last count is rolled forward too.
+        entries = store.apply_stocktake(
+            engine, {ids[5]: (2, 0)}, "Sam", timestamp="2026-01-04T09:00:00.000Z"
+        )
+        assert [entry["itemId"] for entry in entries] == [ids[5]]
+        assert writes(store) == sorted([("item", ids[0]), ("item", ids[5]), ("movement", ids[5])])
+        assert snapshot(store.load_engine()) == snapshot(engine)
+
+        store.connection.execute("DELETE FROM writes")
+        assert store.apply_stocktake(engine, {}, "Sam") == []
+        assert writes(store) == [("item", ids[5])]
+
+
+def test_reopening_the_wal_database(tmp_path, engine):
+    path = str(tmp_path / "store.db")
+    store = StocktakeStore(path)
+    store.save_engine(engine)
+    # A second connection reads the committed state while the first is still open.
+    with StocktakeStore(path) as reader:
+        assert snapshot(reader.load_engine()) == snapshot(engine)
+    store.apply_stocktake(
+        engine, {engine.fields["id"][2]: (4, 0)}, "Sam", timestamp="2026-01-05T09:00:00.000Z"
+    )
+    store.close()
+
+    with StocktakeStore(path) as reopened:
+        mode = reopened.connection.execute("PRAGMA journal_mode").fetchone()[0]
+        loaded = reopened.load_engine()
+    assert mode == "wal"
+    assert snapshot(loaded) == snapshot(engine)
+    assert loaded.history[0]["timestamp"] == "2026-01-05T09:00:00.000Z"
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM movements").fetchone()[0] == 4
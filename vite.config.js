@@ -10,4 +10,12 @@ export default defineConfig({
     react(),
     tailwindcss(),
   ],
+  build: {
+    // Lets benchmarks/startup.bench.js work out which chunks each route loads
+    manifest: true,
+  },
+  worker: {
+    // The workbook worker loads excel.js on demand, which needs code splitting
+    format: 'es',
+  },
 })